@@ -3,88 +3,109 @@ Azure DevOps API adapter
 """
 import os
 import structlog
-from typing import List
-from azure.devops.connection import Connection
-from msrest.authentication import BasicAuthentication
+from typing import AsyncIterator, List, Optional
 
 from models import UnifiedPRData
 from .base_adapter import BasePlatformAdapter
+from .diff_stream import DiffFilter, FilePatch
+from .http_client import PlatformHttpClient
+from .pr_context import PRContext
 
 logger = structlog.get_logger()
 
 
 class AzureAdapter(BasePlatformAdapter):
-    """Azure DevOps API client"""
+    """Azure DevOps REST API client"""
     
-    def __init__(self):
+    API_VERSION = "7.1"
+    
+    def __init__(
+        self,
+        http: Optional[PlatformHttpClient] = None,
+        api_url: Optional[str] = None,
+        diff_filter: Optional[DiffFilter] = None
+    ):
         pat = os.getenv("AZURE_DEVOPS_PAT")
         org_url = os.getenv("AZURE_DEVOPS_ORG")
         
         if not pat or not org_url:
             raise ValueError("AZURE_DEVOPS_PAT and AZURE_DEVOPS_ORG required")
         
-        credentials = BasicAuthentication('', pat)
-        self.connection = Connection(base_url=org_url, creds=credentials)
-        self.git_client = self.connection.clients.get_git_client()
+        self.http = http or PlatformHttpClient()
+        self.diff_filter = diff_filter or DiffFilter()
+        # AZURE_DEVOPS_ORG is the organisation URL (https://dev.azure.com/<org>)
+        self.org_url = org_url.rstrip("/")
+        self.auth = ('', pat)
+        self.params = {"api-version": self.API_VERSION}
         
         logger.info("azure_adapter_initialized")
     
-    async def fetch_diff(self, pr_data: UnifiedPRData) -> str:
-        """Fetch PR diff from Azure DevOps"""
-        try:
-            project_id = pr_data.metadata['project_id']
-            repo_id = pr_data.metadata['repository_id']
-            pr_id = int(pr_data.pr_id)
-            
-            # Get PR iterations (commits)
-            iterations = self.git_client.get_pull_request_iterations(
-                repository_id=repo_id,
-                pull_request_id=pr_id,
-                project=project_id
-            )
-            
-            if not iterations:
-                return ""
-            
-            # Get changes from latest iteration
-            changes = self.git_client.get_pull_request_iteration_changes(
-                repository_id=repo_id,
-                pull_request_id=pr_id,
-                iteration_id=iterations[-1].id,
-                project=project_id
-            )
-            
-            # Build diff from changes
-            diff_parts = []
-            for change in changes.change_entries:
-                if hasattr(change, 'item') and change.item:
-                    diff_parts.append(f"--- a/{change.item.path}")
-                    diff_parts.append(f"+++ b/{change.item.path}")
-            
-            return "\n".join(diff_parts)
-            
-        except Exception as e:
-            logger.exception("azure_fetch_diff_failed", error=str(e))
-            return ""
+    def _pr_url(self, pr_data: UnifiedPRData) -> str:
+        project_id = pr_data.metadata['project_id']
+        repo_id = pr_data.metadata['repository_id']
+        return (
+            f"{self.org_url}/{project_id}/_apis/git/repositories/{repo_id}"
+            f"/pullRequests/{int(pr_data.pr_id)}"
+        )
+    
+    async def _create_thread(self, ctx: PRContext, thread: dict) -> None:
+        response = await self._request(
+            ctx,
+            "pullRequests.threads",
+            "POST",
+            f"{self._pr_url(ctx.pr_data)}/threads",
+            params=self.params,
+            auth=self.auth,
+            json=thread
+        )
+        response.raise_for_status()
     
-    async def post_summary_comment(self, pr_data: UnifiedPRData, comment: str) -> bool:
+    async def iter_file_patches(self, pr_data: UnifiedPRData, ctx: PRContext) -> AsyncIterator[FilePatch]:
+        """List the changed files of the latest PR iteration (Azure returns no patches)"""
+        pr_url = self._pr_url(pr_data)
+        
+        # Get PR iterations (commits)
+        response = await self._request(
+            ctx, "pullRequests.iterations", "GET", f"{pr_url}/iterations", params=self.params, auth=self.auth
+        )
+        response.raise_for_status()
+        iterations = response.json().get("value") or []
+        
+        if not iterations:
+            return
+        
+        # Get changes from latest iteration
+        response = await self._request(
+            ctx,
+            "pullRequests.iterations.changes",
+            "GET",
+            f"{pr_url}/iterations/{iterations[-1]['id']}/changes",
+            params=self.params,
+            auth=self.auth
+        )
+        response.raise_for_status()
+        
+        for change in response.json().get("changeEntries") or []:
+            item = change.get("item")
+            if item and item.get("path"):
+                path = item["path"].lstrip("/")
+                yield FilePatch(path=path, skip_reason=self.diff_filter.skip_reason(path))
+    
+    async def post_summary_comment(
+        self,
+        pr_data: UnifiedPRData,
+        comment: str,
+        ctx: Optional[PRContext] = None
+    ) -> bool:
         """Post comment on Azure DevOps PR"""
+        ctx = ctx or self.context(pr_data)
         try:
-            project_id = pr_data.metadata['project_id']
-            repo_id = pr_data.metadata['repository_id']
-            pr_id = int(pr_data.pr_id)
-            
             thread = {
-                'comments': [{'content': comment}],
+                'comments': [{'content': comment, 'commentType': 1}],
                 'status': 1  # Active
             }
             
-            self.git_client.create_thread(
-                comment_thread=thread,
-                repository_id=repo_id,
-                pull_request_id=pr_id,
-                project=project_id
-            )
+            await self._create_thread(ctx, thread)
             
             logger.info("azure_comment_posted", pr_id=pr_data.pr_id)
             return True
@@ -96,40 +117,39 @@ class AzureAdapter(BasePlatformAdapter):
     async def post_inline_comments(
         self,
         pr_data: UnifiedPRData,
-        comments: List[dict]
+        comments: List[dict],
+        ctx: Optional[PRContext] = None
     ) -> bool:
-        """Post inline comments on Azure DevOps PR"""
+        """Post inline comments on Azure DevOps PR (bounded concurrency)"""
+        if not comments:
+            return True
+        ctx = ctx or self.context(pr_data)
         try:
-            project_id = pr_data.metadata['project_id']
-            repo_id = pr_data.metadata['repository_id']
-            pr_id = int(pr_data.pr_id)
-            
-            for comment_data in comments:
+            async def post_one(comment_data: dict) -> None:
+                file_path = comment_data['file_path']
                 thread = {
-                    'comments': [{'content': comment_data['body']}],
+                    'comments': [{'content': comment_data['body'], 'commentType': 1}],
                     'status': 1,
-                    'thread_context': {
-                        'file_path': comment_data['file_path'],
-                        'right_file_start': {
+                    'threadContext': {
+                        'filePath': file_path if file_path.startswith('/') else f"/{file_path}",
+                        'rightFileStart': {
                             'line': comment_data['line'],
                             'offset': 1
                         },
-                        'right_file_end': {
+                        'rightFileEnd': {
                             'line': comment_data['line'],
                             'offset': 1
                         }
                     }
                 }
                 
-                self.git_client.create_thread(
-                    comment_thread=thread,
-                    repository_id=repo_id,
-                    pull_request_id=pr_id,
-                    project=project_id
-                )
+                await self._create_thread(ctx, thread)
             
-            logger.info("azure_inline_comments_posted", count=len(comments))
-            return True
+            errors = await self._post_bounded(comments, post_one)
+            for error in errors:
+                logger.warning("azure_inline_comment_failed", error=str(error))
+            logger.info("azure_inline_comments_posted", count=len(comments) - len(errors))
+            return not errors
             
         except Exception as e:
             logger.exception("azure_post_inline_failed", error=str(e))
@@ -139,9 +159,11 @@ class AzureAdapter(BasePlatformAdapter):
         self,
         pr_data: UnifiedPRData,
         state: str,
-        description: str
+        description: str,
+        ctx: Optional[PRContext] = None
     ) -> bool:
         """Update Azure DevOps PR status"""
+        ctx = ctx or self.context(pr_data)
         try:
             # Azure DevOps uses pull request statuses differently
             # This would typically update the PR vote/status
@@ -1,35 +1,185 @@
 """
 Base adapter interface for platform integrations
 """
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional
+
+import httpx
+import structlog
+
 from models import UnifiedPRData
+from .diff_stream import DiffFetchStats, DiffFilter, FilePatch
+from .pr_context import PRContext
+
+logger = structlog.get_logger()
+
+
+class InterdiffUnavailable(Exception):
+    """The platform cannot diff the pushed commits (no compare API, force push)"""
 
 
 class BasePlatformAdapter(ABC):
-    """Abstract base class for platform adapters"""
+    """
+    Abstract base class for platform adapters
+    
+    Subclasses set ``self.http`` to the shared PlatformHttpClient and
+    ``self.diff_filter`` to the DiffFilter applied while fetching diffs.
+    Every method takes an optional per-run ``ctx``; when omitted a fresh
+    context is created for that call alone.
+    """
+    
+    # Max concurrent requests when a platform has no batch endpoint for inline comments
+    inline_concurrency = 4
+    
+    def context(self, pr_data: UnifiedPRData) -> PRContext:
+        """Create the per-run context passed to the methods below"""
+        return PRContext.for_pr(pr_data)
+    
+    def log_api_calls(self, ctx: PRContext, **fields: Any) -> None:
+        """Log how many platform API calls one run made"""
+        logger.info("platform_api_calls", **ctx.summary(), **fields)
+    
+    async def _request(self, ctx: PRContext, endpoint: str, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send one platform API request through the shared pool, counted on ``ctx``"""
+        ctx.record(endpoint)
+        return await self.http.request(method, url, **kwargs)
+    
+    def _iter_pages(self, ctx: PRContext, endpoint: str, url: str, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream the items of a paginated list endpoint, counting each page on ``ctx``"""
+        return self.http.iter_paginated(url, on_page=lambda: ctx.record(endpoint), **kwargs)
+    
+    async def _post_bounded(
+        self,
+        items: List[dict],
+        post_one: Callable[[dict], Awaitable[None]]
+    ) -> List[BaseException]:
+        """
+        Post ``items`` with at most ``inline_concurrency`` requests in flight.
+        
+        Every item is attempted even if some fail; returns the errors raised.
+        """
+        limit = asyncio.Semaphore(max(1, self.inline_concurrency))
+        
+        async def run(item: dict) -> None:
+            async with limit:
+                await post_one(item)
+        
+        results = await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+        return [r for r in results if isinstance(r, Exception)]
     
     @abstractmethod
-    async def fetch_diff(self, pr_data: UnifiedPRData) -> str:
+    def iter_file_patches(self, pr_data: UnifiedPRData, ctx: PRContext) -> AsyncIterator[FilePatch]:
+        """
+        Stream the PR's changed files one patch at a time
+        
+        Implementations should consult ``self.diff_filter.skip_reason(path)``
+        where the platform lets them avoid downloading a file's body.
+        
+        Args:
+            pr_data: Unified PR data
+            ctx: Per-run context (cached lookups, API-call counts)
         """
-        Fetch the actual diff content for a PR
+    
+    async def fetch_diff(self, pr_data: UnifiedPRData, ctx: Optional[PRContext] = None) -> str:
+        """
+        Fetch the filtered diff for a PR
         
         Args:
             pr_data: Unified PR data
+            ctx: Per-run context (cached lookups, API-call counts)
             
         Returns:
-            Diff text in unified format
+            Diff text in unified format ("" on failure); filter statistics
+            are left on ``ctx.diff_stats``
         """
-        pass
+        ctx = ctx or self.context(pr_data)
+        stats = ctx.diff_stats = DiffFetchStats()
+        try:
+            parts = [
+                fp.render()
+                async for fp in self.diff_filter.apply(self.iter_file_patches(pr_data, ctx), stats)
+            ]
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            logger.exception("platform_fetch_diff_failed", platform=pr_data.platform.value, error=str(e))
+            return ""
+        logger.info("platform_diff_fetched", platform=pr_data.platform.value, **stats.summary())
+        return "\n".join(parts)
+    
+    async def head_sha(self, pr_data: UnifiedPRData, ctx: Optional[PRContext] = None) -> Optional[str]:
+        """Head commit of the PR, if known (webhook payload or an earlier lookup)"""
+        ctx = ctx or self.context(pr_data)
+        return ctx.head_sha
+    
+    def iter_compare_patches(
+        self,
+        pr_data: UnifiedPRData,
+        base_sha: str,
+        head_sha: str,
+        ctx: PRContext
+    ) -> AsyncIterator[FilePatch]:
+        """
+        Stream the changes from ``base_sha`` to ``head_sha`` one patch at a time
+        
+        Raises InterdiffUnavailable when the platform has no compare API or
+        ``base_sha`` is not an ancestor of ``head_sha`` (force push / rebase).
+        """
+        raise InterdiffUnavailable(f"{pr_data.platform.value}: compare not supported")
+    
+    async def fetch_interdiff(
+        self,
+        pr_data: UnifiedPRData,
+        base_sha: str,
+        ctx: Optional[PRContext] = None
+    ) -> Optional[str]:
+        """
+        Fetch the filtered diff of the commits pushed since ``base_sha``
+        
+        Args:
+            pr_data: Unified PR data
+            base_sha: Last reviewed head commit
+            ctx: Per-run context (cached lookups, API-call counts)
+            
+        Returns:
+            Diff text in unified format, or None when the inter-diff is not
+            available and the caller should fall back to the full PR diff
+        """
+        ctx = ctx or self.context(pr_data)
+        stats = DiffFetchStats()
+        try:
+            head = await self.head_sha(pr_data, ctx)
+            if not head:
+                return None
+            parts = [
+                fp.render()
+                async for fp in self.diff_filter.apply(self.iter_compare_patches(pr_data, base_sha, head, ctx), stats)
+            ]
+        except InterdiffUnavailable as e:
+            logger.info("platform_interdiff_unavailable", platform=pr_data.platform.value, reason=str(e))
+            return None
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            logger.warning("platform_fetch_interdiff_failed", platform=pr_data.platform.value, error=str(e))
+            return None
+        if stats.truncated:
+            # A partial inter-diff would silently skip files; review the full diff instead
+            return None
+        logger.info("platform_interdiff_fetched", platform=pr_data.platform.value, base=base_sha, **stats.summary())
+        return "\n".join(parts)
     
     @abstractmethod
-    async def post_summary_comment(self, pr_data: UnifiedPRData, comment: str) -> bool:
+    async def post_summary_comment(
+        self,
+        pr_data: UnifiedPRData,
+        comment: str,
+        ctx: Optional[PRContext] = None
+    ) -> bool:
         """
         Post a summary comment on the PR
         
         Args:
             pr_data: Unified PR data
             comment: Markdown formatted comment
+            ctx: Per-run context (cached lookups, API-call counts)
             
         Returns:
             True if successful
@@ -40,7 +190,8 @@ class BasePlatformAdapter(ABC):
     async def post_inline_comments(
         self,
         pr_data: UnifiedPRData,
-        comments: List[dict]
+        comments: List[dict],
+        ctx: Optional[PRContext] = None
     ) -> bool:
         """
         Post inline comments on specific lines
@@ -48,6 +199,7 @@ class BasePlatformAdapter(ABC):
         Args:
             pr_data: Unified PR data
             comments: List of {file_path, line, body}
+            ctx: Per-run context (cached lookups, API-call counts)
             
         Returns:
             True if successful
@@ -59,7 +211,8 @@ class BasePlatformAdapter(ABC):
         self,
         pr_data: UnifiedPRData,
         state: str,
-        description: str
+        description: str,
+        ctx: Optional[PRContext] = None
     ) -> bool:
         """
         Update PR status/check
@@ -68,6 +221,7 @@ class BasePlatformAdapter(ABC):
             pr_data: Unified PR data
             state: success, failure, pending
             description: Status description
+            ctx: Per-run context (cached lookups, API-call counts)
             
         Returns:
             True if successful
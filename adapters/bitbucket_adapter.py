@@ -3,11 +3,14 @@ Bitbucket API adapter (Updated for API Tokens)
 """
 import os
 import structlog
-import requests
-from typing import List
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
 
 from models import UnifiedPRData
 from .base_adapter import BasePlatformAdapter
+from .diff_stream import DiffFilter, FilePatch, iter_unified_diff
+from .http_client import PlatformHttpClient
+from .pr_context import PRContext
 
 logger = structlog.get_logger()
 
@@ -15,7 +18,12 @@ logger = structlog.get_logger()
 class BitbucketAdapter(BasePlatformAdapter):
     """Bitbucket API client using API Tokens"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        http: Optional[PlatformHttpClient] = None,
+        api_url: Optional[str] = None,
+        diff_filter: Optional[DiffFilter] = None
+    ):
         # Support both API Token (new) and App Password (legacy)
         self.api_token = os.getenv("BITBUCKET_API_TOKEN")
         self.username = os.getenv("BITBUCKET_USERNAME")
@@ -26,7 +34,9 @@ class BitbucketAdapter(BasePlatformAdapter):
                 "Either BITBUCKET_API_TOKEN or (BITBUCKET_USERNAME + BITBUCKET_APP_PASSWORD) required"
             )
         
-        self.api_base = "https://api.bitbucket.org/2.0"
+        self.http = http or PlatformHttpClient()
+        self.diff_filter = diff_filter or DiffFilter()
+        self.api_base = (api_url or "https://api.bitbucket.org/2.0").rstrip("/")
         self.auth_type = "token" if self.api_token else "basic"
         
         logger.info("bitbucket_adapter_initialized", auth_type=self.auth_type)
@@ -39,42 +49,49 @@ class BitbucketAdapter(BasePlatformAdapter):
                 "Accept": "application/json"
             }
         else:
-            # Basic auth will be handled by requests.auth
+            # Basic auth is passed to httpx via _get_auth()
             return {"Accept": "application/json"}
     
     def _get_auth(self):
         """Get authentication for requests"""
         if self.auth_type == "basic":
-            from requests.auth import HTTPBasicAuth
-            return HTTPBasicAuth(self.username, self.app_password)
+            return (self.username, self.app_password)
         return None
     
-    async def fetch_diff(self, pr_data: UnifiedPRData) -> str:
-        """Fetch PR diff from Bitbucket"""
-        try:
-            workspace = pr_data.metadata['workspace']
-            repo_slug = pr_data.repo_full_name.split('/')[-1]
-            pr_id = pr_data.pr_id
-            
-            # Construct API URL
-            url = f"{self.api_base}/repositories/{workspace}/{repo_slug}/pullrequests/{pr_id}/diff"
-            
-            # Make request
-            response = requests.get(
-                url,
-                headers=self._get_headers(),
-                auth=self._get_auth()
-            )
+    async def iter_file_patches(self, pr_data: UnifiedPRData, ctx: PRContext) -> AsyncIterator[FilePatch]:
+        """Stream the PR diff from Bitbucket line by line, split per file"""
+        workspace = pr_data.metadata['workspace']
+        repo_slug = pr_data.repo_full_name.split('/')[-1]
+        pr_id = pr_data.pr_id
+        
+        # Construct API URL
+        url = f"{self.api_base}/repositories/{workspace}/{repo_slug}/pullrequests/{pr_id}/diff"
+        
+        ctx.record("pullrequests.diff")
+        async with self.http.stream(
+            "GET",
+            url,
+            headers=self._get_headers(),
+            auth=self._get_auth()
+        ) as response:
             response.raise_for_status()
-            
-            return response.text
-            
-        except Exception as e:
-            logger.exception("bitbucket_fetch_diff_failed", error=str(e))
-            return ""
+            patches = iter_unified_diff(
+                response.aiter_lines(),
+                self.diff_filter.skip_reason,
+                self.diff_filter.config.max_file_bytes
+            )
+            async with aclosing(patches):
+                async for patch in patches:
+                    yield patch
     
-    async def post_summary_comment(self, pr_data: UnifiedPRData, comment: str) -> bool:
+    async def post_summary_comment(
+        self,
+        pr_data: UnifiedPRData,
+        comment: str,
+        ctx: Optional[PRContext] = None
+    ) -> bool:
         """Post comment on Bitbucket PR"""
+        ctx = ctx or self.context(pr_data)
         try:
             workspace = pr_data.metadata['workspace']
             repo_slug = pr_data.repo_full_name.split('/')[-1]
@@ -84,7 +101,10 @@ class BitbucketAdapter(BasePlatformAdapter):
             url = f"{self.api_base}/repositories/{workspace}/{repo_slug}/pullrequests/{pr_id}/comments"
             
             # Make request
-            response = requests.post(
+            response = await self._request(
+                ctx,
+                "pullrequests.comments",
+                "POST",
                 url,
                 headers=self._get_headers(),
                 auth=self._get_auth(),
@@ -102,17 +122,23 @@ class BitbucketAdapter(BasePlatformAdapter):
     async def post_inline_comments(
         self,
         pr_data: UnifiedPRData,
-        comments: List[dict]
+        comments: List[dict],
+        ctx: Optional[PRContext] = None
     ) -> bool:
-        """Post inline comments on Bitbucket PR"""
+        """Post inline comments on Bitbucket PR (bounded concurrency)"""
+        if not comments:
+            return True
+        ctx = ctx or self.context(pr_data)
         try:
             workspace = pr_data.metadata['workspace']
             repo_slug = pr_data.repo_full_name.split('/')[-1]
             pr_id = pr_data.pr_id
             
             url = f"{self.api_base}/repositories/{workspace}/{repo_slug}/pullrequests/{pr_id}/comments"
+            headers = self._get_headers()
+            auth = self._get_auth()
             
-            for comment_data in comments:
+            async def post_one(comment_data: dict) -> None:
                 # Bitbucket inline comments require specific structure
                 payload = {
                     "content": {"raw": comment_data['body']},
@@ -122,16 +148,16 @@ class BitbucketAdapter(BasePlatformAdapter):
                     }
                 }
                 
-                response = requests.post(
-                    url,
-                    headers=self._get_headers(),
-                    auth=self._get_auth(),
-                    json=payload
+                response = await self._request(
+                    ctx, "pullrequests.comments", "POST", url, headers=headers, auth=auth, json=payload
                 )
                 response.raise_for_status()
             
-            logger.info("bitbucket_inline_comments_posted", count=len(comments))
-            return True
+            errors = await self._post_bounded(comments, post_one)
+            for error in errors:
+                logger.warning("bitbucket_inline_comment_failed", error=str(error))
+            logger.info("bitbucket_inline_comments_posted", count=len(comments) - len(errors))
+            return not errors
             
         except Exception as e:
             logger.exception("bitbucket_post_inline_failed", error=str(e))
@@ -141,13 +167,15 @@ class BitbucketAdapter(BasePlatformAdapter):
         self,
         pr_data: UnifiedPRData,
         state: str,
-        description: str
+        description: str,
+        ctx: Optional[PRContext] = None
     ) -> bool:
         """Update Bitbucket commit status"""
+        ctx = ctx or self.context(pr_data)
         try:
             workspace = pr_data.metadata['workspace']
             repo_slug = pr_data.repo_full_name.split('/')[-1]
-            sha = pr_data.metadata.get('sha')
+            sha = ctx.head_sha
             
             if not sha:
                 return False
@@ -168,7 +196,10 @@ class BitbucketAdapter(BasePlatformAdapter):
                 "name": "AI Code Review"
             }
             
-            response = requests.post(
+            response = await self._request(
+                ctx,
+                "statuses",
+                "POST",
                 url,
                 headers=self._get_headers(),
                 auth=self._get_auth(),
@@ -0,0 +1,237 @@
+"""
+Streaming diff pipeline for PR reviews.
+
+Adapters yield one ``FilePatch`` per changed file (``iter_file_patches``) as
+pages / response lines arrive. ``DiffFilter.apply`` drops files matched by
+``.reviewignore``, lockfiles, binaries and vendored dependencies (plus any
+``classify_file`` categories opted into with ``diff_fetch.skip_categories``),
+and stops pulling from the platform once the byte budget is spent, so only
+the kept patches are ever held in memory. Skipped paths are kept on the
+stats so the summary comment can list them.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from pathlib import PurePosixPath
+from typing import Any, AsyncIterator, Callable, Optional
+
+from services.file_filters import classify_file, is_ignored
+
+LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml",
+    "poetry.lock", "pipfile.lock", "pdm.lock", "uv.lock", "cargo.lock",
+    "composer.lock", "gemfile.lock", "go.sum", "packages.lock.json",
+    "podfile.lock", "pubspec.lock", "mix.lock", "flake.lock",
+}
+
+BINARY_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".svg",
+    ".pdf", ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".jar", ".war",
+    ".dll", ".exe", ".so", ".dylib", ".a", ".o", ".class", ".pyc", ".wasm",
+    ".woff", ".woff2", ".ttf", ".eot", ".otf",
+    ".mp3", ".mp4", ".mov", ".avi", ".wav", ".ogg", ".webm",
+    ".db", ".sqlite", ".bin", ".dat", ".pkl", ".parquet",
+}
+
+
+# Third-party code checked into the repository (any path segment)
+VENDORED_DIRS = {
+    "vendor", "vendors", "node_modules", "bower_components", "third_party",
+    "third-party", "thirdparty", "pods", "carthage", ".yarn",
+}
+
+# Skipped paths kept per fetch for the summary comment
+MAX_SKIPPED_FILES = 200
+
+
+@dataclass
+class FilePatch:
+    path: str
+    patch: str = ""  # hunks starting at the first "@@"; empty when the platform gives none
+    old_path: Optional[str] = None
+    binary: bool = False
+    too_large: bool = False
+    skip_reason: Optional[str] = None  # set by the adapter when it skipped the body
+
+    def render(self) -> str:
+        lines = [f"--- a/{self.old_path or self.path}", f"+++ b/{self.path}"]
+        if self.patch:
+            lines.append(self.patch.rstrip("\n"))
+        return "\n".join(lines)
+
+
+@dataclass(frozen=True)
+class DiffFetchConfig:
+    max_total_bytes: int = 1_000_000
+    max_file_bytes: int = 200_000
+    skip_categories: tuple[str, ...] = ()  # classify_file categories, opt-in (e.g. auto_generated)
+    skip_lockfiles: bool = True
+    skip_binary: bool = True
+    skip_vendored: bool = True
+    use_reviewignore: bool = True
+
+
+def parse_diff_fetch_config(config: dict) -> DiffFetchConfig:
+    cfg = config.get("diff_fetch") or {}
+    return DiffFetchConfig(
+        max_total_bytes=max(1_000, int(cfg.get("max_total_bytes", 1_000_000))),
+        max_file_bytes=max(1_000, int(cfg.get("max_file_bytes", 200_000))),
+        skip_categories=tuple(cfg.get("skip_categories") or ()),
+        skip_lockfiles=bool(cfg.get("skip_lockfiles", True)),
+        skip_binary=bool(cfg.get("skip_binary", True)),
+        skip_vendored=bool(cfg.get("skip_vendored", True)),
+        use_reviewignore=bool(cfg.get("use_reviewignore", True)),
+    )
+
+
+@dataclass
+class DiffFetchStats:
+    files_seen: int = 0
+    files_kept: int = 0
+    bytes_kept: int = 0
+    truncated: bool = False
+    skipped: Counter = field(default_factory=Counter)
+    skipped_files: list[tuple[str, str]] = field(default_factory=list)  # (path, reason)
+
+    @property
+    def files_skipped(self) -> int:
+        return sum(self.skipped.values())
+
+    def skip(self, path: str, reason: str) -> None:
+        self.skipped[reason] += 1
+        if len(self.skipped_files) < MAX_SKIPPED_FILES:
+            self.skipped_files.append((path, reason))
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "files_seen": self.files_seen,
+            "files_kept": self.files_kept,
+            "bytes_kept": self.bytes_kept,
+            "truncated": self.truncated,
+            "skipped": dict(self.skipped),
+        }
+
+
+class DiffFilter:
+    """Path and size filters applied while a diff streams in."""
+
+    def __init__(self, config: Optional[DiffFetchConfig] = None, ignore_patterns: Optional[list[str]] = None):
+        self.config = config or DiffFetchConfig()
+        self.ignore_patterns = list(ignore_patterns or []) if self.config.use_reviewignore else []
+
+    def skip_reason(self, path: str) -> Optional[str]:
+        """Why ``path`` should not be reviewed, decided from the path alone (None = keep)."""
+        name = PurePosixPath(path).name
+        suffix = PurePosixPath(path).suffix.lower()
+        if self.config.skip_lockfiles and name.lower() in LOCKFILES:
+            return "lockfile"
+        if self.config.skip_binary and suffix in BINARY_EXTENSIONS:
+            return "binary"
+        if self.config.skip_vendored and any(part.lower() in VENDORED_DIRS for part in PurePosixPath(path).parts[:-1]):
+            return "vendored"
+        if self.ignore_patterns and is_ignored(path, self.ignore_patterns):
+            return "reviewignore"
+        if self.config.skip_categories:
+            category = classify_file(path, suffix)
+            if category in self.config.skip_categories:
+                return category
+        return None
+
+    async def apply(self, patches: AsyncIterator[FilePatch], stats: DiffFetchStats) -> AsyncIterator[FilePatch]:
+        """Yield the patches worth reviewing; close the source once the budget is spent."""
+        async with aclosing(patches):
+            async for fp in patches:
+                stats.files_seen += 1
+                reason = fp.skip_reason or self.skip_reason(fp.path)
+                if reason is None and fp.binary and self.config.skip_binary:
+                    reason = "binary"
+                if reason is None:
+                    size = len(fp.patch.encode("utf-8"))
+                    if fp.too_large or size > self.config.max_file_bytes:
+                        reason = "too_large"
+                    elif stats.bytes_kept + size > self.config.max_total_bytes:
+                        stats.truncated = True
+                        stats.skipped["budget"] += 1
+                        return
+                if reason:
+                    stats.skip(fp.path, reason)
+                    continue
+                stats.files_kept += 1
+                stats.bytes_kept += size
+                yield fp
+
+
+def _header_path(value: str) -> Optional[str]:
+    value = value.split("\t", 1)[0].strip()
+    if value == "/dev/null":
+        return None
+    if value.startswith(("a/", "b/")):
+        return value[2:]
+    return value
+
+
+async def iter_unified_diff(
+    lines: AsyncIterator[str],
+    skip: Callable[[str], Optional[str]],
+    max_file_bytes: int,
+) -> AsyncIterator[FilePatch]:
+    """
+    Split a streamed ``git diff`` into per-file patches.
+
+    Files for which ``skip(path)`` returns a reason are passed over without
+    buffering their lines; bodies over ``max_file_bytes`` stop accumulating
+    and are flagged ``too_large``.
+    """
+    current: Optional[FilePatch] = None
+    body: list[str] = []
+    size = 0
+    in_hunks = False
+
+    def finish() -> Optional[FilePatch]:
+        if current is None:
+            return None
+        if not current.skip_reason and not current.too_large:
+            current.patch = "\n".join(body)
+        return current
+
+    async for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line.startswith("diff --git "):
+            done = finish()
+            if done:
+                yield done
+            parts = line[len("diff --git "):].split(" b/", 1)
+            path = parts[1] if len(parts) == 2 else parts[0]
+            old = _header_path(parts[0])
+            current = FilePatch(path=path, old_path=old if old != path else None, skip_reason=skip(path))
+            body, size, in_hunks = [], 0, False
+            continue
+        if current is None or current.skip_reason:
+            continue
+        if not in_hunks:
+            if line.startswith("+++ "):
+                new_path = _header_path(line[4:])
+                if new_path and new_path != current.path:
+                    current.path = new_path
+                    current.skip_reason = skip(new_path)
+            elif line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+                current.binary = True
+            elif line.startswith("@@"):
+                in_hunks = True
+            if not in_hunks:
+                continue
+        if current.too_large:
+            continue
+        size += len(line) + 1
+        if size > max_file_bytes:
+            current.too_large = True
+            body = []
+            continue
+        body.append(line)
+
+    done = finish()
+    if done:
+        yield done
@@ -3,113 +3,238 @@ GitHub API adapter
 """
 import os
 import structlog
-from typing import List
-from github import Github, GithubException
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+
+import httpx
 
 from models import UnifiedPRData
-from .base_adapter import BasePlatformAdapter
+from .base_adapter import BasePlatformAdapter, InterdiffUnavailable
+from .diff_stream import DiffFilter, FilePatch
+from .http_client import PlatformHttpClient
+from .pr_context import PRContext
 
 logger = structlog.get_logger()
 
 
 class GitHubAdapter(BasePlatformAdapter):
-    """GitHub API client"""
-    
-    def __init__(self):
+    """GitHub REST API client"""
+
+    def __init__(
+        self,
+        http: Optional[PlatformHttpClient] = None,
+        api_url: Optional[str] = None,
+        diff_filter: Optional[DiffFilter] = None
+    ):
         token = os.getenv("GITHUB_TOKEN")
         if not token:
             raise ValueError("GITHUB_TOKEN environment variable required")
-        
-        self.client = Github(token)
+
+        self.http = http or PlatformHttpClient()
+        self.diff_filter = diff_filter or DiffFilter()
+        self.api_base = (api_url or "https://api.github.com").rstrip("/")
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        }
         logger.info("github_adapter_initialized")
-    
-    async def fetch_diff(self, pr_data: UnifiedPRData) -> str:
-        """Fetch PR diff from GitHub"""
+
+    def _pr_url(self, pr_data: UnifiedPRData) -> str:
+        return f"{self.api_base}/repos/{pr_data.repo_full_name}/pulls/{int(pr_data.pr_id)}"
+
+    async def _head_sha(self, ctx: PRContext) -> str:
+        """Head commit of the PR; taken from the webhook or fetched once per run"""
+        if ctx.head_sha:
+            return ctx.head_sha
+        if ctx.pr is None:
+            response = await self._request(ctx, "pulls.get", "GET", self._pr_url(ctx.pr_data), headers=self.headers)
+            response.raise_for_status()
+            ctx.pr = response.json()
+        ctx.head_sha = ctx.pr["head"]["sha"]
+        return ctx.head_sha
+
+    async def iter_file_patches(self, pr_data: UnifiedPRData, ctx: PRContext) -> AsyncIterator[FilePatch]:
+        """Stream PR files from GitHub, one page (100 files) at a time"""
+        files = self._iter_pages(
+            ctx,
+            "pulls.files",
+            f"{self._pr_url(pr_data)}/files",
+            params={"per_page": 100},
+            headers=self.headers
+        )
+        async with aclosing(files):
+            async for file in files:
+                yield self._file_patch(file)
+
+    def _file_patch(self, file: dict) -> FilePatch:
+        path = file["filename"]
+        reason = self.diff_filter.skip_reason(path)
+        # GitHub omits "patch" for binary files and diffs it considers too large
+        if not reason and not file.get("patch"):
+            reason = "no_patch"
+        return FilePatch(
+            path=path,
+            patch="" if reason else file["patch"],
+            old_path=file.get("previous_filename"),
+            skip_reason=reason,
+        )
+
+    async def head_sha(self, pr_data: UnifiedPRData, ctx: Optional[PRContext] = None) -> Optional[str]:
         try:
-            repo = self.client.get_repo(pr_data.repo_full_name)
-            pr = repo.get_pull(int(pr_data.pr_id))
-            
-            # Get diff
-            files = pr.get_files()
-            diff_parts = []
-            
-            for file in files:
-                if file.patch:
-                    diff_parts.append(f"--- a/{file.filename}")
-                    diff_parts.append(f"+++ b/{file.filename}")
-                    diff_parts.append(file.patch)
-            
-            return "\n".join(diff_parts)
-            
-        except GithubException as e:
-            logger.exception("github_fetch_diff_failed", error=str(e))
-            return ""
-    
-    async def post_summary_comment(self, pr_data: UnifiedPRData, comment: str) -> bool:
+            return await self._head_sha(ctx or self.context(pr_data))
+        except (httpx.HTTPError, KeyError) as e:
+            logger.warning("github_head_sha_failed", error=str(e))
+            return None
+
+    async def iter_compare_patches(
+        self,
+        pr_data: UnifiedPRData,
+        base_sha: str,
+        head_sha: str,
+        ctx: PRContext
+    ) -> AsyncIterator[FilePatch]:
+        """Files changed between two commits (compare API, up to 300 files)"""
+        response = await self._request(
+            ctx,
+            "compare",
+            "GET",
+            f"{self.api_base}/repos/{pr_data.repo_full_name}/compare/{base_sha}...{head_sha}",
+            headers=self.headers
+        )
+        if response.status_code == 404:
+            raise InterdiffUnavailable(f"commit {base_sha} not found")
+        response.raise_for_status()
+        data = response.json()
+        # "diverged" / "behind": the reviewed commit is no longer in the branch history
+        if data.get("status") not in ("ahead", "identical"):
+            raise InterdiffUnavailable(f"compare status {data.get('status')}")
+        for file in data.get("files") or []:
+            yield self._file_patch(file)
+
+    async def post_summary_comment(
+        self,
+        pr_data: UnifiedPRData,
+        comment: str,
+        ctx: Optional[PRContext] = None
+    ) -> bool:
         """Post summary comment on GitHub PR"""
+        ctx = ctx or self.context(pr_data)
         try:
-            repo = self.client.get_repo(pr_data.repo_full_name)
-            pr = repo.get_pull(int(pr_data.pr_id))
-            pr.create_issue_comment(comment)
-            
+            response = await self._request(
+                ctx,
+                "issues.comments",
+                "POST",
+                f"{self.api_base}/repos/{pr_data.repo_full_name}/issues/{int(pr_data.pr_id)}/comments",
+                headers=self.headers,
+                json={"body": comment}
+            )
+            response.raise_for_status()
+
             logger.info("github_comment_posted", pr_id=pr_data.pr_id)
             return True
-            
-        except GithubException as e:
+
+        except httpx.HTTPError as e:
             logger.exception("github_post_comment_failed", error=str(e))
             return False
-    
+
     async def post_inline_comments(
         self,
         pr_data: UnifiedPRData,
-        comments: List[dict]
+        comments: List[dict],
+        ctx: Optional[PRContext] = None
     ) -> bool:
-        """Post inline comments on GitHub PR"""
+        """
+        Post inline comments on GitHub PR as a single review.
+
+        GitHub rejects the whole review if any comment points outside the
+        diff (422); in that case comments are posted one by one so the valid
+        ones still land.
+        """
+        if not comments:
+            return True
+        ctx = ctx or self.context(pr_data)
         try:
-            repo = self.client.get_repo(pr_data.repo_full_name)
-            pr = repo.get_pull(int(pr_data.pr_id))
-            commit = pr.get_commits().reversed[0]  # Latest commit
-            
-            for comment_data in comments:
-                pr.create_review_comment(
-                    body=comment_data['body'],
-                    commit=commit,
-                    path=comment_data['file_path'],
-                    line=comment_data['line']
+            commit_id = await self._head_sha(ctx)  # Latest commit
+            pr_url = self._pr_url(pr_data)
+            review_comments = [
+                {
+                    "path": comment_data['file_path'],
+                    "line": comment_data['line'],
+                    "side": "RIGHT",
+                    "body": comment_data['body'],
+                }
+                for comment_data in comments
+            ]
+
+            response = await self._request(
+                ctx,
+                "pulls.reviews",
+                "POST",
+                f"{pr_url}/reviews",
+                headers=self.headers,
+                json={"commit_id": commit_id, "event": "COMMENT", "comments": review_comments}
+            )
+            if response.status_code != 422:
+                response.raise_for_status()
+                logger.info("github_inline_comments_posted", count=len(comments), mode="review")
+                return True
+
+            logger.warning("github_review_rejected_falling_back", count=len(comments), error=response.text[:200])
+
+            async def post_one(comment: dict) -> None:
+                single = await self._request(
+                    ctx,
+                    "pulls.comments",
+                    "POST",
+                    f"{pr_url}/comments",
+                    headers=self.headers,
+                    json={"commit_id": commit_id, **comment}
                 )
-            
-            logger.info("github_inline_comments_posted", count=len(comments))
-            return True
-            
-        except GithubException as e:
+                single.raise_for_status()
+
+            errors = await self._post_bounded(review_comments, post_one)
+            for error in errors:
+                logger.warning("github_inline_comment_failed", error=str(error))
+            logger.info("github_inline_comments_posted", count=len(comments) - len(errors), mode="single")
+            return not errors
+
+        except httpx.HTTPError as e:
             logger.exception("github_post_inline_failed", error=str(e))
             return False
-    
+
     async def update_status(
         self,
         pr_data: UnifiedPRData,
         state: str,
-        description: str
+        description: str,
+        ctx: Optional[PRContext] = None
     ) -> bool:
         """Update GitHub commit status"""
+        ctx = ctx or self.context(pr_data)
         try:
-            repo = self.client.get_repo(pr_data.repo_full_name)
-            sha = pr_data.metadata.get('sha')
-            
+            sha = ctx.head_sha
+
             if not sha:
                 return False
-            
-            commit = repo.get_commit(sha)
-            commit.create_status(
-                state=state,
-                description=description,
-                context="AI Code Review"
+
+            response = await self._request(
+                ctx,
+                "statuses",
+                "POST",
+                f"{self.api_base}/repos/{pr_data.repo_full_name}/statuses/{sha}",
+                headers=self.headers,
+                json={
+                    "state": state,
+                    "description": description,
+                    "context": "AI Code Review",
+                }
             )
-            
+            response.raise_for_status()
+
             logger.info("github_status_updated", state=state)
             return True
-            
-        except GithubException as e:
+
+        except httpx.HTTPError as e:
             logger.exception("github_update_status_failed", error=str(e))
             return False
-
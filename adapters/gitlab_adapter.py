@@ -3,124 +3,248 @@ GitLab API adapter
 """
 import os
 import structlog
-from typing import List
-import gitlab
-from gitlab.exceptions import GitlabError
+from contextlib import aclosing
+from typing import AsyncIterator, List, Optional
+
+import httpx
 
 from models import UnifiedPRData
-from .base_adapter import BasePlatformAdapter
+from .base_adapter import BasePlatformAdapter, InterdiffUnavailable
+from .diff_stream import DiffFilter, FilePatch
+from .http_client import PlatformHttpClient
+from .pr_context import PRContext
 
 logger = structlog.get_logger()
 
 
 class GitLabAdapter(BasePlatformAdapter):
-    """GitLab API client"""
-    
-    def __init__(self):
+    """GitLab REST API (v4) client"""
+
+    def __init__(
+        self,
+        http: Optional[PlatformHttpClient] = None,
+        api_url: Optional[str] = None,
+        diff_filter: Optional[DiffFilter] = None
+    ):
         token = os.getenv("GITLAB_TOKEN")
-        url = os.getenv("GITLAB_URL", "https://gitlab.com")
-        
+        url = os.getenv("GITLAB_URL")
+
         if not token:
             raise ValueError("GITLAB_TOKEN environment variable required")
-        
-        self.client = gitlab.Gitlab(url, private_token=token)
+
+        self.http = http or PlatformHttpClient()
+        self.diff_filter = diff_filter or DiffFilter()
+        # GITLAB_URL (self-hosted instance root) wins over platforms.gitlab.api_url
+        self.api_base = f"{url.rstrip('/')}/api/v4" if url else (api_url or "https://gitlab.com/api/v4").rstrip("/")
+        self.headers = {"PRIVATE-TOKEN": token}
         logger.info("gitlab_adapter_initialized")
-    
-    async def fetch_diff(self, pr_data: UnifiedPRData) -> str:
-        """Fetch MR diff from GitLab"""
-        try:
-            project = self.client.projects.get(pr_data.metadata['project_id'])
-            mr = project.mergerequests.get(int(pr_data.pr_id))
-            
-            # Get diff
-            diffs = mr.diffs.list()
-            diff_parts = []
-            
-            for diff in diffs:
-                diff_parts.append(diff.diff)
-            
-            return "\n".join(diff_parts)
-            
-        except GitlabError as e:
-            logger.exception("gitlab_fetch_diff_failed", error=str(e))
-            return ""
-    
-    async def post_summary_comment(self, pr_data: UnifiedPRData, comment: str) -> bool:
+
+    def _mr_url(self, pr_data: UnifiedPRData) -> str:
+        project_id = pr_data.metadata['project_id']
+        return f"{self.api_base}/projects/{project_id}/merge_requests/{int(pr_data.pr_id)}"
+
+    async def _merge_request(self, ctx: PRContext) -> dict:
+        """MR payload (diff refs, head sha), fetched once per run"""
+        if ctx.pr is None:
+            response = await self._request(ctx, "merge_requests.get", "GET", self._mr_url(ctx.pr_data), headers=self.headers)
+            response.raise_for_status()
+            ctx.pr = response.json()
+            ctx.diff_refs = ctx.pr.get('diff_refs')
+            ctx.head_sha = ctx.head_sha or ctx.pr.get('sha')
+        return ctx.pr
+
+    async def iter_file_patches(self, pr_data: UnifiedPRData, ctx: PRContext) -> AsyncIterator[FilePatch]:
+        """Stream MR diffs from GitLab, one page (100 files) at a time"""
+        diffs = self._iter_pages(
+            ctx,
+            "merge_requests.diffs",
+            f"{self._mr_url(pr_data)}/diffs",
+            params={"per_page": 100},
+            headers=self.headers
+        )
+        async with aclosing(diffs):
+            async for diff in diffs:
+                yield self._file_patch(diff)
+
+    def _file_patch(self, diff: dict) -> FilePatch:
+        path = diff.get("new_path") or diff.get("old_path")
+        reason = self.diff_filter.skip_reason(path)
+        if not reason and not diff.get("diff"):
+            reason = "no_patch"
+        # GitLab returns hunks only; render() adds the file headers
+        return FilePatch(
+            path=path,
+            patch="" if reason else diff["diff"],
+            old_path=diff.get("old_path") if diff.get("old_path") != path else None,
+            too_large=bool(diff.get("too_large")),
+            skip_reason=reason,
+        )
+
+    async def head_sha(self, pr_data: UnifiedPRData, ctx: Optional[PRContext] = None) -> Optional[str]:
+        ctx = ctx or self.context(pr_data)
+        if not ctx.head_sha:
+            try:
+                await self._merge_request(ctx)
+            except (httpx.HTTPError, KeyError) as e:
+                logger.warning("gitlab_head_sha_failed", error=str(e))
+        return ctx.head_sha
+
+    async def iter_compare_patches(
+        self,
+        pr_data: UnifiedPRData,
+        base_sha: str,
+        head_sha: str,
+        ctx: PRContext
+    ) -> AsyncIterator[FilePatch]:
+        """Files changed between two commits (repository compare API)"""
+        project_id = pr_data.metadata['project_id']
+        # compare diffs from the merge base: after a rebase that is not the
+        # change between the two heads, so require the reviewed commit to be
+        # an ancestor of the new head
+        response = await self._request(
+            ctx,
+            "repository.merge_base",
+            "GET",
+            f"{self.api_base}/projects/{project_id}/repository/merge_base",
+            params={"refs[]": [base_sha, head_sha]},
+            headers=self.headers
+        )
+        if response.status_code in (400, 404):
+            raise InterdiffUnavailable(f"commit {base_sha} not found")
+        response.raise_for_status()
+        if response.json().get("id") != base_sha:
+            raise InterdiffUnavailable(f"commit {base_sha} is not an ancestor of {head_sha}")
+        response = await self._request(
+            ctx,
+            "repository.compare",
+            "GET",
+            f"{self.api_base}/projects/{project_id}/repository/compare",
+            params={"from": base_sha, "to": head_sha},
+            headers=self.headers
+        )
+        if response.status_code == 404:
+            raise InterdiffUnavailable(f"commit {base_sha} not found")
+        response.raise_for_status()
+        data = response.json()
+        # No commits on top of the reviewed one: the branch was reset by a force push
+        if not data.get("commits") and not data.get("compare_same_ref"):
+            raise InterdiffUnavailable("no commits between the reviewed and the new head")
+        for diff in data.get("diffs") or []:
+            yield self._file_patch(diff)
+
+    async def post_summary_comment(
+        self,
+        pr_data: UnifiedPRData,
+        comment: str,
+        ctx: Optional[PRContext] = None
+    ) -> bool:
         """Post note on GitLab MR"""
+        ctx = ctx or self.context(pr_data)
         try:
-            project = self.client.projects.get(pr_data.metadata['project_id'])
-            mr = project.mergerequests.get(int(pr_data.pr_id))
-            mr.notes.create({'body': comment})
-            
+            response = await self._request(
+                ctx,
+                "merge_requests.notes",
+                "POST",
+                f"{self._mr_url(pr_data)}/notes",
+                headers=self.headers,
+                json={'body': comment}
+            )
+            response.raise_for_status()
+
             logger.info("gitlab_comment_posted", mr_id=pr_data.pr_id)
             return True
-            
-        except GitlabError as e:
+
+        except (httpx.HTTPError, KeyError) as e:
             logger.exception("gitlab_post_comment_failed", error=str(e))
             return False
-    
+
     async def post_inline_comments(
         self,
         pr_data: UnifiedPRData,
-        comments: List[dict]
+        comments: List[dict],
+        ctx: Optional[PRContext] = None
     ) -> bool:
-        """Post inline discussions on GitLab MR"""
+        """Post inline discussions on GitLab MR (bounded concurrency)"""
+        if not comments:
+            return True
+        ctx = ctx or self.context(pr_data)
         try:
-            project = self.client.projects.get(pr_data.metadata['project_id'])
-            mr = project.mergerequests.get(int(pr_data.pr_id))
-            
-            for comment_data in comments:
+            discussions_url = f"{self._mr_url(pr_data)}/discussions"
+            await self._merge_request(ctx)
+            diff_refs = ctx.diff_refs or {}
+
+            async def post_one(comment_data: dict) -> None:
                 # GitLab uses discussions for inline comments
-                mr.discussions.create({
-                    'body': comment_data['body'],
-                    'position': {
-                        'position_type': 'text',
-                        'new_path': comment_data['file_path'],
-                        'new_line': comment_data['line'],
-                        'base_sha': mr.diff_refs['base_sha'],
-                        'start_sha': mr.diff_refs['start_sha'],
-                        'head_sha': mr.diff_refs['head_sha']
+                response = await self._request(
+                    ctx,
+                    "merge_requests.discussions",
+                    "POST",
+                    discussions_url,
+                    headers=self.headers,
+                    json={
+                        'body': comment_data['body'],
+                        'position': {
+                            'position_type': 'text',
+                            'new_path': comment_data['file_path'],
+                            'new_line': comment_data['line'],
+                            'base_sha': diff_refs['base_sha'],
+                            'start_sha': diff_refs['start_sha'],
+                            'head_sha': diff_refs['head_sha']
+                        }
                     }
-                })
-            
-            logger.info("gitlab_inline_comments_posted", count=len(comments))
-            return True
-            
-        except GitlabError as e:
+                )
+                response.raise_for_status()
+
+            errors = await self._post_bounded(comments, post_one)
+            for error in errors:
+                logger.warning("gitlab_inline_comment_failed", error=str(error))
+            logger.info("gitlab_inline_comments_posted", count=len(comments) - len(errors))
+            return not errors
+
+        except (httpx.HTTPError, KeyError) as e:
             logger.exception("gitlab_post_inline_failed", error=str(e))
             return False
-    
+
     async def update_status(
         self,
         pr_data: UnifiedPRData,
         state: str,
-        description: str
+        description: str,
+        ctx: Optional[PRContext] = None
     ) -> bool:
         """Update GitLab commit status"""
+        ctx = ctx or self.context(pr_data)
         try:
-            project = self.client.projects.get(pr_data.metadata['project_id'])
-            sha = pr_data.metadata.get('sha')
-            
+            project_id = pr_data.metadata['project_id']
+            sha = ctx.head_sha
+
             if not sha:
                 return False
-            
+
             # Map state names
             gitlab_state = {
                 'success': 'success',
                 'failure': 'failed',
                 'pending': 'pending'
             }.get(state, 'pending')
-            
-            project.commits.get(sha).statuses.create({
-                'state': gitlab_state,
-                'description': description,
-                'name': 'AI Code Review'
-            })
-            
+
+            response = await self._request(
+                ctx,
+                "statuses",
+                "POST",
+                f"{self.api_base}/projects/{project_id}/statuses/{sha}",
+                headers=self.headers,
+                json={
+                    'state': gitlab_state,
+                    'description': description,
+                    'name': 'AI Code Review'
+                }
+            )
+            response.raise_for_status()
+
             logger.info("gitlab_status_updated", state=gitlab_state)
             return True
-            
-        except GitlabError as e:
+
+        except (httpx.HTTPError, KeyError) as e:
             logger.exception("gitlab_update_status_failed", error=str(e))
             return False
-
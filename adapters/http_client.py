@@ -0,0 +1,191 @@
+"""
+Shared async HTTP client for platform adapters.
+
+One pooled ``httpx.AsyncClient`` (keep-alive, HTTP/2 when the ``h2`` package
+is installed) is created by CodeReviewServer and handed to every adapter.
+Requests are capped per host and retried with jittered exponential backoff
+on connection errors, 429 and 5xx responses.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import random
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import structlog
+
+logger = structlog.get_logger()
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+@dataclass(frozen=True)
+class HttpPoolConfig:
+    timeout_seconds: float = 30.0
+    connect_timeout_seconds: float = 10.0
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 60.0
+    per_host_connections: int = 10
+    http2: bool = True
+    retries: int = 3
+    backoff_base_seconds: float = 0.5
+    backoff_max_seconds: float = 10.0
+
+
+def parse_http_pool_config(config: dict) -> HttpPoolConfig:
+    cfg = config.get("http") or {}
+    return HttpPoolConfig(
+        timeout_seconds=max(1.0, float(cfg.get("timeout_seconds", 30))),
+        connect_timeout_seconds=max(1.0, float(cfg.get("connect_timeout_seconds", 10))),
+        max_connections=max(1, int(cfg.get("max_connections", 100))),
+        max_keepalive_connections=max(0, int(cfg.get("max_keepalive_connections", 20))),
+        keepalive_expiry_seconds=max(1.0, float(cfg.get("keepalive_expiry_seconds", 60))),
+        per_host_connections=max(1, int(cfg.get("per_host_connections", 10))),
+        http2=bool(cfg.get("http2", True)),
+        retries=max(0, int(cfg.get("retries", 3))),
+        backoff_base_seconds=max(0.0, float(cfg.get("backoff_base_seconds", 0.5))),
+        backoff_max_seconds=max(0.0, float(cfg.get("backoff_max_seconds", 10))),
+    )
+
+
+class PlatformHttpClient:
+    """Pooled AsyncClient with per-host concurrency caps and retries."""
+
+    def __init__(self, config: Optional[HttpPoolConfig] = None, *, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.config = config or HttpPoolConfig()
+        http2 = self.config.http2 and importlib.util.find_spec("h2") is not None
+        if self.config.http2 and not http2:
+            logger.info("http2_unavailable_falling_back", reason="h2 package not installed")
+        self.http2 = http2
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(self.config.timeout_seconds, connect=self.config.connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry_seconds,
+            ),
+            follow_redirects=True,
+            transport=transport,
+        )
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self.requests_total = 0
+        self.retries_total = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._client.is_closed
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.config.per_host_connections)
+            self._host_limits[host] = limit
+        return limit
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(self.config.backoff_max_seconds, max(0.0, float(retry_after)))
+                except ValueError:
+                    pass
+        # Full jitter: uniform(0, base * 2^attempt), capped.
+        ceiling = min(self.config.backoff_max_seconds, self.config.backoff_base_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    async def request(self, method: str, url: str, *, retry: Optional[bool] = None, **kwargs: Any) -> httpx.Response:
+        """
+        Send a request and return the final response (not raised for status).
+
+        Non-idempotent methods (POST/PATCH) are only retried on connection
+        errors and 429, where the server never processed the request, unless
+        ``retry=True`` is passed.
+        """
+        method = method.upper()
+        retry_any = method in _IDEMPOTENT_METHODS if retry is None else retry
+        attempts = self.config.retries + 1
+        async with self._host_limit(url):
+            for attempt in range(attempts):
+                response: Optional[httpx.Response] = None
+                try:
+                    self.requests_total += 1
+                    response = await self._client.request(method, url, **kwargs)
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError, httpx.PoolTimeout) as e:
+                    if attempt + 1 >= attempts:
+                        raise
+                    error = str(e) or type(e).__name__
+                else:
+                    retryable = response.status_code == 429 or (retry_any and response.status_code in _RETRY_STATUSES)
+                    if not retryable or attempt + 1 >= attempts:
+                        return response
+                    error = f"HTTP {response.status_code}"
+                delay = self._backoff(attempt, response)
+                self.retries_total += 1
+                logger.warning(
+                    "platform_http_retry",
+                    method=method,
+                    host=urlsplit(url).netloc,
+                    attempt=attempt + 1,
+                    delay=round(delay, 2),
+                    error=error,
+                )
+                await asyncio.sleep(delay)
+        raise RuntimeError("unreachable")
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def iter_paginated(
+        self,
+        url: str,
+        *,
+        params: Optional[dict] = None,
+        on_page: Optional[Callable[[], None]] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        """
+        Yield JSON list items across RFC 5988 ``Link: rel="next"`` pages (GitHub, GitLab).
+
+        The next page is only requested once the caller has consumed the
+        current one, so stopping early saves the remaining requests.
+        """
+        next_url: Optional[str] = url
+        next_params = params
+        while next_url:
+            if on_page:
+                on_page()
+            response = await self.get(next_url, params=next_params, **kwargs)
+            response.raise_for_status()
+            for item in response.json():
+                yield item
+            next_url = response.links.get("next", {}).get("url")
+            next_params = None  # the next link already carries the query string
+
+    async def get_paginated(self, url: str, **kwargs: Any) -> list[Any]:
+        """All items of a paginated list endpoint (see ``iter_paginated``)."""
+        return [item async for item in self.iter_paginated(url, **kwargs)]
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """Streamed response (body not read up front); not retried."""
+        async with self._host_limit(url):
+            self.requests_total += 1
+            async with self._client.stream(method.upper(), url, **kwargs) as response:
+                yield response
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+        logger.info("platform_http_client_closed", requests=self.requests_total, retries=self.retries_total)
@@ -0,0 +1,42 @@
+"""
+Per-run PR context shared by the adapter calls of one review.
+
+The server builds one ``PRContext`` per webhook run (``adapter.context(pr_data)``)
+and passes it to fetch_diff / post_summary_comment / post_inline_comments /
+update_status, so lookups such as the PR payload, head commit and GitLab diff
+refs are fetched at most once per run. It also counts the platform API calls
+the run made and keeps the diff filter statistics.
+"""
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from models import UnifiedPRData
+
+
+@dataclass
+class PRContext:
+    pr_data: UnifiedPRData
+    head_sha: Optional[str] = None
+    pr: Optional[dict] = None  # raw PR / MR payload from the platform
+    diff_refs: Optional[dict] = None  # GitLab base/start/head shas
+    diff_stats: Optional[Any] = None  # DiffFetchStats of the last fetch_diff
+    api_calls: int = 0
+    calls_by_endpoint: Counter = field(default_factory=Counter)
+
+    @classmethod
+    def for_pr(cls, pr_data: UnifiedPRData) -> "PRContext":
+        return cls(pr_data=pr_data, head_sha=pr_data.metadata.get('sha'))
+
+    def record(self, endpoint: str) -> None:
+        self.api_calls += 1
+        self.calls_by_endpoint[endpoint] += 1
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "platform": self.pr_data.platform.value,
+            "pr_id": self.pr_data.pr_id,
+            "api_calls": self.api_calls,
+            "by_endpoint": dict(self.calls_by_endpoint),
+            "diff": self.diff_stats.summary() if self.diff_stats else None,
+        }
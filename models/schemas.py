@@ -103,6 +103,9 @@ class ReviewResult(BaseModel):
     security_issues_count: int = 0
     secret_leak_detected: bool = False
     owasp_categories_hit: List[str] = Field(default_factory=list)
+
+    # Incomplete review (failed chunk, unparsable AI answer): never cached
+    degraded: bool = False
     
     def __init__(self, **data):
         super().__init__(**data)
@@ -6,8 +6,9 @@ All templates must implement render_summary() and render_inline().
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 from models import ReviewResult, ReviewIssue, IssueSeverity
+from services.parsed_diff import TargetLineIndex
 
 
 SEVERITY_EMOJI = {
@@ -81,14 +82,29 @@ class BaseTemplate(ABC):
         lines.extend(["", f"*Category: {issue.category}*"])
         return "\n".join(lines)
 
-    def render_inline_comments(self, result: ReviewResult) -> List[dict]:
-        """Build the list of inline comment payloads."""
+    def render_inline_comments(
+        self,
+        result: ReviewResult,
+        line_index: Optional[TargetLineIndex] = None,
+    ) -> List[dict]:
+        """
+        Build the list of inline comment payloads.
+
+        With a ``line_index`` (built from the PR diff), lines outside the
+        changed hunks are snapped to the nearest hunk edge or dropped, so no
+        comment is posted that the platform would reject.
+        """
         comments = []
         for issue in result.issues:
             if issue.file_path and issue.line_number:
+                line = issue.line_number
+                if line_index is not None:
+                    line = line_index.resolve(issue.file_path, line)
+                    if line is None:
+                        continue
                 comments.append({
                     "file_path": issue.file_path,
-                    "line": issue.line_number,
+                    "line": line,
                     "body": self.render_inline(issue),
                 })
         return comments
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LiveLogStore under concurrent writers and pollers.
+
+Starts one writer thread per run, each appending ``--events`` events, and
+``--pollers`` reader threads that cycle through the runs. Each reader calls
+``get_events_since`` with its own cursor per run and ``list_active_runs``
+now and then, as the dashboard does. Reports wall time, append throughput
+and append / poll latency percentiles for:
+
+* striped   the store as is (per-run locks, index lock for status changes)
+* global    the same store behind one lock shared by every call, i.e. the
+            previous single ``threading.Lock`` design
+
+Usage:
+  python3 scripts/bench_live_log_contention.py [--runs 50] [--events 200] [--pollers 20]
+"""
+
+import argparse
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `import services` works when executed as a script.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from services.live_log_store import LiveLogStore
+
+
+class GlobalLockStore:
+    """Serializes every call on one lock, like the store before lock striping."""
+
+    def __init__(self, store: LiveLogStore):
+        self._store = store
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self._store, name)
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return method(*args, **kwargs)
+
+        return locked
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run_bench(store, runs: int, events: int, pollers: int, step_sleep: float) -> dict:
+    run_ids = [
+        store.start_run(platform="github", pr_id=str(i), title=f"PR {i}", author="bench")
+        for i in range(runs)
+    ]
+    start = threading.Barrier(runs + pollers + 1)
+    writers_done = threading.Event()
+    append_lat: list[list[float]] = [[] for _ in range(runs)]
+    poll_lat: list[list[float]] = [[] for _ in range(pollers)]
+
+    def writer(idx: int) -> None:
+        run_id = run_ids[idx]
+        samples = append_lat[idx]
+        start.wait()
+        for i in range(events):
+            t0 = time.perf_counter()
+            store.append_event(run_id, step="step_2", message=f"event {i}", meta={"i": i})
+            samples.append(time.perf_counter() - t0)
+            if step_sleep:
+                time.sleep(step_sleep)
+        store.complete_run(run_id, score=8, issues=0, critical=0)
+
+    def poller(idx: int) -> None:
+        cursors = dict.fromkeys(run_ids, 0)
+        samples = poll_lat[idx]
+        start.wait()
+        n = idx
+        while not writers_done.is_set():
+            run_id = run_ids[n % runs]
+            t0 = time.perf_counter()
+            _, _, cursors[run_id] = store.get_events_since(run_id, cursor=cursors[run_id], limit=200)
+            if n % 10 == 0:
+                store.list_active_runs()
+            samples.append(time.perf_counter() - t0)
+            n += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(runs)]
+    readers = [threading.Thread(target=poller, args=(i,)) for i in range(pollers)]
+    for t in threads + readers:
+        t.start()
+    start.wait()
+    started = time.perf_counter()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    writers_done.set()
+    for t in readers:
+        t.join()
+
+    appends = [s for samples in append_lat for s in samples]
+    polls = [s for samples in poll_lat for s in samples]
+    return {
+        "wall": wall,
+        "appends_per_s": len(appends) / wall,
+        "append_p50": percentile(appends, 0.5),
+        "append_p99": percentile(appends, 0.99),
+        "polls": len(polls),
+        "poll_p50": percentile(polls, 0.5),
+        "poll_p99": percentile(polls, 0.99),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=50)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--pollers", type=int, default=20)
+    parser.add_argument("--step-sleep", type=float, default=0.0, help="pause between a run's events (seconds)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{args.runs} runs x {args.events} events, {args.pollers} pollers (best of {args.repeat})\n")
+    print(f"{'':>9}{'wall':>9}{'appends/s':>12}{'append p50':>12}{'append p99':>12}{'polls':>9}{'poll p50':>11}{'poll p99':>11}")
+    for label, factory in (
+        ("global", lambda: GlobalLockStore(LiveLogStore(max_events_per_run=500))),
+        ("striped", lambda: LiveLogStore(max_events_per_run=500)),
+    ):
+        best = min(
+            (run_bench(factory(), args.runs, args.events, args.pollers, args.step_sleep) for _ in range(args.repeat)),
+            key=lambda r: r["wall"],
+        )
+        print(
+            f"{label:>9}{best['wall'] * 1000:>7.0f}ms{best['appends_per_s']:>12.0f}"
+            f"{best['append_p50'] * 1e6:>10.1f}us{best['append_p99'] * 1e6:>10.1f}us"
+            f"{best['polls']:>9}{best['poll_p50'] * 1e6:>9.1f}us{best['poll_p99'] * 1e6:>9.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: LiveLogStore event ring vs the previous list buffer.
+
+For each ``max_events_per_run`` it fills one run past capacity, then times
+an append (the run is full, so every append also trims) and two polls: an
+up-to-date viewer (cursor a few events behind the head) and a first load
+(cursor 0, one ``max_events_per_poll`` page). With the ring all three stay
+flat as the capacity grows. The list buffer copies on every trim and scans
+every event on every poll.
+
+Usage:
+  python3 scripts/bench_live_log_store.py [--sizes 50,100,200,500] [--ops 20000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `import services` works when executed as a script.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from services.live_log_store import EventRing
+
+
+class ListBuffer:
+    """The previous storage: slice-trimmed list, filtered on every poll."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.events: list[dict] = []
+
+    def append(self, event: dict) -> None:
+        self.events.append(event)
+        if len(self.events) > self.capacity:
+            self.events = self.events[-self.capacity :]
+
+    def since(self, cursor: int, limit: int) -> list[dict]:
+        return [e for e in self.events if int(e["seq"]) > int(cursor)][:limit]
+
+
+def _event(seq: int) -> dict:
+    return {"seq": seq, "ts": "", "level": "info", "step": "step_1", "message": "m", "meta": {}}
+
+
+def per_op_us(fn, ops: int) -> float:
+    started = time.perf_counter()
+    for i in range(ops):
+        fn(i)
+    return (time.perf_counter() - started) / ops * 1e6
+
+
+def bench(factory, capacity: int, ops: int) -> tuple[float, float, float]:
+    buf = factory(capacity)
+    seq = 0
+    for _ in range(capacity * 2):
+        seq += 1
+        buf.append(_event(seq))
+
+    counter = [seq]
+
+    def append(_):
+        counter[0] += 1
+        buf.append(_event(counter[0]))
+
+    t_append = per_op_us(append, ops)
+    head = counter[0]
+    t_tail = per_op_us(lambda _: buf.since(head - 5, 200), ops)
+    t_first = per_op_us(lambda _: buf.since(0, 200), ops)
+    assert [e["seq"] for e in buf.since(head - 5, 200)] == list(range(head - 4, head + 1))
+    return t_append, t_tail, t_first
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="50,100,200,500")
+    parser.add_argument("--ops", type=int, default=20_000)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(f"per-operation cost in µs ({args.ops} ops each, run filled past capacity)\n")
+    print(f"{'capacity':>8} | {'append':>14} | {'poll (tail)':>14} | {'poll (cursor 0)':>16}")
+    print(f"{'':>8} | {'list':>6} {'ring':>7} | {'list':>6} {'ring':>7} | {'list':>7} {'ring':>8}")
+    for capacity in sizes:
+        old = bench(ListBuffer, capacity, args.ops)
+        new = bench(EventRing, capacity, args.ops)
+        print(
+            f"{capacity:>8} | {old[0]:>6.2f} {new[0]:>7.2f} | {old[1]:>6.2f} {new[1]:>7.2f}"
+            f" | {old[2]:>7.2f} {new[2]:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ParsedDiff (array-backed) vs DiffAnalyzer.parse_diff (nested dicts).
+
+Generates a synthetic diff and reports parse time and peak traced memory for
+both representations, plus the cost of the typical access patterns (file
+paths, added line numbers, hunk lookup).
+
+Usage:
+  python3 scripts/bench_parsed_diff.py [--lines 50000] [--files 200] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Ensure repo root is on sys.path so `import services` works when executed as a script.
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from services.diff_analyzer import DiffAnalyzer
+from services.parsed_diff import ParsedDiff
+
+
+def make_diff(total_lines: int, files: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    per_file = max(1, total_lines // files)
+    out = []
+    for f in range(files):
+        path = f"src/pkg{f % 17}/module_{f}.py"
+        out += [f"diff --git a/{path} b/{path}", f"--- a/{path}", f"+++ b/{path}"]
+        old = new = 1
+        written = 0
+        while written < per_file:
+            body, old_count, new_count = [], 0, 0
+            for i in range(min(40, per_file - written)):
+                r = rng.random()
+                if r < 0.35:
+                    body.append(f"+    value_{i} = compute(value_{i - 1}, factor={i})")
+                    new_count += 1
+                elif r < 0.5:
+                    body.append(f"-    value_{i} = legacy(value_{i - 1})")
+                    old_count += 1
+                else:
+                    body.append(f"     return transform(value_{i}, options)")
+                    old_count += 1
+                    new_count += 1
+            out.append(f"@@ -{old},{old_count} +{new},{new_count} @@ def handler_{written}():")
+            out += body
+            written += len(body)
+            old += old_count + 20
+            new += new_count + 20
+    return "\n".join(out) + "\n"
+
+
+def measure(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    result = fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, default=50_000)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_diff(args.lines, args.files)
+    print(f"diff: {len(text) / 1e6:.1f} MB, ~{args.lines} hunk lines, {args.files} files\n")
+
+    legacy, legacy_time, legacy_peak = measure(lambda: DiffAnalyzer.parse_diff(text), args.repeat)
+    compact, compact_time, compact_peak = measure(lambda: ParsedDiff.parse(text), args.repeat)
+
+    assert compact.to_dict() == legacy, "ParsedDiff.to_dict() differs from parse_diff()"
+
+    print(f"{'':28}{'parse_diff (dicts)':>20}{'ParsedDiff':>14}")
+    print(f"{'parse time (best)':28}{legacy_time * 1000:>18.1f}ms{compact_time * 1000:>12.1f}ms")
+    print(f"{'peak memory':28}{legacy_peak / 1e6:>18.1f}MB{compact_peak / 1e6:>12.1f}MB")
+
+    _, t_legacy, _ = measure(lambda: [f["path"] for f in legacy["files"]], args.repeat)
+    _, t_compact, _ = measure(lambda: compact.paths, args.repeat)
+    print(f"{'file paths':28}{t_legacy * 1e6:>18.1f}us{t_compact * 1e6:>12.1f}us")
+
+    def legacy_added():
+        return {
+            f["path"]: [c["line_number"] for h in f["hunks"] for c in h["changes"] if c["type"] == "added"]
+            for f in legacy["files"]
+        }
+
+    _, t_legacy, _ = measure(legacy_added, args.repeat)
+    _, t_compact, _ = measure(compact.added_line_numbers, args.repeat)
+    print(f"{'added lines per file':28}{t_legacy * 1000:>18.1f}ms{t_compact * 1000:>12.1f}ms")
+
+    target = compact.files[-1]
+    line = target.hunks[-1].target_start + 1
+
+    def legacy_hunk():
+        for f in legacy["files"]:
+            if f["path"] == target.path:
+                for h in f["hunks"]:
+                    if h["target_start"] <= line < h["target_start"] + max(h["target_length"], 1):
+                        return h
+        return None
+
+    _, t_legacy, _ = measure(legacy_hunk, args.repeat)
+    _, t_compact, _ = measure(lambda: compact.hunk_containing(target.path, line), args.repeat)
+    print(f"{'hunk containing line N':28}{t_legacy * 1e6:>18.1f}us{t_compact * 1e6:>12.1f}us")
+
+
+if __name__ == "__main__":
+    main()
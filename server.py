@@ -6,7 +6,6 @@ from __future__ import annotations
 
 import asyncio
 import os
-import fnmatch
 import yaml
 import shutil
 import structlog
@@ -17,7 +16,7 @@ from copy import deepcopy
 from pathlib import Path
 from typing import Any
 from fastapi import FastAPI, Request, HTTPException, Query, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from dotenv import load_dotenv
 
@@ -35,17 +34,34 @@ except ImportError:
     TextContent = Any  # type: ignore[assignment]
 
 # Local imports
-from models import Platform, ReviewRequest
+from models import Platform, ReviewRequest, UnifiedPRData
+from adapters.diff_stream import DiffFilter, parse_diff_fetch_config
+from adapters.http_client import PlatformHttpClient, parse_http_pool_config
 from webhook import WebhookHandler
 from services import AIReviewer, DiffAnalyzer, CommentService
 from services.rules_service import RulesHelper
+from services.live_log_archive import LiveLogArchive, parse_live_log_retention_config
 from services.live_log_store import LiveLogStore
+from services.live_log_stream import LiveLogBroker, parse_live_stream_config
+from services.parsed_diff import TargetLineIndex
+from services.incremental_review import file_patch_hashes, plan_incremental_review
+from services.token_budget import summarize_usage
 from services.ui_logs_config import parse_ui_logs_config
+from services.ai_providers import provider_health_snapshot, rate_limit_snapshot
 from services.analytics_store import AnalyticsStore
 from services.review_store import ReviewStore
 from services.feedback_analyzer import FeedbackAnalyzer
 from services.rule_evolver import RuleEvolver
 from services.owasp_updater import OWASPUpdater
+from services.project_review_scheduler import (
+    ProjectFile,
+    ProjectReviewScheduler,
+    parse_project_review_config,
+    prioritize_files,
+)
+from services.review_cache import ReviewCache, parse_review_cache_config
+from services.file_filters import classify_file, is_ignored, load_reviewignore
+from services.webhook_queue import WebhookJob, WebhookJobQueue, WebhookWorkerPool, parse_webhook_queue_config, pr_key
 from tools import ReviewTools
 
 
@@ -175,7 +191,9 @@ class CodeReviewServer:
         
         ai_config = config["ai"]
         self.rules_helper = RulesHelper()
-        self.ai_reviewer = AIReviewer(ai_config=ai_config)
+        self.review_cache_config = parse_review_cache_config(self.config)
+        self.review_cache = ReviewCache.from_config(self.review_cache_config) if self.review_cache_config.enabled else None
+        self.ai_reviewer = AIReviewer(ai_config=ai_config, cache=self.review_cache)
         
         self.diff_analyzer = DiffAnalyzer()
         self.analytics = AnalyticsStore()
@@ -192,12 +210,32 @@ class CodeReviewServer:
         )
       
         self.ui_logs_config = parse_ui_logs_config(self.config)
-        self.live_logs = LiveLogStore(max_events_per_run=self.ui_logs_config.max_events_per_poll)
+        self.live_log_retention = parse_live_log_retention_config(self.config)
+        self.live_logs = LiveLogStore(
+            max_events_per_run=self.ui_logs_config.max_events_per_poll,
+            max_runs=self.live_log_retention.max_runs,
+            max_age_seconds=self.live_log_retention.max_age_hours * 3600,
+            archive=LiveLogArchive.from_config(self.live_log_retention) if self.live_log_retention.archive_enabled else None,
+        )
+        self.live_stream_config = parse_live_stream_config(self.config)
+        self.live_broker = LiveLogBroker(queue_size=self.live_stream_config.queue_size)
+        self.live_broker.attach(self.live_logs)
         template_config = config.get("review", {}).get("template")
         self.comment_service = CommentService(template_config=template_config)
 
+        self.webhook_queue_config = parse_webhook_queue_config(self.config)
+        self.webhook_queue = WebhookJobQueue(Path(self.webhook_queue_config.db_path))
+        self.webhook_workers = WebhookWorkerPool(
+            self.webhook_queue,
+            self._process_webhook_job,
+            workers=self.webhook_queue_config.workers,
+            per_repo_concurrency=self.webhook_queue_config.per_repo_concurrency,
+            poll_interval_seconds=self.webhook_queue_config.poll_interval_seconds,
+        )
         
-        # Initialize platform adapters
+        # Initialize platform adapters (one pooled HTTP client shared by all)
+        self.http = PlatformHttpClient(parse_http_pool_config(self.config))
+        self.diff_filter = DiffFilter(parse_diff_fetch_config(self.config), ignore_patterns=load_reviewignore())
         self.adapters = {}
         self._init_adapters()
         
@@ -217,7 +255,14 @@ class CodeReviewServer:
         config = deepcopy(updated_config)
         self.ui_logs_config = parse_ui_logs_config(self.config)
         self.live_logs.set_max_events_per_run(self.ui_logs_config.max_events_per_poll)
-        self.ai_reviewer = AIReviewer(ai_config=self.config.get("ai", {}))
+        self.live_log_retention = parse_live_log_retention_config(self.config)
+        self.live_logs.set_retention(
+            max_runs=self.live_log_retention.max_runs,
+            max_age_seconds=self.live_log_retention.max_age_hours * 3600,
+        )
+        self.live_stream_config = parse_live_stream_config(self.config)
+        self.live_broker.queue_size = self.live_stream_config.queue_size
+        self.ai_reviewer = AIReviewer(ai_config=self.config.get("ai", {}), cache=self.review_cache)
         self.review_tools = ReviewTools(self.ai_reviewer, self.diff_analyzer)
         template_config = self.config.get("review", {}).get("template")
         self.comment_service = CommentService(template_config=template_config)
@@ -230,32 +275,48 @@ class CodeReviewServer:
         if platforms_config.get('github', {}).get('enabled'):
             try:
                 from adapters.github_adapter import GitHubAdapter
-                self.adapters[Platform.GITHUB] = GitHubAdapter()
+                self.adapters[Platform.GITHUB] = GitHubAdapter(
+                    http=self.http,
+                    api_url=platforms_config['github'].get('api_url'),
+                    diff_filter=self.diff_filter,
+                )
             except Exception as e:
                 logger.warning("github_adapter_init_failed", error=str(e))
         
         if platforms_config.get('gitlab', {}).get('enabled'):
             try:
                 from adapters.gitlab_adapter import GitLabAdapter
-                self.adapters[Platform.GITLAB] = GitLabAdapter()
+                self.adapters[Platform.GITLAB] = GitLabAdapter(
+                    http=self.http,
+                    api_url=platforms_config['gitlab'].get('api_url'),
+                    diff_filter=self.diff_filter,
+                )
             except Exception as e:
                 logger.warning("gitlab_adapter_init_failed", error=str(e))
         
         if platforms_config.get('bitbucket', {}).get('enabled'):
             try:
                 from adapters.bitbucket_adapter import BitbucketAdapter
-                self.adapters[Platform.BITBUCKET] = BitbucketAdapter()
+                self.adapters[Platform.BITBUCKET] = BitbucketAdapter(
+                    http=self.http,
+                    api_url=platforms_config['bitbucket'].get('api_url'),
+                    diff_filter=self.diff_filter,
+                )
             except Exception as e:
                 logger.warning("bitbucket_adapter_init_failed", error=str(e))
         
         if platforms_config.get('azure', {}).get('enabled'):
             try:
                 from adapters.azure_adapter import AzureAdapter
-                self.adapters[Platform.AZURE] = AzureAdapter()
+                self.adapters[Platform.AZURE] = AzureAdapter(
+                    http=self.http,
+                    api_url=platforms_config['azure'].get('api_url'),
+                    diff_filter=self.diff_filter,
+                )
             except Exception as e:
                 logger.warning("azure_adapter_init_failed", error=str(e))
 
-    def _start_live_run(self, pr_data) -> str | None:
+    def _start_live_run(self, pr_data, run_id: str | None = None) -> str | None:
         try:
             return self.live_logs.start_run(
                 platform=pr_data.platform.value,
@@ -265,6 +326,7 @@ class CodeReviewServer:
                 source_branch=pr_data.source_branch,
                 target_branch=pr_data.target_branch,
                 repo=pr_data.repo_full_name,
+                run_id=run_id,
             )
         except Exception as e:
             logger.warning("live_run_start_failed", error=str(e))
@@ -308,9 +370,22 @@ class CodeReviewServer:
         except Exception as e:
             logger.warning("live_run_fail_failed", run_id=run_id, error=str(e))
     
+    async def _receive_webhook(self, request: Request) -> UnifiedPRData | None:
+        """Parse an incoming webhook; returns None for ignored events."""
+        print("\n" + "=" * 80)
+        print("🔔 WEBHOOK RECEIVED")
+        print("=" * 80)
+
+        pr_data = await self.webhook_handler.handle(request)
+
+        if not pr_data:
+            print("⚠️  Ignored: Not a PR event or unsupported platform")
+            print("=" * 80 + "\n")
+        return pr_data
+
     async def process_webhook(self, request: Request) -> dict:
         """
-        Process incoming webhook from any platform
+        Process incoming webhook from any platform inline (queue disabled).
 
         Args:
             request: FastAPI request
@@ -318,7 +393,104 @@ class CodeReviewServer:
         Returns:
             Response dict
         """
-        run_id: str | None = None
+        pr_data = await self._receive_webhook(request)
+        if not pr_data:
+            return {"status": "ignored", "message": "Not a PR event or unsupported platform"}
+
+        run_id = self._start_live_run(pr_data)
+        return await self.review_pull_request(pr_data, run_id)
+
+    async def enqueue_webhook(self, request: Request) -> dict:
+        """
+        Parse the webhook and hand the review to the worker pool.
+
+        Returns immediately with the run_id so the platform's webhook call
+        does not wait for the diff fetch and LLM round-trip.
+        """
+        pr_data = await self._receive_webhook(request)
+        if not pr_data:
+            return {"status": "ignored", "message": "Not a PR event or unsupported platform"}
+
+        run_id = self._start_live_run(pr_data)
+        sha = pr_data.metadata.get("sha")
+        job_id = await asyncio.to_thread(
+            self.webhook_queue.enqueue,
+            pr_data.model_dump(mode="json"),
+            run_id=run_id,
+            platform=pr_data.platform.value,
+            repo=pr_data.repo_full_name,
+            pr_id=str(pr_data.pr_id),
+            sha=sha,
+            delay_seconds=self.webhook_queue_config.debounce_seconds,
+        )
+        superseded = await self.webhook_workers.supersede(
+            pr_key(pr_data.platform.value, pr_data.repo_full_name, str(pr_data.pr_id)),
+            sha=sha,
+            keep_job_id=job_id,
+        )
+        self._record_superseded_runs(run_id, superseded)
+        self._emit_live_event(
+            run_id,
+            step="queued",
+            message="⏳ Review queued",
+            meta={
+                "job_id": job_id,
+                "sha": sha,
+                "queue_depth": await asyncio.to_thread(self.webhook_queue.depth),
+                "coalesced": len(superseded["coalesced"]),
+                "cancelled": len(superseded["cancelled"]),
+            },
+        )
+        self.webhook_workers.notify()
+        print(f"⏳ Queued PR #{pr_data.pr_id} ({pr_data.repo_full_name}) as job {job_id}")
+        print("=" * 80 + "\n")
+        return {
+            "status": "queued",
+            "job_id": job_id,
+            "run_id": run_id,
+            "pr_id": pr_data.pr_id,
+            "platform": pr_data.platform.value,
+            "coalesced": len(superseded["coalesced"]),
+            "cancelled": len(superseded["cancelled"]),
+        }
+
+    def _record_superseded_runs(self, run_id: str | None, superseded: dict[str, list[dict[str, Any]]]) -> None:
+        """Close live runs replaced by a newer push and count them on the new run."""
+        coalesced = superseded.get("coalesced", [])
+        cancelled = superseded.get("cancelled", [])
+        for kind, jobs in (("coalesced", coalesced), ("cancelled", cancelled)):
+            for job in jobs:
+                old_run_id = job.get("run_id")
+                if not old_run_id:
+                    continue
+                self._emit_live_event(
+                    old_run_id,
+                    step="superseded",
+                    message=f"⏭️ Superseded by a newer push ({kind})",
+                    level="warning",
+                    meta={"superseded_by": run_id, "sha": job.get("sha")},
+                )
+                try:
+                    self.live_logs.supersede_run(old_run_id, superseded_by=run_id)
+                except KeyError:
+                    pass
+        if run_id and (coalesced or cancelled):
+            try:
+                self.live_logs.record_coalesced(run_id, coalesced=len(coalesced), cancelled=len(cancelled))
+            except KeyError:
+                pass
+
+    async def _process_webhook_job(self, job: WebhookJob) -> dict:
+        """Worker-pool entry point: rebuild the PR data and run the review."""
+        pr_data = UnifiedPRData.model_validate(job.payload)
+        run_id = job.run_id
+        if not run_id or self.live_logs.get_run(run_id) is None:
+            # Job outlived the in-memory live log (e.g. server restart).
+            run_id = self._start_live_run(pr_data, run_id=run_id)
+        return await self.review_pull_request(pr_data, run_id)
+
+    async def review_pull_request(self, pr_data: UnifiedPRData, run_id: str | None) -> dict:
+        """Fetch diff, review, post comments and update status for one PR."""
 
         def out(
             message: str,
@@ -330,21 +502,6 @@ class CodeReviewServer:
             print(message)
             self._emit_live_event(run_id, step=step, message=message, level=level, meta=meta)
 
-        out("\n" + "=" * 80, step="console_banner")
-        out("🔔 WEBHOOK RECEIVED", step="console_banner")
-        out("=" * 80, step="console_banner")
-
-        # Parse webhook
-        pr_data = await self.webhook_handler.handle(request)
-
-        if not pr_data:
-            out("⚠️  Ignored: Not a PR event or unsupported platform", step="ignored", level="warning")
-            out("=" * 80 + "\n", step="console_banner")
-            return {"status": "ignored", "message": "Not a PR event or unsupported platform"}
-
-        # Start live run before detailed prints so console lines are streamed to UI.
-        run_id = self._start_live_run(pr_data)
-
         out(f"📦 Platform: {pr_data.platform.value.upper()}", step="console_header")
         out(f"🔗 PR #{pr_data.pr_id}: {pr_data.title}", step="console_header")
         out(f"👤 Author: {pr_data.author}", step="console_header")
@@ -368,10 +525,12 @@ class CodeReviewServer:
                 "platform": pr_data.platform.value,
             }
 
+        # Per-run cache of platform lookups (head sha, diff refs) and API-call counts
+        ctx = adapter.context(pr_data)
         try:
             # Fetch actual diff
             out("📥 Step 1/5: Fetching diff from platform...", step="step_1")
-            diff = await adapter.fetch_diff(pr_data)
+            diff = await adapter.fetch_diff(pr_data, ctx=ctx)
             if not diff:
                 out("❌ Failed to fetch diff", step="step_1", level="error")
                 out("=" * 80 + "\n", step="console_banner")
@@ -385,14 +544,28 @@ class CodeReviewServer:
                     "platform": pr_data.platform.value,
                 }
             out(f"✅ Diff fetched successfully ({len(diff)} bytes)", step="step_1", meta={"bytes": len(diff)})
+            diff_stats = ctx.diff_stats
+            if diff_stats and diff_stats.files_skipped:
+                reasons = ", ".join(f"{k}: {v}" for k, v in sorted(diff_stats.skipped.items()))
+                out(
+                    f"   ⏭️  Skipped {diff_stats.files_skipped} file(s) ({reasons})",
+                    step="step_1",
+                    meta=diff_stats.summary(),
+                )
+            if diff_stats and diff_stats.truncated:
+                out(
+                    f"   ⚠️  Diff budget reached; reviewing the first {diff_stats.files_kept} file(s)",
+                    step="step_1",
+                    level="warning",
+                )
             print()
 
             pr_data.diff = diff
 
             # Analyze diff
             out("🔍 Step 2/5: Analyzing diff...", step="step_2")
-            diff_info = self.diff_analyzer.parse_diff(diff)
-            pr_data.files_changed = [f["path"] for f in diff_info["files"]]
+            parsed_diff = self.diff_analyzer.parse(diff)
+            pr_data.files_changed = parsed_diff.paths
             out(
                 f"✅ Found {len(pr_data.files_changed)} changed file(s):",
                 step="step_2",
@@ -402,11 +575,33 @@ class CodeReviewServer:
                 out(f"   📄 {file}", step="step_2_file")
             if len(pr_data.files_changed) > 5:
                 out(f"   ... and {len(pr_data.files_changed) - 5} more", step="step_2_file")
+
+            # Incremental review: only what was pushed since the last reviewed commit
+            review_config = self.config["review"]
+            head_sha = await adapter.head_sha(pr_data, ctx)
+            file_hashes = file_patch_hashes(parsed_diff)
+            plan = None
+            if (review_config.get("incremental") or {}).get("enabled", True) and head_sha:
+                previous = self.review_store.get_last_pr_review(
+                    pr_data.repo_full_name,
+                    str(pr_data.pr_id),
+                    platform=pr_data.platform.value,
+                )
+                plan = await plan_incremental_review(
+                    adapter, pr_data, ctx, parsed_diff, file_hashes, previous, head_sha
+                )
+            if plan is not None:
+                out(
+                    f"♻️  Incremental review since {plan.base_sha[:7]} ({plan.mode}): "
+                    f"{len(plan.review_files)}/{plan.total_files} file(s) to review, "
+                    f"{len(plan.carried_issues)} issue(s) carried over",
+                    step="step_2",
+                    meta=plan.summary(),
+                )
             print()
 
             # Perform AI review
             out("🤖 Step 3/5: Starting AI code review...", step="step_3")
-            review_config = self.config["review"]
             ai_cfg = self.config.get("ai", {})
             if isinstance(ai_cfg.get("providers"), list) and ai_cfg["providers"]:
                 primary = ai_cfg.get("primary") or ai_cfg["providers"][0].get("name")
@@ -423,15 +618,51 @@ class CodeReviewServer:
             out(f"   Focus areas: {', '.join(review_config.get('focus', []))}", step="step_3")
             print()
 
-            review_result = await self.ai_reviewer.review(
-                diff=diff,
-                files_changed=pr_data.files_changed,
-                focus_areas=review_config.get("focus", []),
-                repo=pr_data.repo_full_name,
-            )
+            def on_issue(issue: dict) -> None:
+                # Findings show up in the live log while the model is still writing
+                location = issue.get("file_path") or "?"
+                if issue.get("line_number"):
+                    location += f":{issue['line_number']}"
+                out(
+                    f"   🔎 [{str(issue.get('severity') or 'info').upper()}] {issue.get('title', 'Issue')} ({location})",
+                    step="step_3",
+                    meta={"event": "issue", "issue": issue},
+                )
+
+            new_result = None
+            if plan is None or plan.review_diff:
+                new_result = await self.ai_reviewer.review(
+                    diff=plan.review_diff if plan else diff,
+                    files_changed=plan.review_files if plan else pr_data.files_changed,
+                    focus_areas=review_config.get("focus", []),
+                    repo=pr_data.repo_full_name,
+                    on_issue=on_issue,
+                )
+            else:
+                out("   No new changes in the PR's files since the last review", step="step_3")
+            review_result = plan.merge(new_result) if plan else new_result
 
             out("✅ AI Review completed!", step="step_3")
             out(f"   Score: {review_result.score}/10", step="step_3")
+            token_summary = self.ai_reviewer.last_token_summary() if new_result else summarize_usage([])
+            if token_summary["requests"]:
+                out(
+                    f"   Tokens: {token_summary['prompt_tokens']} prompt "
+                    f"({token_summary['content_tokens']} diff, {token_summary['rules_tokens']} rules), "
+                    f"~{token_summary['completion_tokens']} completion over {token_summary['requests']} request(s)"
+                    + (f", {token_summary['cached_tokens']} from prompt cache" if token_summary["cached_tokens"] else ""),
+                    step="step_3",
+                    meta={
+                        **token_summary,
+                        "per_request": [u.to_dict() for u in self.ai_reviewer.last_token_usage],
+                    },
+                )
+                if token_summary["truncated"]:
+                    out(
+                        f"   ⚠️  {token_summary['truncated']} request(s) truncated to fit the token budget",
+                        step="step_3",
+                        level="warning",
+                    )
             out(f"   Issues: {review_result.total_issues} total", step="step_3")
             if review_result.critical_count > 0:
                 out(f"   🔴 Critical: {review_result.critical_count}", step="step_3")
@@ -461,15 +692,32 @@ class CodeReviewServer:
                 summary_comment = self.comment_service.format_summary_comment(
                     review_result,
                     show_detailed_table=show_detailed_table,
+                    skipped_files=diff_stats.skipped_files if diff_stats else (),
                 )
-                await adapter.post_summary_comment(pr_data, summary_comment)
+                await adapter.post_summary_comment(pr_data, summary_comment, ctx=ctx)
                 out("   ✅ Summary comment posted", step="step_4")
 
             if strategy in ["inline", "both"]:
-                inline_comments = self.comment_service.format_inline_comments(review_result)
+                line_index = TargetLineIndex.from_diff(
+                    parsed_diff,
+                    max_snap=int(review_config.get("inline_snap_lines", 3)),
+                )
+                # Carried-over issues were already commented on by the previous review
+                inline_comments = self.comment_service.format_inline_comments(
+                    new_result,
+                    line_index=line_index,
+                ) if new_result else []
+                if line_index.snapped or line_index.dropped:
+                    out(
+                        f"   📍 Inline lines outside the diff: {line_index.snapped} snapped, "
+                        f"{line_index.dropped} dropped",
+                        step="step_4",
+                        level="warning" if line_index.dropped else "info",
+                        meta=line_index.summary(),
+                    )
                 if inline_comments:
                     out(f"   💭 Posting {len(inline_comments)} inline comment(s)...", step="step_4")
-                    await adapter.post_inline_comments(pr_data, inline_comments)
+                    await adapter.post_inline_comments(pr_data, inline_comments, ctx=ctx)
                     out("   ✅ Inline comments posted", step="step_4")
             print()
 
@@ -479,17 +727,17 @@ class CodeReviewServer:
                 status_msg = "Critical issues found - merge blocked"
                 out("   ❌ Status: FAILURE", step="step_5", level="error")
                 out(f"   Message: {status_msg}", step="step_5", level="error")
-                await adapter.update_status(pr_data, "failure", status_msg)
+                await adapter.update_status(pr_data, "failure", status_msg, ctx=ctx)
             elif review_result.score >= 8:
                 status_msg = f"Code quality: {review_result.score}/10"
                 out("   ✅ Status: SUCCESS", step="step_5")
                 out(f"   Message: {status_msg}", step="step_5")
-                await adapter.update_status(pr_data, "success", status_msg)
+                await adapter.update_status(pr_data, "success", status_msg, ctx=ctx)
             else:
                 status_msg = f"Review complete: {review_result.score}/10"
                 out("   ✅ Status: SUCCESS", step="step_5")
                 out(f"   Message: {status_msg}", step="step_5")
-                await adapter.update_status(pr_data, "success", status_msg)
+                await adapter.update_status(pr_data, "success", status_msg, ctx=ctx)
             print()
 
             logger.info(
@@ -520,6 +768,7 @@ class CodeReviewServer:
                 repo=pr_data.repo_full_name,
                 author=pr_data.author,
                 platform=pr_data.platform.value,
+                token_usage=token_summary,
             )
             self.review_store.persist_review(
                 review_result,
@@ -527,6 +776,9 @@ class CodeReviewServer:
                 pr_id=str(pr_data.pr_id),
                 platform=pr_data.platform.value,
                 author=pr_data.author,
+                # A failed or partial review must not become the next push's incremental base
+                head_sha=None if review_result.degraded else head_sha,
+                file_hashes=None if review_result.degraded else file_hashes,
             )
 
             # Auto-evolve repo rules if enough reviews accumulated
@@ -552,6 +804,7 @@ class CodeReviewServer:
                 "score": review_result.score,
                 "issues": review_result.total_issues,
                 "critical": review_result.critical_count,
+                "platform_api_calls": ctx.api_calls,
             }
 
         except Exception as e:
@@ -565,6 +818,8 @@ class CodeReviewServer:
                 "message": str(e),
                 "run_id": run_id,
             }
+        finally:
+            adapter.log_api_calls(ctx, run_id=run_id)
 
 # Create server instance
 review_server = CodeReviewServer()
@@ -623,11 +878,19 @@ async def lifespan(app: FastAPI):
         _owasp_task = asyncio.create_task(_owasp_scheduler())
         print(f"📋 OWASP Auto-Update: every {interval_days} day(s)")
 
+    if review_server.webhook_queue_config.enabled:
+        await review_server.webhook_workers.start()
+        depth = await asyncio.to_thread(review_server.webhook_queue.depth)
+        print(f"📬 Webhook Queue: {review_server.webhook_queue_config.workers} worker(s), depth {depth}")
+
     yield
 
     if _owasp_task:
         _owasp_task.cancel()
 
+    await review_server.webhook_workers.stop()
+    await review_server.http.aclose()
+
     print("\n" + "="*80)
     print("🛑 SERVER SHUTTING DOWN")
     print("="*80 + "\n")
@@ -797,6 +1060,7 @@ async def logs_config():
     return {
         "poll_interval_seconds": cfg.poll_interval_seconds,
         "max_events_per_poll": cfg.max_events_per_poll,
+        "stream_enabled": review_server.live_stream_config.enabled,
     }
 
 
@@ -905,8 +1169,9 @@ async def logs_active():
 
 
 @app.get("/api/logs/runs")
-async def logs_runs():
-    runs = review_server.live_logs.list_runs()
+async def logs_runs(limit: int = Query(100, ge=1, le=1000)):
+    """Newest runs first, including finished runs spilled to the archive."""
+    runs = review_server.live_logs.list_runs(limit=limit)
     return {"count": len(runs), "runs": runs}
 
 
@@ -927,6 +1192,70 @@ async def logs_run_events(run_id: str, cursor: int = 0, limit: int = 200):
         raise HTTPException(status_code=404, detail="Run not found")
 
 
+@app.get("/api/logs/runs/{run_id}/stream")
+async def logs_run_stream(request: Request, run_id: str, cursor: int = 0):
+    """
+    Server-Sent Events for one run: events after ``cursor`` (or the
+    ``Last-Event-ID`` header of a reconnecting client), then live events
+    until the run finishes.
+    """
+    stream_cfg = review_server.live_stream_config
+    if not stream_cfg.enabled:
+        raise HTTPException(status_code=404, detail="Log streaming is disabled")
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        cursor = max(cursor, int(last_event_id))
+    try:
+        frames = review_server.live_broker.stream(
+            review_server.live_logs,
+            run_id,
+            cursor=cursor,
+            batch_limit=review_server.ui_logs_config.max_events_per_poll,
+            keepalive_seconds=stream_cfg.keepalive_seconds,
+            is_disconnected=request.is_disconnected,
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return StreamingResponse(
+        frames,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/ai/rate-limits")
+async def ai_rate_limits():
+    """Per-provider request/token budget utilisation and throttling counters."""
+    return {"providers": rate_limit_snapshot()}
+
+
+@app.get("/api/ai/health")
+async def ai_provider_health():
+    """Circuit breaker state and EWMA latency/error health per provider."""
+    router = review_server.ai_reviewer.router
+    return {
+        "chain": router.chain,
+        "primary": router.primary,
+        "providers": provider_health_snapshot(),
+        "hedging": {"enabled": router.hedging.enabled, **router.hedge_budget.snapshot()},
+    }
+
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Review result cache hit/miss counters and size."""
+    if review_server.review_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **review_server.review_cache.stats()}
+
+
+@app.delete("/api/cache")
+async def cache_clear():
+    if review_server.review_cache is None:
+        return {"enabled": False, "removed": 0}
+    return {"enabled": True, "removed": review_server.review_cache.clear()}
+
+
 @app.get("/api/analytics/overview")
 async def analytics_overview():
     return review_server.analytics.get_overview()
@@ -968,54 +1297,6 @@ REVIEW_EXTENSIONS = {
     ".css", ".scss", ".less", ".html", ".sql",
 }
 
-_DEFAULT_REVIEWIGNORE = Path(__file__).parent / ".reviewignore"
-
-
-def _parse_reviewignore(text: str) -> list[str]:
-    patterns: list[str] = []
-    for line in text.splitlines():
-        stripped = line.strip()
-        if not stripped or stripped.startswith("#"):
-            continue
-        patterns.append(stripped)
-    return patterns
-
-
-def _load_reviewignore(project_root: Path) -> list[str]:
-    local = project_root / ".reviewignore"
-    if local.is_file():
-        return _parse_reviewignore(local.read_text(encoding="utf-8", errors="ignore"))
-    if _DEFAULT_REVIEWIGNORE.is_file():
-        return _parse_reviewignore(_DEFAULT_REVIEWIGNORE.read_text(encoding="utf-8", errors="ignore"))
-    return []
-
-
-def _is_ignored(rel_path: str, patterns: list[str]) -> bool:
-    rel = rel_path.replace("\\", "/")
-    parts = rel.split("/")
-
-    for pat in patterns:
-        p = pat.rstrip("/")
-        is_dir_pattern = pat.endswith("/")
-
-        if "/" not in p:
-            if is_dir_pattern:
-                if any(fnmatch.fnmatch(part, p) for part in parts[:-1]):
-                    return True
-            else:
-                if fnmatch.fnmatch(parts[-1], p):
-                    return True
-                if any(fnmatch.fnmatch(part, p) for part in parts[:-1]):
-                    return True
-        else:
-            if fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(rel, p + "/**"):
-                return True
-            if is_dir_pattern and fnmatch.fnmatch(rel, p + "*"):
-                return True
-
-    return False
-
-
 def _detect_lang(ext: str) -> str:
     m = {
         ".py": "python", ".cs": "csharp", ".java": "java",
@@ -1029,8 +1310,8 @@ def _detect_lang(ext: str) -> str:
     return m.get(ext.lower(), "auto")
 
 
-async def _run_project_review(review_id: str, tmp_dir: str, focus: list[str], provider: str | None, model: str | None, exclude_categories: set[str] | None = None):
-    import time, json as _json
+async def _run_project_review(review_id: str, tmp_dir: str, focus: list[str], provider: str | None, model: str | None, exclude_categories: set[str] | None = None, bypass_cache: bool = False):
+    import time
     project = Path(tmp_dir)
     rev = _project_reviews[review_id]
     excl = exclude_categories or set()
@@ -1038,107 +1319,94 @@ async def _run_project_review(review_id: str, tmp_dir: str, focus: list[str], pr
     rev["status"] = "scanning"
     rev["status_message"] = "Dosyalar taranıyor ve sınıflandırılıyor..."
 
-    ignore_patterns = _load_reviewignore(project)
-    files: list[Path] = []
+    ignore_patterns = load_reviewignore(project)
+    files: list[ProjectFile] = []
     skipped_categories: dict[str, int] = {}
     for f in sorted(project.rglob("*")):
         if not f.is_file():
             continue
         rel = str(f.relative_to(project))
-        if _is_ignored(rel, ignore_patterns):
+        if is_ignored(rel, ignore_patterns):
             continue
-        if f.suffix.lower() not in REVIEW_EXTENSIONS or f.stat().st_size > 50_000:
+        size = f.stat().st_size
+        if f.suffix.lower() not in REVIEW_EXTENSIONS or size > 50_000:
             continue
-        cat = _classify_file(rel, f.suffix)
+        cat = classify_file(rel, f.suffix)
         if cat in excl:
             skipped_categories[cat] = skipped_categories.get(cat, 0) + 1
             continue
-        files.append(f)
+        files.append(ProjectFile(rel=rel, category=cat, size=size))
+    files = prioritize_files(files)
 
     rev["total_files"] = len(files)
     rev["status"] = "reviewing"
     rev["status_message"] = f"{len(files)} dosya bulundu, review başlıyor..."
-    results = []
-    consecutive_errors = 0
-
-    for idx, fpath in enumerate(files):
-        if rev.get("status") == "cancelled":
-            break
-
-        import time as _time
-        rel = str(fpath.relative_to(project))
-        rev["current_file"] = rel
-        rev["current_file_started_at"] = _time.time()
-        rev["reviewed_count"] = idx
-        rev["status_message"] = f"[{idx + 1}/{len(files)}] {rel}"
 
+    async def review_one(item: ProjectFile) -> dict:
+        fpath = project / item.rel
         code = fpath.read_text(encoding="utf-8", errors="replace")
         if len(code.strip()) < 10:
-            results.append({"file": rel, "skipped": True, "reason": "empty"})
-            continue
+            return {"file": item.rel, "skipped": True, "reason": "empty"}
 
         truncated = len(code) > 10_000
         if truncated:
             code = code[:10_000]
 
         lang = _detect_lang(fpath.suffix)
-        providers_to_try = [provider] if provider else [None]
-        fallback_providers = ["openai", "anthropic", "groq"]
-        for fb in fallback_providers:
-            if fb not in providers_to_try and fb != provider:
-                providers_to_try.append(fb)
-
-        file_result = None
-        last_error = None
-        for prov_attempt in providers_to_try:
-            try:
-                t0 = time.time()
-                review_result = await review_server.ai_reviewer.review_file(
-                    code=code,
-                    file_path=rel,
-                    language=lang,
-                    focus_areas=focus,
-                    provider=prov_attempt,
-                    model=model if prov_attempt == provider else None,
-                )
-                elapsed = round(time.time() - t0, 1)
-                file_result = {
-                    "file": rel,
-                    "language": lang,
-                    "score": review_result.score,
-                    "total_issues": review_result.total_issues,
-                    "truncated": truncated,
-                    "review_time_sec": elapsed,
-                    "issues": [
-                        {
-                            "severity": iss.severity.value,
-                            "title": iss.title,
-                            "description": iss.description,
-                            "category": iss.category,
-                            "suggestion": iss.suggestion,
-                        }
-                        for iss in review_result.issues
-                    ],
+        t0 = time.time()
+        review_result = await review_server.ai_reviewer.review_file(
+            code=code,
+            file_path=item.rel,
+            language=lang,
+            focus_areas=focus,
+            provider=provider,
+            model=model,
+            bypass_cache=bypass_cache,
+        )
+        return {
+            "file": item.rel,
+            "language": lang,
+            "score": review_result.score,
+            "total_issues": review_result.total_issues,
+            "truncated": truncated,
+            "review_time_sec": round(time.time() - t0, 1),
+            "cache_hit": review_server.ai_reviewer.last_cache_hit,
+            "provider": review_server.ai_reviewer.last_provider_used,
+            "issues": [
+                {
+                    "severity": iss.severity.value,
+                    "title": iss.title,
+                    "description": iss.description,
+                    "category": iss.category,
+                    "suggestion": iss.suggestion,
                 }
-                break
-            except Exception as e:
-                last_error = str(e)
-                continue
-
-        if file_result is None:
-            file_result = {"file": rel, "error": f"Tüm provider'lar başarısız: {(last_error or 'unknown')[:120]}"}
-            consecutive_errors += 1
-        elif file_result.get("error"):
-            consecutive_errors += 1
-        else:
-            consecutive_errors = 0
-
-        results.append(file_result)
+                for iss in review_result.issues
+            ],
+        }
 
-        if consecutive_errors >= 5:
-            rev["status"] = "failed"
-            rev["status_message"] = f"Review durduruldu: Art arda {consecutive_errors} dosya hata aldı. Tüm AI provider'lar rate-limited olabilir."
-            break
+    def on_start(item: ProjectFile) -> None:
+        rev["current_file"] = item.rel
+        rev["current_file_started_at"] = time.time()
+        rev["in_progress"] = list(scheduler.in_progress)
+        rev["status_message"] = f"[{rev['reviewed_count'] + 1}/{len(files)}] {item.rel}"
+
+    def on_done(item: ProjectFile, result: dict) -> None:
+        rev["reviewed_count"] = rev.get("reviewed_count", 0) + 1
+        rev["results"].append(result)
+        rev["in_progress"] = list(scheduler.in_progress)
+
+    sched_cfg = parse_project_review_config(review_server.config)
+    # Provider fallback and circuit breaking happen inside the AI router.
+    scheduler = ProjectReviewScheduler(
+        review_one,
+        workers=sched_cfg.workers,
+        is_cancelled=lambda: rev.get("status") == "cancelled",
+        on_start=on_start,
+        on_done=on_done,
+    )
+    rev["reviewed_count"] = 0
+    results = await scheduler.run(files)
+    rev["in_progress"] = []
 
     reviewed = [r for r in results if not r.get("skipped") and not r.get("error")]
     errors = [r for r in results if r.get("error")]
@@ -1157,10 +1425,7 @@ async def _run_project_review(review_id: str, tmp_dir: str, focus: list[str], pr
     error_count = len(errors)
     error_message = None
     if final_status == "failed":
-        if error_count > 0 and errors[0].get("error", "").startswith("All AI providers"):
-            error_message = "Tüm AI provider'lar rate-limited. Lütfen farklı bir provider seçin veya daha sonra tekrar deneyin."
-        else:
-            error_message = f"{error_count} dosyada hata oluştu ({len(reviewed)} dosya başarıyla review edildi)."
+        error_message = f"{error_count} dosyada hata oluştu ({len(reviewed)} dosya başarıyla review edildi)."
 
     rev.update({
         "status": final_status,
@@ -1185,48 +1450,6 @@ async def _run_project_review(review_id: str, tmp_dir: str, focus: list[str], pr
     shutil.rmtree(tmp_dir, ignore_errors=True)
 
 
-_AUTO_GENERATED_PATTERNS = {
-    "migrations", "migration", "Migrations",
-    "designer.cs", ".designer.cs", ".generated.cs", ".g.cs", ".g.i.cs",
-    "assemblyinfo.cs", "globalusings.g.cs",
-    "reference.cs", "service.reference",
-}
-_AUTO_GENERATED_DIRS = {
-    "Migrations", "migrations", "Generated", "generated",
-    "wwwroot", "Properties",
-}
-_TEST_PATTERNS = {"test", "tests", "Test", "Tests", "Spec", "spec", "Specs", "specs", "__tests__", "__test__"}
-_BOILERPLATE_FILES = {
-    "program.cs", "startup.cs", "globalusings.cs",
-    "appsettings.json", "appsettings.development.json",
-    "launchsettings.json",
-}
-_CONFIG_EXTENSIONS = {".json", ".xml", ".yaml", ".yml", ".toml", ".ini", ".config", ".csproj", ".sln", ".props", ".targets"}
-
-
-def _classify_file(rel: str, ext: str) -> str:
-    rel_lower = rel.lower()
-    parts_lower = [p.lower() for p in Path(rel).parts]
-
-    if any(d.lower() in parts_lower for d in _AUTO_GENERATED_DIRS):
-        return "auto_generated"
-    if any(pat in rel_lower for pat in _AUTO_GENERATED_PATTERNS):
-        return "auto_generated"
-
-    if any(t in parts_lower for t in _TEST_PATTERNS):
-        return "test"
-    if rel_lower.endswith("tests.cs") or rel_lower.endswith("test.cs") or rel_lower.endswith(".spec.ts") or rel_lower.endswith(".test.ts") or rel_lower.endswith("_test.py") or rel_lower.endswith("_test.go"):
-        return "test"
-
-    if Path(rel).name.lower() in _BOILERPLATE_FILES:
-        return "boilerplate"
-
-    if ext.lower() in _CONFIG_EXTENSIONS:
-        return "config"
-
-    return "source"
-
-
 @app.post("/api/project-review/plan")
 async def project_review_plan(file: UploadFile = File(...)):
     if not file.filename or not file.filename.endswith(".zip"):
@@ -1245,21 +1468,21 @@ async def project_review_plan(file: UploadFile = File(...)):
         zip_path.unlink()
 
         project = Path(tmp_dir)
-        ignore_patterns = _load_reviewignore(project)
+        ignore_patterns = load_reviewignore(project)
         files = []
         ignored_count = 0
         for f in sorted(project.rglob("*")):
             if not f.is_file():
                 continue
             rel = str(f.relative_to(project))
-            if _is_ignored(rel, ignore_patterns):
+            if is_ignored(rel, ignore_patterns):
                 ignored_count += 1
                 continue
             if f.suffix.lower() not in REVIEW_EXTENSIONS:
                 continue
             if f.stat().st_size > 50_000:
                 continue
-            category = _classify_file(rel, f.suffix)
+            category = classify_file(rel, f.suffix)
             files.append({
                 "file": rel,
                 "language": _detect_lang(f.suffix),
@@ -1290,6 +1513,7 @@ async def project_review_upload(
     provider: str = Form(None),
     model: str = Form(None),
     exclude_categories: str = Form("auto_generated,config"),
+    bypass_cache: bool = Form(False),
 ):
     if not file.filename or not file.filename.endswith(".zip"):
         raise HTTPException(400, "Only .zip files are accepted")
@@ -1315,40 +1539,15 @@ async def project_review_upload(
     prov = provider if provider and provider != "null" else None
     mod = model if model and model != "null" else None
 
-    # Pre-flight: test AI provider before starting
-    try:
-        test_providers = [prov] if prov else [None]
-        fallback = ["openai", "anthropic", "groq"]
-        for fb in fallback:
-            if fb not in test_providers:
-                test_providers.append(fb)
-
-        test_ok = False
-        for tp in test_providers:
-            try:
-                review_server.ai_reviewer.router.chat(
-                    system="You are a test.",
-                    user="Reply with only: OK",
-                    provider_override=tp,
-                    model_override=None,
-                )
-                test_ok = True
-                break
-            except Exception:
-                continue
-
-        if not test_ok:
-            shutil.rmtree(tmp_dir, ignore_errors=True)
-            raise HTTPException(
-                503,
-                "AI provider'lara ulaşılamıyor. Groq rate-limit aşılmış olabilir, "
-                "OpenAI/Anthropic key'leri geçersiz. Lütfen .env dosyasında geçerli bir API key olduğundan emin olun."
-            )
-    except HTTPException:
-        raise
-    except Exception as e:
+    # The router falls back across providers and skips circuit-open ones, so
+    # only refuse the job when nothing in the chain can be called at all.
+    if not review_server.ai_reviewer.router.available_providers(prov):
         shutil.rmtree(tmp_dir, ignore_errors=True)
-        raise HTTPException(503, f"AI provider testi başarısız: {e}")
+        raise HTTPException(
+            503,
+            "AI provider'lara ulaşılamıyor. Tüm provider'lar devre dışı (circuit open) veya "
+            ".env dosyasında geçerli bir API key tanımlı değil."
+        )
 
     import time as _time
     _project_reviews[review_id] = {
@@ -1360,13 +1559,14 @@ async def project_review_upload(
         "reviewed_count": 0,
         "current_file": None,
         "current_file_started_at": None,
+        "in_progress": [],
         "started_at": _time.time(),
         "results": [],
         "summary": None,
     }
 
     excl = set(c.strip() for c in exclude_categories.split(",") if c.strip()) if exclude_categories else set()
-    background_tasks.add_task(_run_project_review, review_id, tmp_dir, focus_list, prov, mod, excl)
+    background_tasks.add_task(_run_project_review, review_id, tmp_dir, focus_list, prov, mod, excl, bypass_cache)
     return {"review_id": review_id}
 
 
@@ -1390,12 +1590,34 @@ async def project_review_list():
     return {"reviews": list(_project_reviews.values())}
 
 
+@app.get("/api/queue/metrics")
+async def queue_metrics():
+    """Webhook job queue depth, worker utilisation and latency."""
+    return {
+        "enabled": review_server.webhook_queue_config.enabled,
+        **(await review_server.webhook_workers.metrics()),
+    }
+
+
+@app.get("/api/queue/jobs/{job_id}")
+async def queue_job(job_id: str):
+    job = await asyncio.to_thread(review_server.webhook_queue.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.pop("payload", None)
+    return job
+
+
 @app.post("/webhook")
 async def webhook_endpoint(request: Request):
     """
     Universal webhook endpoint - automatically detects platform
     """
     try:
+        if review_server.webhook_queue_config.enabled:
+            result = await review_server.enqueue_webhook(request)
+            status_code = 202 if result.get("status") == "queued" else 200
+            return JSONResponse(content=result, status_code=status_code)
         result = await review_server.process_webhook(request)
         return JSONResponse(content=result)
     except Exception as e:
@@ -2,6 +2,8 @@ from .base import AIProvider, AIProviderError
 from .router import AIProviderRouter
 from .factory import create_provider, default_model_for_provider
 from .mock_provider import MockProvider
+from .health import ProviderHealth, get_provider_health, provider_health_snapshot
+from .rate_limiter import ProviderRateLimiter, get_rate_limiter, rate_limit_snapshot
 
 __all__ = [
     "AIProvider",
@@ -10,5 +12,11 @@ __all__ = [
     "create_provider",
     "default_model_for_provider",
     "MockProvider",
+    "ProviderHealth",
+    "ProviderRateLimiter",
+    "get_provider_health",
+    "get_rate_limiter",
+    "provider_health_snapshot",
+    "rate_limit_snapshot",
 ]
 
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 
 from .base import AIProvider, AIProviderError, ChatRequest
 
@@ -16,24 +16,113 @@ class AnthropicProvider(AIProvider):
         if not key:
             raise AIProviderError("ANTHROPIC_API_KEY environment variable required")
         self._client = Anthropic(api_key=key)
+        self._async_client = AsyncAnthropic(api_key=key)
         self._default_model = default_model or "claude-3-5-sonnet-20241022"
 
     def default_model(self) -> str:
         return self._default_model
 
+    @staticmethod
+    def _message_kwargs(req: ChatRequest) -> dict:
+        return {
+            "model": req.model,
+            "max_tokens": req.max_tokens,
+            "temperature": req.temperature,
+            "messages": [{"role": "user", "content": req.user}],
+            "system": AnthropicProvider._system_blocks(req),
+        }
+
+    # The API accepts at most four cache breakpoints per request
+    MAX_CACHE_BREAKPOINTS = 4
+
+    @staticmethod
+    def _system_blocks(req: ChatRequest):
+        """
+        The system prompt, split at ``req.cache_breakpoints`` into text blocks
+        whose ends carry ``cache_control`` so the stable prefix is read from
+        the prompt cache on later calls.
+        """
+        if not req.cache_breakpoints:
+            return req.system
+        blocks = []
+        start = 0
+        for end in sorted(set(req.cache_breakpoints))[-AnthropicProvider.MAX_CACHE_BREAKPOINTS:]:
+            if start < end <= len(req.system):
+                blocks.append({
+                    "type": "text",
+                    "text": req.system[start:end],
+                    "cache_control": {"type": "ephemeral"},
+                })
+                start = end
+        if start < len(req.system):
+            blocks.append({"type": "text", "text": req.system[start:]})
+        return blocks
+
+    def _report_message_usage(self, req: ChatRequest, msg) -> None:
+        usage = getattr(msg, "usage", None)
+        if usage is None:
+            return
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        written = getattr(usage, "cache_creation_input_tokens", None) or 0
+        uncached = getattr(usage, "input_tokens", None)
+        self._report_usage(
+            req,
+            # input_tokens excludes cache reads/writes; report the whole prompt like OpenAI does
+            input_tokens=None if uncached is None else uncached + cached + written,
+            output_tokens=getattr(usage, "output_tokens", None),
+            cached_tokens=cached,
+            cache_write_tokens=written,
+        )
+
+    @staticmethod
+    def _extract_text(msg) -> str:
+        # anthropic SDK returns content list
+        if not msg.content:
+            return ""
+        return getattr(msg.content[0], "text", "") or ""
+
     def chat(self, req: ChatRequest) -> str:
         try:
-            msg = self._client.messages.create(
-                model=req.model,
-                max_tokens=req.max_tokens,
-                temperature=req.temperature,
-                messages=[{"role": "user", "content": req.user}],
-                system=req.system,
-            )
-            # anthropic SDK returns content list
-            if not msg.content:
-                return ""
-            return getattr(msg.content[0], "text", "") or ""
+            raw = self._client.messages.with_raw_response.create(**self._message_kwargs(req))
+            self._report_headers(raw.headers)
+            msg = raw.parse()
+            self._report_message_usage(req, msg)
+            return self._extract_text(msg)
         except Exception as e:
+            self._report_error_headers(e)
             raise AIProviderError(str(e)) from e
 
+    async def achat(self, req: ChatRequest) -> str:
+        try:
+            raw = await self._async_client.messages.with_raw_response.create(**self._message_kwargs(req))
+            self._report_headers(raw.headers)
+            msg = raw.parse()
+            self._report_message_usage(req, msg)
+            return self._extract_text(msg)
+        except Exception as e:
+            self._report_error_headers(e)
+            raise AIProviderError(str(e)) from e
+
+    async def astream(self, req: ChatRequest) -> AsyncIterator[str]:
+        try:
+            raw = await self._async_client.messages.with_raw_response.create(**self._message_kwargs(req), stream=True)
+            self._report_headers(raw.headers)
+            stream = raw.parse()
+        except Exception as e:
+            self._report_error_headers(e)
+            raise AIProviderError(str(e)) from e
+        try:
+            async for event in stream:
+                kind = getattr(event, "type", None)
+                if kind == "message_start":
+                    self._report_message_usage(req, event.message)
+                elif kind == "content_block_delta":
+                    text = getattr(event.delta, "text", None)
+                    if text:
+                        yield text
+                elif kind == "message_delta":
+                    self._report_usage(req, output_tokens=getattr(getattr(event, "usage", None), "output_tokens", None))
+        except Exception as e:
+            raise AIProviderError(str(e)) from e
+        finally:
+            await stream.close()
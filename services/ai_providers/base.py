@@ -7,9 +7,10 @@ decoupled from specific SDKs (OpenAI/Anthropic/Groq/etc.).
 
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Mapping, Optional, Protocol
 
 
 class AIProviderError(RuntimeError):
@@ -23,6 +24,22 @@ class ChatRequest:
     model: str
     temperature: float = 0.3
     max_tokens: int = 4096
+    # Offsets into ``system`` ending a stable prefix (instructions, rules)
+    # that providers with explicit prompt caching may mark cacheable.
+    cache_breakpoints: tuple[int, ...] = ()
+    # Filled by the provider with the token usage it reports, when given:
+    # input_tokens, output_tokens, cached_tokens, cache_write_tokens.
+    usage: Optional[dict[str, int]] = field(default=None, compare=False)
+
+
+class StreamSink(Protocol):
+    """Consumer of a streamed completion (see ``AIProviderRouter.achat(stream=...)``)."""
+
+    def reset(self) -> None:
+        """Forget what was fed so far; called before every (re)try."""
+
+    def feed(self, text: str) -> bool:
+        """Take the next text delta; return True to stop the stream early."""
 
 
 class AIProvider(ABC):
@@ -30,6 +47,28 @@ class AIProvider(ABC):
 
     name: str
 
+    # Set by the router; receives response headers so its rate limiter can
+    # follow the provider's x-ratelimit-* / retry-after values.
+    headers_listener: Optional[Callable[[Mapping[str, Any]], None]] = None
+
+    def _report_headers(self, headers: Optional[Mapping[str, Any]]) -> None:
+        if headers is None or self.headers_listener is None:
+            return
+        try:
+            self.headers_listener(headers)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _report_usage(req: ChatRequest, **counts: Any) -> None:
+        if req.usage is None:
+            return
+        req.usage.update({k: int(v) for k, v in counts.items() if isinstance(v, (int, float))})
+
+    def _report_error_headers(self, error: BaseException) -> None:
+        response = getattr(error, "response", None)
+        self._report_headers(getattr(response, "headers", None))
+
     @abstractmethod
     def default_model(self) -> str:
         """Return provider default model name."""
@@ -38,6 +77,25 @@ class AIProvider(ABC):
     def chat(self, req: ChatRequest) -> str:
         """Run a chat completion and return plain text."""
 
+    async def achat(self, req: ChatRequest) -> str:
+        """
+        Async variant of chat().
+
+        Providers with a native async SDK client override this. The default
+        offloads the blocking chat() call to a worker thread so the event loop
+        keeps serving webhooks and log polls while the request is in flight.
+        """
+        return await asyncio.to_thread(self.chat, req)
+
+    async def astream(self, req: ChatRequest) -> AsyncIterator[str]:
+        """
+        Streamed variant of achat(), yielding text deltas.
+
+        Providers with a streaming API override this; the default yields the
+        whole achat() answer as a single delta.
+        """
+        yield await self.achat(req)
+
     def resolve_model(self, model: Optional[str]) -> str:
         return model or self.default_model()
 
@@ -0,0 +1,188 @@
+"""
+Per-provider circuit breakers and health scores.
+
+Every call outcome feeds an EWMA of latency and error rate. After
+``failure_threshold`` consecutive failures the breaker opens and the router
+skips the provider; once ``reset_seconds`` have passed a single half-open
+probe is let through, which closes the breaker on success or re-opens it on
+failure.
+
+Like the rate limiters, breakers are process-wide (one per provider name).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ProviderHealth:
+    """Circuit breaker + EWMA health for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 3,
+        reset_seconds: float = 30.0,
+        alpha: float = 0.3,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = max(0.0, float(reset_seconds))
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_error: Optional[str] = None
+        self._latencies: deque = deque(maxlen=200)
+
+    def configure(self, failure_threshold: Optional[int] = None, reset_seconds: Optional[float] = None) -> None:
+        with self._lock:
+            if failure_threshold:
+                self.failure_threshold = max(1, int(failure_threshold))
+            if reset_seconds is not None:
+                self.reset_seconds = max(0.0, float(reset_seconds))
+
+    def _current_state(self, now: float) -> str:
+        if self.state == OPEN and now - self.opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return self.state
+
+    def available(self, now: Optional[float] = None) -> bool:
+        """Whether a call may go to this provider right now (no side effects)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self._current_state(now)
+            return state == CLOSED or (state == HALF_OPEN and not self._probe_in_flight)
+
+    def try_acquire(self) -> bool:
+        """Claim permission to call; in half-open state only one probe may run."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self.state = HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            self.skipped += 1
+            return False
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            self._probe_in_flight = False
+            self._observe(latency, error=False)
+            self._latencies.append(latency)
+
+    def record_cancelled(self) -> None:
+        """A call we abandoned (lost a hedge race): no health signal either way."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self, latency: float, error: str = "") -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = error[:200] if error else None
+            self._observe(latency, error=True)
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = now
+            self._probe_in_flight = False
+
+    def _observe(self, latency: float, *, error: bool) -> None:
+        a = self.alpha
+        self.ewma_error_rate = a * (1.0 if error else 0.0) + (1 - a) * self.ewma_error_rate
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = a * latency + (1 - a) * self.ewma_latency
+
+    def latency_quantile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """Quantile of recent successful call latencies, or None if too few samples."""
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < max(1, min_samples):
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def score(self) -> float:
+        """Lower is healthier: seconds of expected latency, inflated by errors."""
+        with self._lock:
+            latency = self.ewma_latency or 0.0
+            return latency * (1 + 4 * self.ewma_error_rate) + 10 * self.ewma_error_rate
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            state = self._current_state(now)
+            retry_in = max(0.0, self.reset_seconds - (now - self.opened_at)) if state == OPEN else 0.0
+            return {
+                "provider": self.name,
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "ewma_latency_seconds": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+                "ewma_error_rate": round(self.ewma_error_rate, 3),
+                "p90_latency_seconds": _quantile(self._latencies, 0.9),
+                "successes": self.successes,
+                "failures": self.failures,
+                "skipped": self.skipped,
+                "retry_in_seconds": round(retry_in, 1),
+                "last_error": self.last_error,
+            }
+
+
+def _quantile(samples, q: float) -> Optional[float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
+
+
+_registry: dict[str, ProviderHealth] = {}
+_registry_lock = threading.Lock()
+
+
+def get_provider_health(
+    name: str,
+    failure_threshold: Optional[int] = None,
+    reset_seconds: Optional[float] = None,
+) -> ProviderHealth:
+    key = (name or "").lower()
+    with _registry_lock:
+        health = _registry.get(key)
+        if health is None:
+            health = ProviderHealth(key)
+            _registry[key] = health
+    health.configure(failure_threshold=failure_threshold, reset_seconds=reset_seconds)
+    return health
+
+
+def provider_health_snapshot() -> list[dict[str, Any]]:
+    with _registry_lock:
+        entries = list(_registry.values())
+    snaps = []
+    for health in sorted(entries, key=lambda h: h.name):
+        snap = health.snapshot()
+        snap["score"] = round(health.score(), 3)
+        snaps.append(snap)
+    return snaps
@@ -0,0 +1,113 @@
+"""
+Hedged requests: if the first provider is slower than its usual p90, send the
+same request to the next provider in the chain and keep whichever valid
+answer lands first. A per-day budget caps how many extra calls this costs.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+
+@dataclass(frozen=True)
+class HedgingConfig:
+    enabled: bool = False
+    quantile: float = 0.9
+    min_samples: int = 10
+    min_delay_seconds: float = 1.0
+    default_delay_seconds: float = 10.0
+    daily_budget: int = 200
+    require_json: bool = True
+
+
+def parse_hedging_config(ai_config: dict) -> HedgingConfig:
+    cfg = ai_config.get("hedging") or {}
+    return HedgingConfig(
+        enabled=bool(cfg.get("enabled", False)),
+        quantile=min(0.99, max(0.5, float(cfg.get("quantile", 0.9)))),
+        min_samples=max(1, int(cfg.get("min_samples", 10))),
+        min_delay_seconds=max(0.0, float(cfg.get("min_delay_seconds", 1.0))),
+        default_delay_seconds=max(0.0, float(cfg.get("default_delay_seconds", 10.0))),
+        daily_budget=max(0, int(cfg.get("daily_budget", 200))),
+        require_json=bool(cfg.get("require_json", True)),
+    )
+
+
+class HedgeBudget:
+    """Counts hedged calls per UTC day and refuses once the limit is reached."""
+
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self.used_today = 0
+        self.fired_total = 0
+        self.won_total = 0
+        self.denied_total = 0
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    def _roll(self) -> None:
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.used_today = 0
+
+    def try_consume(self) -> bool:
+        with self._lock:
+            self._roll()
+            if self.used_today >= self.daily_limit:
+                self.denied_total += 1
+                return False
+            self.used_today += 1
+            self.fired_total += 1
+            return True
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.won_total += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            self._roll()
+            return {
+                "day": self._day,
+                "daily_limit": self.daily_limit,
+                "used_today": self.used_today,
+                "fired_total": self.fired_total,
+                "won_total": self.won_total,
+                "denied_total": self.denied_total,
+            }
+
+
+_budget: Optional[HedgeBudget] = None
+_budget_lock = threading.Lock()
+
+
+def get_hedge_budget(daily_limit: int) -> HedgeBudget:
+    """Process-wide budget so every router draws from the same daily allowance."""
+    global _budget
+    with _budget_lock:
+        if _budget is None:
+            _budget = HedgeBudget(daily_limit)
+        else:
+            _budget.daily_limit = daily_limit
+        return _budget
+
+
+def is_json_answer(text: str) -> bool:
+    """True if the response contains a parseable JSON object (optionally fenced)."""
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end <= start:
+        return False
+    try:
+        return isinstance(json.loads(text[start:end + 1]), dict)
+    except ValueError:
+        return False
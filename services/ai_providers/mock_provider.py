@@ -29,3 +29,6 @@ class MockProvider(AIProvider):
             '}'
         )
 
+    async def achat(self, req: ChatRequest) -> str:
+        # No I/O involved, so there is nothing to offload to a thread.
+        return self.chat(req)
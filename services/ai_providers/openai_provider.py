@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import os
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 from .base import AIProvider, AIProviderError, ChatRequest
 
@@ -16,23 +16,75 @@ class OpenAIProvider(AIProvider):
         if not key:
             raise AIProviderError("OPENAI_API_KEY environment variable required")
         self._client = OpenAI(api_key=key)
+        self._async_client = AsyncOpenAI(api_key=key)
         self._default_model = default_model or "gpt-4-turbo-preview"
 
     def default_model(self) -> str:
         return self._default_model
 
+    @staticmethod
+    def _completion_kwargs(req: ChatRequest) -> dict:
+        return {
+            "model": req.model,
+            "messages": [
+                {"role": "system", "content": req.system},
+                {"role": "user", "content": req.user},
+            ],
+            "temperature": req.temperature,
+            "max_tokens": req.max_tokens,
+        }
+
+    def _report_completion_usage(self, req: ChatRequest, usage) -> None:
+        # Prompt prefixes are cached automatically; hits show up as cached_tokens
+        if usage is None:
+            return
+        self._report_usage(
+            req,
+            input_tokens=getattr(usage, "prompt_tokens", None),
+            output_tokens=getattr(usage, "completion_tokens", None),
+            cached_tokens=getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None),
+        )
+
     def chat(self, req: ChatRequest) -> str:
         try:
-            resp = self._client.chat.completions.create(
-                model=req.model,
-                messages=[
-                    {"role": "system", "content": req.system},
-                    {"role": "user", "content": req.user},
-                ],
-                temperature=req.temperature,
-                max_tokens=req.max_tokens,
-            )
+            raw = self._client.chat.completions.with_raw_response.create(**self._completion_kwargs(req))
+            self._report_headers(raw.headers)
+            resp = raw.parse()
+            self._report_completion_usage(req, getattr(resp, "usage", None))
+            return resp.choices[0].message.content or ""
+        except Exception as e:
+            self._report_error_headers(e)
+            raise AIProviderError(str(e)) from e
+
+    async def achat(self, req: ChatRequest) -> str:
+        try:
+            raw = await self._async_client.chat.completions.with_raw_response.create(**self._completion_kwargs(req))
+            self._report_headers(raw.headers)
+            resp = raw.parse()
+            self._report_completion_usage(req, getattr(resp, "usage", None))
             return resp.choices[0].message.content or ""
         except Exception as e:
+            self._report_error_headers(e)
             raise AIProviderError(str(e)) from e
 
+    async def astream(self, req: ChatRequest) -> AsyncIterator[str]:
+        try:
+            raw = await self._async_client.chat.completions.with_raw_response.create(
+                **self._completion_kwargs(req), stream=True, stream_options={"include_usage": True}
+            )
+            self._report_headers(raw.headers)
+            stream = raw.parse()
+        except Exception as e:
+            self._report_error_headers(e)
+            raise AIProviderError(str(e)) from e
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None)
+                if usage is not None:
+                    self._report_completion_usage(req, usage)
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise AIProviderError(str(e)) from e
+        finally:
+            await stream.close()
@@ -0,0 +1,378 @@
+"""
+Per-provider request/token budgets.
+
+Each provider gets two token buckets (requests per minute and tokens per
+minute) configured from ``ai.providers[*].rpm`` / ``tpm``. Callers reserve
+capacity before a request and sleep until it is available, so bursts queue
+up locally instead of turning into 429s. Rate-limit response headers
+(``x-ratelimit-*``, ``anthropic-ratelimit-*``, ``retry-after``) resync the
+buckets with the provider's own view and, when no budget is configured,
+teach the limiter the real limits.
+
+``ai.providers[*].max_in_flight`` caps the calls a provider has open at
+once. Callers beyond the cap wait for a slot in arrival order, so a burst
+of concurrent reviews (a project upload, several webhooks) does not pile
+onto one provider whichever router sent them.
+
+Limiters are process-wide (one per provider name) so the reviewer, rule
+generator and rule evolver routers share the same budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Mapping, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_reset_seconds(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Parse a rate-limit reset / retry-after header value into seconds from now.
+
+    Accepts plain seconds ("12", "0.5"), Go-style durations ("1m30.5s",
+    "250ms") and RFC 3339 timestamps ("2024-05-01T12:00:00Z").
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    try:
+        return max(0.0, float(text))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if parts and "".join(n + u for n, u in parts) == text:
+        scale = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+        return sum(float(n) * scale[u] for n, u in parts)
+    try:
+        reset_at = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    current = now if now is not None else time.time()
+    return max(0.0, reset_at.timestamp() - current)
+
+
+def estimate_request_tokens(system: str, user: str) -> int:
+    # ~4 chars per token; headers correct the estimate after the call.
+    return (len(system) + len(user)) // 4 + 1
+
+
+class TokenBucket:
+    """
+    Reservation-based token bucket.
+
+    ``reserve()`` always succeeds and returns how long the caller must wait;
+    the level may go negative, which queues later callers behind earlier ones
+    without needing a loop-bound asyncio primitive.
+    """
+
+    def __init__(self, per_minute: float, now: Optional[float] = None):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self._updated = now if now is not None else time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated)
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        self._refill(now)
+        self.level -= min(float(amount), self.capacity)
+        if self.level >= 0:
+            return 0.0
+        return -self.level / self.rate
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.level
+
+    def sync_remaining(self, remaining: float, now: float) -> None:
+        """Never believe we have more budget than the provider says we do."""
+        self._refill(now)
+        self.level = min(self.level, float(remaining))
+
+    def drain(self, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.level, 0.0)
+
+    def resize(self, per_minute: float, now: float) -> None:
+        self._refill(now)
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = min(self.level, self.capacity)
+
+
+class ProviderRateLimiter:
+    """Request and token budget for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        self.name = name
+        self._lock = threading.Lock()
+        self._requests: Optional[TokenBucket] = None
+        self._tokens: Optional[TokenBucket] = None
+        self._blocked_until = 0.0
+        self.source = "config"
+        self.waiting = 0
+        self.throttled_total = 0
+        self.rate_limited_total = 0
+        self.wait_seconds_total = 0.0
+        self.max_in_flight: Optional[int] = None
+        self.in_flight = 0
+        # (loop, future) per caller waiting for a slot; may span event loops
+        self._slot_waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self.configure(rpm=rpm, tpm=tpm, max_in_flight=max_in_flight)
+
+    def configure(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._requests = self._sized(self._requests, rpm, now)
+            self._tokens = self._sized(self._tokens, tpm, now)
+            if rpm or tpm:
+                self.source = "config"
+            if max_in_flight:
+                self.max_in_flight = max(1, int(max_in_flight))
+            woken = self._hand_out_slots()
+        for loop, waiter in woken:
+            loop.call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _sized(bucket: Optional[TokenBucket], per_minute: Optional[float], now: float) -> Optional[TokenBucket]:
+        if not per_minute or per_minute <= 0:
+            return bucket
+        if bucket is None:
+            return TokenBucket(per_minute, now=now)
+        if bucket.capacity != float(per_minute):
+            bucket.resize(per_minute, now)
+        return bucket
+
+    @property
+    def enabled(self) -> bool:
+        return self._requests is not None or self._tokens is not None
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and ``tokens`` tokens; return seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            if wait > 0:
+                self.throttled_total += 1
+                self.wait_seconds_total += wait
+        return wait
+
+    def _hand_out_slots(self) -> list[tuple[asyncio.AbstractEventLoop, asyncio.Future]]:
+        # Caller holds self._lock
+        woken = []
+        while self._slot_waiters and (self.max_in_flight is None or self.in_flight < self.max_in_flight):
+            woken.append(self._slot_waiters.popleft())
+            self.in_flight += 1
+        return woken
+
+    def _wake(self, waiter: asyncio.Future) -> None:
+        if waiter.cancelled():
+            self.release_slot()  # its caller gave up; pass the slot on
+        elif not waiter.done():
+            waiter.set_result(None)
+
+    async def acquire_slot(self) -> None:
+        """Wait for an in-flight slot; returns at once without ``max_in_flight``."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.max_in_flight is None or self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._slot_waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                try:
+                    self._slot_waiters.remove((loop, waiter))
+                    handed = False
+                except ValueError:
+                    handed = True
+            # A slot handed over before the cancel landed is ours to return;
+            # one handed to the cancelled future is returned by _wake
+            if handed and not waiter.cancelled():
+                self.release_slot()
+            raise
+
+    def release_slot(self) -> None:
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            woken = self._hand_out_slots()
+        for loop, waiter in woken:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(self._wake, waiter)
+            else:
+                self.release_slot()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one in-flight slot for the duration of a provider call."""
+        await self.acquire_slot()
+        try:
+            yield
+        finally:
+            self.release_slot()
+
+    def begin_wait(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def end_wait(self) -> None:
+        with self._lock:
+            self.waiting -= 1
+
+    def on_rate_limited(self, retry_after: Optional[float], attempt: int) -> float:
+        """Record a 429 and block new calls until the provider's window resets."""
+        backoff = retry_after if retry_after is not None else min(30.0, 2.0 ** attempt)
+        now = time.monotonic()
+        with self._lock:
+            self.rate_limited_total += 1
+            self._blocked_until = max(self._blocked_until, now + backoff)
+            if self._requests is not None:
+                self._requests.drain(now)
+        logger.warning("ai_provider_rate_limited", provider=self.name, retry_after=round(backoff, 2))
+        return backoff
+
+    def observe_headers(self, headers: Optional[Mapping[str, Any]]) -> None:
+        """Adapt to rate-limit headers from a provider response (success or 429)."""
+        if not headers:
+            return
+        h = {str(k).lower(): v for k, v in headers.items()}
+        now = time.monotonic()
+
+        limit_req = _first_number(h, "x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit")
+        limit_tok = _first_number(h, "x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit")
+        remaining_req = _first_number(h, "x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining")
+        remaining_tok = _first_number(h, "x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining")
+        reset_req = parse_reset_seconds(_first(h, "x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset"))
+        reset_tok = parse_reset_seconds(_first(h, "x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset"))
+        retry_after = parse_reset_seconds(_first(h, "retry-after"))
+
+        with self._lock:
+            # Learn limits only when nothing was configured; explicit config wins.
+            if self._requests is None and limit_req:
+                self._requests = TokenBucket(limit_req, now=now)
+                self.source = "headers"
+            if self._tokens is None and limit_tok:
+                self._tokens = TokenBucket(limit_tok, now=now)
+                self.source = "headers"
+            if self._requests is not None and remaining_req is not None:
+                self._requests.sync_remaining(remaining_req, now)
+            if self._tokens is not None and remaining_tok is not None:
+                self._tokens.sync_remaining(remaining_tok, now)
+
+            block = retry_after
+            if remaining_req == 0 and reset_req is not None:
+                block = max(block or 0.0, reset_req)
+            if remaining_tok == 0 and reset_tok is not None:
+                block = max(block or 0.0, reset_tok)
+            if block:
+                self._blocked_until = max(self._blocked_until, now + block)
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            out: dict[str, Any] = {
+                "provider": self.name,
+                "enabled": self.enabled,
+                "source": self.source,
+                "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 2),
+                "waiting": self.waiting,
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self.in_flight,
+                "slot_waiters": len(self._slot_waiters),
+                "throttled_total": self.throttled_total,
+                "rate_limited_total": self.rate_limited_total,
+                "wait_seconds_total": round(self.wait_seconds_total, 2),
+            }
+            for key, bucket in (("requests", self._requests), ("tokens", self._tokens)):
+                if bucket is None:
+                    out[key] = None
+                    continue
+                available = bucket.available(now)
+                out[key] = {
+                    "per_minute": bucket.capacity,
+                    "available": round(available, 1),
+                    "utilisation": round(min(1.0, max(0.0, 1 - available / bucket.capacity)), 3),
+                }
+        return out
+
+
+def _first(headers: Mapping[str, Any], *names: str) -> Optional[str]:
+    for name in names:
+        if name in headers and headers[name] not in (None, ""):
+            return str(headers[name])
+    return None
+
+
+def _first_number(headers: Mapping[str, Any], *names: str) -> Optional[float]:
+    value = _first(headers, *names)
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+_registry: dict[str, ProviderRateLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    name: str,
+    rpm: Optional[float] = None,
+    tpm: Optional[float] = None,
+    max_in_flight: Optional[int] = None,
+) -> ProviderRateLimiter:
+    """Return the process-wide limiter for ``name``, applying rpm/tpm/max_in_flight if given."""
+    key = (name or "").lower()
+    with _registry_lock:
+        limiter = _registry.get(key)
+        if limiter is None:
+            limiter = ProviderRateLimiter(key, rpm=rpm, tpm=tpm, max_in_flight=max_in_flight)
+            _registry[key] = limiter
+            return limiter
+    if rpm or tpm or max_in_flight:
+        limiter.configure(rpm=rpm, tpm=tpm, max_in_flight=max_in_flight)
+    return limiter
+
+
+def rate_limit_snapshot() -> list[dict[str, Any]]:
+    with _registry_lock:
+        limiters = list(_registry.values())
+    return [limiter.snapshot() for limiter in sorted(limiters, key=lambda l: l.name)]
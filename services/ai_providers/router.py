@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import asyncio
+import time
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import structlog
 
-from .base import AIProvider, AIProviderError, ChatRequest
+from .base import AIProvider, AIProviderError, ChatRequest, StreamSink
 from .factory import create_provider, default_model_for_provider
+from .health import ProviderHealth, get_provider_health
+from .hedging import HedgeBudget, get_hedge_budget, is_json_answer, parse_hedging_config
+from .rate_limiter import (
+    ProviderRateLimiter,
+    estimate_request_tokens,
+    get_rate_limiter,
+    parse_reset_seconds,
+)
 
 logger = structlog.get_logger()
 
@@ -31,9 +41,24 @@ class AIProviderRouter:
         providers:
           - name: groq
             model: llama-3.3-70b-versatile
+            rpm: 30    # optional request budget per minute
+            tpm: 6000  # optional token budget per minute
+            max_in_flight: 2  # optional cap on concurrent calls to this provider
           - name: openai
             model: gpt-4o-mini
         primary: groq
+        fallback: [anthropic]  # extra providers tried after the configured ones
+        rate_limit_retries: 2  # 429s are waited out and retried this many times
+        circuit_breaker:
+          failure_threshold: 3  # consecutive failures before a provider is skipped
+          reset_seconds: 30     # how long it is skipped before a half-open probe
+        hedging:
+          enabled: false        # race the next provider when the first is slower than its p90
+          daily_budget: 200     # max hedged (extra) calls per UTC day
+
+    achat() walks the fallback chain: the requested (or primary) provider
+    first, then the rest ordered by health score, skipping providers whose
+    circuit breaker is open.
     """
 
     def __init__(self, ai_config: dict[str, Any]):
@@ -49,13 +74,36 @@ class AIProviderRouter:
         else:
             legacy_provider = self.ai_config.get("provider", "groq")
             legacy_model = self.ai_config.get("model")
-            self.providers_cfg = [{"name": legacy_provider, "model": legacy_model}]
+            self.providers_cfg = [{
+                "name": legacy_provider,
+                "model": legacy_model,
+                "rpm": self.ai_config.get("rpm"),
+                "tpm": self.ai_config.get("tpm"),
+                "max_in_flight": self.ai_config.get("max_in_flight"),
+            }]
 
         # Keep it simple: select a single provider.
         self.primary = (self.ai_config.get("primary") or self.providers_cfg[0]["name"]).lower()
 
+        self.rate_limit_retries = max(0, int(self.ai_config.get("rate_limit_retries", 2)))
+
+        # Ordered fallback chain: primary, other configured providers, then ai.fallback.
+        chain = [self.primary] + [str(c["name"]).lower() for c in self.providers_cfg]
+        chain += [str(n).lower() for n in (self.ai_config.get("fallback") or [])]
+        self.chain: list[str] = list(dict.fromkeys(chain))
+
+        breaker_cfg = self.ai_config.get("circuit_breaker") or {}
+        self.failure_threshold = max(1, int(breaker_cfg.get("failure_threshold", 3)))
+        self.reset_seconds = max(0.0, float(breaker_cfg.get("reset_seconds", 30)))
+
+        self.hedging = parse_hedging_config(self.ai_config)
+        self.hedge_budget: HedgeBudget = get_hedge_budget(self.hedging.daily_budget)
+
         # Cache provider instances (lazy-init on first use)
         self._providers: dict[str, AIProvider] = {}
+        for cfg in self.providers_cfg:
+            if cfg.get("rpm") or cfg.get("tpm") or cfg.get("max_in_flight"):
+                self.rate_limiter(cfg["name"])
 
     def _get_provider_cfg(self, name: str) -> Optional[dict[str, Any]]:
         name_l = (name or "").lower()
@@ -70,9 +118,44 @@ class AIProviderRouter:
             return self._providers[name_l]
         cfg = self._get_provider_cfg(name_l) or {"name": name_l}
         provider = create_provider(name_l, cfg)
+        provider.headers_listener = self.rate_limiter(name_l).observe_headers
         self._providers[name_l] = provider
         return provider
 
+    def rate_limiter(self, name: str) -> ProviderRateLimiter:
+        cfg = self._get_provider_cfg(name) or {}
+        max_in_flight = _as_float(cfg.get("max_in_flight"))
+        return get_rate_limiter(
+            name,
+            rpm=_as_float(cfg.get("rpm")),
+            tpm=_as_float(cfg.get("tpm")),
+            max_in_flight=int(max_in_flight) if max_in_flight else None,
+        )
+
+    def health(self, name: str) -> ProviderHealth:
+        return get_provider_health(name, failure_threshold=self.failure_threshold, reset_seconds=self.reset_seconds)
+
+    def candidates(self, provider_override: Optional[str] = None, fallback: bool = True) -> list[str]:
+        """Requested (or primary) provider first, then the chain by health score."""
+        first = (provider_override or self.primary).lower()
+        if not fallback:
+            return [first]
+        rest = [name for name in self.chain if name != first]
+        rest.sort(key=lambda name: self.health(name).score())
+        return [first] + rest
+
+    def available_providers(self, provider_override: Optional[str] = None) -> list[str]:
+        """Providers that are configured (SDK/key present) and not circuit-open."""
+        available = []
+        for name in self.candidates(provider_override):
+            try:
+                self._get_or_create_provider(name)
+            except Exception:
+                continue
+            if self.health(name).available():
+                available.append(name)
+        return available
+
     def resolve(self, provider_override: Optional[str] = None, model_override: Optional[str] = None) -> SelectedProvider:
         """
         Resolve provider+model WITHOUT instantiating provider SDKs.
@@ -94,6 +177,25 @@ class AIProviderRouter:
         """
         return self.resolve(provider_override=provider_override, model_override=model_override)
 
+    def _build_request(
+        self,
+        system: str,
+        user: str,
+        model: str,
+        *,
+        cache_breakpoints: tuple[int, ...] = (),
+        usage: Optional[dict[str, int]] = None,
+    ) -> ChatRequest:
+        return ChatRequest(
+            system=system,
+            user=user,
+            model=model,
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            cache_breakpoints=cache_breakpoints,
+            usage=usage,
+        )
+
     def chat(
         self,
         system: str,
@@ -103,21 +205,253 @@ class AIProviderRouter:
     ) -> tuple[str, str, str]:
         """
         Single-provider chat (no fallback). Returns (provider_name, model, response_text).
+
+        Blocking; prefer achat() from async code.
         """
         selected = self.resolve(provider_override=provider_override, model_override=model_override)
         try:
             provider = self._get_or_create_provider(selected.provider_name)
-            text = provider.chat(
-                ChatRequest(
-                    system=system,
-                    user=user,
-                    model=selected.model,
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                )
-            )
-            return provider.name, selected.model, text
+            limiter = self.rate_limiter(selected.provider_name)
+            tokens = estimate_request_tokens(system, user)
+            for attempt in range(self.rate_limit_retries + 1):
+                wait = limiter.reserve(tokens)
+                if wait > 0:
+                    time.sleep(wait)
+                try:
+                    text = provider.chat(self._build_request(system, user, selected.model))
+                    return provider.name, selected.model, text
+                except Exception as e:
+                    if attempt >= self.rate_limit_retries or not is_rate_limit_error(e):
+                        raise
+                    limiter.on_rate_limited(retry_after_seconds(e), attempt)
         except Exception as e:
             logger.warning("ai_provider_call_failed", provider=selected.provider_name, model=selected.model, error=str(e))
             raise AIProviderError(str(e)) from e
 
+    async def achat(
+        self,
+        system: str,
+        user: str,
+        provider_override: Optional[str] = None,
+        model_override: Optional[str] = None,
+        fallback: bool = True,
+        *,
+        cache_breakpoints: tuple[int, ...] = (),
+        usage: Optional[dict[str, int]] = None,
+        stream: Optional[StreamSink] = None,
+    ) -> tuple[str, str, str]:
+        """
+        Async chat over the fallback chain. Returns (provider_name, model,
+        response_text) of the provider that answered.
+
+        ``model_override`` applies to the first provider only; fallbacks use
+        their configured model. Calls are paced by each provider's rate
+        limiter and capped at its ``max_in_flight``, a 429 is waited out and retried, and providers with an open
+        circuit breaker are skipped.
+
+        ``cache_breakpoints`` mark the stable prefix of ``system`` for prompt
+        caching; ``usage`` receives the token counts the provider reports.
+
+        With ``stream`` the completion is streamed and every text delta fed
+        to it (the sink is reset before each retry or fallback); when the
+        sink asks to stop, the text received so far is the answer. Streamed
+        calls are not hedged, so one sink never sees two interleaved answers.
+        """
+        first = self.resolve(provider_override=provider_override, model_override=model_override)
+        errors: list[str] = []
+        remaining = self.candidates(provider_override, fallback=fallback)
+        hedge = self.hedging.enabled and fallback and stream is None
+        options = {"cache_breakpoints": cache_breakpoints, "usage": usage, "stream": stream}
+        while remaining:
+            call = self._claim_next(remaining, first, errors)
+            if call is None:
+                break
+            attempts = {asyncio.create_task(self._attempt(*call, system, user, **options)): call[0]}
+            try:
+                if hedge:
+                    delay = self._hedge_delay(call[0])
+                    done, _ = await asyncio.wait(set(attempts), timeout=delay)
+                    if not done and self._has_candidate(remaining):
+                        if self.hedge_budget.try_consume():
+                            backup = self._claim_next(remaining, first, errors)
+                            if backup is not None:
+                                logger.info("ai_hedge_fired", primary=call[0], backup=backup[0], after_seconds=round(delay, 2))
+                                attempts[asyncio.create_task(self._attempt(*backup, system, user, **options))] = backup[0]
+                        else:
+                            logger.info("ai_hedge_budget_exhausted", primary=call[0])
+                result = await self._first_answer(attempts, errors)
+            finally:
+                for task in attempts:
+                    if not task.done():
+                        task.cancel()
+                await asyncio.gather(*attempts, return_exceptions=True)
+
+            if result is not None:
+                if len(attempts) > 1 and result[0] != call[1].name:
+                    self.hedge_budget.record_win()
+                if result[0] != first.provider_name:
+                    logger.info("ai_provider_fallback_used", requested=first.provider_name, provider=result[0], model=result[1])
+                return result
+
+        raise AIProviderError("; ".join(errors) or "No AI provider available")
+
+    def _claim_next(
+        self, remaining: list[str], first: SelectedProvider, errors: list[str]
+    ) -> Optional[tuple[str, AIProvider, str]]:
+        """Pop candidates until one is configured and its breaker admits a call."""
+        while remaining:
+            name = remaining.pop(0)
+            try:
+                provider = self._get_or_create_provider(name)
+                model = first.model if name == first.provider_name else self.resolve(name).model
+            except Exception as e:
+                # Not configured here (missing SDK / API key): not a health signal.
+                errors.append(f"{name}: {e}")
+                continue
+            if not self.health(name).try_acquire():
+                errors.append(f"{name}: circuit open")
+                continue
+            return name, provider, model
+        return None
+
+    def _has_candidate(self, remaining: list[str]) -> bool:
+        return any(self.health(name).available() for name in remaining)
+
+    def _hedge_delay(self, name: str) -> float:
+        cfg = self.hedging
+        observed = self.health(name).latency_quantile(cfg.quantile, cfg.min_samples)
+        return max(cfg.min_delay_seconds, observed if observed is not None else cfg.default_delay_seconds)
+
+    async def _attempt(
+        self, name: str, provider: AIProvider, model: str, system: str, user: str, **options: Any
+    ) -> tuple[str, str, str]:
+        health = self.health(name)
+        started = time.monotonic()
+
+        def call_started() -> None:
+            # Latency counts the provider call only, not rate-limit waits or retried 429s
+            nonlocal started
+            started = time.monotonic()
+
+        try:
+            text = await self._achat_with_retries(provider, system, user, model, on_call=call_started, **options)
+        except asyncio.CancelledError:
+            health.record_cancelled()
+            raise
+        except Exception as e:
+            health.record_failure(time.monotonic() - started, str(e))
+            logger.warning("ai_provider_call_failed", provider=name, model=model, error=str(e))
+            raise
+        health.record_success(time.monotonic() - started)
+        return provider.name, model, text
+
+    async def _first_answer(
+        self, attempts: dict[asyncio.Task, str], errors: list[str]
+    ) -> Optional[tuple[str, str, str]]:
+        """
+        Wait for the first usable answer. When racing a hedge, an answer that
+        isn't valid JSON only wins if the other attempt fails too.
+        """
+        pending = set(attempts)
+        unusable: Optional[tuple[str, str, str]] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    errors.append(f"{attempts[task]}: {e}")
+                    continue
+                racing = len(attempts) > 1
+                if not racing or not self.hedging.require_json or is_json_answer(result[2]):
+                    return result
+                unusable = unusable or result
+        return unusable
+
+    async def _achat_with_retries(
+        self,
+        provider: AIProvider,
+        system: str,
+        user: str,
+        model: str,
+        *,
+        stream: Optional[StreamSink] = None,
+        on_call: Optional[Callable[[], None]] = None,
+        **options: Any,
+    ) -> str:
+        limiter = self.rate_limiter(provider.name)
+        tokens = estimate_request_tokens(system, user)
+        for attempt in range(self.rate_limit_retries + 1):
+            await _await_budget(limiter, tokens)
+            try:
+                async with limiter.slot():
+                    if on_call is not None:
+                        on_call()
+                    request = self._build_request(system, user, model, **options)
+                    if stream is not None:
+                        return await _collect_stream(provider, request, stream)
+                    return await provider.achat(request)
+            except Exception as e:
+                if attempt >= self.rate_limit_retries or not is_rate_limit_error(e):
+                    raise
+                limiter.on_rate_limited(retry_after_seconds(e), attempt)
+        raise AIProviderError(f"{provider.name}: rate limit retries exhausted")
+
+
+async def _collect_stream(provider: AIProvider, request: ChatRequest, sink: StreamSink) -> str:
+    sink.reset()
+    parts: list[str] = []
+    deltas = provider.astream(request)
+    try:
+        async for delta in deltas:
+            parts.append(delta)
+            if sink.feed(delta):
+                logger.info("ai_stream_stopped_early", provider=provider.name, chars=sum(map(len, parts)))
+                break
+    finally:
+        await deltas.aclose()
+    return "".join(parts)
+
+
+async def _await_budget(limiter: ProviderRateLimiter, tokens: int) -> None:
+    wait = limiter.reserve(tokens)
+    if wait <= 0:
+        return
+    limiter.begin_wait()
+    try:
+        await asyncio.sleep(wait)
+    finally:
+        limiter.end_wait()
+
+
+def _error_chain(error: Optional[BaseException]):
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    for err in _error_chain(error):
+        if getattr(err, "status_code", None) == 429:
+            return True
+    text = str(error).lower()
+    return "429" in text or "rate_limit" in text or "rate limit" in text
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    for err in _error_chain(error):
+        headers = getattr(getattr(err, "response", None), "headers", None)
+        if headers is not None:
+            value = headers.get("retry-after") or headers.get("Retry-After")
+            if value is not None:
+                return parse_reset_seconds(value)
+    return None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except (TypeError, ValueError):
+        return None
@@ -4,15 +4,29 @@ AI-powered code review (provider-agnostic).
 Supports Groq/OpenAI/Anthropic and is designed to be extended with new providers
 via services/ai_providers/*.
 """
+import asyncio
+import contextvars
 import json
 import structlog
-from typing import List, Optional, Dict
+from collections import Counter
+from typing import Callable, List, Optional
 
-from models import ReviewResult, ReviewIssue, IssueSeverity
+from models import ReviewResult, ReviewIssue
+from services.diff_analyzer import DiffAnalyzer, DiffChunk, estimate_tokens
 from services.language_detector import LanguageDetector
 from services.rule_generator import RuleGenerator, RULE_CATEGORIES
 from services.rules_service import RulesHelper
+from services.rule_selector import build_query
 from services.ai_providers import AIProviderRouter, AIProviderError
+from services.review_cache import ReviewCache, make_cache_key
+from services.review_stream import ReviewStream, is_short_circuit_issue, parse_streaming_config
+from services.token_budget import (
+    PromptUsage,
+    fit_prompt,
+    get_token_counter,
+    parse_token_budget_config,
+    summarize_usage,
+)
 
 logger = structlog.get_logger()
 
@@ -32,15 +46,10 @@ class AIReviewer:
         "bugs": "compilation.md",  # Bugs often cause compilation issues
     }
     
-    REVIEW_PROMPT = """You are an expert code reviewer with deep knowledge of multiple programming languages. Analyze the following code changes and provide detailed, critical feedback.
-
-Focus areas: {focus_areas}
-
-Code diff:
-{diff}
-
-Files changed:
-{files}
+    # Prompts are split into static instructions, sent first (system message)
+    # so providers can cache them as a prompt prefix together with the rules,
+    # and a per-request part carrying the diff / code.
+    REVIEW_INSTRUCTIONS = """You are an expert code reviewer with deep knowledge of multiple programming languages. Analyze the code changes in the user message and provide detailed, critical feedback.
 
 **CRITICAL CHECKS (Must verify - CHECK EVERY LINE CAREFULLY - NO EXCEPTIONS):**
 
@@ -146,13 +155,13 @@ Rationale: if code cannot compile, all other checks are meaningless.
 **If code has compilation/syntax errors or will break the build, mark as CRITICAL and set block_merge=true.**
 
 Provide your review in JSON format:
-{{
+{
     "summary": "DETAILED summary - MUST explicitly state if code won't compile/run. List ALL compilation errors found. If there are CRITICAL errors, start with '🚨 CRITICAL ERRORS FOUND:' and list them clearly.",
     "score": 3,
     "ai_slop_detected": true,
     "security_score": 4,
     "issues": [
-        {{
+        {
             "severity": "critical",
             "title": "CRITICAL: Missing await keyword",
             "description": "DETAILED explanation ...",
@@ -161,21 +170,21 @@ Provide your review in JSON format:
             "code_snippet": "writer.WriteLineAsync(JsonSerializer.Serialize(error));",
             "suggestion": "Add 'await' keyword: await writer.WriteLineAsync(...);",
             "category": "compilation"
-        }},
-        {{
+        },
+        {
             "severity": "critical",
             "title": "SQL Injection: User input in raw query",
             "description": "User-supplied 'username' is interpolated directly into SQL query string, enabling SQL injection attacks.",
             "file_path": "path/to/repo.cs",
             "line_number": 28,
-            "code_snippet": "var q = $\"SELECT * FROM Users WHERE name='{{username}}'\";",
-            "suggestion": "Use parameterized queries: db.Query(\"SELECT * FROM Users WHERE name=@n\", new {{ n = username }});",
+            "code_snippet": "var q = $\"SELECT * FROM Users WHERE name='{username}'\";",
+            "suggestion": "Use parameterized queries: db.Query(\"SELECT * FROM Users WHERE name=@n\", new { n = username });",
             "category": "security",
             "threat_type": "injection",
             "owasp_id": "A1",
             "cwe_id": "CWE-89"
-        }},
-        {{
+        },
+        {
             "severity": "medium",
             "title": "AI Slop: Redundant comments restating the code",
             "description": "Multiple comments simply restate what the code does instead of explaining why.",
@@ -184,11 +193,11 @@ Provide your review in JSON format:
             "code_snippet": "// Initialize the list\nvar list = new List<string>();",
             "suggestion": "Remove obvious comments or replace them with comments explaining the business logic and intent.",
             "category": "ai_slop"
-        }}
+        }
     ],
     "approval_recommended": false,
     "block_merge": true
-}}
+}
 
 **CRITICAL:** 
 - Severity MUST be lowercase: "critical", "high", "medium", "low", "info" (NOT "CRITICAL", "HIGH", etc.)
@@ -199,6 +208,14 @@ Provide your review in JSON format:
 
 Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag false positives than miss real compilation errors. If you see ANY syntax error, type mismatch, or missing keyword → mark as CRITICAL.
 """
+
+    REVIEW_REQUEST = """Focus areas: {focus_areas}
+
+Code diff:
+{diff}
+
+Files changed:
+{files}"""
     
     def __init__(
         self,
@@ -206,13 +223,14 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
         model: Optional[str] = None,
         *,
         ai_config: Optional[dict] = None,
+        cache: Optional[ReviewCache] = None,
     ):
         """
         Backward compatible:
           AIReviewer(provider="groq", model="...") still works.
 
         Recommended:
-          AIReviewer(ai_config=config["ai"])
+          AIReviewer(ai_config=config["ai"], cache=ReviewCache(...))
         """
         if ai_config is None:
             ai_config = {
@@ -224,8 +242,13 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
 
         self.ai_config = ai_config
         self.router = AIProviderRouter(ai_config)
-        self.last_provider_used: Optional[str] = None
-        self.last_model_used: Optional[str] = None
+        # Per-task record of the last call, so concurrent reviews sharing this
+        # reviewer (project review workers, webhook workers) don't clobber it.
+        self._last_call: contextvars.ContextVar[dict] = contextvars.ContextVar(f"ai_reviewer_last_call_{id(self)}", default={})
+        self.cache = cache
+        self.token_budget = parse_token_budget_config(ai_config)
+        self.prompt_cache = bool((ai_config.get("prompt_cache") or {}).get("enabled", True))
+        self.streaming = parse_streaming_config(ai_config)
 
         self.rules_helper = RulesHelper()
         self.rule_generator = RuleGenerator(ai_config=ai_config, rules_helper=self.rules_helper)
@@ -235,8 +258,145 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
             primary_provider=self.router.primary,
         )
     
-    def _load_rules(self, focus_areas: List[str], language: Optional[str] = None, repo: Optional[str] = None) -> str:
-        """Load relevant rules from local rule files."""
+    def _set_last_call(self, **values) -> None:
+        self._last_call.set({**self._last_call.get(), **values})
+
+    @property
+    def last_provider_used(self) -> Optional[str]:
+        return self._last_call.get().get("provider")
+
+    @last_provider_used.setter
+    def last_provider_used(self, value: Optional[str]) -> None:
+        self._set_last_call(provider=value)
+
+    @property
+    def last_model_used(self) -> Optional[str]:
+        return self._last_call.get().get("model")
+
+    @last_model_used.setter
+    def last_model_used(self, value: Optional[str]) -> None:
+        self._set_last_call(model=value)
+
+    @property
+    def last_cache_hit(self) -> bool:
+        return bool(self._last_call.get().get("cache_hit", False))
+
+    @last_cache_hit.setter
+    def last_cache_hit(self, value: bool) -> None:
+        self._set_last_call(cache_hit=value)
+
+    @property
+    def last_token_usage(self) -> List[PromptUsage]:
+        """Token accounting of every LLM request made by the last review in this context."""
+        return list(self._last_call.get().get("token_usage") or [])
+
+    def last_token_summary(self) -> dict:
+        return summarize_usage(self.last_token_usage)
+
+    def _record_usage(self, usage: PromptUsage) -> None:
+        usages = self._last_call.get().get("token_usage")
+        if usages is None:
+            usages = []
+            self._set_last_call(token_usage=usages)
+        usages.append(usage)
+
+    def _record_answer(self, provider_used: str, model_used: str) -> None:
+        self.last_provider_used = provider_used
+        self.last_model_used = model_used
+        # Shared with the caller's context (see review()), like token_usage
+        answered = self._last_call.get().get("answered_by")
+        if answered is not None:
+            answered.append(((provider_used or "").lower(), model_used))
+
+    def _system_prompt(self, role: str, instructions: str, rules: str, footer: str) -> tuple[str, tuple[int, ...]]:
+        """
+        System message for a review: role, static instructions and rules —
+        everything that repeats across requests — ahead of the per-request
+        user message, so providers can serve it from their prompt cache.
+        Returns the message and the offsets ending its cacheable blocks.
+        """
+        system = f"{role}\n\n{instructions}"
+        breakpoints = [len(system)]
+        if rules:
+            system += f"\n\n---\n## SPECIFIC RULES TO FOLLOW:\n\n{rules}\n\n---\n{footer}"
+            breakpoints.append(len(system))
+        return system, tuple(breakpoints) if self.prompt_cache else ()
+
+    def _finish_usage(self, usage: PromptUsage, reported: dict, response: str) -> None:
+        usage.apply_reported(reported)
+        if not usage.completion_tokens:
+            usage.completion_tokens = get_token_counter(usage.model).count(response)
+        self._record_usage(usage)
+
+    def _review_stream(self, on_issue: Optional[Callable[[dict], None]], *, short_circuit: bool) -> Optional[ReviewStream]:
+        short_circuit = short_circuit and self.streaming.abort_on_compilation_error
+        # Nobody reads the issues and nothing would stop the stream early:
+        # a plain call is cheaper and can be hedged
+        if not self.streaming.enabled or (on_issue is None and not short_circuit):
+            return None
+        return ReviewStream(on_issue, short_circuit=short_circuit)
+
+    def _fit_prompt(
+        self,
+        *,
+        kind: str,
+        system: str,
+        frame: str,
+        content: str,
+        rules: str,
+        provider: Optional[str],
+        model: Optional[str],
+    ) -> tuple[str, str, PromptUsage]:
+        """Truncate content and rules to the selected model's token budget."""
+        selected = self.router.resolve(provider_override=provider, model_override=model)
+        return fit_prompt(
+            get_token_counter(selected.model),
+            self.token_budget,
+            kind=kind,
+            model=selected.model,
+            fixed_text=f"{system}\n{frame}",
+            content=content,
+            rules=rules,
+            response_tokens=self.router.max_tokens,
+        )
+
+    def _load_rules(
+        self,
+        focus_areas: List[str],
+        language: Optional[str] = None,
+        repo: Optional[str] = None,
+        *,
+        code: Optional[str] = None,
+        files: Optional[List[str]] = None,
+    ) -> str:
+        """
+        Load relevant rules from local rule files.
+
+        With ``code`` (the diff or file under review) and rule selection
+        enabled, only the rule sections most relevant to it are returned,
+        within ``ai.rule_selection.max_tokens``; otherwise the full bundle,
+        which the per-request token budget truncates if needed.
+        """
+        selection = self.ai_config.get("rule_selection") or {}
+        if code is not None and selection.get("enabled", True):
+            index = self.rules_helper.resolve_rule_index(focus_areas, language=language, repo=repo)
+            if not len(index):
+                logger.info("no_rules_resolved", focus_areas=focus_areas, language=language)
+                return ""
+            max_tokens = max(200, int(selection.get("max_tokens", 3000)))
+            query = build_query(code, files or [], language=language, focus_areas=focus_areas)
+            content, selected = index.render(query, max_tokens)
+            logger.info(
+                "rules_selected",
+                files=index.sources,
+                sections=len(selected),
+                total_sections=len(index),
+                tokens=sum(section.tokens for section in selected),
+                total_tokens=index.total_tokens,
+                language=language,
+            )
+            return content
+
         result = self.rules_helper.resolve_rules(focus_areas, language=language, repo=repo)
         content = result.get("content", "")
         files = result.get("files", [])
@@ -247,6 +407,89 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
             logger.info("no_rules_resolved", focus_areas=focus_areas, language=language)
 
         return content
+
+    def _cache_lookup(self, key: Optional[str], provider: Optional[str], model: Optional[str]) -> Optional[ReviewResult]:
+        if not key or self.cache is None:
+            return None
+        try:
+            entry = self.cache.get_entry(key)
+        except Exception as e:
+            logger.warning("review_cache_lookup_failed", error=str(e))
+            return None
+        if entry is None:
+            return None
+        selected = self.router.resolve(provider_override=provider, model_override=model)
+        self.last_provider_used = entry.provider or selected.provider_name
+        self.last_model_used = entry.model or selected.model
+        self.last_cache_hit = True
+        logger.info("review_cache_hit", key=key[:12])
+        return entry.result
+
+    def _cache_store(
+        self,
+        key: Optional[str],
+        kind: str,
+        result: ReviewResult,
+        provider: Optional[str],
+        model: Optional[str],
+    ) -> None:
+        if not key or self.cache is None:
+            return
+        if result.degraded:
+            # A retry of the same input should get a real review, not this one
+            logger.info("review_cache_skip_degraded", kind=kind, key=key[:12])
+            return
+        # The key names the resolved provider/model; a fallback or hedged
+        # answer from another one must not be served under it
+        selected = self.router.resolve(provider_override=provider, model_override=model)
+        keyed_by = (selected.provider_name.lower(), selected.model)
+        answered_by = set(self._last_call.get().get("answered_by") or ())
+        if answered_by != {keyed_by}:
+            logger.info(
+                "review_cache_skip_fallback",
+                kind=kind,
+                key=key[:12],
+                expected=f"{keyed_by[0]}/{keyed_by[1]}",
+                answered=sorted(f"{p}/{m}" for p, m in answered_by),
+            )
+            return
+        try:
+            self.cache.put(
+                key,
+                result,
+                kind=kind,
+                provider=selected.provider_name,
+                model=selected.model,
+            )
+        except Exception as e:
+            logger.warning("review_cache_store_failed", error=str(e))
+
+    def _cache_key(
+        self,
+        *,
+        kind: str,
+        content: str,
+        rules: str,
+        focus_areas: List[str],
+        prompt: str,
+        provider: Optional[str],
+        model: Optional[str],
+        bypass_cache: bool,
+        extra: Optional[dict] = None,
+    ) -> Optional[str]:
+        if self.cache is None or bypass_cache:
+            return None
+        selected = self.router.resolve(provider_override=provider, model_override=model)
+        return make_cache_key(
+            kind=kind,
+            content=content,
+            rules=rules,
+            focus_areas=focus_areas,
+            prompt=prompt,
+            provider=selected.provider_name,
+            model=selected.model,
+            extra=extra,
+        )
     
     async def review(
         self,
@@ -257,6 +500,8 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
         provider: Optional[str] = None,
         model: Optional[str] = None,
         repo: Optional[str] = None,
+        bypass_cache: bool = False,
+        on_issue: Optional[Callable[[dict], None]] = None,
     ) -> ReviewResult:
         """
         Review code changes using AI
@@ -265,10 +510,15 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
             diff: Git diff text
             files_changed: List of changed file paths
             focus_areas: Areas to focus on (security, performance, etc.)
+            bypass_cache: Skip the review cache lookup and store
+            on_issue: Called with each raw issue as it streams in
             
         Returns:
             ReviewResult with findings
         """
+        self.last_cache_hit = False
+        # Shared by the chunk tasks, which run in copies of this context
+        self._set_last_call(token_usage=[], answered_by=[])
         try:
             # Dil tespiti yap
             detected_language = LanguageDetector.detect_from_files(files_changed)
@@ -292,121 +542,44 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
                     )
             
             # Load relevant rules (dil tespit edildiyse dile özel, repo varsa repo-spesifik)
-            rules = self._load_rules(focus_areas, language=detected_language, repo=repo)
-            
-            # Build enhanced prompt with rules
-            prompt_parts = [
-                self.REVIEW_PROMPT.format(
-                    focus_areas=", ".join(focus_areas),
-                    diff=diff[:10000],  # Limit diff size
-                    files="\n".join(files_changed)
-                )
-            ]
-            
-            if rules:
-                prompt_parts.append("\n---\n## SPECIFIC RULES TO FOLLOW:\n")
-                prompt_parts.append(rules[:15000])  # Limit rules size
-                prompt_parts.append("\n---\nApply these rules strictly when reviewing the code above.")
-            
-            prompt = "\n".join(prompt_parts)
-            
-            logger.info(
-                "requesting_ai_review",
-                primary_provider=self.router.primary,
-                files_count=len(files_changed),
-                rules_loaded=bool(rules),
+            rules = self._load_rules(
+                focus_areas,
+                language=detected_language,
+                repo=repo,
+                code=diff,
+                files=files_changed,
             )
 
-            system_msg = "You are an expert code reviewer."
-            provider_used, model_used, response = self.router.chat(
-                system=system_msg,
-                user=prompt,
-                provider_override=provider,
-                model_override=model,
+            cache_key = self._cache_key(
+                kind="diff",
+                content=diff,
+                rules=rules,
+                focus_areas=focus_areas,
+                prompt=self.REVIEW_INSTRUCTIONS + self.REVIEW_REQUEST,
+                provider=provider,
+                model=model,
+                bypass_cache=bypass_cache,
+                extra={"files": sorted(files_changed)},
             )
-            self.last_provider_used = provider_used
-            self.last_model_used = model_used
-            
-            # Parse AI response
-            review_data = self._parse_ai_response(response)
-            
-            # Normalize severity values (convert uppercase to lowercase)
-            normalized_issues = []
-            for issue in review_data.get("issues", []):
-                if "severity" in issue:
-                    severity = issue["severity"]
-                    # Convert uppercase to lowercase
-                    if isinstance(severity, str):
-                        severity_lower = severity.lower()
-                        # Map common variations
-                        severity_map = {
-                            "critical": "critical",
-                            "high": "high",
-                            "medium": "medium",
-                            "low": "low",
-                            "info": "info",
-                            "information": "info",
-                            "minor": "low",
-                            "major": "high",
-                        }
-                        issue["severity"] = severity_map.get(severity_lower, severity_lower)
-                
-                # AI Slop issues must never block merge — cap at medium
-                if issue.get("category") == "ai_slop" and issue.get("severity") in ("critical", "high"):
-                    issue["severity"] = "medium"
-
-                # Ensure critical issues have detailed descriptions
-                if issue.get("severity") == "critical":
-                    desc = issue.get("description", "")
-                    if not desc.startswith(("CRITICAL", "🚨", "❌", "critical")):
-                        issue["description"] = f"🚨 CRITICAL: {desc}"
-                    title = issue.get("title", "")
-                    if not title.startswith(("CRITICAL", "🚨", "❌")):
-                        issue["title"] = f"CRITICAL: {title}"
-                
-                normalized_issues.append(issue)
+            cached = self._cache_lookup(cache_key, provider, model)
+            if cached is not None:
+                return cached
             
-            # Short-circuit: if compilation/syntax errors exist, drop everything else
-            compilation_issues = [
-                i for i in normalized_issues
-                if i.get("severity") == "critical"
-                and i.get("category", "").lower() in ("compilation", "syntax")
-            ]
-            if compilation_issues:
-                normalized_issues = compilation_issues
-                logger.info("short_circuit_compilation", kept=len(compilation_issues))
-
-            summary = review_data.get("summary", "AI review completed")
-            critical_issues = [i for i in normalized_issues if i.get("severity") == "critical"]
-
-            if critical_issues:
-                critical_summary = f"🚨 CRITICAL ERRORS FOUND ({len(critical_issues)}):\n"
-                for idx, issue in enumerate(critical_issues, 1):
-                    critical_summary += f"{idx}. {issue.get('title', 'Unknown issue')} - {issue.get('description', '')[:100]}...\n"
-                summary = critical_summary + "\n" + summary
-
-            ai_slop_from_response = review_data.get("ai_slop_detected", False)
-            ai_slop_issues = [i for i in normalized_issues if i.get("category") == "ai_slop"]
-
-            # Strip unknown fields before creating ReviewIssue
-            known_issue_fields = {
-                "severity", "title", "description", "file_path", "line_number",
-                "line_end", "code_snippet", "suggestion", "category",
-                "owasp_id", "cwe_id", "threat_type",
-            }
-            clean_issues = []
-            for issue in normalized_issues:
-                clean_issues.append({k: v for k, v in issue.items() if k in known_issue_fields})
+            chunks = self._plan_chunks(diff)
+            if len(chunks) > 1:
+                result = await self._review_chunked(chunks, focus_areas, rules, provider, model, on_issue)
+            else:
+                review_data = await self._request_diff_review(
+                    diff,
+                    files_changed,
+                    focus_areas,
+                    rules,
+                    provider=provider,
+                    model=model,
+                    on_issue=on_issue,
+                )
+                result = self._build_review_result(review_data)
 
-            result = ReviewResult(
-                summary=summary,
-                score=review_data.get("score", 7),
-                issues=[ReviewIssue(**issue) for issue in clean_issues],
-                approval_recommended=review_data.get("approval_recommended", True),
-                block_merge=review_data.get("block_merge", False) or len(critical_issues) > 0,
-                ai_slop_detected=ai_slop_from_response or len(ai_slop_issues) > 0,
-            )
-            
             logger.info(
                 "review_completed",
                 total_issues=result.total_issues,
@@ -414,8 +587,10 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
                 security_score=result.security_score,
                 security_issues=result.security_issues_count,
                 score=result.score,
+                chunks=len(chunks),
             )
-            
+
+            self._cache_store(cache_key, "diff", result, provider, model)
             return result
             
         except Exception as e:
@@ -430,19 +605,281 @@ Be EXTREMELY CRITICAL and THOROUGH. Check every line of the diff. Better to flag
                 score=0,
                 issues=[],
                 approval_recommended=False,
-                block_merge=True
+                block_merge=True,
+                degraded=True,
             )
 
-    FILE_REVIEW_PROMPT = """You are an expert code reviewer performing a FULL FILE ANALYSIS (not a diff review).
-Analyze the ENTIRE source code below for issues. This is a standalone file from a project — review it thoroughly.
+    def _plan_chunks(self, diff: str) -> List[DiffChunk]:
+        """Split the diff per file/hunk when chunked review is enabled and the
+        diff does not fit into a single prompt."""
+        chunking = self.ai_config.get("chunking") or {}
+        if not chunking.get("enabled", False):
+            return [DiffChunk(diff=diff)]
+        max_tokens = max(200, int(chunking.get("max_chunk_tokens", 3000)))
+        if estimate_tokens(diff) <= max_tokens:
+            return [DiffChunk(diff=diff)]
+        return DiffAnalyzer.chunk_diff(diff, max_tokens=max_tokens)
+
+    async def _review_chunked(
+        self,
+        chunks: List[DiffChunk],
+        focus_areas: List[str],
+        rules: str,
+        provider: Optional[str],
+        model: Optional[str],
+        on_issue: Optional[Callable[[dict], None]] = None,
+    ) -> ReviewResult:
+        """Review diff chunks concurrently (bounded) and merge the results."""
+        chunking = self.ai_config.get("chunking") or {}
+        semaphore = asyncio.Semaphore(max(1, int(chunking.get("max_concurrency", 4))))
+        total = len(chunks)
+
+        async def review_chunk(index: int, chunk: DiffChunk) -> dict:
+            async with semaphore:
+                logger.info("reviewing_diff_chunk", chunk=index + 1, total=total, files=chunk.files, tokens=chunk.tokens)
+                data = await self._request_diff_review(
+                    chunk.diff,
+                    chunk.files,
+                    focus_areas,
+                    rules,
+                    provider=provider,
+                    model=model,
+                    part=(index + 1, total),
+                    on_issue=on_issue,
+                )
+            # Keep issues from different single-file chunks apart when deduplicating
+            if len(chunk.files) == 1:
+                for issue in data.get("issues", []):
+                    issue.setdefault("file_path", chunk.files[0])
+            return data
+
+        outcomes = await asyncio.gather(
+            *(review_chunk(i, chunk) for i, chunk in enumerate(chunks)),
+            return_exceptions=True,
+        )
 
-**File:** {file_path}
-**Language:** {language}
-**Focus areas:** {focus_areas}
+        # Chunk tasks ran in copied contexts; report the provider that answered most chunks.
+        answered = self._last_call.get().get("answered_by") or []
+        if answered:
+            self.last_provider_used, self.last_model_used = Counter(answered).most_common(1)[0][0]
+        else:
+            selected = self.router.resolve(provider_override=provider, model_override=model)
+            self.last_provider_used = selected.provider_name
+            self.last_model_used = selected.model
+
+        parts = []
+        failed = 0
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, BaseException):
+                failed += 1
+                logger.warning("diff_chunk_review_failed", files=chunk.files, error=str(outcome))
+                continue
+            parts.append((outcome, chunk.tokens))
+        if not parts:
+            raise AIProviderError(f"All {total} diff chunks failed to review")
+
+        merged = self._merge_review_data(parts)
+        if failed:
+            merged["summary"] = f"⚠️ {failed}/{total} diff chunks could not be reviewed.\n\n" + merged["summary"]
+            merged["approval_recommended"] = False
+            merged["degraded"] = True
+        return self._build_review_result(merged)
+
+    @staticmethod
+    def _merge_review_data(parts: List[tuple]) -> dict:
+        """
+        Merge per-chunk review data into one.
 
-```{language}
-{code}
-```
+        Issues are deduplicated on (file, line, category, title); the score is
+        the chunk-size weighted mean; merge blocking and AI-slop flags are OR-ed.
+        """
+        issues: List[dict] = []
+        seen = set()
+        weighted_score = 0.0
+        total_weight = 0
+        summaries = []
+        for data, weight in parts:
+            for issue in data.get("issues", []):
+                key = (
+                    issue.get("file_path"),
+                    issue.get("line_number"),
+                    (issue.get("category") or "").lower(),
+                    (issue.get("title") or "").strip().lower(),
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                issues.append(issue)
+            weight = max(1, weight)
+            weighted_score += float(data.get("score", 7)) * weight
+            total_weight += weight
+            summary = (data.get("summary") or "").strip()
+            if summary and summary not in summaries:
+                summaries.append(summary)
+
+        return {
+            "summary": "\n\n".join(summaries) or "AI review completed",
+            "score": round(weighted_score / total_weight),
+            "issues": issues,
+            "approval_recommended": all(d.get("approval_recommended", True) for d, _ in parts),
+            "block_merge": any(d.get("block_merge", False) for d, _ in parts),
+            "ai_slop_detected": any(d.get("ai_slop_detected", False) for d, _ in parts),
+            "degraded": any(d.get("degraded", False) for d, _ in parts),
+        }
+
+    async def _request_diff_review(
+        self,
+        diff: str,
+        files_changed: List[str],
+        focus_areas: List[str],
+        rules: str,
+        *,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        part: Optional[tuple] = None,
+        on_issue: Optional[Callable[[dict], None]] = None,
+    ) -> dict:
+        """Send one diff review prompt and return the parsed, severity-normalized response."""
+        role = "You are an expert code reviewer."
+        footer = "Apply these rules strictly when reviewing the code in the user message."
+
+        def build(diff_text: str) -> str:
+            prompt_parts = [
+                self.REVIEW_REQUEST.format(
+                    focus_areas=", ".join(focus_areas),
+                    diff=diff_text,
+                    files="\n".join(files_changed)
+                )
+            ]
+            if part is not None:
+                prompt_parts.append(
+                    f"\nNOTE: This is part {part[0]} of {part[1]} of a larger change set. "
+                    "Only review the diff shown here; other files are reviewed separately."
+                )
+            return "\n".join(prompt_parts)
+
+        diff, rules, usage = self._fit_prompt(
+            kind="diff",
+            system=self._system_prompt(role, self.REVIEW_INSTRUCTIONS, " " if rules else "", footer)[0],
+            frame=build(""),
+            content=diff,
+            rules=rules,
+            provider=provider,
+            model=model,
+        )
+        system_msg, cache_breakpoints = self._system_prompt(role, self.REVIEW_INSTRUCTIONS, rules, footer)
+        prompt = build(diff)
+
+        logger.info(
+            "requesting_ai_review",
+            primary_provider=self.router.primary,
+            files_count=len(files_changed),
+            rules_loaded=bool(rules),
+            prompt_tokens=usage.prompt_tokens,
+            diff_truncated=usage.content_truncated,
+            rules_truncated=usage.rules_truncated,
+        )
+
+        reported: dict = {}
+        stream = self._review_stream(on_issue, short_circuit=True)
+        provider_used, model_used, response = await self.router.achat(
+            system=system_msg,
+            user=prompt,
+            provider_override=provider,
+            model_override=model,
+            cache_breakpoints=cache_breakpoints,
+            usage=reported,
+            stream=stream,
+        )
+        self._record_answer(provider_used, model_used)
+        self._finish_usage(usage, reported, response)
+
+        # Parse AI response
+        review_data = self._parse_ai_response(response, stream)
+
+        # Normalize severity values (convert uppercase to lowercase)
+        normalized_issues = []
+        for issue in review_data.get("issues", []):
+            if "severity" in issue:
+                severity = issue["severity"]
+                # Convert uppercase to lowercase
+                if isinstance(severity, str):
+                    severity_lower = severity.lower()
+                    # Map common variations
+                    severity_map = {
+                        "critical": "critical",
+                        "high": "high",
+                        "medium": "medium",
+                        "low": "low",
+                        "info": "info",
+                        "information": "info",
+                        "minor": "low",
+                        "major": "high",
+                    }
+                    issue["severity"] = severity_map.get(severity_lower, severity_lower)
+
+            # AI Slop issues must never block merge — cap at medium
+            if issue.get("category") == "ai_slop" and issue.get("severity") in ("critical", "high"):
+                issue["severity"] = "medium"
+
+            # Ensure critical issues have detailed descriptions
+            if issue.get("severity") == "critical":
+                desc = issue.get("description", "")
+                if not desc.startswith(("CRITICAL", "🚨", "❌", "critical")):
+                    issue["description"] = f"🚨 CRITICAL: {desc}"
+                title = issue.get("title", "")
+                if not title.startswith(("CRITICAL", "🚨", "❌")):
+                    issue["title"] = f"CRITICAL: {title}"
+
+            normalized_issues.append(issue)
+
+        review_data["issues"] = normalized_issues
+        return review_data
+
+    def _build_review_result(self, review_data: dict) -> ReviewResult:
+        """Turn (possibly merged) review data into a ReviewResult."""
+        normalized_issues = review_data.get("issues", [])
+
+        # Short-circuit: if compilation/syntax errors exist, drop everything else
+        compilation_issues = [i for i in normalized_issues if is_short_circuit_issue(i)]
+        if compilation_issues:
+            normalized_issues = compilation_issues
+            logger.info("short_circuit_compilation", kept=len(compilation_issues))
+
+        summary = review_data.get("summary", "AI review completed")
+        critical_issues = [i for i in normalized_issues if i.get("severity") == "critical"]
+
+        if critical_issues:
+            critical_summary = f"🚨 CRITICAL ERRORS FOUND ({len(critical_issues)}):\n"
+            for idx, issue in enumerate(critical_issues, 1):
+                critical_summary += f"{idx}. {issue.get('title', 'Unknown issue')} - {issue.get('description', '')[:100]}...\n"
+            summary = critical_summary + "\n" + summary
+
+        ai_slop_from_response = review_data.get("ai_slop_detected", False)
+        ai_slop_issues = [i for i in normalized_issues if i.get("category") == "ai_slop"]
+
+        # Strip unknown fields before creating ReviewIssue
+        known_issue_fields = {
+            "severity", "title", "description", "file_path", "line_number",
+            "line_end", "code_snippet", "suggestion", "category",
+            "owasp_id", "cwe_id", "threat_type",
+        }
+        clean_issues = []
+        for issue in normalized_issues:
+            clean_issues.append({k: v for k, v in issue.items() if k in known_issue_fields})
+
+        return ReviewResult(
+            summary=summary,
+            score=review_data.get("score", 7),
+            issues=[ReviewIssue(**issue) for issue in clean_issues],
+            approval_recommended=review_data.get("approval_recommended", True),
+            block_merge=review_data.get("block_merge", False) or len(critical_issues) > 0,
+            ai_slop_detected=ai_slop_from_response or len(ai_slop_issues) > 0,
+            degraded=bool(review_data.get("degraded", False)),
+        )
+
+    FILE_REVIEW_INSTRUCTIONS = """You are an expert code reviewer performing a FULL FILE ANALYSIS (not a diff review).
+Analyze the ENTIRE source file in the user message for issues. This is a standalone file from a project — review it thoroughly.
 
 **WHAT TO LOOK FOR:**
 
@@ -490,26 +927,26 @@ Do NOT say "everything looks fine" unless the code is truly exemplary.
 Most production code has at least 2-3 issues.
 
 Provide your review in JSON format:
-{{
+{
     "summary": "Brief summary of findings for this file",
     "score": 7,
     "ai_slop_detected": false,
     "security_score": 8,
     "issues": [
-        {{
+        {
             "severity": "high",
             "title": "Missing input validation",
             "description": "User input is used directly without validation...",
-            "file_path": "{file_path}",
+            "file_path": "<file path from the user message>",
             "line_number": 42,
             "code_snippet": "relevant code here",
             "suggestion": "Add input validation...",
             "category": "security"
-        }}
+        }
     ],
     "approval_recommended": true,
     "block_merge": false
-}}
+}
 
 **Rules:**
 - severity: "critical", "high", "medium", "low", "info" (lowercase only)
@@ -518,6 +955,14 @@ Provide your review in JSON format:
 - Be specific: include line numbers and code snippets when possible
 """
 
+    FILE_REVIEW_REQUEST = """**File:** {file_path}
+**Language:** {language}
+**Focus areas:** {focus_areas}
+
+```{language}
+{code}
+```"""
+
     async def review_file(
         self,
         code: str,
@@ -527,40 +972,76 @@ Provide your review in JSON format:
         *,
         provider: Optional[str] = None,
         model: Optional[str] = None,
+        bypass_cache: bool = False,
+        on_issue: Optional[Callable[[dict], None]] = None,
     ) -> ReviewResult:
         """Review a standalone file (not a diff)."""
+        self.last_cache_hit = False
+        self._set_last_call(token_usage=[], answered_by=[])
         try:
-            rules = self._load_rules(focus_areas, language=language)
+            rules = self._load_rules(focus_areas, language=language, code=code, files=[file_path])
+
+            cache_key = self._cache_key(
+                kind="file",
+                content=code,
+                rules=rules,
+                focus_areas=focus_areas,
+                prompt=self.FILE_REVIEW_INSTRUCTIONS + self.FILE_REVIEW_REQUEST,
+                provider=provider,
+                model=model,
+                bypass_cache=bypass_cache,
+                extra={"file_path": file_path, "language": language},
+            )
+            cached = self._cache_lookup(cache_key, provider, model)
+            if cached is not None:
+                return cached
 
-            prompt_parts = [
-                self.FILE_REVIEW_PROMPT.format(
+            def build(code_text: str) -> str:
+                return self.FILE_REVIEW_REQUEST.format(
                     file_path=file_path,
                     language=language,
-                    code=code[:10000],
+                    code=code_text,
                     focus_areas=", ".join(focus_areas),
                 )
-            ]
-
-            if rules:
-                prompt_parts.append("\n---\n## SPECIFIC RULES TO FOLLOW:\n")
-                prompt_parts.append(rules[:15000])
-                prompt_parts.append("\n---\nApply these rules strictly.")
 
-            prompt = "\n".join(prompt_parts)
+            role = "You are an expert code reviewer performing thorough file-level analysis."
+            footer = "Apply these rules strictly."
+            code_text, rules, usage = self._fit_prompt(
+                kind="file",
+                system=self._system_prompt(role, self.FILE_REVIEW_INSTRUCTIONS, " " if rules else "", footer)[0],
+                frame=build(""),
+                content=code,
+                rules=rules,
+                provider=provider,
+                model=model,
+            )
+            system_msg, cache_breakpoints = self._system_prompt(role, self.FILE_REVIEW_INSTRUCTIONS, rules, footer)
+            prompt = build(code_text)
 
-            logger.info("requesting_file_review", file=file_path, language=language)
+            logger.info(
+                "requesting_file_review",
+                file=file_path,
+                language=language,
+                prompt_tokens=usage.prompt_tokens,
+                code_truncated=usage.content_truncated,
+            )
 
-            system_msg = "You are an expert code reviewer performing thorough file-level analysis."
-            provider_used, model_used, response = self.router.chat(
+            reported: dict = {}
+            # The file prompt has no compilation short-circuit; only stream issues out
+            stream = self._review_stream(on_issue, short_circuit=False)
+            provider_used, model_used, response = await self.router.achat(
                 system=system_msg,
                 user=prompt,
                 provider_override=provider,
                 model_override=model,
+                cache_breakpoints=cache_breakpoints,
+                usage=reported,
+                stream=stream,
             )
-            self.last_provider_used = provider_used
-            self.last_model_used = model_used
+            self._record_answer(provider_used, model_used)
+            self._finish_usage(usage, reported, response)
 
-            review_data = self._parse_ai_response(response)
+            review_data = self._parse_ai_response(response, stream)
 
             normalized_issues = []
             for issue in review_data.get("issues", []):
@@ -598,9 +1079,11 @@ Provide your review in JSON format:
                 approval_recommended=review_data.get("approval_recommended", True),
                 block_merge=review_data.get("block_merge", False),
                 ai_slop_detected=review_data.get("ai_slop_detected", False) or len(ai_slop_issues) > 0,
+                degraded=bool(review_data.get("degraded", False)),
             )
 
             logger.info("file_review_completed", file=file_path, score=result.score, issues=result.total_issues)
+            self._cache_store(cache_key, "file", result, provider, model)
             return result
 
         except Exception as e:
@@ -631,8 +1114,16 @@ Provide your review in JSON format:
             max_tokens=self.router.max_tokens,
         )
     
-    def _parse_ai_response(self, response: str) -> dict:
-        """Parse AI response to structured data"""
+    def _parse_ai_response(self, response: str, stream: Optional[ReviewStream] = None) -> dict:
+        """
+        Parse AI response to structured data.
+
+        A stream stopped by the compilation short-circuit, or an answer cut
+        off mid-JSON, falls back to the issues parsed while streaming.
+        """
+        if stream is not None and stream.aborted:
+            logger.info("review_stream_short_circuit", issues=len(stream.issues))
+            return stream.review_data()
         try:
             # Try to find JSON in the response
             start = response.find('{')
@@ -647,14 +1138,19 @@ Provide your review in JSON format:
                     "summary": response[:500],
                     "score": 7,
                     "issues": [],
-                    "approval_recommended": True
+                    "approval_recommended": True,
+                    "degraded": True,
                 }
         except json.JSONDecodeError:
+            if stream is not None and stream.issues:
+                logger.warning("failed_to_parse_ai_response", recovered_issues=len(stream.issues))
+                return {**stream.review_data(), "degraded": True}
             logger.warning("failed_to_parse_ai_response")
             return {
                 "summary": "Failed to parse AI response",
                 "score": 5,
                 "issues": [],
-                "approval_recommended": False
+                "approval_recommended": False,
+                "degraded": True,
             }
 
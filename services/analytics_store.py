@@ -41,7 +41,9 @@ class AnalyticsStore:
         repo: str = "",
         author: str = "",
         platform: str = "",
+        token_usage: dict[str, Any] | None = None,
     ) -> None:
+        token_usage = token_usage or {}
         categories: dict[str, int] = defaultdict(int)
         threat_types: dict[str, int] = defaultdict(int)
         for issue in result.issues:
@@ -71,6 +73,10 @@ class AnalyticsStore:
             "approval_recommended": result.approval_recommended,
             "categories": dict(categories),
             "threat_types": dict(threat_types),
+            "llm_requests": token_usage.get("requests", 0),
+            "prompt_tokens": token_usage.get("prompt_tokens", 0),
+            "completion_tokens": token_usage.get("completion_tokens", 0),
+            "cached_tokens": token_usage.get("cached_tokens", 0),
         }
         with self._lock:
             self._reviews.append(snapshot)
@@ -91,6 +97,10 @@ class AnalyticsStore:
                 "total_ai_slop": 0,
                 "blocked_merges": 0,
                 "secret_leaks": 0,
+                "total_prompt_tokens": 0,
+                "avg_prompt_tokens": 0,
+                "total_completion_tokens": 0,
+                "total_cached_tokens": 0,
             }
 
         return {
@@ -103,6 +113,10 @@ class AnalyticsStore:
             "total_ai_slop": sum(r["ai_slop_count"] for r in reviews),
             "blocked_merges": sum(1 for r in reviews if r["block_merge"]),
             "secret_leaks": sum(1 for r in reviews if r["secret_leak_detected"]),
+            "total_prompt_tokens": sum(r["prompt_tokens"] for r in reviews),
+            "avg_prompt_tokens": round(sum(r["prompt_tokens"] for r in reviews) / total),
+            "total_completion_tokens": sum(r["completion_tokens"] for r in reviews),
+            "total_cached_tokens": sum(r.get("cached_tokens", 0) for r in reviews),
         }
 
     def get_score_trend(self, limit: int = 50) -> list[dict[str, Any]]:
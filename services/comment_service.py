@@ -4,13 +4,17 @@ Delegates rendering to the active review template.
 """
 
 import structlog
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 
 from models import ReviewResult, ReviewIssue
 from review_templates import BaseTemplate, get_template
+from services.parsed_diff import TargetLineIndex
 
 logger = structlog.get_logger()
 
+# Skipped files listed in the summary comment before it says "and N more"
+MAX_LISTED_SKIPPED_FILES = 20
+
 
 class CommentService:
     """Format review results as comments using a configurable template."""
@@ -26,14 +30,33 @@ class CommentService:
         self,
         result: ReviewResult,
         show_detailed_table: bool = False,
+        skipped_files: Sequence[Tuple[str, str]] = (),
     ) -> str:
-        return self.template.render_summary(
+        """Render the summary; ``skipped_files`` are (path, reason) pairs left out of the review."""
+        comment = self.template.render_summary(
             result,
             show_detailed_table=show_detailed_table,
         )
+        if skipped_files:
+            comment = f"{comment.rstrip()}\n\n{self.format_skipped_files(skipped_files)}"
+        return comment
+
+    @staticmethod
+    def format_skipped_files(skipped_files: Sequence[Tuple[str, str]]) -> str:
+        lines = [f"### ⏭️ Not Reviewed ({len(skipped_files)} file(s))", ""]
+        for path, reason in skipped_files[:MAX_LISTED_SKIPPED_FILES]:
+            lines.append(f"- `{path}` — {reason}")
+        hidden = len(skipped_files) - MAX_LISTED_SKIPPED_FILES
+        if hidden > 0:
+            lines.append(f"- … and {hidden} more")
+        return "\n".join(lines)
 
     def format_inline_comment(self, issue: ReviewIssue) -> str:
         return self.template.render_inline(issue)
 
-    def format_inline_comments(self, result: ReviewResult) -> List[dict]:
-        return self.template.render_inline_comments(result)
+    def format_inline_comments(
+        self,
+        result: ReviewResult,
+        line_index: Optional[TargetLineIndex] = None,
+    ) -> List[dict]:
+        return self.template.render_inline_comments(result, line_index=line_index)
@@ -2,19 +2,49 @@
 Diff parsing and analysis utilities
 """
 import structlog
+from dataclasses import dataclass, field
 from typing import List, Dict, Any
 from unidiff import PatchSet
 
+from .parsed_diff import ADDED, CONTEXT, NO_NEWLINE, REMOVED, DiffFile, Hunk, ParsedDiff
+from .token_budget import count_tokens
+
 logger = structlog.get_logger()
 
+_LINE_PREFIX = {ADDED: '+', REMOVED: '-', CONTEXT: ' ', NO_NEWLINE: '\\'}
+
+
+def estimate_tokens(text: str) -> int:
+    """Model-agnostic token count used for chunk budgeting."""
+    return count_tokens(text)
+
+
+@dataclass
+class DiffChunk:
+    """A slice of a PR diff small enough to review in one LLM call."""
+    diff: str
+    files: List[str] = field(default_factory=list)
+    tokens: int = 0
+
 
 class DiffAnalyzer:
     """Analyze and parse git diffs"""
     
+    @staticmethod
+    def parse(diff_text: str) -> ParsedDiff:
+        """
+        Parse unified diff format into the compact ParsedDiff model
+        
+        Lines are stored in flat arrays and only materialised on access;
+        prefer this over ``parse_diff`` when only paths, counts or a few
+        hunks are needed.
+        """
+        return ParsedDiff.parse(diff_text)
+    
     @staticmethod
     def parse_diff(diff_text: str) -> Dict[str, Any]:
         """
-        Parse unified diff format
+        Parse unified diff format into nested dicts (one per hunk line)
         
         Args:
             diff_text: Unified diff text
@@ -82,8 +112,7 @@ class DiffAnalyzer:
     def get_changed_files(diff_text: str) -> List[str]:
         """Extract list of changed file paths"""
         try:
-            patch_set = PatchSet(diff_text)
-            return [f.path for f in patch_set]
+            return ParsedDiff.parse(diff_text).paths
         except Exception as e:
             logger.warning("failed_to_extract_changed_files", error=str(e))
             return []
@@ -97,3 +126,124 @@ class DiffAnalyzer:
             stats[ext] = stats.get(ext, 0) + 1
         return stats
 
+    @staticmethod
+    def chunk_diff(diff_text: str, max_tokens: int = 3000) -> List[DiffChunk]:
+        """
+        Split a unified diff into token-budgeted chunks.
+
+        Whole files are packed together while they fit; a file larger than the
+        budget is split by hunk, and a single oversized hunk is split into
+        line windows with recomputed ``@@`` headers. Every chunk stays a valid
+        unified diff with its own file headers.
+
+        Args:
+            diff_text: Unified diff text
+            max_tokens: Approximate token budget per chunk
+
+        Returns:
+            Chunks in diff order; a single chunk holding the raw diff if it
+            cannot be parsed
+        """
+        parsed = ParsedDiff.parse(diff_text)
+        if not parsed.files:
+            return [DiffChunk(diff=diff_text, files=[], tokens=estimate_tokens(diff_text))]
+
+        # (path, text) pieces, each no larger than the budget unless a single line is
+        pieces: List[tuple] = []
+        for diff_file in parsed.files:
+            path = diff_file.path
+            header = f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+            hunk_texts: List[str] = []
+            for hunk in diff_file.hunks:
+                hunk_texts.extend(DiffAnalyzer._render_hunk(hunk, max_tokens - estimate_tokens(header)))
+
+            whole = header + "".join(hunk_texts)
+            if estimate_tokens(whole) <= max_tokens:
+                pieces.append((path, whole))
+                continue
+
+            body = ""
+            for hunk_text in hunk_texts:
+                if body and estimate_tokens(header + body + hunk_text) > max_tokens:
+                    pieces.append((path, header + body))
+                    body = ""
+                body += hunk_text
+            if body:
+                pieces.append((path, header + body))
+
+        chunks: List[DiffChunk] = []
+        current = DiffChunk(diff="")
+        for path, text in pieces:
+            tokens = estimate_tokens(text)
+            if current.diff and current.tokens + tokens > max_tokens:
+                chunks.append(current)
+                current = DiffChunk(diff="")
+            current.diff += text
+            current.tokens += tokens
+            if path not in current.files:
+                current.files.append(path)
+        if current.diff:
+            chunks.append(current)
+
+        logger.info("diff_chunked", chunks=len(chunks), files=len(parsed), max_tokens=max_tokens)
+        return chunks
+
+    @staticmethod
+    def render_file(diff_file: DiffFile) -> str:
+        """Render one parsed file back to unified diff text, headers included."""
+        path = diff_file.path
+        parts = [f"diff --git a/{path} b/{path}\n--- a/{diff_file.old_path or path}\n+++ b/{path}\n"]
+        for hunk in diff_file.hunks:
+            parts.append(f"@@ -{hunk.source_start},{hunk.source_length} +{hunk.target_start},{hunk.target_length} @@\n")
+            for kind, content in hunk.iter_raw():
+                parts.append(_LINE_PREFIX[kind] + content + ("" if content.endswith("\n") else "\n"))
+        return "".join(parts)
+
+    @staticmethod
+    def _render_hunk(hunk: Hunk, max_tokens: int) -> List[str]:
+        """Render a parsed hunk back to text, splitting it into line windows
+        (each with a correct ``@@`` header) when it exceeds ``max_tokens``."""
+        windows: List[str] = []
+        # Every window repeats an "@@" header; reserve room for it (+1 for digit growth)
+        max_tokens -= estimate_tokens(
+            f"@@ -{hunk.source_start},{hunk.source_length} +{hunk.target_start},{hunk.target_length} @@\n"
+        ) + 1
+        source_line = hunk.source_start
+        target_line = hunk.target_start
+        lines: List[str] = []
+        window_tokens = 0
+        window_source, window_target = source_line, target_line
+        source_count = target_count = 0
+
+        def flush():
+            if lines:
+                windows.append(
+                    f"@@ -{window_source},{source_count} +{window_target},{target_count} @@\n" + "".join(lines)
+                )
+
+        for kind, content in hunk.iter_raw():
+            if not content.endswith('\n'):
+                content += '\n'
+            line = _LINE_PREFIX[kind] + content
+            if kind == NO_NEWLINE:
+                # Belongs to the previous line; never starts a window of its own
+                if lines:
+                    lines.append(line)
+                continue
+            line_tokens = estimate_tokens(line)
+            if lines and window_tokens + line_tokens > max_tokens:
+                flush()
+                lines = []
+                window_tokens = 0
+                window_source, window_target = source_line, target_line
+                source_count = target_count = 0
+            lines.append(line)
+            window_tokens += line_tokens
+            if kind != ADDED:
+                source_line += 1
+                source_count += 1
+            if kind != REMOVED:
+                target_line += 1
+                target_count += 1
+        flush()
+        return windows
@@ -0,0 +1,103 @@
+"""
+File filters shared by project reviews and PR diff fetching.
+
+``.reviewignore`` uses .gitignore-style patterns; ``classify_file`` buckets a
+path into source / test / boilerplate / config / auto_generated.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+from pathlib import Path
+from typing import Optional
+
+_DEFAULT_REVIEWIGNORE = Path(__file__).resolve().parent.parent / ".reviewignore"
+
+
+def parse_reviewignore(text: str) -> list[str]:
+    patterns: list[str] = []
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        patterns.append(stripped)
+    return patterns
+
+
+def load_reviewignore(project_root: Optional[Path] = None) -> list[str]:
+    """Patterns from ``project_root/.reviewignore``, else the server's default file."""
+    local = project_root / ".reviewignore" if project_root else None
+    if local and local.is_file():
+        return parse_reviewignore(local.read_text(encoding="utf-8", errors="ignore"))
+    if _DEFAULT_REVIEWIGNORE.is_file():
+        return parse_reviewignore(_DEFAULT_REVIEWIGNORE.read_text(encoding="utf-8", errors="ignore"))
+    return []
+
+
+def is_ignored(rel_path: str, patterns: list[str]) -> bool:
+    rel = rel_path.replace("\\", "/")
+    parts = rel.split("/")
+
+    for pat in patterns:
+        p = pat.rstrip("/")
+        is_dir_pattern = pat.endswith("/")
+
+        if "/" not in p:
+            if is_dir_pattern:
+                if any(fnmatch.fnmatch(part, p) for part in parts[:-1]):
+                    return True
+            else:
+                if fnmatch.fnmatch(parts[-1], p):
+                    return True
+                if any(fnmatch.fnmatch(part, p) for part in parts[:-1]):
+                    return True
+        else:
+            if fnmatch.fnmatch(rel, p) or fnmatch.fnmatch(rel, p + "/**"):
+                return True
+            if is_dir_pattern and fnmatch.fnmatch(rel, p + "*"):
+                return True
+
+    return False
+
+
+_AUTO_GENERATED_PATTERNS = {
+    "migrations", "migration", "Migrations",
+    "designer.cs", ".designer.cs", ".generated.cs", ".g.cs", ".g.i.cs",
+    "assemblyinfo.cs", "globalusings.g.cs",
+    "reference.cs", "service.reference",
+}
+_AUTO_GENERATED_DIRS = {
+    "Migrations", "migrations", "Generated", "generated",
+    "wwwroot", "Properties",
+}
+_TEST_PATTERNS = {"test", "tests", "Test", "Tests", "Spec", "spec", "Specs", "specs", "__tests__", "__test__"}
+_BOILERPLATE_FILES = {
+    "program.cs", "startup.cs", "globalusings.cs",
+    "appsettings.json", "appsettings.development.json",
+    "launchsettings.json",
+}
+_CONFIG_EXTENSIONS = {".json", ".xml", ".yaml", ".yml", ".toml", ".ini", ".config", ".csproj", ".sln", ".props", ".targets"}
+
+
+def classify_file(rel: str, ext: str) -> str:
+    """source | test | boilerplate | config | auto_generated"""
+    rel_lower = rel.lower()
+    parts_lower = [p.lower() for p in Path(rel).parts]
+
+    if any(d.lower() in parts_lower for d in _AUTO_GENERATED_DIRS):
+        return "auto_generated"
+    if any(pat in rel_lower for pat in _AUTO_GENERATED_PATTERNS):
+        return "auto_generated"
+
+    if any(t in parts_lower for t in _TEST_PATTERNS):
+        return "test"
+    if rel_lower.endswith("tests.cs") or rel_lower.endswith("test.cs") or rel_lower.endswith(".spec.ts") or rel_lower.endswith(".test.ts") or rel_lower.endswith("_test.py") or rel_lower.endswith("_test.go"):
+        return "test"
+
+    if Path(rel).name.lower() in _BOILERPLATE_FILES:
+        return "boilerplate"
+
+    if ext.lower() in _CONFIG_EXTENSIONS:
+        return "config"
+
+    return "source"
@@ -0,0 +1,201 @@
+"""
+Incremental PR reviews.
+
+Every PR review is persisted with its head commit and a hash of each file's
+patch (``file_patch_hashes``). On the next push of the same PR the pipeline
+reviews only what changed since then:
+
+* with an inter-diff (platform compare of the last reviewed head and the new
+  one), only the files and hunks touched by the new commits are reviewed;
+  earlier issues outside those hunks are carried over with their line numbers
+  moved past the inserted / removed lines;
+* without one (no compare API, force push), files whose patch hash changed
+  are re-reviewed in full and the issues of the other files carried over.
+
+``IncrementalPlan.merge`` folds the partial review and the carried issues
+into one ReviewResult for comments, status and persistence.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import structlog
+
+from models import ReviewIssue, ReviewResult
+from services.diff_analyzer import DiffAnalyzer
+from services.parsed_diff import DiffFile, ParsedDiff
+
+logger = structlog.get_logger()
+
+
+def file_patch_hashes(parsed: ParsedDiff) -> dict[str, str]:
+    """Content hash of every file's patch, keyed by path."""
+    return {
+        f.path: hashlib.sha256(DiffAnalyzer.render_file(f).encode("utf-8")).hexdigest()[:16]
+        for f in parsed.files
+    }
+
+
+def remap_line(diff_file: DiffFile, line: int) -> Optional[int]:
+    """
+    Position of old-side ``line`` on the new side of ``diff_file``, or None
+    when the line lies inside a hunk (changed, or context of a change).
+    """
+    shift = 0
+    for hunk in diff_file.hunks:
+        if hunk.source_length == 0:
+            # Pure insertion after line ``source_start``
+            if line <= hunk.source_start:
+                break
+        else:
+            end = hunk.source_start + hunk.source_length - 1
+            if line < hunk.source_start:
+                break
+            if line <= end:
+                return None
+        shift += hunk.target_length - hunk.source_length
+    return line + shift
+
+
+@dataclass
+class IncrementalPlan:
+    base_sha: str  # head commit of the previous review
+    head_sha: str
+    mode: str  # "interdiff" or "changed_files"
+    review_diff: str  # "" when nothing new needs reviewing
+    review_files: list[str]
+    carried_issues: list[dict[str, Any]] = field(default_factory=list)
+    dropped_issues: int = 0
+    previous_score: int = 7
+    total_files: int = 0
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "base_sha": self.base_sha,
+            "head_sha": self.head_sha,
+            "mode": self.mode,
+            "review_files": len(self.review_files),
+            "total_files": self.total_files,
+            "carried_issues": len(self.carried_issues),
+            "dropped_issues": self.dropped_issues,
+        }
+
+    def merge(self, result: Optional[ReviewResult]) -> ReviewResult:
+        """Combine the review of the new changes (None if there were none) with the carried issues."""
+        carried = [ReviewIssue(**issue) for issue in self.carried_issues]
+        note = (
+            f"♻️ Incremental review since `{self.base_sha[:7]}`: {len(self.review_files)} of "
+            f"{self.total_files} file(s) reviewed, {len(carried)} earlier issue(s) carried over."
+        )
+        if result is None:
+            return ReviewResult(
+                summary=f"No new changes to review.\n\n{note}",
+                score=self.previous_score,
+                issues=carried,
+                approval_recommended=not any(i.severity.value == "critical" for i in carried),
+                block_merge=any(i.severity.value == "critical" for i in carried),
+            )
+
+        # Files not re-reviewed keep the previous score's weight
+        reviewed = max(1, len(self.review_files))
+        untouched = max(0, self.total_files - len(self.review_files))
+        score = round((result.score * reviewed + self.previous_score * untouched) / (reviewed + untouched))
+        block_merge = result.block_merge or any(i.severity.value == "critical" for i in carried)
+        return ReviewResult(
+            summary=f"{result.summary}\n\n{note}",
+            score=score,
+            issues=[*result.issues, *carried],
+            approval_recommended=result.approval_recommended and not block_merge,
+            block_merge=block_merge,
+            degraded=result.degraded,
+        )
+
+
+def build_incremental_plan(
+    previous: Optional[dict[str, Any]],
+    head_sha: Optional[str],
+    parsed: ParsedDiff,
+    file_hashes: dict[str, str],
+    interdiff: Optional[str],
+) -> Optional[IncrementalPlan]:
+    """
+    Plan the review of a push from the previous review of the PR
+    (``ReviewStore.get_last_pr_review``). None means review the full diff.
+    """
+    if not previous or not head_sha or not previous.get("head_sha") or previous["head_sha"] == head_sha:
+        return None
+
+    pr_files = parsed.paths
+    touched: dict[str, Optional[DiffFile]] = {}
+    if interdiff is not None:
+        mode = "interdiff"
+        inter = ParsedDiff.parse(interdiff)
+        # Files outside the PR diff (reverted, or brought in from the base branch) are not reviewed
+        for f in inter.files:
+            if f.path in file_hashes:
+                touched[f.path] = f
+        review_diff = "".join(DiffAnalyzer.render_file(f) for f in touched.values())
+    else:
+        mode = "changed_files"
+        old_hashes = previous.get("file_hashes") or {}
+        for path in pr_files:
+            if old_hashes.get(path) != file_hashes.get(path):
+                touched[path] = None
+        if len(touched) == len(pr_files):
+            # Nothing to carry over; a full review costs the same
+            return None
+        review_diff = "".join(DiffAnalyzer.render_file(parsed.file(path)) for path in touched)
+
+    carried: list[dict[str, Any]] = []
+    dropped = 0
+    for issue in previous.get("issues") or []:
+        path = issue.get("file_path")
+        if not path or path not in file_hashes:
+            # PR-level issue or file no longer changed by the PR
+            dropped += 1
+            continue
+        if path in touched:
+            inter_file = touched[path]
+            line = issue.get("line_number")
+            if inter_file is None or not line:
+                dropped += 1  # re-reviewed in full
+                continue
+            new_line = remap_line(inter_file, int(line))
+            if new_line is None:
+                dropped += 1  # the new commits changed this spot; the review sees it again
+                continue
+            issue = {**issue, "line_number": new_line}
+        carried.append(issue)
+
+    plan = IncrementalPlan(
+        base_sha=previous["head_sha"],
+        head_sha=head_sha,
+        mode=mode,
+        review_diff=review_diff,
+        review_files=list(touched),
+        carried_issues=carried,
+        dropped_issues=dropped,
+        previous_score=int(previous.get("score", 7)),
+        total_files=len(pr_files),
+    )
+    logger.info("incremental_review_planned", **plan.summary())
+    return plan
+
+
+async def plan_incremental_review(
+    adapter: Any,
+    pr_data: Any,
+    ctx: Any,
+    parsed: ParsedDiff,
+    file_hashes: dict[str, str],
+    previous: Optional[dict[str, Any]],
+    head_sha: Optional[str],
+) -> Optional[IncrementalPlan]:
+    """Fetch the inter-diff since the previous review (when possible) and plan the review."""
+    if not previous or not head_sha or previous.get("head_sha") in (None, head_sha):
+        return None
+    interdiff = await adapter.fetch_interdiff(pr_data, previous["head_sha"], ctx=ctx)
+    return build_incremental_plan(previous, head_sha, parsed, file_hashes, interdiff)
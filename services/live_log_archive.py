@@ -0,0 +1,199 @@
+"""
+On-disk archive for finished live-log runs, backed by SQLite.
+
+``LiveLogStore`` keeps only recent runs in memory (``ui.logs.retention``).
+Finished runs beyond the count or age limit are spilled here: one row per
+run summary and one row per event, keyed ``(run_id, seq)``. The store falls
+back to the archive for ``get_run``, ``get_events_since`` and
+``list_runs``, so the logs API and the dashboard behave the same for an
+evicted run. The archive itself is pruned by count and age.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+_DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "live_logs.db"
+
+
+@dataclass(frozen=True)
+class LiveLogRetentionConfig:
+    max_runs: int = 200  # runs kept in memory; active runs are never evicted
+    max_age_hours: float = 24.0  # finished runs older than this leave memory
+    archive_enabled: bool = True
+    archive_path: str = str(_DEFAULT_DB_PATH)
+    archive_max_runs: int = 5000
+    archive_max_age_days: float = 30.0
+
+
+def parse_live_log_retention_config(config: dict) -> LiveLogRetentionConfig:
+    """Build LiveLogRetentionConfig from the ``ui.logs.retention`` section."""
+    section = ((config.get("ui") or {}).get("logs") or {}).get("retention") or {}
+    archive = section.get("archive") or {}
+    default = LiveLogRetentionConfig()
+    return LiveLogRetentionConfig(
+        max_runs=max(1, int(section.get("max_runs", default.max_runs))),
+        max_age_hours=max(0.0, float(section.get("max_age_hours", default.max_age_hours))),
+        archive_enabled=bool(archive.get("enabled", default.archive_enabled)),
+        archive_path=str(archive.get("path") or default.archive_path),
+        archive_max_runs=max(1, int(archive.get("max_runs", default.archive_max_runs))),
+        archive_max_age_days=max(0.0, float(archive.get("max_age_days", default.archive_max_age_days))),
+    )
+
+
+class LiveLogArchive:
+    """Thread-safe SQLite store of evicted runs and their events."""
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        *,
+        max_runs: int = 5000,
+        max_age_seconds: float = 30 * 86400,
+    ):
+        self._db_path = Path(db_path) if db_path else _DEFAULT_DB_PATH
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_runs = max(1, int(max_runs))
+        self.max_age_seconds = max_age_seconds
+        self._local = threading.local()
+        self._init_schema()
+
+    @classmethod
+    def from_config(cls, cfg: LiveLogRetentionConfig) -> "LiveLogArchive":
+        return cls(
+            Path(cfg.archive_path),
+            max_runs=cfg.archive_max_runs,
+            max_age_seconds=cfg.archive_max_age_days * 86400,
+        )
+
+    # -- connection helpers ---------------------------------------------------
+
+    @contextmanager
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _init_schema(self) -> None:
+        with self._conn() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS live_runs (
+                    run_id      TEXT PRIMARY KEY,
+                    status      TEXT NOT NULL,
+                    updated_at  TEXT NOT NULL,
+                    archived_at REAL NOT NULL,
+                    summary     TEXT NOT NULL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_live_runs_updated ON live_runs(updated_at);
+
+                CREATE TABLE IF NOT EXISTS live_events (
+                    run_id TEXT NOT NULL,
+                    seq    INTEGER NOT NULL,
+                    event  TEXT NOT NULL,
+                    PRIMARY KEY (run_id, seq)
+                ) WITHOUT ROWID;
+                """
+            )
+
+    # -- API ------------------------------------------------------------------
+
+    def archive_runs(self, runs: list[tuple[dict[str, Any], list[dict[str, Any]]]]) -> None:
+        """Write ``(run summary, events)`` pairs, replacing earlier copies, then prune."""
+        if not runs:
+            return
+        now = time.time()
+        with self._conn() as conn:
+            for run, events in runs:
+                run_id = run["run_id"]
+                conn.execute(
+                    "INSERT OR REPLACE INTO live_runs (run_id, status, updated_at, archived_at, summary) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (run_id, run.get("status") or "", run.get("updated_at") or "", now, json.dumps(run, default=str)),
+                )
+                conn.execute("DELETE FROM live_events WHERE run_id = ?", (run_id,))
+                conn.executemany(
+                    "INSERT INTO live_events (run_id, seq, event) VALUES (?, ?, ?)",
+                    [(run_id, int(e["seq"]), json.dumps(e, ensure_ascii=False, default=str)) for e in events],
+                )
+            pruned = self._prune(conn, now)
+        logger.info("live_logs_archived", runs=len(runs), pruned=pruned)
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> int:
+        stale: set[str] = set()
+        if self.max_age_seconds:
+            rows = conn.execute(
+                "SELECT run_id FROM live_runs WHERE archived_at < ?", (now - self.max_age_seconds,)
+            ).fetchall()
+            stale.update(r["run_id"] for r in rows)
+        overflow = conn.execute("SELECT COUNT(*) AS cnt FROM live_runs").fetchone()["cnt"] - len(stale) - self.max_runs
+        if overflow > 0:
+            rows = conn.execute(
+                "SELECT run_id FROM live_runs ORDER BY updated_at ASC LIMIT ?", (overflow + len(stale),)
+            ).fetchall()
+            for r in rows:
+                if overflow <= 0:
+                    break
+                if r["run_id"] not in stale:
+                    stale.add(r["run_id"])
+                    overflow -= 1
+        for run_id in stale:
+            conn.execute("DELETE FROM live_runs WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM live_events WHERE run_id = ?", (run_id,))
+        return len(stale)
+
+    def get_run(self, run_id: str) -> Optional[dict[str, Any]]:
+        with self._conn() as conn:
+            row = conn.execute("SELECT summary FROM live_runs WHERE run_id = ?", (run_id,)).fetchone()
+        return json.loads(row["summary"]) if row else None
+
+    def get_events_since(self, run_id: str, *, cursor: int = 0, limit: int = 200) -> list[dict[str, Any]]:
+        with self._conn() as conn:
+            rows = conn.execute(
+                "SELECT event FROM live_events WHERE run_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (run_id, int(cursor), int(limit)),
+            ).fetchall()
+        return [json.loads(r["event"]) for r in rows]
+
+    def list_runs(self, *, limit: int, exclude: set[str] | frozenset[str] = frozenset()) -> list[dict[str, Any]]:
+        """Newest archived runs first (by ``updated_at``), skipping ``exclude``."""
+        if limit <= 0:
+            return []
+        runs: list[dict[str, Any]] = []
+        with self._conn() as conn:
+            rows = conn.execute(
+                "SELECT run_id, summary FROM live_runs ORDER BY updated_at DESC LIMIT ?",
+                (limit + len(exclude),),
+            ).fetchall()
+        for row in rows:
+            if row["run_id"] in exclude:
+                continue
+            runs.append(json.loads(row["summary"]))
+            if len(runs) >= limit:
+                break
+        return runs
+
+    def count(self) -> int:
+        with self._conn() as conn:
+            return conn.execute("SELECT COUNT(*) AS cnt FROM live_runs").fetchone()["cnt"]
@@ -1,24 +1,159 @@
 from __future__ import annotations
 
+import heapq
+import time
+from bisect import bisect_right
+from collections import OrderedDict
 from datetime import datetime, timezone
+from itertools import islice
 from threading import Lock
-from typing import Any
+from typing import Any, Callable
 from uuid import uuid4
 
+import structlog
+
+logger = structlog.get_logger()
+
 
 def _utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+class EventRing:
+    """
+    Fixed-capacity ring of events with increasing ``seq``.
+
+    Appending past capacity overwrites the oldest slot instead of copying the
+    list. The seqs sit in a parallel int list, so the first event after a
+    cursor is a bisect over the (at most two) sorted segments of the ring.
+    """
+
+    __slots__ = ("_events", "_seqs", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        capacity = max(1, int(capacity))
+        self._events: list[dict[str, Any] | None] = [None] * capacity
+        self._seqs: list[int] = [0] * capacity
+        self._start = 0
+        self._size = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._events)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, event: dict[str, Any]) -> None:
+        capacity = len(self._events)
+        if self._size < capacity:
+            idx = (self._start + self._size) % capacity
+            self._size += 1
+        else:
+            idx = self._start
+            self._start = (self._start + 1) % capacity
+        self._events[idx] = event
+        self._seqs[idx] = int(event["seq"])
+
+    def since(self, cursor: int, limit: int) -> list[dict[str, Any]]:
+        """Up to ``limit`` events with ``seq > cursor``, oldest first."""
+        capacity = len(self._events)
+        start, size = self._start, self._size
+        first_end = min(start + size, capacity)  # first segment: [start, first_end)
+        wrapped = start + size - capacity  # second segment: [0, wrapped)
+        idx = bisect_right(self._seqs, cursor, start, first_end)
+        if idx == first_end and wrapped > 0:
+            idx = bisect_right(self._seqs, cursor, 0, wrapped)
+            return self._events[idx : min(wrapped, idx + limit)]  # type: ignore[return-value]
+        chunk = self._events[idx : min(first_end, idx + limit)]
+        if wrapped > 0 and len(chunk) < limit:
+            chunk += self._events[: min(wrapped, limit - len(chunk))]
+        return chunk  # type: ignore[return-value]
+
+    def resize(self, capacity: int) -> None:
+        """Change capacity, keeping the most recent events."""
+        capacity = max(1, int(capacity))
+        if capacity == len(self._events):
+            return
+        kept = self.since(-1, self._size)[-capacity:]
+        self._events = [None] * capacity
+        self._seqs = [0] * capacity
+        self._start = 0
+        self._size = 0
+        for event in kept:
+            self.append(event)
+
+
+class _RunState:
+    """One run: its summary, event ring and seq counter, behind its own lock."""
+
+    __slots__ = ("lock", "run", "ring", "next_seq", "evicted")
+
+    def __init__(self, run: dict[str, Any], capacity: int):
+        self.lock = Lock()
+        self.run = run
+        self.ring = EventRing(capacity)
+        self.next_seq = 1
+        self.evicted = False
+
+
 class LiveLogStore:
-    """In-memory buffer for active PR review runs and their events."""
+    """
+    In-memory buffer for active PR review runs and their events.
+
+    Locking is striped: each run has its own lock for its summary and
+    events, so concurrent reviews appending events and dashboards reading
+    one run don't contend with each other. The store lock only guards the
+    run index (``_states``, ``_recent``, ``_active``, ``_spilling``). Its
+    writers are run start, status changes and eviction. When both are held,
+    the store lock is taken first. ``append_event`` and ``get_events_since``
+    look the run up without the store lock; a run evicted in between is
+    detected through ``_RunState.evicted``.
 
-    def __init__(self, max_events_per_run: int = 200):
+    ``_recent`` orders runs by their last status change, oldest first;
+    ``_active`` holds the running ones. Listings merge the finished runs in
+    that order with the (few) active runs sorted by ``updated_at``, and stop
+    at the limit instead of sorting every run. With ``max_runs`` /
+    ``max_age_seconds`` set, finished runs beyond the limits are evicted,
+    and spilled to ``archive`` (a LiveLogArchive) when given. Reads fall
+    back to the archive for evicted runs.
+    """
+
+    def __init__(
+        self,
+        max_events_per_run: int = 200,
+        *,
+        max_runs: int | None = None,
+        max_age_seconds: float = 0,
+        archive: Any = None,
+    ):
         self.max_events_per_run = max(1, int(max_events_per_run))
+        self.max_runs = max(1, int(max_runs)) if max_runs else None
+        self.max_age_seconds = max(0.0, float(max_age_seconds))
+        self.archive = archive
         self._lock = Lock()
-        self._runs: dict[str, dict[str, Any]] = {}
-        self._events: dict[str, list[dict[str, Any]]] = {}
-        self._next_seq: dict[str, int] = {}
+        self._states: dict[str, _RunState] = {}
+        # run_id -> last status change (time.time()), least recent first
+        self._recent: OrderedDict[str, float] = OrderedDict()
+        self._active: dict[str, None] = {}
+        # Evicted runs while they are being written to the archive
+        self._spilling: dict[str, tuple[dict[str, Any], list[dict[str, Any]]]] = {}
+        self._listeners: list[Callable[[str, str, dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[str, str, dict[str, Any]], None]) -> None:
+        """
+        Call ``listener(run_id, kind, payload)`` after every change: kind
+        "event" with the appended event, or "run" with the run summary when
+        its status changes. Listeners run outside the locks.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, run_id: str, kind: str, payload: dict[str, Any]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(run_id, kind, payload)
+            except Exception:
+                pass
 
     def start_run(
         self,
@@ -30,11 +165,12 @@ class LiveLogStore:
         source_branch: str | None = None,
         target_branch: str | None = None,
         repo: str | None = None,
+        run_id: str | None = None,
     ) -> str:
-        with self._lock:
-            run_id = str(uuid4())
-            now = _utc_now_iso()
-            self._runs[run_id] = {
+        run_id = run_id or str(uuid4())
+        now = _utc_now_iso()
+        state = _RunState(
+            {
                 "run_id": run_id,
                 "platform": platform,
                 "pr_id": pr_id,
@@ -50,10 +186,29 @@ class LiveLogStore:
                 "issues": None,
                 "critical": None,
                 "error": None,
-            }
-            self._events[run_id] = []
-            self._next_seq[run_id] = 1
-            return run_id
+                "coalesced": 0,
+                "cancelled": 0,
+                "superseded_by": None,
+            },
+            self.max_events_per_run,
+        )
+        with self._lock:
+            replaced = self._states.get(run_id)
+            if replaced is not None:
+                with replaced.lock:
+                    replaced.evicted = True
+            self._states[run_id] = state
+            self._touch(run_id, active=True)
+            evicted = self._collect_evictions()
+        self._spill(evicted)
+        return run_id
+
+    def _state(self, run_id: str) -> _RunState:
+        # A plain dict read: no store lock on the per-event paths
+        state = self._states.get(run_id)
+        if state is None:
+            raise KeyError(f"run not found: {run_id}")
+        return state
 
     def append_event(
         self,
@@ -64,13 +219,13 @@ class LiveLogStore:
         level: str = "info",
         meta: dict[str, Any] | None = None,
     ) -> dict[str, Any]:
-        with self._lock:
-            run = self._runs.get(run_id)
-            if not run:
+        state = self._state(run_id)
+        with state.lock:
+            if state.evicted:
                 raise KeyError(f"run not found: {run_id}")
 
-            seq = self._next_seq[run_id]
-            self._next_seq[run_id] = seq + 1
+            seq = state.next_seq
+            state.next_seq = seq + 1
 
             event = {
                 "seq": seq,
@@ -81,58 +236,167 @@ class LiveLogStore:
                 "meta": meta or {},
             }
 
-            events = self._events[run_id]
-            events.append(event)
-            if len(events) > self.max_events_per_run:
-                # Keep the most recent events only.
-                self._events[run_id] = events[-self.max_events_per_run :]
+            # The ring keeps the most recent events only.
+            state.ring.append(event)
 
-            run["updated_at"] = event["ts"]
-            return event
+            state.run["updated_at"] = event["ts"]
+        self._notify(run_id, "event", event)
+        return event
 
-    def complete_run(self, run_id: str, *, score: int, issues: int, critical: int) -> None:
+    def _update_run(self, run_id: str, changes: dict[str, Any], *, finished: bool) -> dict[str, Any]:
+        """Apply ``changes`` to a run summary and reindex it; returns a copy."""
         with self._lock:
-            run = self._runs.get(run_id)
-            if not run:
+            state = self._states.get(run_id)
+            if state is None:
                 raise KeyError(f"run not found: {run_id}")
-            run["status"] = "completed"
-            run["score"] = score
-            run["issues"] = issues
-            run["critical"] = critical
-            run["updated_at"] = _utc_now_iso()
+            with state.lock:
+                run = state.run
+                for key, value in changes.items():
+                    if key in ("coalesced", "cancelled"):
+                        run[key] += value
+                    else:
+                        run[key] = value
+                run["updated_at"] = _utc_now_iso()
+                summary = run.copy()
+            self._touch(run_id, active=False if finished else None)
+            evicted = self._collect_evictions() if finished else []
+        if finished:
+            self._notify(run_id, "run", summary)
+        self._spill(evicted)
+        return summary
+
+    def complete_run(self, run_id: str, *, score: int, issues: int, critical: int) -> None:
+        self._update_run(
+            run_id,
+            {"status": "completed", "score": score, "issues": issues, "critical": critical},
+            finished=True,
+        )
 
     def fail_run(self, run_id: str, *, error: str) -> None:
+        self._update_run(run_id, {"status": "error", "error": error}, finished=True)
+
+    def supersede_run(self, run_id: str, *, superseded_by: str | None) -> None:
+        """Close a run whose review was dropped in favour of a newer push."""
+        self._update_run(run_id, {"status": "superseded", "superseded_by": superseded_by}, finished=True)
+
+    def record_coalesced(self, run_id: str, *, coalesced: int = 0, cancelled: int = 0) -> None:
+        """Count older queued (coalesced) and in-flight (cancelled) runs this run replaced."""
+        self._update_run(run_id, {"coalesced": coalesced, "cancelled": cancelled}, finished=False)
+
+    def _touch(self, run_id: str, *, active: bool | None = None) -> None:
+        """Move a run to the newest end of the index. Call with the store lock held."""
+        self._recent[run_id] = time.time()
+        self._recent.move_to_end(run_id)
+        if active is True:
+            self._active[run_id] = None
+        elif active is False:
+            self._active.pop(run_id, None)
+
+    def set_retention(self, *, max_runs: int | None, max_age_seconds: float = 0) -> None:
         with self._lock:
-            run = self._runs.get(run_id)
-            if not run:
-                raise KeyError(f"run not found: {run_id}")
-            run["status"] = "error"
-            run["error"] = error
-            run["updated_at"] = _utc_now_iso()
+            self.max_runs = max(1, int(max_runs)) if max_runs else None
+            self.max_age_seconds = max(0.0, float(max_age_seconds))
+            evicted = self._collect_evictions()
+        self._spill(evicted)
 
-    def list_active_runs(self) -> list[dict[str, Any]]:
+    def evict(self) -> int:
+        """Apply the retention limits now; returns the number of runs evicted."""
         with self._lock:
-            active = [r.copy() for r in self._runs.values() if r.get("status") == "active"]
-            active.sort(key=lambda x: x["updated_at"], reverse=True)
-            return active
+            evicted = self._collect_evictions()
+        self._spill(evicted)
+        return len(evicted)
+
+    def _collect_evictions(self) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+        """Remove finished runs over the count / age limits. Call with the store lock held."""
+        if self.max_runs is None and not self.max_age_seconds:
+            return []
+        excess = len(self._states) - self.max_runs if self.max_runs else 0
+        cutoff = time.time() - self.max_age_seconds if self.max_age_seconds else None
+        victims = []
+        for run_id, touched in self._recent.items():
+            if excess <= 0 and (cutoff is None or touched >= cutoff):
+                break  # everything after this is newer
+            if run_id in self._active:
+                continue
+            victims.append(run_id)
+            excess -= 1
+
+        evicted = []
+        for run_id in victims:
+            del self._recent[run_id]
+            state = self._states.pop(run_id)
+            with state.lock:
+                state.evicted = True
+                pair = (state.run, state.ring.since(0, len(state.ring)))
+            evicted.append(pair)
+            if self.archive is not None:
+                self._spilling[run_id] = pair
+        return evicted
+
+    def _spill(self, evicted: list[tuple[dict[str, Any], list[dict[str, Any]]]]) -> None:
+        if not evicted or self.archive is None:
+            return
+        try:
+            self.archive.archive_runs(evicted)
+        except Exception as e:
+            logger.warning("live_log_spill_failed", runs=len(evicted), error=str(e))
+        finally:
+            with self._lock:
+                for run, _ in evicted:
+                    self._spilling.pop(run["run_id"], None)
+
+    @staticmethod
+    def _copy_run(state: _RunState) -> dict[str, Any]:
+        with state.lock:
+            return state.run.copy()
 
-    def list_runs(self) -> list[dict[str, Any]]:
+    def _active_by_update(self) -> list[dict[str, Any]]:
+        """Copies of the active runs, newest update first. Call with the store lock held."""
+        active = [self._copy_run(self._states[run_id]) for run_id in self._active]
+        active.sort(key=lambda r: r["updated_at"], reverse=True)
+        return active
+
+    def list_active_runs(self, limit: int | None = None) -> list[dict[str, Any]]:
+        with self._lock:
+            active = self._active_by_update()
+        return active if limit is None else active[:limit]
+
+    def list_runs(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Newest first: runs in memory, then archived runs."""
         with self._lock:
-            items = [r.copy() for r in self._runs.values()]
-            items.sort(key=lambda x: x["updated_at"], reverse=True)
-            return items
+            finished = (
+                self._copy_run(self._states[run_id])
+                for run_id in reversed(self._recent)
+                if run_id not in self._active
+            )
+            merged = heapq.merge(self._active_by_update(), finished, key=lambda r: r["updated_at"], reverse=True)
+            items = list(islice(merged, limit))
+            spilled = [run.copy() for run, _ in self._spilling.values()]
+            items.extend(spilled[: None if limit is None else max(0, limit - len(items))])
+            seen = {item["run_id"] for item in items}
+        if self.archive is not None and (limit is None or len(items) < limit):
+            remaining = self.archive.max_runs if limit is None else limit - len(items)
+            items.extend(self.archive.list_runs(limit=remaining, exclude=seen))
+        return items
 
     def set_max_events_per_run(self, value: int) -> None:
         with self._lock:
             self.max_events_per_run = max(1, int(value))
-            for run_id, events in self._events.items():
-                if len(events) > self.max_events_per_run:
-                    self._events[run_id] = events[-self.max_events_per_run :]
+            for state in self._states.values():
+                with state.lock:
+                    state.ring.resize(self.max_events_per_run)
 
     def get_run(self, run_id: str) -> dict[str, Any] | None:
+        state = self._states.get(run_id)
+        if state is not None:
+            with state.lock:
+                if not state.evicted:
+                    return state.run.copy()
         with self._lock:
-            run = self._runs.get(run_id)
-            return run.copy() if run else None
+            spilled = self._spilling.get(run_id)
+            if spilled:
+                return spilled[0].copy()
+        return self.archive.get_run(run_id) if self.archive is not None else None
 
     def get_events_since(
         self,
@@ -141,14 +405,26 @@ class LiveLogStore:
         cursor: int = 0,
         limit: int = 200,
     ) -> tuple[dict[str, Any], list[dict[str, Any]], int]:
+        effective_limit = max(1, min(int(limit), 1000))
+        state = self._states.get(run_id)
+        if state is not None:
+            with state.lock:
+                if not state.evicted:
+                    chunk = state.ring.since(int(cursor), effective_limit)
+                    next_cursor = int(chunk[-1]["seq"]) if chunk else int(cursor)
+                    return state.run.copy(), [e.copy() for e in chunk], next_cursor
+
         with self._lock:
-            run = self._runs.get(run_id)
-            if not run:
-                raise KeyError(f"run not found: {run_id}")
+            spilled = self._spilling.get(run_id)
+            if spilled:
+                run, events = spilled
+                chunk = [e.copy() for e in events if int(e["seq"]) > int(cursor)][:effective_limit]
+                next_cursor = int(chunk[-1]["seq"]) if chunk else int(cursor)
+                return run.copy(), chunk, next_cursor
 
-            effective_limit = max(1, min(int(limit), 1000))
-            events = self._events.get(run_id, [])
-            filtered = [e for e in events if int(e["seq"]) > int(cursor)]
-            chunk = filtered[:effective_limit]
-            next_cursor = int(chunk[-1]["seq"]) if chunk else int(cursor)
-            return run.copy(), [e.copy() for e in chunk], next_cursor
+        archived = self.archive.get_run(run_id) if self.archive is not None else None
+        if archived is None:
+            raise KeyError(f"run not found: {run_id}")
+        chunk = self.archive.get_events_since(run_id, cursor=int(cursor), limit=effective_limit)
+        next_cursor = int(chunk[-1]["seq"]) if chunk else int(cursor)
+        return archived, chunk, next_cursor
@@ -0,0 +1,231 @@
+"""
+Push channel for live review logs.
+
+The dashboard used to poll ``/api/logs/runs/{run_id}/events``. That is one
+store lock and one event-list scan per viewer per interval. The
+``LiveLogBroker`` listens to the ``LiveLogStore`` instead and fans every
+change out to per-run subscriber queues. Each event is encoded once as a
+Server-Sent Events frame, whatever the number of viewers.
+
+A viewer that reads too slowly fills its queue. It then stops receiving
+events until it has drained what was queued. After that it gets one
+``summary`` frame with the number of skipped events and their seq range.
+It can fetch the gap from the events endpoint. Run status changes are never
+dropped. Frame ids are event seqs, so a reconnecting ``EventSource``
+(``Last-Event-ID``) resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, AsyncIterator, Callable, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+TERMINAL_STATUSES = ("completed", "error", "superseded")
+
+
+@dataclass(frozen=True)
+class LiveStreamConfig:
+    enabled: bool = True
+    queue_size: int = 256  # frames buffered per viewer before it is summarized
+    keepalive_seconds: int = 15
+
+
+def parse_live_stream_config(config: dict) -> LiveStreamConfig:
+    """Build LiveStreamConfig from the ``ui.logs.stream`` section."""
+    section = ((config.get("ui") or {}).get("logs") or {}).get("stream") or {}
+    default = LiveStreamConfig()
+    return LiveStreamConfig(
+        enabled=bool(section.get("enabled", default.enabled)),
+        queue_size=max(16, min(int(section.get("queue_size", default.queue_size)), 4096)),
+        keepalive_seconds=max(1, min(int(section.get("keepalive_seconds", default.keepalive_seconds)), 60)),
+    )
+
+
+def sse_frame(event: str, data: dict[str, Any], *, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events frame."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class LiveLogSubscription:
+    """One viewer of one run: a bounded queue of encoded frames."""
+
+    def __init__(self, run_id: str, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.run_id = run_id
+        self.loop = loop
+        # (seq, frame, final): seq is None for run status frames; final ends the stream
+        self.queue: asyncio.Queue[tuple[Optional[int], str, bool]] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.total_dropped = 0
+        self._gap: Optional[tuple[int, int]] = None
+        self._run_frame: Optional[tuple[None, str, bool]] = None
+
+    def offer(self, seq: Optional[int], frame: str, final: bool = False) -> None:
+        """Queue a frame, or record it as skipped. Must run on ``self.loop``."""
+        if not self.dropped:
+            try:
+                self.queue.put_nowait((seq, frame, final))
+                return
+            except asyncio.QueueFull:
+                pass
+        if seq is None:
+            # Run status: keep the latest one and send it once the queue is drained
+            self._run_frame = (None, frame, final)
+            return
+        self.dropped += 1
+        self.total_dropped += 1
+        first = self._gap[0] if self._gap else seq
+        self._gap = (first, seq)
+
+    async def next(self, timeout: float) -> Optional[tuple[Optional[int], str, bool]]:
+        """Next ``(seq, frame, final)``. Returns None when nothing arrives within ``timeout``."""
+        if self.queue.empty():
+            if self._gap is not None:
+                first, last = self._gap
+                skipped = self.dropped
+                self._gap = None
+                self.dropped = 0
+                summary = sse_frame(
+                    "summary",
+                    {"dropped": skipped, "first_seq": first, "last_seq": last, "next_cursor": last},
+                    event_id=last,
+                )
+                return last, summary, False
+            if self._run_frame is not None:
+                item, self._run_frame = self._run_frame, None
+                return item
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveLogBroker:
+    """Fans LiveLogStore changes out to the subscribers of each run."""
+
+    def __init__(self, queue_size: int = LiveStreamConfig.queue_size):
+        self.queue_size = queue_size
+        self._lock = Lock()
+        self._subscribers: dict[str, set[LiveLogSubscription]] = {}
+
+    def attach(self, store: Any) -> None:
+        store.add_listener(self.publish)
+
+    def subscriber_count(self, run_id: Optional[str] = None) -> int:
+        with self._lock:
+            if run_id is not None:
+                return len(self._subscribers.get(run_id, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, run_id: str) -> LiveLogSubscription:
+        sub = LiveLogSubscription(run_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(run_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: LiveLogSubscription) -> None:
+        with self._lock:
+            subs = self._subscribers.get(sub.run_id)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.run_id]
+
+    def publish(self, run_id: str, kind: str, payload: dict[str, Any]) -> None:
+        """LiveLogStore listener. It may be called from any thread."""
+        with self._lock:
+            subs = tuple(self._subscribers.get(run_id, ()))
+        if not subs:
+            return
+        if kind == "event":
+            seq: Optional[int] = int(payload["seq"])
+            frame = sse_frame("log", payload, event_id=seq)
+        else:
+            seq = None
+            frame = sse_frame("run", payload)
+        final = kind == "run" and payload.get("status") in TERMINAL_STATUSES
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        for sub in subs:
+            if sub.loop is current:
+                sub.offer(seq, frame, final)
+            elif not sub.loop.is_closed():
+                sub.loop.call_soon_threadsafe(sub.offer, seq, frame, final)
+
+    def stream(
+        self,
+        store: Any,
+        run_id: str,
+        *,
+        cursor: int = 0,
+        batch_limit: int = 200,
+        keepalive_seconds: float = 15,
+        is_disconnected: Optional[Callable[[], Any]] = None,
+    ) -> AsyncIterator[str]:
+        """
+        SSE frames for ``run_id``: the backlog after ``cursor``, then live
+        events until the run ends or the client disconnects. Call it from
+        the event loop. Raises KeyError right away for an unknown run.
+        """
+        sub = self.subscribe(run_id)
+        try:
+            # Subscribe before the replay so nothing falls between the two
+            run, events, cursor = store.get_events_since(run_id, cursor=cursor, limit=batch_limit)
+        except KeyError:
+            self.unsubscribe(sub)
+            raise
+        return self._frames(store, sub, run, events, cursor, batch_limit, keepalive_seconds, is_disconnected)
+
+    async def _frames(
+        self,
+        store: Any,
+        sub: LiveLogSubscription,
+        run: dict[str, Any],
+        events: list[dict[str, Any]],
+        cursor: int,
+        batch_limit: int,
+        keepalive_seconds: float,
+        is_disconnected: Optional[Callable[[], Any]],
+    ) -> AsyncIterator[str]:
+        try:
+            yield sse_frame("run", run)
+            while events:
+                for event in events:
+                    yield sse_frame("log", event, event_id=int(event["seq"]))
+                if len(events) < batch_limit:
+                    break
+                run, events, cursor = store.get_events_since(sub.run_id, cursor=cursor, limit=batch_limit)
+            if run.get("status") in TERMINAL_STATUSES:
+                yield sse_frame("run", run)
+                return
+
+            while True:
+                item = await sub.next(keepalive_seconds)
+                if item is None:
+                    if is_disconnected is not None and await is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                seq, frame, final = item
+                if seq is not None and seq <= cursor:
+                    continue  # already sent by the replay
+                if seq is not None:
+                    cursor = seq
+                yield frame
+                if final:
+                    return
+        finally:
+            self.unsubscribe(sub)
+            if sub.total_dropped:
+                logger.info("live_log_stream_lagged", run_id=sub.run_id, dropped=sub.total_dropped)
+
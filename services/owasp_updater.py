@@ -19,6 +19,8 @@ from typing import Any, Optional
 import requests
 import structlog
 
+from services.rules_service import invalidate_rule_cache
+
 logger = structlog.get_logger()
 
 RULES_DIR = Path(__file__).parent.parent / "rules"
@@ -88,6 +90,7 @@ class OWASPUpdater:
         self._backup_existing()
         RULES_DIR.mkdir(parents=True, exist_ok=True)
         OWASP_RULE_FILE.write_text(rule_content, encoding="utf-8")
+        invalidate_rule_cache(OWASP_RULE_FILE)
 
         self._log_update(fetched_count, errors)
 
@@ -0,0 +1,366 @@
+"""
+Compact parsed-diff representation.
+
+``ParsedDiff.parse`` makes one pass over a unified diff and records every
+hunk line in flat arrays: a type code (``array('b')``), the old/new line
+numbers and the (start, end) offsets of its content in the original diff
+text, which is kept as the single shared buffer. Files and hunks are small
+``__slots__`` views over those tables; line objects / strings are only
+created when a caller asks for them.
+
+``DiffAnalyzer.parse_diff`` still returns the nested-dict format for
+callers that want it (``ParsedDiff.to_dict`` produces the same shape).
+
+``TargetLineIndex`` is built from a ``ParsedDiff`` once per review run and
+checks inline-comment line numbers against the new-side hunk ranges.
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Any, Iterator, List, Optional, Tuple
+
+ADDED = 1
+REMOVED = -1
+CONTEXT = 0
+NO_NEWLINE = 2  # "\ No newline at end of file" marker; no line numbers
+
+_TYPE_NAMES = {ADDED: "added", REMOVED: "removed", CONTEXT: "context", NO_NEWLINE: "context"}
+_HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def _header_path(value: str) -> Optional[str]:
+    value = value.split("\t", 1)[0].strip()
+    if value == "/dev/null":
+        return None
+    if value.startswith(("a/", "b/")):
+        return value[2:]
+    return value
+
+
+class DiffLine:
+    __slots__ = ("type", "line_number", "source_line_no", "target_line_no", "content")
+
+    def __init__(self, type: str, source_line_no: Optional[int], target_line_no: Optional[int], content: str):
+        self.type = type
+        self.source_line_no = source_line_no
+        self.target_line_no = target_line_no
+        # Same convention as the dict format: new-side number for added lines, old-side otherwise
+        self.line_number = target_line_no if type == "added" else source_line_no
+        self.content = content
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"type": self.type, "line_number": self.line_number, "content": self.content}
+
+
+class Hunk:
+    __slots__ = ("_diff", "source_start", "source_length", "target_start", "target_length", "start", "end")
+
+    def __init__(self, diff: "ParsedDiff", source_start: int, source_length: int,
+                 target_start: int, target_length: int, start: int):
+        self._diff = diff
+        self.source_start = source_start
+        self.source_length = source_length
+        self.target_start = target_start
+        self.target_length = target_length
+        self.start = start  # [start, end) rows in the diff's line tables
+        self.end = start
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    @property
+    def target_end(self) -> int:
+        """Last new-side line number covered by the hunk."""
+        return self.target_start + max(self.target_length, 1) - 1
+
+    def contains_target_line(self, line: int) -> bool:
+        return self.target_start <= line <= self.target_end
+
+    def lines(self) -> Iterator[DiffLine]:
+        d = self._diff
+        for i in range(self.start, self.end):
+            yield d.line(i)
+
+    def iter_raw(self) -> Iterator[Tuple[int, str]]:
+        """(type code, content) pairs without building line objects."""
+        d = self._diff
+        text, kinds, starts, ends = d.text, d.kinds, d.starts, d.ends
+        for i in range(self.start, self.end):
+            yield kinds[i], text[starts[i]:ends[i]]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "source_start": self.source_start,
+            "source_length": self.source_length,
+            "target_start": self.target_start,
+            "target_length": self.target_length,
+            "changes": [line.to_dict() for line in self.lines()],
+        }
+
+
+class DiffFile:
+    __slots__ = ("path", "old_path", "is_new", "is_deleted", "is_binary", "additions", "deletions", "hunks")
+
+    def __init__(self, path: str, old_path: Optional[str], is_new: bool, is_deleted: bool):
+        self.path = path
+        self.old_path = old_path
+        self.is_new = is_new
+        self.is_deleted = is_deleted
+        self.is_binary = False
+        self.additions = 0
+        self.deletions = 0
+        self.hunks: List[Hunk] = []
+
+    def hunk_containing(self, line: int) -> Optional[Hunk]:
+        """Hunk whose new-side range covers ``line`` (hunks are sorted by target_start)."""
+        idx = bisect_right([h.target_start for h in self.hunks], line) - 1
+        if idx >= 0 and self.hunks[idx].contains_target_line(line):
+            return self.hunks[idx]
+        return None
+
+    def added_line_numbers(self) -> List[int]:
+        if not self.hunks:
+            return []
+        d = self.hunks[0]._diff
+        kinds, new_no = d.kinds, d.new_no
+        return [
+            new_no[i]
+            for h in self.hunks
+            for i in range(h.start, h.end)
+            if kinds[i] == ADDED
+        ]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "path": self.path,
+            "additions": self.additions,
+            "deletions": self.deletions,
+            "is_new": self.is_new,
+            "is_deleted": self.is_deleted,
+            "hunks": [h.to_dict() for h in self.hunks],
+        }
+
+
+class ParsedDiff:
+    """Array-backed unified diff; see module docstring."""
+
+    __slots__ = ("text", "files", "kinds", "starts", "ends", "old_no", "new_no", "_by_path")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.files: List[DiffFile] = []
+        self.kinds = array("b")
+        self.starts = array("l")
+        self.ends = array("l")
+        self.old_no = array("l")  # 0 = no old-side line (added)
+        self.new_no = array("l")  # 0 = no new-side line (removed)
+        self._by_path: Optional[dict[str, DiffFile]] = None
+
+    # --- parsing -----------------------------------------------------------------
+
+    @classmethod
+    def parse(cls, text: str) -> "ParsedDiff":
+        diff = cls(text)
+        kinds, starts, ends, old_no, new_no = diff.kinds, diff.starts, diff.ends, diff.old_no, diff.new_no
+        current: Optional[DiffFile] = None
+        hunk: Optional[Hunk] = None
+        pending_old: Optional[str] = None
+        git_paths: Optional[Tuple[Optional[str], Optional[str]]] = None
+        old_left = new_left = 0
+        old_line = new_line = 0
+
+        pos = 0
+        n = len(text)
+        while pos < n:
+            nl = text.find("\n", pos)
+            end = n if nl < 0 else nl
+            line_end = end - 1 if end > pos and text[end - 1] == "\r" else end
+            first = text[pos] if line_end > pos else " "  # blank line inside a hunk = empty context
+
+            if hunk is not None and (old_left > 0 or new_left > 0) and first in "+- ":
+                if first == "+":
+                    kinds.append(ADDED); old_no.append(0); new_no.append(new_line)
+                    new_line += 1; new_left -= 1
+                    current.additions += 1
+                elif first == "-":
+                    kinds.append(REMOVED); old_no.append(old_line); new_no.append(0)
+                    old_line += 1; old_left -= 1
+                    current.deletions += 1
+                else:
+                    kinds.append(CONTEXT); old_no.append(old_line); new_no.append(new_line)
+                    old_line += 1; new_line += 1; old_left -= 1; new_left -= 1
+                starts.append(pos + 1)
+                ends.append(n if nl < 0 else nl + 1)  # content keeps its newline, like unidiff
+                hunk.end = len(kinds)
+            elif first == "\\" and hunk is not None and hunk.end == len(kinds) and hunk.end > hunk.start:
+                kinds.append(NO_NEWLINE); old_no.append(0); new_no.append(0)
+                starts.append(pos + 1)
+                ends.append(n if nl < 0 else nl + 1)
+                hunk.end = len(kinds)
+            elif first == "@" and current is not None and text.startswith("@@", pos):
+                m = _HUNK_HEADER.match(text, pos, line_end)
+                if m:
+                    o_start, o_len, n_start, n_len = m.groups()
+                    o_len = 1 if o_len is None else int(o_len)
+                    n_len = 1 if n_len is None else int(n_len)
+                    hunk = Hunk(diff, int(o_start), o_len, int(n_start), n_len, len(kinds))
+                    current.hunks.append(hunk)
+                    old_line, new_line = int(o_start), int(n_start)
+                    old_left, new_left = o_len, n_len
+            elif text.startswith("diff --git ", pos):
+                hunk, pending_old = None, None
+                parts = text[pos + 11:line_end].split(" b/", 1)
+                git_paths = (_header_path(parts[0]), parts[1] if len(parts) == 2 else None)
+                path = git_paths[1] or git_paths[0]
+                if path:
+                    current = DiffFile(path, None, False, False)
+                    diff.files.append(current)
+            elif text.startswith("--- ", pos):
+                hunk = None
+                pending_old = text[pos + 4:line_end]
+            elif text.startswith("+++ ", pos) and pending_old is not None:
+                old_path = _header_path(pending_old)
+                new_path = _header_path(text[pos + 4:line_end])
+                path = new_path or old_path or ""
+                if git_paths is not None and current is not None and not current.hunks:
+                    # Same file as the preceding "diff --git" header
+                    current.path = path
+                else:
+                    current = DiffFile(path, None, False, False)
+                    diff.files.append(current)
+                current.is_new = old_path is None
+                current.is_deleted = new_path is None
+                current.old_path = old_path if old_path not in (None, path) else None
+                pending_old, git_paths = None, None
+            elif text.startswith("Binary files ", pos) and current is not None:
+                current.is_binary = True
+            pos = end + 1
+        return diff
+
+    # --- access ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self) -> Iterator[DiffFile]:
+        return iter(self.files)
+
+    @property
+    def paths(self) -> List[str]:
+        return [f.path for f in self.files]
+
+    @property
+    def total_additions(self) -> int:
+        return sum(f.additions for f in self.files)
+
+    @property
+    def total_deletions(self) -> int:
+        return sum(f.deletions for f in self.files)
+
+    @property
+    def line_count(self) -> int:
+        return len(self.kinds)
+
+    def file(self, path: str) -> Optional[DiffFile]:
+        if self._by_path is None:
+            self._by_path = {f.path: f for f in self.files}
+        return self._by_path.get(path)
+
+    def line(self, index: int) -> DiffLine:
+        kind = self.kinds[index]
+        return DiffLine(
+            _TYPE_NAMES[kind],
+            self.old_no[index] or None,
+            self.new_no[index] or None,
+            self.text[self.starts[index]:self.ends[index]],
+        )
+
+    def added_line_numbers(self) -> dict[str, List[int]]:
+        """New-side line numbers of added lines, per file."""
+        return {f.path: f.added_line_numbers() for f in self.files}
+
+    def hunk_containing(self, path: str, line: int) -> Optional[Hunk]:
+        f = self.file(path)
+        return f.hunk_containing(line) if f else None
+
+    def to_dict(self) -> dict[str, Any]:
+        files = [f.to_dict() for f in self.files]
+        return {
+            "files": files,
+            "total_additions": self.total_additions,
+            "total_deletions": self.total_deletions,
+            "files_count": len(files),
+        }
+
+
+class TargetLineIndex:
+    """
+    Per-file sorted, merged new-side line ranges of a diff.
+
+    ``resolve(path, line)`` returns the line itself when it falls inside a
+    hunk, the nearest hunk edge when it is at most ``max_snap`` lines away,
+    and None otherwise (file not in the diff, deleted file, or too far off).
+    Lookups are a bisect over the file's range starts. ``snapped`` and
+    ``dropped`` count the outcomes since the index was built.
+    """
+
+    __slots__ = ("_ranges", "max_snap", "snapped", "dropped")
+
+    def __init__(self, ranges: dict[str, Tuple[array, array]], max_snap: int = 3):
+        self._ranges = ranges
+        self.max_snap = max(0, max_snap)
+        self.snapped = 0
+        self.dropped = 0
+
+    @classmethod
+    def from_diff(cls, diff: ParsedDiff, max_snap: int = 3) -> "TargetLineIndex":
+        ranges: dict[str, Tuple[array, array]] = {}
+        for f in diff.files:
+            starts, ends = array("l"), array("l")
+            for h in sorted(f.hunks, key=lambda h: h.target_start):
+                if h.target_length <= 0:
+                    continue
+                if ends and h.target_start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], h.target_end)
+                else:
+                    starts.append(h.target_start)
+                    ends.append(h.target_end)
+            if starts:
+                ranges[f.path] = (starts, ends)
+        return cls(ranges, max_snap=max_snap)
+
+    def __contains__(self, path: str) -> bool:
+        return _normalize_path(path) in self._ranges
+
+    def resolve(self, path: str, line: int) -> Optional[int]:
+        found = self._ranges.get(_normalize_path(path))
+        if found is None:
+            self.dropped += 1
+            return None
+        starts, ends = found
+        idx = bisect_right(starts, line) - 1
+        if idx >= 0 and line <= ends[idx]:
+            return line
+
+        # Between ranges (or before the first / after the last): nearest edge wins
+        best: Optional[int] = None
+        if idx >= 0 and line - ends[idx] <= self.max_snap:
+            best = ends[idx]
+        if idx + 1 < len(starts) and starts[idx + 1] - line <= self.max_snap:
+            if best is None or starts[idx + 1] - line < line - best:
+                best = starts[idx + 1]
+        if best is None:
+            self.dropped += 1
+        else:
+            self.snapped += 1
+        return best
+
+    def summary(self) -> dict[str, int]:
+        return {"snapped": self.snapped, "dropped": self.dropped, "files": len(self._ranges)}
+
+
+def _normalize_path(path: str) -> str:
+    return path.strip().removeprefix("./").lstrip("/")
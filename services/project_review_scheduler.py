@@ -0,0 +1,153 @@
+"""
+Concurrent scheduler for whole-project reviews (/api/project-review/upload).
+
+Files are reviewed by a pool of workers in priority order (source before
+config, riskier and larger files first), at most ``workers`` at a time.
+Provider fallback, circuit breaking, rate limiting and the per-provider
+in-flight cap (``ai.providers[*].max_in_flight``) happen inside the AI
+router, where the provider is actually picked; a file whose review still
+fails is recorded as an error and the run moves on.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+# Lower rank is reviewed first.
+_CATEGORY_RANK = {
+    "source": 0,
+    "test": 1,
+    "boilerplate": 2,
+    "config": 3,
+    "auto_generated": 4,
+}
+
+_RISKY_PATH_HINTS = (
+    "auth", "login", "password", "passwd", "secret", "token", "crypt",
+    "security", "permission", "session", "payment", "billing", "admin",
+    "sql", "query", "upload", "exec", "shell", "serializ",
+)
+
+@dataclass(frozen=True)
+class ProjectReviewConfig:
+    workers: int = 4
+
+
+def parse_project_review_config(config: dict) -> ProjectReviewConfig:
+    cfg = config.get("project_review") or {}
+    return ProjectReviewConfig(
+        workers=max(1, int(cfg.get("workers", 4))),
+    )
+
+
+@dataclass
+class ProjectFile:
+    rel: str
+    category: str = "source"
+    size: int = 0
+
+
+def file_priority(item: ProjectFile) -> tuple:
+    """Sort key: category rank, then risky paths, then larger files first."""
+    rel = item.rel.lower()
+    risky = any(hint in rel for hint in _RISKY_PATH_HINTS)
+    return (_CATEGORY_RANK.get(item.category, 5), 0 if risky else 1, -item.size, item.rel)
+
+
+def prioritize_files(items: list[ProjectFile]) -> list[ProjectFile]:
+    return sorted(items, key=file_priority)
+
+
+ReviewFn = Callable[[ProjectFile], Awaitable[dict[str, Any]]]
+
+
+class ProjectReviewScheduler:
+    """
+    Review ``ProjectFile`` items with ``review_fn(item)``, at most ``workers``
+    at a time. ``review_fn`` raises on failure and returns the per-file result
+    dict otherwise.
+    """
+
+    def __init__(
+        self,
+        review_fn: ReviewFn,
+        *,
+        workers: int = 4,
+        is_cancelled: Callable[[], bool] = lambda: False,
+        on_start: Optional[Callable[[ProjectFile], None]] = None,
+        on_done: Optional[Callable[[ProjectFile, dict[str, Any]], None]] = None,
+        cancel_poll_seconds: float = 0.5,
+    ):
+        self.review_fn = review_fn
+        self.workers = max(1, int(workers))
+        self.is_cancelled = is_cancelled
+        self.on_start = on_start
+        self.on_done = on_done
+        self.cancel_poll_seconds = cancel_poll_seconds
+        self.in_progress: list[str] = []
+        self.cancelled = False
+
+    async def _review_one(self, item: ProjectFile) -> dict[str, Any]:
+        try:
+            return await self.review_fn(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("project_review_file_failed", file=item.rel, error=str(e)[:200])
+            return {"file": item.rel, "error": str(e)[:200]}
+
+    async def run(self, items: list[ProjectFile]) -> list[dict[str, Any]]:
+        """Review ``items`` (already prioritized) and return results in that order.
+
+        Items not reached because of cancellation are left out of the result
+        list.
+        """
+        results: list[Optional[dict[str, Any]]] = [None] * len(items)
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for idx in range(len(items)):
+            queue.put_nowait(idx)
+
+        async def worker() -> None:
+            while not self.cancelled:
+                try:
+                    idx = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                item = items[idx]
+                self.in_progress.append(item.rel)
+                if self.on_start:
+                    self.on_start(item)
+                started = time.time()
+                try:
+                    result = await self._review_one(item)
+                finally:
+                    self.in_progress.remove(item.rel)
+                result.setdefault("review_time_sec", round(time.time() - started, 1))
+                results[idx] = result
+                if self.on_done:
+                    self.on_done(item, result)
+
+        tasks = [asyncio.create_task(worker()) for _ in range(min(self.workers, len(items)) or 1)]
+        pending = set(tasks)
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=self.cancel_poll_seconds)
+            if pending and self.is_cancelled():
+                self.cancelled = True
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+                break
+        for task in tasks:
+            if task.done() and not task.cancelled() and task.exception():
+                raise task.exception()
+
+        if self.is_cancelled():
+            self.cancelled = True
+        return [r for r in results if r is not None]
@@ -0,0 +1,252 @@
+"""
+Content-addressed cache of AI review results backed by SQLite.
+
+A review is keyed on a hash of the normalised diff (or file content), the
+resolved rules text, focus areas, prompt template, provider and model, so a
+re-review of identical input (reopened PR, retried pipeline, re-uploaded
+project, unchanged file in the IDE) returns the stored ReviewResult without
+an LLM round-trip.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import structlog
+
+from models import ReviewResult
+
+logger = structlog.get_logger()
+
+_DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "review_cache.db"
+
+
+@dataclass(frozen=True)
+class ReviewCacheConfig:
+    enabled: bool = True
+    path: str = str(_DEFAULT_DB_PATH)
+    ttl_hours: float = 168.0
+    max_entries: int = 5000
+
+
+@dataclass(frozen=True)
+class CachedReview:
+    result: ReviewResult
+    provider: str  # the provider/model that produced the stored review
+    model: str
+
+
+def parse_review_cache_config(config: dict) -> ReviewCacheConfig:
+    cache_cfg = config.get("review_cache") or {}
+    return ReviewCacheConfig(
+        enabled=bool(cache_cfg.get("enabled", True)),
+        path=str(cache_cfg.get("path") or _DEFAULT_DB_PATH),
+        ttl_hours=max(0.0, float(cache_cfg.get("ttl_hours", 168))),
+        max_entries=max(1, int(cache_cfg.get("max_entries", 5000))),
+    )
+
+
+def normalize_content(text: str) -> str:
+    """Drop differences that never change a review: line endings, trailing
+    whitespace, surrounding blank lines and git `index <sha>..<sha>` headers."""
+    lines = []
+    for line in text.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        if line.startswith("index ") and ".." in line:
+            continue
+        lines.append(line.rstrip())
+    return "\n".join(lines).strip("\n")
+
+
+def make_cache_key(
+    *,
+    kind: str,
+    content: str,
+    rules: str,
+    focus_areas: list[str],
+    prompt: str,
+    provider: str,
+    model: str,
+    extra: Optional[dict[str, Any]] = None,
+) -> str:
+    h = hashlib.sha256()
+    parts = {
+        "kind": kind,
+        "content": hashlib.sha256(normalize_content(content).encode("utf-8")).hexdigest(),
+        "rules": hashlib.sha256(rules.encode("utf-8")).hexdigest(),
+        "focus": sorted({(a or "").lower() for a in focus_areas}),
+        "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "provider": (provider or "").lower(),
+        "model": model or "",
+        "extra": extra or {},
+    }
+    h.update(json.dumps(parts, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class ReviewCache:
+    """Thread-safe SQLite cache with TTL expiry and LRU eviction by entry count."""
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        *,
+        ttl_seconds: float = 7 * 86400,
+        max_entries: int = 5000,
+    ):
+        self._db_path = Path(db_path) if db_path else _DEFAULT_DB_PATH
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, int(max_entries))
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._init_schema()
+        logger.info("review_cache_initialized", db=str(self._db_path), max_entries=self.max_entries)
+
+    @classmethod
+    def from_config(cls, cfg: ReviewCacheConfig) -> "ReviewCache":
+        return cls(Path(cfg.path), ttl_seconds=cfg.ttl_hours * 3600, max_entries=cfg.max_entries)
+
+    # -- connection helpers ---------------------------------------------------
+
+    @contextmanager
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _init_schema(self) -> None:
+        with self._conn() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS review_cache (
+                    cache_key   TEXT PRIMARY KEY,
+                    kind        TEXT NOT NULL DEFAULT '',
+                    provider    TEXT NOT NULL DEFAULT '',
+                    model       TEXT NOT NULL DEFAULT '',
+                    result      TEXT NOT NULL,
+                    created_at  REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    hit_count   INTEGER NOT NULL DEFAULT 0
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_review_cache_access ON review_cache(last_access);
+                """
+            )
+
+    # -- API ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[ReviewResult]:
+        entry = self.get_entry(key)
+        return entry.result if entry is not None else None
+
+    def get_entry(self, key: str) -> Optional[CachedReview]:
+        now = time.time()
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT result, provider, model, created_at FROM review_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds and now - row["created_at"] > self.ttl_seconds:
+                conn.execute("DELETE FROM review_cache WHERE cache_key = ?", (key,))
+                self._count(evictions=1)
+                row = None
+            if row is not None:
+                conn.execute(
+                    "UPDATE review_cache SET last_access = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                    (now, key),
+                )
+
+        if row is None:
+            self._count(misses=1)
+            return None
+        try:
+            # ReviewResult.__init__ recomputes the derived counters.
+            result = ReviewResult(**json.loads(row["result"]))
+        except Exception as e:
+            logger.warning("review_cache_corrupt_entry", key=key, error=str(e))
+            self._count(misses=1)
+            return None
+        self._count(hits=1)
+        return CachedReview(result=result, provider=row["provider"], model=row["model"])
+
+    def put(self, key: str, result: ReviewResult, *, kind: str = "", provider: str = "", model: str = "") -> None:
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO review_cache
+                    (cache_key, kind, provider, model, result, created_at, last_access, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, kind, provider or "", model or "", result.model_dump_json(), now, now),
+            )
+            evicted = self._evict(conn, now)
+        self._count(stores=1, evictions=evicted)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> int:
+        evicted = 0
+        if self.ttl_seconds:
+            evicted += conn.execute(
+                "DELETE FROM review_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        total = conn.execute("SELECT COUNT(*) AS cnt FROM review_cache").fetchone()["cnt"]
+        overflow = total - self.max_entries
+        if overflow > 0:
+            evicted += conn.execute(
+                """
+                DELETE FROM review_cache WHERE cache_key IN (
+                    SELECT cache_key FROM review_cache ORDER BY last_access ASC LIMIT ?
+                )
+                """,
+                (overflow,),
+            ).rowcount
+        return evicted
+
+    def clear(self) -> int:
+        with self._conn() as conn:
+            removed = conn.execute("DELETE FROM review_cache").rowcount
+        logger.info("review_cache_cleared", removed=removed)
+        return removed
+
+    def _count(self, *, hits: int = 0, misses: int = 0, stores: int = 0, evictions: int = 0) -> None:
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+            self.stores += stores
+            self.evictions += evictions
+
+    def stats(self) -> dict[str, Any]:
+        with self._conn() as conn:
+            entries = conn.execute("SELECT COUNT(*) AS cnt FROM review_cache").fetchone()["cnt"]
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
@@ -3,6 +3,8 @@ Persistent review storage backed by SQLite.
 
 Stores completed review results and their issues so that the feedback
 loop (FeedbackAnalyzer / RuleEvolver) can learn from historical data.
+PR reviews also record the head commit and a hash per file patch, which the
+next push of the same PR uses to review incrementally.
 """
 
 from __future__ import annotations
@@ -92,11 +94,25 @@ class ReviewStore:
                     threat_type TEXT
                 );
 
+                CREATE TABLE IF NOT EXISTS review_files (
+                    review_id   TEXT NOT NULL REFERENCES reviews(review_id),
+                    file_path   TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (review_id, file_path)
+                );
+
                 CREATE INDEX IF NOT EXISTS idx_issues_review ON issues(review_id);
+                CREATE INDEX IF NOT EXISTS idx_reviews_pr     ON reviews(repo, pr_id, platform);
                 CREATE INDEX IF NOT EXISTS idx_reviews_repo   ON reviews(repo);
                 CREATE INDEX IF NOT EXISTS idx_issues_category ON issues(category);
                 """
             )
+            # Databases created before head commits were recorded
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(reviews)")}
+            if "head_sha" not in columns:
+                conn.execute("ALTER TABLE reviews ADD COLUMN head_sha TEXT")
+            if "degraded" not in columns:
+                conn.execute("ALTER TABLE reviews ADD COLUMN degraded INTEGER NOT NULL DEFAULT 0")
         logger.info("review_store_initialized", db=str(self._db_path))
 
     # -- write ----------------------------------------------------------------
@@ -109,6 +125,8 @@ class ReviewStore:
         pr_id: str = "",
         platform: str = "",
         author: str = "",
+        head_sha: Optional[str] = None,
+        file_hashes: Optional[dict[str, str]] = None,
     ) -> str:
         review_id = uuid.uuid4().hex
         now = datetime.now(timezone.utc).isoformat()
@@ -118,8 +136,8 @@ class ReviewStore:
                 """
                 INSERT INTO reviews
                     (review_id, repo, pr_id, platform, author,
-                     score, security_score, block_merge, approval, ai_slop, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     score, security_score, block_merge, approval, ai_slop, created_at, head_sha, degraded)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     review_id,
@@ -133,9 +151,17 @@ class ReviewStore:
                     int(result.approval_recommended),
                     result.ai_slop_count,
                     now,
+                    head_sha,
+                    int(result.degraded),
                 ),
             )
 
+            if file_hashes:
+                conn.executemany(
+                    "INSERT INTO review_files (review_id, file_path, content_hash) VALUES (?, ?, ?)",
+                    [(review_id, path, digest) for path, digest in file_hashes.items()],
+                )
+
             for issue in result.issues:
                 conn.execute(
                     """
@@ -195,6 +221,43 @@ class ReviewStore:
             rows = conn.execute(query, params).fetchall()
         return [dict(r) for r in rows]
 
+    def get_last_pr_review(
+        self, repo: str, pr_id: str, *, platform: str = ""
+    ) -> Optional[dict[str, Any]]:
+        """
+        Latest complete (not degraded) review of a PR that recorded its head
+        commit, with its per-file hashes and issues; None if there is none.
+        """
+        with self._conn() as conn:
+            review = conn.execute(
+                """
+                SELECT review_id, head_sha, score, created_at FROM reviews
+                WHERE repo = ? AND pr_id = ? AND platform = ? AND head_sha IS NOT NULL
+                  AND degraded = 0
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                (repo, pr_id, platform),
+            ).fetchone()
+            if review is None:
+                return None
+            files = conn.execute(
+                "SELECT file_path, content_hash FROM review_files WHERE review_id = ?",
+                (review["review_id"],),
+            ).fetchall()
+            issues = conn.execute(
+                """
+                SELECT severity, title, description, category, file_path, line_number,
+                       suggestion, owasp_id, cwe_id, threat_type
+                FROM issues WHERE review_id = ? ORDER BY rowid
+                """,
+                (review["review_id"],),
+            ).fetchall()
+        return {
+            **dict(review),
+            "file_hashes": {r["file_path"]: r["content_hash"] for r in files},
+            "issues": [dict(r) for r in issues],
+        }
+
     def get_repo_reviews(
         self, repo: str, *, limit: int = 50
     ) -> list[dict[str, Any]]:
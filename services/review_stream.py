@@ -0,0 +1,194 @@
+"""
+Streaming review responses.
+
+``IssueStreamParser`` scans the review JSON as it streams in and returns
+every ``issues[]`` element as soon as its closing brace arrives, plus the
+top-level scalar fields (``summary``, ``score``, ...) once they are
+complete. Text around the JSON object (markdown fences, prose) is skipped.
+
+``ReviewStream`` is the ``StreamSink`` the reviewer hands to the router: it
+reports each issue to a callback (the live log) and stops the stream once
+the compilation short-circuit applies — after a critical compilation /
+syntax issue, anything but another one would be dropped by the reviewer
+anyway, so there is no point paying for it.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+SHORT_CIRCUIT_CATEGORIES = ("compilation", "syntax")
+
+
+def is_short_circuit_issue(issue: dict) -> bool:
+    """A critical compilation / syntax error: the review reports only these."""
+    return (
+        str(issue.get("severity") or "").lower() == "critical"
+        and str(issue.get("category") or "").lower() in SHORT_CIRCUIT_CATEGORIES
+    )
+
+
+@dataclass(frozen=True)
+class StreamingConfig:
+    enabled: bool = True
+    abort_on_compilation_error: bool = True
+
+
+def parse_streaming_config(ai_config: dict[str, Any]) -> StreamingConfig:
+    """Build StreamingConfig from the ``ai.streaming`` section."""
+    section = (ai_config or {}).get("streaming") or {}
+    default = StreamingConfig()
+    return StreamingConfig(
+        enabled=bool(section.get("enabled", default.enabled)),
+        abort_on_compilation_error=bool(section.get("abort_on_compilation_error", default.abort_on_compilation_error)),
+    )
+
+
+class IssueStreamParser:
+    """Incremental scanner for the review JSON object."""
+
+    def __init__(self, array_key: str = "issues"):
+        self.array_key = array_key
+        self.fields: dict[str, Any] = {}
+        self.issues_closed = False
+        self.done = False
+        self._buf = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._key_candidate: Optional[str] = None
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._in_array = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, text: str) -> list[dict]:
+        """Consume the next chunk; returns the array items completed by it."""
+        self._buf += text
+        buf = self._buf
+        items: list[dict] = []
+        stack = self._stack
+        for i in range(self._pos, len(buf)):
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if len(stack) == 1 and self._key is None:
+                        self._key_candidate = _loads(buf[self._string_start : i + 1])
+                continue
+            if not stack:
+                # Outside the object: skip prose / fences until the first "{"
+                if c == "{" and not self.done:
+                    stack.append(c)
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c == ":" and len(stack) == 1:
+                self._key, self._key_candidate = self._key_candidate, None
+                self._value_start = i + 1
+            elif c in "{[":
+                if c == "[" and len(stack) == 1 and self._key == self.array_key:
+                    self._in_array = True
+                elif c == "{" and len(stack) == 2 and self._in_array:
+                    self._item_start = i
+                stack.append(c)
+            elif c in "}]":
+                stack.pop()
+                if self._in_array and len(stack) == 2 and c == "}" and self._item_start is not None:
+                    item = _loads(buf[self._item_start : i + 1])
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self._item_start = None
+                elif self._in_array and len(stack) == 1 and c == "]":
+                    self._in_array = False
+                    self.issues_closed = True
+                elif not stack:
+                    self._end_field(i)
+                    self.done = True
+            elif c == "," and len(stack) == 1:
+                self._end_field(i)
+        self._pos = len(buf)
+        return items
+
+    def _end_field(self, end: int) -> None:
+        if self._key is not None and self._value_start is not None and self._key != self.array_key:
+            value = _loads(self._buf[self._value_start : end])
+            if value is not None:
+                self.fields[self._key] = value
+        self._key = None
+        self._value_start = None
+
+
+def _loads(text: str) -> Any:
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class ReviewStream:
+    """StreamSink for one review request."""
+
+    def __init__(
+        self,
+        on_issue: Optional[Callable[[dict], None]] = None,
+        *,
+        short_circuit: bool = True,
+    ):
+        self.on_issue = on_issue
+        self.short_circuit = short_circuit
+        # Issues already reported; a retried request doesn't repeat them
+        self._announced: set[tuple] = set()
+        self.reset()
+
+    def reset(self) -> None:
+        self.parser = IssueStreamParser()
+        self.issues: list[dict] = []
+        self.tripped = False
+        self.aborted = False
+
+    def feed(self, text: str) -> bool:
+        for issue in self.parser.feed(text):
+            if is_short_circuit_issue(issue):
+                self.tripped = True
+            elif self.tripped and self.short_circuit:
+                self.aborted = True
+                return True
+            self.issues.append(issue)
+            self._announce(issue)
+        if self.tripped and self.short_circuit and self.parser.issues_closed:
+            self.aborted = True
+        return self.aborted
+
+    def _announce(self, issue: dict) -> None:
+        key = (issue.get("file_path"), issue.get("line_number"), issue.get("title"))
+        if self.on_issue is None or key in self._announced:
+            return
+        self._announced.add(key)
+        try:
+            self.on_issue(dict(issue))
+        except Exception as e:
+            logger.warning("stream_issue_callback_failed", error=str(e))
+
+    def review_data(self) -> dict:
+        """Review data from what was streamed (a stopped or unparsable answer)."""
+        data = dict(self.parser.fields)
+        data["issues"] = list(self.issues)
+        data.setdefault("summary", "AI review completed")
+        if self.tripped:
+            data["approval_recommended"] = False
+            data["block_merge"] = True
+        return data
@@ -16,6 +16,8 @@ from typing import Any, Optional, TYPE_CHECKING
 from services.feedback_analyzer import FeedbackAnalyzer
 from services.review_store import ReviewStore
 from services.ai_providers import AIProviderRouter
+from services.rules_service import invalidate_rule_cache
+from services.token_budget import truncate_tokens
 
 if TYPE_CHECKING:
     from services.rules_service import RulesHelper
@@ -133,11 +135,11 @@ Markdown formatında döndür. Başka açıklama ekleme."""
             directory_hotspots=json.dumps(report["directory_hotspots"], indent=2),
             recurring_titles=json.dumps(report["top_recurring_titles"], indent=2),
             review_stats=json.dumps(report["review_stats"], indent=2),
-            base_rules=base_rules[:6000],
+            base_rules=truncate_tokens(base_rules, 1500, self.router.resolve().model),
         )
 
         system_msg = "Sen bir kod review kuralları uzmanısın. Verilen feedback verilerine göre repo'ya özel kurallar üretiyorsun."
-        provider_used, model_used, response = self.router.chat(
+        provider_used, model_used, response = await self.router.achat(
             system=system_msg, user=prompt
         )
 
@@ -189,6 +191,7 @@ Markdown formatında döndür. Başka açıklama ekleme."""
         REPO_RULES_DIR.mkdir(parents=True, exist_ok=True)
         path = self._rule_path(repo)
         path.write_text(content, encoding="utf-8")
+        invalidate_rule_cache(path)
         return path
 
     def _load_base_rules(self) -> str:
@@ -3,10 +3,13 @@ Rule dosyalarını dile göre revize eden servis.
 
 Provider-agnostic AI routing is implemented via services/ai_providers/*.
 """
+import asyncio
 import structlog
 from pathlib import Path
 from typing import Optional, Dict, List, TYPE_CHECKING
 from services.ai_providers import AIProviderRouter
+from services.rules_service import invalidate_rule_cache
+from services.token_budget import truncate_tokens
 
 if TYPE_CHECKING:
     from services.rules_service import RulesHelper
@@ -151,14 +154,14 @@ Sadece markdown içeriğini döndür, başka açıklama ekleme."""
             prompt = self.RULE_GENERATION_PROMPT.format(
                 language=language_display,
                 category=category,
-                base_rules=base_rules[:8000]  # Token limiti için kısalt
+                base_rules=truncate_tokens(base_rules, 2000, self.router.resolve().model)  # Token limiti için kısalt
             )
             
             logger.info("generating_rule", language=language, category=category)
             
             # AI'dan rule oluştur (simple single-provider routing)
             system_msg = "Sen bir programlama dili uzmanısın ve kod review kuralları oluşturuyorsun."
-            provider_used, model_used, response = self.router.chat(system=system_msg, user=prompt)
+            provider_used, model_used, response = await self.router.achat(system=system_msg, user=prompt)
             self.last_provider_used = provider_used
             self.last_model_used = model_used
             
@@ -166,6 +169,7 @@ Sadece markdown içeriğini döndür, başka açıklama ekleme."""
             rule_path.parent.mkdir(parents=True, exist_ok=True)
             with open(rule_path, 'w', encoding='utf-8') as f:
                 f.write(response)
+            invalidate_rule_cache(rule_path)
             
             logger.info("rule_generated", file=rule_filename, language=language, category=category)
             return True
@@ -194,16 +198,17 @@ Sadece markdown içeriğini döndür, başka açıklama ekleme."""
         if categories is None:
             categories = RULE_CATEGORIES
         
-        results = {}
-        for category in categories:
-            success = await self.generate_rule_for_language(
+        # Kategoriler birbirinden bağımsız; AI çağrıları paralel beklenir
+        outcomes = await asyncio.gather(*(
+            self.generate_rule_for_language(
                 language=language,
                 category=category,
                 force_regenerate=force_regenerate
             )
-            results[category] = success
+            for category in categories
+        ))
         
-        return results
+        return dict(zip(categories, outcomes))
     
     # NOTE: SDK-specific implementations moved to services/ai_providers/*
 
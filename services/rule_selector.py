@@ -0,0 +1,249 @@
+"""
+Relevance-ranked rule selection.
+
+Rule markdown files are split into sections (``##`` / ``###`` headings,
+ignoring headings inside code fences) and indexed with BM25 over an
+inverted index. For each review a query is built from the changed code —
+language, file paths, imports and identifiers — and the best-matching
+sections are packed into a token budget instead of truncating the
+concatenated rule files at a fixed character count.
+
+Every rule file keeps at least its best section (budget permitting), so
+repo-specific or OWASP rules are never crowded out entirely, and sections
+flagged CRITICAL get a small boost.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from services.diff_analyzer import estimate_tokens
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9_]*")
+_CAMEL = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_HEADING = re.compile(r"^(#{2,3})\s+(.*\S)\s*$")
+_IMPORT = re.compile(
+    r"^\s*(?:import\s+([\w.]+)|from\s+([\w.]+)\s+import|using\s+([\w.]+)\s*;"
+    r"|#include\s*[<\"]([\w./]+)|.*\brequire\(\s*['\"]([\w@./-]+)['\"]\s*\)"
+    r"|.*\bfrom\s+['\"]([\w@./-]+)['\"])"
+)
+
+_STOPWORDS = frozenset(
+    """
+    the and for with that this from are not use you your but all any can has have
+    its into out was were will when then than them they what which who why how
+    should must never always don does also only each other more most some such
+    self return true false none null var let const def class new public private
+    static void int str string bool else elif while try catch except finally
+    """.split()
+)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+CRITICAL_BOOST = 1.3
+REPO_BOOST = 1.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms; identifiers also yield their camelCase / snake_case parts."""
+    terms: List[str] = []
+    for word in _WORD.findall(text):
+        lower = word.lower()
+        parts = [p.lower() for piece in word.split("_") for p in _CAMEL.findall(piece)]
+        if len(parts) > 1 and len(lower) >= 3 and lower not in _STOPWORDS:
+            terms.append(lower)
+        for part in parts:
+            if len(part) >= 3 and part not in _STOPWORDS:
+                terms.append(part)
+    return terms
+
+
+@dataclass
+class RuleSection:
+    source: str  # rule file, e.g. "python-security.md"
+    title: str  # document title shown in the prompt, e.g. "Rules for: SECURITY"
+    heading: str  # full heading line ("### SQL Injection"), "" for the preamble
+    parent: str  # enclosing "## " heading of a "### " section, else ""
+    body: str
+    tokens: int = 0
+    critical: bool = False
+    repo_specific: bool = False
+    terms: Counter = field(default_factory=Counter, repr=False)
+
+    def render(self) -> str:
+        return f"{self.heading}\n{self.body}".strip() if self.heading else self.body.strip()
+
+
+def split_sections(
+    source: str,
+    title: str,
+    content: str,
+    *,
+    repo_specific: bool = False,
+) -> List[RuleSection]:
+    """Split one rule document into heading-delimited sections."""
+    sections: List[RuleSection] = []
+    heading, parent, buf = "", "", []
+    in_fence = False
+
+    def flush() -> None:
+        body = "\n".join(buf).strip()
+        if not body:
+            # e.g. a "## " heading directly followed by "### "; kept as the parent
+            return
+        text = f"{parent}\n{heading}\n{body}"
+        sections.append(RuleSection(
+            source=source,
+            title=title,
+            heading=heading,
+            parent=parent,
+            body=body,
+            tokens=estimate_tokens(f"{heading}\n{body}"),
+            critical="CRITICAL" in text,
+            repo_specific=repo_specific,
+            # Headings describe the whole section; weigh their terms higher
+            terms=Counter(tokenize(body)) + Counter(tokenize(f"{parent} {heading}") * 3),
+        ))
+
+    for line in content.splitlines():
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        m = None if in_fence else _HEADING.match(line)
+        if m is None:
+            buf.append(line)
+            continue
+        flush()
+        buf = []
+        if m.group(1) == "##":
+            heading, parent = line.strip(), ""
+        else:
+            if not parent and heading.startswith("## "):
+                parent = heading
+            heading = line.strip()
+    flush()
+    return sections
+
+
+class RuleSectionIndex:
+    """BM25 inverted index over the sections of a resolved rule bundle."""
+
+    def __init__(self, sections: Sequence[RuleSection]):
+        self.sections = list(sections)
+        self.sources: List[str] = list(dict.fromkeys(s.source for s in self.sections))
+        self._postings: dict[str, List[Tuple[int, int]]] = {}
+        self._lengths = [sum(s.terms.values()) for s in self.sections]
+        for i, section in enumerate(self.sections):
+            for term, tf in section.terms.items():
+                self._postings.setdefault(term, []).append((i, tf))
+        self._avg_len = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        self.total_tokens = sum(s.tokens for s in self.sections)
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Tuple[str, str, str]]) -> "RuleSectionIndex":
+        """``documents`` are (source file, title, content) in priority order."""
+        sections: List[RuleSection] = []
+        for source, title, content in documents:
+            sections.extend(split_sections(source, title, content, repo_specific=source.startswith("repo/")))
+        return cls(sections)
+
+    def __len__(self) -> int:
+        return len(self.sections)
+
+    def scores(self, query_terms: Counter) -> List[float]:
+        n = len(self.sections)
+        scores = [0.0] * n
+        if not n or not self._avg_len:
+            return scores
+        for term, q_count in query_terms.items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            q_weight = 1 + math.log(q_count)
+            for i, tf in postings:
+                norm = K1 * (1 - B + B * self._lengths[i] / self._avg_len)
+                scores[i] += q_weight * idf * tf * (K1 + 1) / (tf + norm)
+        for i, section in enumerate(self.sections):
+            if section.critical:
+                scores[i] *= CRITICAL_BOOST
+            if section.repo_specific:
+                scores[i] *= REPO_BOOST
+        return scores
+
+    def select(self, query_terms: Counter, max_tokens: int) -> List[RuleSection]:
+        """
+        Best sections within ``max_tokens``: first the top section of every
+        source file (in priority order), then the rest by score. Returned in
+        document order.
+        """
+        scores = self.scores(query_terms)
+        ranked = sorted(range(len(self.sections)), key=lambda i: (-scores[i], i))
+        chosen: set[int] = set()
+        used = 0
+
+        def take(i: int) -> None:
+            nonlocal used
+            if i not in chosen and used + self.sections[i].tokens <= max_tokens:
+                chosen.add(i)
+                used += self.sections[i].tokens
+
+        for source in self.sources:
+            best = next((i for i in ranked if self.sections[i].source == source), None)
+            if best is not None:
+                take(best)
+        for i in ranked:
+            if scores[i] <= 0 or used >= max_tokens:
+                break
+            take(i)
+        return [self.sections[i] for i in sorted(chosen)]
+
+    def render(self, query_terms: Counter, max_tokens: int) -> Tuple[str, List[RuleSection]]:
+        """Prompt text for the selected sections, grouped under their document titles."""
+        selected = self.select(query_terms, max_tokens)
+        parts: List[str] = []
+        current_title = current_parent = None
+        for section in selected:
+            if section.title != current_title:
+                parts.append(f"\n## {section.title}")
+                current_title, current_parent = section.title, None
+            if section.parent and section.parent != current_parent:
+                parts.append(section.parent)
+            current_parent = section.parent or None
+            parts.append(section.render())
+        return "\n\n".join(parts).strip(), selected
+
+
+def build_query(
+    code: str,
+    files: Sequence[str] = (),
+    language: Optional[str] = None,
+    focus_areas: Sequence[str] = (),
+) -> Counter:
+    """
+    Query terms for a review: language, focus areas, path components,
+    imported modules and identifiers from the changed code. For a diff only
+    added and context lines count; removed code is no longer a concern.
+    """
+    query: Counter = Counter()
+    for term in tokenize(" ".join([language or "", *focus_areas])):
+        query[term] += 3
+    for path in files:
+        query.update(tokenize(path.replace("/", " ").replace(".", " ")))
+
+    for line in code.splitlines():
+        if line.startswith(("-", "@@", "diff --git", "+++", "index ")):
+            continue
+        text = line[1:] if line[:1] in ("+", " ") else line
+        m = _IMPORT.match(text)
+        if m:
+            module = next(g for g in m.groups() if g)
+            for term in tokenize(module.replace(".", " ").replace("/", " ")):
+                query[term] += 2
+        query.update(tokenize(text))
+    return query
@@ -1,13 +1,24 @@
 """
 Rules helper: reads rule markdown files directly from the local filesystem.
 No external service dependency — used as an in-process utility.
+
+Rule file contents and resolved rule bundles are kept in a process-wide
+``RuleCache`` shared by every ``RulesHelper`` instance. Entries are
+revalidated by stat (mtime + size) at most once per ``STAT_INTERVAL_SECONDS``,
+so repeated reviews do no file I/O; in-process writers (RuleEvolver,
+OWASPUpdater, RuleGenerator) call ``invalidate_rule_cache`` so their edits
+apply at once.
 """
 
 from __future__ import annotations
 
+import threading
+import time
 import structlog
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+
+from services.rule_selector import RuleSectionIndex
 
 logger = structlog.get_logger()
 
@@ -25,12 +36,117 @@ FOCUS_RULE_FILES: dict[str, str] = {
     "bugs": "compilation.md",
 }
 
+STAT_INTERVAL_SECONDS = 2.0
+
+# (mtime_ns, size) of a file, or None when it does not exist
+Stamp = Optional[tuple[int, int]]
+
+
+def _stamp(path: Path) -> Stamp:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class RuleCache:
+    """Rule file contents and resolved bundles, revalidated by stat."""
+
+    def __init__(self, stat_interval: float = STAT_INTERVAL_SECONDS):
+        self.stat_interval = stat_interval
+        self._lock = threading.Lock()
+        # path -> (stamp, last checked, content or None)
+        self._files: dict[Path, tuple[Stamp, float, Optional[str]]] = {}
+        # key -> (stamps of every path the bundle consulted, last checked, bundle)
+        self._bundles: dict[tuple, tuple[tuple[tuple[Path, Stamp], ...], float, dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def read(self, path: Path) -> Optional[str]:
+        """File content, or None if the file does not exist."""
+        return self._read(path)[1]
+
+    def _read(self, path: Path) -> tuple[Stamp, Optional[str]]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None and now - entry[1] < self.stat_interval:
+                return entry[0], entry[2]
+            stamp = _stamp(path)
+            if entry is not None and entry[0] == stamp:
+                self._files[path] = (stamp, now, entry[2])
+                return stamp, entry[2]
+            content = None
+            if stamp is not None:
+                try:
+                    content = path.read_text(encoding="utf-8")
+                except OSError:
+                    stamp = None
+            self._files[path] = (stamp, now, content)
+            return stamp, content
+
+    def bundle(
+        self,
+        key: tuple,
+        build: Callable[[Callable[[Path], Optional[str]]], dict[str, Any]],
+    ) -> dict[str, Any]:
+        """
+        Memoised ``build(read)``. Every path passed to ``read`` (found or not)
+        becomes a dependency; the bundle is rebuilt when any of them changes.
+        """
+        now = time.monotonic()
+        entry = self._bundles.get(key)
+        if entry is not None:
+            deps, checked_at, value = entry
+            fresh = now - checked_at < self.stat_interval
+            if not fresh and all(self._read(path)[0] == stamp for path, stamp in deps):
+                self._bundles[key] = (deps, now, value)
+                fresh = True
+            if fresh:
+                self.hits += 1
+                return value
+
+        self.misses += 1
+        deps: list[tuple[Path, Stamp]] = []
+
+        def read(path: Path) -> Optional[str]:
+            stamp, content = self._read(path)
+            deps.append((path, stamp))
+            return content
+
+        value = build(read)
+        self._bundles[key] = (tuple(deps), now, value)
+        return value
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """Forget one file (or everything) and every resolved bundle."""
+        with self._lock:
+            if path is None:
+                self._files.clear()
+            else:
+                self._files.pop(Path(path), None)
+            self._bundles.clear()
+
+
+_rule_cache = RuleCache()
+
+
+def get_rule_cache() -> RuleCache:
+    return _rule_cache
+
+
+def invalidate_rule_cache(path: Optional[Path] = None) -> None:
+    """Call after writing a rule file so the next review sees it immediately."""
+    _rule_cache.invalidate(path)
+
 
 class RulesHelper:
     """Reads and resolves rule .md files from the local rules/ directory."""
 
-    def __init__(self, rules_dir: Optional[Path] = None):
+    def __init__(self, rules_dir: Optional[Path] = None, cache: Optional[RuleCache] = None):
         self.rules_dir = rules_dir or RULES_DIR
+        self.cache = cache or _rule_cache
         logger.info("rules_helper_initialized", rules_dir=str(self.rules_dir))
 
     def list_rules(
@@ -59,25 +175,20 @@ class RulesHelper:
             logger.warning("invalid_rule_filename", filename=filename)
             return None
 
-        p = self.rules_dir / filename
-        if p.exists():
-            return p.read_text(encoding="utf-8")
-        return None
+        return self.cache.read(self.rules_dir / filename)
 
     def get_repo_rule(self, repo: str) -> Optional[str]:
         """Read repo-specific rule file from rules/repo/{owner}_{name}.md."""
-        safe_name = repo.replace("/", "_").replace("\\", "_")
-        p = REPO_RULES_DIR / f"{safe_name}.md"
-        if p.exists():
-            return p.read_text(encoding="utf-8")
-        return None
+        return self.cache.read(self._repo_rule_path(repo))
 
     def get_owasp_rule(self) -> Optional[str]:
         """Read the dynamic OWASP Top 10 rule file if present."""
-        p = self.rules_dir / "owasp-top10.md"
-        if p.exists():
-            return p.read_text(encoding="utf-8")
-        return None
+        return self.cache.read(self.rules_dir / "owasp-top10.md")
+
+    @staticmethod
+    def _repo_rule_path(repo: str) -> Path:
+        safe_name = repo.replace("/", "_").replace("\\", "_")
+        return REPO_RULES_DIR / f"{safe_name}.md"
 
     def resolve_rules(
         self,
@@ -93,17 +204,58 @@ class RulesHelper:
           2. Language-specific rules  (rules/{lang}-{category}.md)
           3. General rules  (rules/{category}.md)
           4. Dynamic OWASP rules  (rules/owasp-top10.md) — when security is a focus area
+
+        Bundles are memoised per (focus areas, language, repo) in the shared
+        RuleCache and rebuilt only when one of the files they consulted changes.
         """
-        used_files: list[str] = []
-        parts: list[str] = []
+        key = (str(self.rules_dir), tuple(focus_areas), language, repo)
+        bundle = self.cache.bundle(key, lambda read: self._build_rules(read, focus_areas, language, repo))
+        # Callers get their own lists; the cached bundle stays untouched
+        return {
+            "language": bundle["language"],
+            "repo": bundle["repo"],
+            "focus_areas": list(focus_areas),
+            "files": list(bundle["files"]),
+            "content": bundle["content"],
+        }
+
+    def resolve_rule_index(
+        self,
+        focus_areas: list[str],
+        language: Optional[str] = None,
+        repo: Optional[str] = None,
+    ) -> RuleSectionIndex:
+        """
+        Sectioned BM25 index over the same files ``resolve_rules`` would use,
+        memoised (and invalidated) like the bundles.
+        """
+        key = ("index", str(self.rules_dir), tuple(focus_areas), language, repo)
+        bundle = self.cache.bundle(
+            key,
+            lambda read: {
+                "index": RuleSectionIndex.from_documents(
+                    self._build_rules(read, focus_areas, language, repo)["documents"]
+                )
+            },
+        )
+        return bundle["index"]
+
+    def _build_rules(
+        self,
+        read: Callable[[Path], Optional[str]],
+        focus_areas: list[str],
+        language: Optional[str],
+        repo: Optional[str],
+    ) -> dict[str, Any]:
+        # (file, title, content) in priority order
+        documents: list[tuple[str, str, str]] = []
 
         # 1) Repo-specific rules (highest priority)
         if repo:
-            repo_content = self.get_repo_rule(repo)
+            repo_content = read(self._repo_rule_path(repo))
             if repo_content:
                 safe_name = repo.replace("/", "_").replace("\\", "_")
-                used_files.append(f"repo/{safe_name}.md")
-                parts.append(f"\n## REPO-SPECIFIC RULES for {repo}\n{repo_content}")
+                documents.append((f"repo/{safe_name}.md", f"REPO-SPECIFIC RULES for {repo}", repo_content))
 
         # 2-3) Language-specific / general rules
         for area in focus_areas:
@@ -115,29 +267,27 @@ class RulesHelper:
             if language:
                 cat = base_file.replace(".md", "")
                 lang_file = f"{language}-{cat}.md"
-                lang_path = self.rules_dir / lang_file
-                if lang_path.exists():
-                    used_files.append(lang_file)
-                    parts.append(f"\n## Rules for {language.upper()}: {area_l.upper()}\n{lang_path.read_text(encoding='utf-8')}")
+                lang_content = read(self.rules_dir / lang_file)
+                if lang_content is not None:
+                    documents.append((lang_file, f"Rules for {language.upper()}: {area_l.upper()}", lang_content))
                     continue
 
-            base_path = self.rules_dir / base_file
-            if base_path.exists():
-                used_files.append(base_file)
-                parts.append(f"\n## Rules for: {area_l.upper()}\n{base_path.read_text(encoding='utf-8')}")
+            base_content = read(self.rules_dir / base_file)
+            if base_content is not None:
+                documents.append((base_file, f"Rules for: {area_l.upper()}", base_content))
 
         # 4) Dynamic OWASP rules when security is a focus area
         security_focus = any(a.lower() in ("security",) for a in focus_areas)
         if security_focus:
-            owasp_content = self.get_owasp_rule()
+            owasp_content = read(self.rules_dir / "owasp-top10.md")
             if owasp_content:
-                used_files.append("owasp-top10.md")
-                parts.append(f"\n## OWASP Top 10 Rules\n{owasp_content}")
+                documents.append(("owasp-top10.md", "OWASP Top 10 Rules", owasp_content))
 
         return {
             "language": language,
             "repo": repo,
-            "focus_areas": focus_areas,
-            "files": used_files,
-            "content": "\n\n".join(parts).strip(),
+            "focus_areas": list(focus_areas),
+            "files": [source for source, _, _ in documents],
+            "documents": documents,
+            "content": "\n\n".join(f"\n## {title}\n{content}" for _, title, content in documents).strip(),
         }
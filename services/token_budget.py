@@ -0,0 +1,265 @@
+"""
+Token counting and per-request prompt budgeting.
+
+``get_token_counter(model)`` returns a cached counter for a model: a
+tiktoken encoding when the optional ``tiktoken`` package (and its encoding
+files) are available, otherwise a local estimator calibrated on BPE
+behaviour — short words ≈ 1 token, long identifiers ≈ 4 chars/token,
+digit runs ≈ 3 digits/token, punctuation and non-ASCII characters (CJK,
+emoji) ≈ 1 token each — which stays close for prose and code and errs on
+the safe side for minified or CJK content.
+
+``plan_budget`` splits the model context between the fixed prompt
+(system message + template), the diff / code, the rules and the response
+``max_tokens``; ``fit_prompt`` truncates the variable parts to that plan
+and returns a ``PromptUsage`` record for logging and analytics, completed
+with the provider-reported (and prompt-cached) token counts after the call.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+import structlog
+
+try:
+    import tiktoken
+except ImportError:  # optional; the estimator is used instead
+    tiktoken = None
+
+logger = structlog.get_logger()
+
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[ \t]+|\n+|[^\x00-\x7f]|[^\sA-Za-z\d]")
+
+
+class TokenCounter:
+    """Counts and truncates text in model tokens."""
+
+    name = "estimate"
+
+    def count(self, text: str) -> int:
+        total = 0
+        for m in _PIECES.finditer(text):
+            total += _piece_tokens(m.group())
+        return total
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Longest prefix within ``max_tokens``, cut back to a line end when possible."""
+        if max_tokens <= 0:
+            return ""
+        used = 0
+        for m in _PIECES.finditer(text):
+            used += _piece_tokens(m.group())
+            if used > max_tokens:
+                return _cut_at_line(text, m.start())
+        return text
+
+
+def _piece_tokens(piece: str) -> int:
+    c = piece[0]
+    if c.isascii() and c.isalpha():
+        return 1 if len(piece) <= 6 else (len(piece) + 3) // 4
+    if c.isdigit() and c.isascii():
+        return (len(piece) + 2) // 3
+    if c in " \t":
+        # A single space merges into the next word; indentation runs are ~1 token
+        return 0 if piece == " " else 1
+    if c == "\n":
+        return 1
+    return 1
+
+
+def _cut_at_line(text: str, end: int) -> str:
+    nl = text.rfind("\n", 0, end)
+    # Keep the cut on a line boundary unless that would throw away most of it
+    return text[: nl + 1] if nl > end // 2 else text[:end]
+
+
+class TiktokenCounter(TokenCounter):
+    def __init__(self, encoding: Any):
+        self.encoding = encoding
+        self.name = f"tiktoken:{encoding.name}"
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        tokens = self.encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        head = self.encoding.decode(tokens[:max_tokens])
+        return _cut_at_line(head, len(head))
+
+
+@lru_cache(maxsize=32)
+def get_token_counter(model: Optional[str] = None) -> TokenCounter:
+    """Cached counter for ``model``; falls back to the estimator."""
+    if tiktoken is not None:
+        try:
+            try:
+                encoding = tiktoken.encoding_for_model(model or "")
+            except KeyError:
+                # Non-OpenAI models: a modern BPE vocabulary is a close proxy
+                encoding = tiktoken.get_encoding("o200k_base")
+            return TiktokenCounter(encoding)
+        except Exception as e:  # encoding files may need a download
+            logger.warning("tiktoken_unavailable", model=model, error=str(e))
+    return TokenCounter()
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    return get_token_counter(model).count(text)
+
+
+def truncate_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    return get_token_counter(model).truncate(text, max_tokens)
+
+
+@dataclass(frozen=True)
+class TokenBudgetConfig:
+    context_window: int = 32_768
+    max_input_tokens: int = 12_000  # cost cap on the prompt, whatever the context window
+    rules_share: float = 0.3  # share of the variable budget reserved for rules
+    safety_margin: int = 256
+
+
+def parse_token_budget_config(ai_config: dict[str, Any]) -> TokenBudgetConfig:
+    """Build TokenBudgetConfig from the ``ai.token_budget`` section."""
+    section = (ai_config or {}).get("token_budget") or {}
+    default = TokenBudgetConfig()
+    return TokenBudgetConfig(
+        context_window=max(1_024, int(section.get("context_window", default.context_window))),
+        max_input_tokens=max(512, int(section.get("max_input_tokens", default.max_input_tokens))),
+        rules_share=min(0.9, max(0.0, float(section.get("rules_share", default.rules_share)))),
+        safety_margin=max(0, int(section.get("safety_margin", default.safety_margin))),
+    )
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    fixed: int  # system message + prompt template
+    content: int  # diff / code
+    rules: int
+    response: int
+
+
+def plan_budget(
+    config: TokenBudgetConfig,
+    *,
+    fixed_tokens: int,
+    content_tokens: int,
+    rules_tokens: int,
+    response_tokens: int,
+) -> PromptBudget:
+    """
+    Split the input budget: the diff / code gets what it needs, except that
+    the rules always keep up to ``rules_share`` of the variable budget;
+    whatever the diff does not use is left to the rules.
+    """
+    input_cap = min(
+        config.max_input_tokens,
+        config.context_window - response_tokens - config.safety_margin,
+    )
+    variable = max(0, input_cap - fixed_tokens)
+    rules = min(rules_tokens, int(variable * config.rules_share))
+    content = min(content_tokens, variable - rules)
+    rules = min(rules_tokens, variable - content)
+    return PromptBudget(fixed=fixed_tokens, content=content, rules=rules, response=response_tokens)
+
+
+@dataclass
+class PromptUsage:
+    """Token accounting of one LLM request."""
+
+    kind: str
+    model: Optional[str]
+    counter: str
+    fixed_tokens: int
+    content_tokens: int
+    rules_tokens: int
+    prompt_tokens: int
+    response_budget: int
+    content_truncated: bool = False
+    rules_truncated: bool = False
+    completion_tokens: int = 0
+    # As reported by the provider, when it does
+    reported_prompt_tokens: Optional[int] = None
+    cached_tokens: int = 0  # prompt tokens served from the provider's prompt cache
+    cache_write_tokens: int = 0  # prompt tokens written to it
+
+    def apply_reported(self, reported: dict[str, int]) -> None:
+        """Take over the counts a provider reported (see ``ChatRequest.usage``)."""
+        if "input_tokens" in reported:
+            self.reported_prompt_tokens = reported["input_tokens"]
+        if "output_tokens" in reported:
+            self.completion_tokens = reported["output_tokens"]
+        self.cached_tokens = reported.get("cached_tokens", 0)
+        self.cache_write_tokens = reported.get("cache_write_tokens", 0)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def fit_prompt(
+    counter: TokenCounter,
+    config: TokenBudgetConfig,
+    *,
+    kind: str,
+    model: Optional[str],
+    fixed_text: str,
+    content: str,
+    rules: str,
+    response_tokens: int,
+) -> tuple[str, str, PromptUsage]:
+    """Truncate ``content`` and ``rules`` to the planned budget."""
+    fixed_tokens = counter.count(fixed_text)
+    content_tokens = counter.count(content)
+    rules_tokens = counter.count(rules) if rules else 0
+    budget = plan_budget(
+        config,
+        fixed_tokens=fixed_tokens,
+        content_tokens=content_tokens,
+        rules_tokens=rules_tokens,
+        response_tokens=response_tokens,
+    )
+    content_truncated = content_tokens > budget.content
+    rules_truncated = rules_tokens > budget.rules
+    if content_truncated:
+        content = counter.truncate(content, budget.content)
+        content_tokens = counter.count(content)
+    if rules_truncated:
+        rules = counter.truncate(rules, budget.rules)
+        rules_tokens = counter.count(rules)
+    usage = PromptUsage(
+        kind=kind,
+        model=model,
+        counter=counter.name,
+        fixed_tokens=fixed_tokens,
+        content_tokens=content_tokens,
+        rules_tokens=rules_tokens,
+        prompt_tokens=fixed_tokens + content_tokens + rules_tokens,
+        response_budget=response_tokens,
+        content_truncated=content_truncated,
+        rules_truncated=rules_truncated,
+    )
+    return content, rules, usage
+
+
+def summarize_usage(usages: list[PromptUsage]) -> dict[str, Any]:
+    """Per-review totals across all LLM requests."""
+    return {
+        "requests": len(usages),
+        "prompt_tokens": sum(u.prompt_tokens for u in usages),
+        "content_tokens": sum(u.content_tokens for u in usages),
+        "rules_tokens": sum(u.rules_tokens for u in usages),
+        "completion_tokens": sum(u.completion_tokens for u in usages),
+        "cached_tokens": sum(u.cached_tokens for u in usages),
+        "cache_write_tokens": sum(u.cache_write_tokens for u in usages),
+        "truncated": sum(1 for u in usages if u.content_truncated or u.rules_truncated),
+        "counter": usages[0].counter if usages else None,
+    }
@@ -0,0 +1,498 @@
+"""
+Durable webhook job queue backed by SQLite, drained by a bounded worker pool.
+
+`/webhook` only parses the payload and enqueues a job; the slow part (diff
+fetch, AI review, comment posting, rule evolution) runs in WebhookWorkerPool.
+Jobs survive restarts: anything left `running` by a crashed process is put
+back to `queued` when the queue is opened again.
+
+Pushes to the same PR are coalesced: each job waits out a short debounce
+window, and a newer event for the same (platform, repo, pr_id) supersedes
+older queued jobs and cancels an in-flight review of an older head SHA.
+
+``WebhookJobQueue`` is synchronous and thread-safe; async callers (the
+worker pool, the webhook handler) run its methods with ``asyncio.to_thread``
+so a busy database (WAL checkpoint, concurrent writers) never blocks the
+event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+import structlog
+
+logger = structlog.get_logger()
+
+_DEFAULT_DB_PATH = Path(__file__).parent.parent / "data" / "webhook_jobs.db"
+
+
+@dataclass(frozen=True)
+class WebhookQueueConfig:
+    enabled: bool = True
+    db_path: str = str(_DEFAULT_DB_PATH)
+    workers: int = 4
+    per_repo_concurrency: int = 1
+    poll_interval_seconds: float = 2.0
+    debounce_seconds: float = 5.0
+
+
+def parse_webhook_queue_config(config: dict) -> WebhookQueueConfig:
+    webhook_cfg = config.get("webhook") or {}
+    queue_cfg = webhook_cfg.get("queue") or {}
+
+    return WebhookQueueConfig(
+        enabled=bool(queue_cfg.get("enabled", True)),
+        db_path=str(queue_cfg.get("db_path") or _DEFAULT_DB_PATH),
+        workers=max(1, min(int(queue_cfg.get("workers", 4)), 64)),
+        per_repo_concurrency=max(1, int(queue_cfg.get("per_repo_concurrency", 1))),
+        poll_interval_seconds=max(0.1, float(queue_cfg.get("poll_interval_seconds", 2.0))),
+        debounce_seconds=max(0.0, min(float(queue_cfg.get("debounce_seconds", 5.0)), 300.0)),
+    )
+
+
+def pr_key(platform: str, repo: str, pr_id: str) -> str:
+    return f"{platform}:{repo}:{pr_id}"
+
+
+@dataclass
+class WebhookJob:
+    job_id: str
+    run_id: Optional[str]
+    platform: str
+    repo: str
+    pr_id: str
+    payload: dict[str, Any]
+    attempts: int
+    enqueued_at: float
+    started_at: Optional[float] = None
+    sha: Optional[str] = None
+
+    @property
+    def pr_key(self) -> str:
+        return pr_key(self.platform, self.repo, self.pr_id)
+
+
+class WebhookJobQueue:
+    """SQLite-backed FIFO of pending webhook reviews."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self._db_path = Path(db_path) if db_path else _DEFAULT_DB_PATH
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._claim_lock = threading.Lock()
+        self._init_schema()
+        recovered = self._requeue_running()
+        logger.info("webhook_queue_initialized", db=str(self._db_path), recovered=recovered)
+
+    # -- connection helpers ---------------------------------------------------
+
+    @contextmanager
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _init_schema(self) -> None:
+        with self._conn() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS webhook_jobs (
+                    job_id      TEXT PRIMARY KEY,
+                    run_id      TEXT,
+                    platform    TEXT NOT NULL DEFAULT '',
+                    repo        TEXT NOT NULL DEFAULT '',
+                    pr_id       TEXT NOT NULL DEFAULT '',
+                    payload     TEXT NOT NULL,
+                    status      TEXT NOT NULL DEFAULT 'queued',
+                    attempts    INTEGER NOT NULL DEFAULT 0,
+                    error       TEXT,
+                    enqueued_at REAL NOT NULL,
+                    started_at  REAL,
+                    finished_at REAL
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_webhook_jobs_status ON webhook_jobs(status, enqueued_at);
+                """
+            )
+            # Columns added after the first release of this table.
+            existing = {r["name"] for r in conn.execute("PRAGMA table_info(webhook_jobs)").fetchall()}
+            for column, ddl in (
+                ("pr_key", "TEXT NOT NULL DEFAULT ''"),
+                ("sha", "TEXT"),
+                ("not_before", "REAL NOT NULL DEFAULT 0"),
+            ):
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE webhook_jobs ADD COLUMN {column} {ddl}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_webhook_jobs_pr_key ON webhook_jobs(pr_key, status)")
+
+    def _requeue_running(self) -> int:
+        with self._conn() as conn:
+            cur = conn.execute(
+                "UPDATE webhook_jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+            )
+        return cur.rowcount
+
+    # -- write ----------------------------------------------------------------
+
+    def enqueue(
+        self,
+        payload: dict[str, Any],
+        *,
+        run_id: Optional[str],
+        platform: str,
+        repo: str,
+        pr_id: str,
+        sha: Optional[str] = None,
+        delay_seconds: float = 0.0,
+    ) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                """
+                INSERT INTO webhook_jobs
+                    (job_id, run_id, platform, repo, pr_id, pr_key, sha, payload,
+                     status, enqueued_at, not_before)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?)
+                """,
+                (
+                    job_id,
+                    run_id,
+                    platform,
+                    repo,
+                    pr_id,
+                    pr_key(platform, repo, pr_id),
+                    sha,
+                    json.dumps(payload),
+                    now,
+                    now + max(0.0, delay_seconds),
+                ),
+            )
+        logger.info("webhook_job_enqueued", job_id=job_id, run_id=run_id, repo=repo, pr_id=pr_id, sha=sha)
+        return job_id
+
+    def supersede_queued(self, key: str, *, keep_job_id: str) -> list[dict[str, Any]]:
+        """Mark every other queued job for the same PR as superseded; returns them."""
+        with self._claim_lock, self._conn() as conn:
+            rows = conn.execute(
+                "SELECT job_id, run_id, sha FROM webhook_jobs WHERE pr_key = ? AND status = 'queued' AND job_id != ?",
+                (key, keep_job_id),
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    f"""
+                    UPDATE webhook_jobs SET status = 'superseded', finished_at = ?
+                    WHERE job_id IN ({', '.join('?' for _ in rows)}) AND status = 'queued'
+                    """,
+                    (time.time(), *[r["job_id"] for r in rows]),
+                )
+        return [dict(r) for r in rows]
+
+    def claim_next(self, *, exclude_repos: Optional[set[str]] = None) -> Optional[WebhookJob]:
+        """Atomically move the oldest due job (skipping saturated repos) to `running`."""
+        excluded = sorted(exclude_repos or ())
+        now = time.time()
+        query = "SELECT * FROM webhook_jobs WHERE status = 'queued' AND not_before <= ?"
+        if excluded:
+            query += f" AND repo NOT IN ({', '.join('?' for _ in excluded)})"
+        query += " ORDER BY enqueued_at LIMIT 1"
+
+        with self._claim_lock, self._conn() as conn:
+            row = conn.execute(query, (now, *excluded)).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                """
+                UPDATE webhook_jobs
+                SET status = 'running', started_at = ?, attempts = attempts + 1
+                WHERE job_id = ? AND status = 'queued'
+                """,
+                (now, row["job_id"]),
+            )
+        return WebhookJob(
+            job_id=row["job_id"],
+            run_id=row["run_id"],
+            platform=row["platform"],
+            repo=row["repo"],
+            pr_id=row["pr_id"],
+            payload=json.loads(row["payload"]),
+            attempts=row["attempts"] + 1,
+            enqueued_at=row["enqueued_at"],
+            started_at=now,
+            sha=row["sha"],
+        )
+
+    def mark_done(self, job_id: str) -> None:
+        self._finish(job_id, "done", None)
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        self._finish(job_id, "failed", error)
+
+    def mark_superseded(self, job_id: str) -> None:
+        self._finish(job_id, "superseded", None)
+
+    def _finish(self, job_id: str, status: str, error: Optional[str]) -> None:
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE webhook_jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (status, error, time.time(), job_id),
+            )
+
+    # -- read -----------------------------------------------------------------
+
+    def depth(self) -> int:
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) AS cnt FROM webhook_jobs WHERE status = 'queued'"
+            ).fetchone()
+        return row["cnt"] if row else 0
+
+    def status_counts(self) -> dict[str, int]:
+        with self._conn() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*) AS cnt FROM webhook_jobs GROUP BY status"
+            ).fetchall()
+        return {r["status"]: r["cnt"] for r in rows}
+
+    def oldest_queued_age(self) -> Optional[float]:
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT MIN(enqueued_at) AS ts FROM webhook_jobs WHERE status = 'queued'"
+            ).fetchone()
+        if not row or row["ts"] is None:
+            return None
+        return max(0.0, time.time() - row["ts"])
+
+    def get_job(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._conn() as conn:
+            row = conn.execute("SELECT * FROM webhook_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+
+def _latency_summary(samples: deque) -> dict[str, Any]:
+    if not samples:
+        return {"count": 0, "avg": None, "p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    n = len(ordered)
+    return {
+        "count": n,
+        "avg": round(sum(ordered) / n, 3),
+        "p50": round(ordered[n // 2], 3),
+        "p95": round(ordered[min(n - 1, int(n * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+JobHandler = Callable[[WebhookJob], Awaitable[Optional[dict[str, Any]]]]
+
+
+class WebhookWorkerPool:
+    """
+    Drains WebhookJobQueue with a fixed number of asyncio workers.
+
+    At most `per_repo_concurrency` jobs for the same repo run at once, so one
+    busy monorepo cannot starve every other repo of workers.
+    """
+
+    def __init__(
+        self,
+        queue: WebhookJobQueue,
+        handler: JobHandler,
+        *,
+        workers: int = 4,
+        per_repo_concurrency: int = 1,
+        poll_interval_seconds: float = 2.0,
+        latency_window: int = 500,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = max(1, int(workers))
+        self.per_repo_concurrency = max(1, int(per_repo_concurrency))
+        self.poll_interval_seconds = poll_interval_seconds
+
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._in_flight: dict[str, int] = {}
+        # pr_key -> {job_id: (job, task)}; a cancelled job may still be unwinding
+        # while the job that superseded it runs
+        self._running_by_pr: dict[str, dict[str, tuple[WebhookJob, asyncio.Task]]] = {}
+        self._superseded: set[str] = set()
+        # Held from claiming a job until it is registered in _running_by_pr,
+        # so supersede() never misses a job that is being claimed meanwhile
+        self._claim_guard = asyncio.Lock()
+        self._processed = 0
+        self._failed = 0
+        self._coalesced = 0
+        self._cancelled = 0
+        self._wait_latency: deque = deque(maxlen=latency_window)
+        self._run_latency: deque = deque(maxlen=latency_window)
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"webhook-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info("webhook_workers_started", workers=self.workers, per_repo=self.per_repo_concurrency)
+
+    async def stop(self) -> None:
+        # wait_for() on 3.11 can swallow a cancel that races its timeout, so
+        # workers also check this flag instead of relying on cancellation alone.
+        self._stopping = True
+        self.notify()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("webhook_workers_stopped")
+
+    def notify(self) -> None:
+        """Wake idle workers after an enqueue instead of waiting for the next poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _saturated_repos(self) -> set[str]:
+        return {repo for repo, n in self._in_flight.items() if n >= self.per_repo_concurrency}
+
+    async def _worker(self, index: int) -> None:
+        while not self._stopping:
+            async with self._claim_guard:
+                job = await asyncio.to_thread(self.queue.claim_next, exclude_repos=self._saturated_repos())
+                task = self._start_job(job) if job is not None else None
+            if job is None or task is None:
+                await self._wait_for_work()
+                continue
+            await self._run_job(job, task)
+
+    async def _wait_for_work(self) -> None:
+        assert self._wakeup is not None
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+        except asyncio.TimeoutError:
+            return
+        self._wakeup.clear()
+
+    async def supersede(self, key: str, *, sha: Optional[str], keep_job_id: str) -> dict[str, list[dict[str, Any]]]:
+        """
+        Drop older work for a PR once a newer event has been queued.
+
+        Queued jobs are superseded outright. An in-flight review is cancelled
+        only when it is for a different head SHA (or the SHA is unknown).
+        """
+        async with self._claim_guard:
+            coalesced = await asyncio.to_thread(self.queue.supersede_queued, key, keep_job_id=keep_job_id)
+            running = list(self._running_by_pr.get(key, {}).values())
+        cancelled: list[dict[str, Any]] = []
+
+        for job, task in running:
+            same_commit = sha is not None and job.sha == sha
+            if job.job_id == keep_job_id or same_commit:
+                continue
+            if not task.done() and job.job_id not in self._superseded:
+                self._superseded.add(job.job_id)
+                task.cancel()
+                cancelled.append({"job_id": job.job_id, "run_id": job.run_id, "sha": job.sha})
+
+        self._coalesced += len(coalesced)
+        self._cancelled += len(cancelled)
+        if coalesced or cancelled:
+            logger.info(
+                "webhook_jobs_superseded",
+                pr_key=key,
+                sha=sha,
+                coalesced=len(coalesced),
+                cancelled=len(cancelled),
+            )
+        return {"coalesced": coalesced, "cancelled": cancelled}
+
+    def _start_job(self, job: WebhookJob) -> asyncio.Task:
+        self._in_flight[job.repo] = self._in_flight.get(job.repo, 0) + 1
+        self._wait_latency.append(time.time() - job.enqueued_at)
+        task = asyncio.create_task(self.handler(job))
+        self._running_by_pr.setdefault(job.pr_key, {})[job.job_id] = (job, task)
+        return task
+
+    async def _run_job(self, job: WebhookJob, task: asyncio.Task) -> None:
+        started = time.time()
+        try:
+            result = await task
+            if isinstance(result, dict) and result.get("status") == "error":
+                self._failed += 1
+                await asyncio.to_thread(self.queue.mark_failed, job.job_id, str(result.get("message", "error")))
+            else:
+                self._processed += 1
+                await asyncio.to_thread(self.queue.mark_done, job.job_id)
+        except asyncio.CancelledError:
+            if job.job_id not in self._superseded:
+                # Shutdown mid-job: leave it `running` so the next start re-queues it.
+                task.cancel()
+                raise
+            await asyncio.to_thread(self.queue.mark_superseded, job.job_id)
+        except Exception as e:
+            self._failed += 1
+            logger.exception("webhook_job_failed", job_id=job.job_id, error=str(e))
+            await asyncio.to_thread(self.queue.mark_failed, job.job_id, str(e))
+        finally:
+            self._superseded.discard(job.job_id)
+            running = self._running_by_pr.get(job.pr_key)
+            if running is not None:
+                running.pop(job.job_id, None)
+                if not running:
+                    del self._running_by_pr[job.pr_key]
+            self._run_latency.append(time.time() - started)
+            remaining = self._in_flight.get(job.repo, 1) - 1
+            if remaining > 0:
+                self._in_flight[job.repo] = remaining
+            else:
+                self._in_flight.pop(job.repo, None)
+            # A repo slot was freed; let idle workers re-check the queue.
+            self.notify()
+
+    async def metrics(self) -> dict[str, Any]:
+        oldest, depth, status_counts = await asyncio.to_thread(
+            lambda: (self.queue.oldest_queued_age(), self.queue.depth(), self.queue.status_counts())
+        )
+        return {
+            "workers": self.workers,
+            "workers_running": self.running,
+            "per_repo_concurrency": self.per_repo_concurrency,
+            "depth": depth,
+            "oldest_queued_seconds": round(oldest, 3) if oldest is not None else None,
+            "in_flight": sum(self._in_flight.values()),
+            "in_flight_by_repo": dict(self._in_flight),
+            "processed": self._processed,
+            "failed": self._failed,
+            "coalesced": self._coalesced,
+            "cancelled": self._cancelled,
+            "status_counts": status_counts,
+            "wait_seconds": _latency_summary(self._wait_latency),
+            "run_seconds": _latency_summary(self._run_latency),
+        }
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+from services.ai_providers import AIProviderRouter
+from services.ai_providers.base import AIProvider, ChatRequest
+
+
+class _SlowSyncProvider(AIProvider):
+    """Provider without an async client: only implements blocking chat()."""
+
+    name = "slow"
+
+    def __init__(self, delay: float = 0.2):
+        self.delay = delay
+        self.threads: set[int] = set()
+
+    def default_model(self) -> str:
+        return "slow-1"
+
+    def chat(self, req: ChatRequest) -> str:
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return '{"summary":"ok","score":9,"issues":[]}'
+
+
+def _router_with(provider: AIProvider) -> AIProviderRouter:
+    router = AIProviderRouter({"providers": [{"name": provider.name, "model": "slow-1"}]})
+    router._providers[provider.name] = provider
+    return router
+
+
+def test_mock_provider_achat_through_router():
+    router = AIProviderRouter({"provider": "mock"})
+    provider, model, text = asyncio.run(router.achat(system="s", user="u"))
+    assert provider == "mock"
+    assert model == "mock-1"
+    assert '"score":8' in text
+
+
+def test_default_achat_offloads_blocking_chat_to_thread():
+    provider = _SlowSyncProvider(delay=0.01)
+    router = _router_with(provider)
+
+    _, _, text = asyncio.run(router.achat(system="s", user="u"))
+    assert "ok" in text
+    assert threading.get_ident() not in provider.threads
+
+
+def test_concurrent_achat_calls_overlap():
+    provider = _SlowSyncProvider(delay=0.2)
+    router = _router_with(provider)
+
+    async def run_many():
+        return await asyncio.gather(*(router.achat(system="s", user=str(i)) for i in range(5)))
+
+    started = time.perf_counter()
+    results = asyncio.run(run_many())
+    elapsed = time.perf_counter() - started
+
+    assert len(results) == 5
+    # Serialised calls would take ~1.0s.
+    assert elapsed < 0.6
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import time
+
+from services.ai_providers.base import AIProvider, ChatRequest
+from services.ai_reviewer import AIReviewer
+from services.diff_analyzer import DiffAnalyzer
+
+
+def _file_diff(path: str, lines: int, start: int = 1) -> str:
+    body = "".join(f"+line_{i} = {i}\n" for i in range(lines))
+    return (
+        f"diff --git a/{path} b/{path}\n"
+        f"--- a/{path}\n"
+        f"+++ b/{path}\n"
+        f"@@ -{start},0 +{start},{lines} @@\n"
+        f"{body}"
+    )
+
+
+class _SlowJSONProvider(AIProvider):
+    name = "slowjson"
+
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    def default_model(self) -> str:
+        return "slow-1"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        await asyncio.sleep(self.delay)
+        path = req.user.split("+++ b/", 1)[1].split("\n", 1)[0]
+        return json.dumps({
+            "summary": f"reviewed {path}",
+            "score": 8 if path.startswith("a") else 4,
+            "issues": [
+                {"severity": "high", "title": "Shared issue", "description": "d", "category": "bugs", "file_path": "x.py", "line_number": 1},
+                {"severity": "low", "title": f"Issue in {path}", "description": "d", "category": "style"},
+            ],
+        })
+
+
+def test_chunk_diff_packs_small_files_and_splits_large_ones():
+    diff = _file_diff("a.py", 5) + _file_diff("b.py", 5) + _file_diff("big.py", 400)
+    chunks = DiffAnalyzer.chunk_diff(diff, max_tokens=300)
+
+    assert chunks[0].files == ["a.py", "b.py"]
+    assert len(chunks) > 2
+    assert all(c.tokens <= 300 for c in chunks)
+
+    # Every chunk is itself a parseable diff and no added line is lost.
+    added = sum(DiffAnalyzer.parse_diff(c.diff)["total_additions"] for c in chunks)
+    assert added == 410
+
+
+def test_oversized_hunk_windows_keep_line_numbers():
+    chunks = DiffAnalyzer.chunk_diff(_file_diff("big.py", 200, start=10), max_tokens=200)
+    starts = []
+    for chunk in chunks:
+        parsed = DiffAnalyzer.parse_diff(chunk.diff)
+        starts.append(parsed["files"][0]["hunks"][0]["target_start"])
+    assert starts[0] == 10
+    assert starts == sorted(starts)
+    last = DiffAnalyzer.parse_diff(chunks[-1].diff)["files"][0]["hunks"][-1]
+    assert last["target_start"] + last["target_length"] == 210
+
+
+def test_chunked_review_runs_in_parallel_and_merges():
+    reviewer = AIReviewer(
+        ai_config={
+            "providers": [{"name": "slowjson", "model": "slow-1"}],
+            "chunking": {"enabled": True, "max_chunk_tokens": 200, "max_concurrency": 8},
+        }
+    )
+    reviewer.router._providers["slowjson"] = _SlowJSONProvider(delay=0.2)
+    diff = "".join(_file_diff(f"{name}.py", 60) for name in ("a1", "a2", "b1", "b2"))
+    chunks = reviewer._plan_chunks(diff)
+    assert len(chunks) >= 4
+
+    started = time.perf_counter()
+    result = asyncio.run(reviewer.review(diff, [], ["bugs"]))
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.2 * len(chunks) / 2
+    titles = [i.title for i in result.issues]
+    assert titles.count("Shared issue") == 1
+    assert {"Issue in a1.py", "Issue in b2.py"} <= set(titles)
+    assert 4 <= result.score <= 8
+    assert "reviewed a1.py" in result.summary
+
+
+def test_chunking_disabled_keeps_single_prompt():
+    reviewer = AIReviewer(ai_config={"provider": "mock"})
+    assert len(reviewer._plan_chunks(_file_diff("big.py", 2000))) == 1
@@ -0,0 +1,209 @@
+import asyncio
+
+import httpx
+
+from adapters.bitbucket_adapter import BitbucketAdapter
+from adapters.diff_stream import (
+    DiffFetchConfig,
+    DiffFetchStats,
+    DiffFilter,
+    FilePatch,
+    iter_unified_diff,
+    parse_diff_fetch_config,
+)
+from adapters.github_adapter import GitHubAdapter
+from adapters.http_client import HttpPoolConfig, PlatformHttpClient
+from models import Platform, UnifiedPRData
+
+
+def _client(handler) -> PlatformHttpClient:
+    cfg = HttpPoolConfig(backoff_base_seconds=0.0, backoff_max_seconds=0.0)
+    return PlatformHttpClient(cfg, transport=httpx.MockTransport(handler))
+
+
+def _pr(**metadata) -> UnifiedPRData:
+    return UnifiedPRData(
+        platform=Platform.GITHUB,
+        pr_url="https://example.test/acme/api/pull/7",
+        pr_id="7",
+        repo_full_name="acme/api",
+        title="t",
+        author="a",
+        source_branch="feature",
+        target_branch="main",
+        diff="",
+        metadata=metadata,
+    )
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+def test_parse_diff_fetch_config():
+    assert parse_diff_fetch_config({}) == DiffFetchConfig()
+    cfg = parse_diff_fetch_config({"diff_fetch": {"skip_categories": ["test"], "max_total_bytes": 5}})
+    assert cfg.skip_categories == ("test",)
+    assert cfg.max_total_bytes == 1_000
+
+
+def test_skip_reason_by_path():
+    f = DiffFilter(ignore_patterns=["docs/"])
+    assert f.skip_reason("src/app.py") is None
+    assert f.skip_reason("web/package-lock.json") == "lockfile"
+    assert f.skip_reason("img/logo.PNG") == "binary"
+    assert f.skip_reason("docs/guide.py") == "reviewignore"
+    assert f.skip_reason("web/node_modules/left-pad/index.js") == "vendored"
+    assert f.skip_reason("src/vendor.py") is None
+    # Hand-written migrations and wwwroot code are reviewed unless auto_generated is opted into
+    assert f.skip_reason("Data/Migrations/001_init.cs") is None
+    assert f.skip_reason("wwwroot/js/site.js") is None
+    opted_in = DiffFilter(DiffFetchConfig(skip_categories=("auto_generated",)))
+    assert opted_in.skip_reason("Data/Migrations/001_init.cs") == "auto_generated"
+    assert DiffFilter(DiffFetchConfig(use_reviewignore=False), ["docs/"]).skip_reason("docs/guide.py") is None
+
+
+def test_apply_stops_pulling_once_budget_is_spent():
+    pulled = []
+
+    async def source():
+        for i in range(100):
+            pulled.append(i)
+            yield FilePatch(path=f"src/f{i}.py", patch="x" * 400)
+
+    f = DiffFilter(DiffFetchConfig(max_total_bytes=1_000, max_file_bytes=1_000))
+    stats = DiffFetchStats()
+    kept = asyncio.run(_collect(f.apply(source(), stats)))
+    assert [p.path for p in kept] == ["src/f0.py", "src/f1.py"]
+    assert stats.truncated is True
+    assert len(pulled) == 3
+
+
+def test_apply_counts_skips():
+    patches = [
+        FilePatch(path="src/a.py", patch="@@ -0,0 +1 @@\n+a"),
+        FilePatch(path="yarn.lock", patch="@@ -1 +1 @@\n-x\n+y"),
+        FilePatch(path="src/big.py", patch="y" * 2_000),
+        FilePatch(path="src/blob.dat2", binary=True),
+        FilePatch(path="src/img.py", skip_reason="no_patch"),
+    ]
+    f = DiffFilter(DiffFetchConfig(max_file_bytes=1_000))
+    stats = DiffFetchStats()
+    kept = asyncio.run(_collect(f.apply(_aiter(patches), stats)))
+    assert [p.path for p in kept] == ["src/a.py"]
+    assert stats.skipped == {"lockfile": 1, "too_large": 1, "binary": 1, "no_patch": 1}
+    assert stats.files_seen == 5
+    assert stats.skipped_files == [
+        ("yarn.lock", "lockfile"), ("src/big.py", "too_large"), ("src/blob.dat2", "binary"), ("src/img.py", "no_patch"),
+    ]
+
+
+def test_summary_comment_lists_skipped_files():
+    from models import ReviewResult
+    from services.comment_service import MAX_LISTED_SKIPPED_FILES, CommentService
+
+    service = CommentService()
+    result = ReviewResult(summary="s", score=8, issues=[])
+    assert "Not Reviewed" not in service.format_summary_comment(result)
+
+    skipped = [(f"vendor/lib{i}.js", "vendored") for i in range(MAX_LISTED_SKIPPED_FILES + 3)]
+    comment = service.format_summary_comment(result, skipped_files=[("yarn.lock", "lockfile"), *skipped])
+    assert f"### ⏭️ Not Reviewed ({MAX_LISTED_SKIPPED_FILES + 4} file(s))" in comment
+    assert "- `yarn.lock` — lockfile" in comment
+    assert comment.endswith("- … and 4 more")
+
+
+def test_iter_unified_diff_splits_and_skips_without_buffering():
+    lines = [
+        "diff --git a/src/a.py b/src/a.py",
+        "index 1..2 100644",
+        "--- a/src/a.py",
+        "+++ b/src/a.py",
+        "@@ -1 +1 @@",
+        "-old",
+        "+new",
+        "diff --git a/yarn.lock b/yarn.lock",
+        "--- a/yarn.lock",
+        "+++ b/yarn.lock",
+        "@@ -1 +1 @@",
+        "-x",
+        "+y",
+        "diff --git a/old.py b/new.py",
+        "similarity index 90%",
+        "rename from old.py",
+        "rename to new.py",
+        "--- a/old.py",
+        "+++ b/new.py",
+        "@@ -3 +3 @@",
+        "+z",
+        "diff --git a/logo.bin b/logo.bin",
+        "Binary files a/logo.bin and b/logo.bin differ",
+    ]
+    f = DiffFilter()
+    patches = asyncio.run(_collect(iter_unified_diff(_aiter(lines), f.skip_reason, 10_000)))
+    assert [(p.path, p.skip_reason) for p in patches] == [
+        ("src/a.py", None),
+        ("yarn.lock", "lockfile"),
+        ("new.py", None),
+        ("logo.bin", "binary"),
+    ]
+    assert patches[0].patch == "@@ -1 +1 @@\n-old\n+new"
+    assert patches[1].patch == ""
+    assert patches[2].old_path == "old.py"
+    assert patches[2].render().splitlines()[:2] == ["--- a/old.py", "+++ b/new.py"]
+
+
+def test_iter_unified_diff_flags_oversized_file():
+    lines = ["diff --git a/src/a.py b/src/a.py", "@@ -1 +1 @@"] + ["+" + "x" * 100] * 50
+    patches = asyncio.run(_collect(iter_unified_diff(_aiter(lines), lambda _: None, 1_000)))
+    assert patches[0].too_large is True
+    assert patches[0].patch == ""
+
+
+def test_github_fetch_diff_filters_and_records_stats(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "t")
+
+    def handler(request):
+        return httpx.Response(200, json=[
+            {"filename": "src/a.py", "patch": "@@ -0,0 +1 @@\n+a"},
+            {"filename": "package-lock.json", "patch": "@@ -1 +1 @@\n-1\n+2"},
+            {"filename": "src/huge.py"},
+        ])
+
+    async def run():
+        client = _client(handler)
+        adapter = GitHubAdapter(http=client)
+        ctx = adapter.context(_pr())
+        try:
+            return await adapter.fetch_diff(ctx.pr_data, ctx=ctx), ctx
+        finally:
+            await client.aclose()
+
+    diff, ctx = asyncio.run(run())
+    assert diff == "--- a/src/a.py\n+++ b/src/a.py\n@@ -0,0 +1 @@\n+a"
+    assert ctx.diff_stats.skipped == {"lockfile": 1, "no_patch": 1}
+
+
+def test_bitbucket_streams_diff(monkeypatch):
+    monkeypatch.setenv("BITBUCKET_API_TOKEN", "t")
+    body = (
+        "diff --git a/src/a.py b/src/a.py\n--- a/src/a.py\n+++ b/src/a.py\n@@ -1 +1 @@\n-a\n+b\n"
+        "diff --git a/poetry.lock b/poetry.lock\n--- a/poetry.lock\n+++ b/poetry.lock\n@@ -1 +1 @@\n-c\n+d\n"
+    )
+
+    def handler(request):
+        return httpx.Response(200, text=body)
+
+    async def run():
+        client = _client(handler)
+        try:
+            return await BitbucketAdapter(http=client).fetch_diff(_pr(workspace="acme"))
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == "--- a/src/a.py\n+++ b/src/a.py\n@@ -1 +1 @@\n-a\n+b"
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+from services.ai_providers import AIProviderRouter
+from services.ai_providers.base import AIProvider, ChatRequest
+from services.ai_providers.hedging import HedgeBudget, is_json_answer
+
+_ANSWER = '{"summary":"ok","score":8,"issues":[]}'
+
+
+class _TimedProvider(AIProvider):
+    def __init__(self, name: str, delay: float, answer: str = _ANSWER):
+        self.name = name
+        self.delay = delay
+        self.answer = answer
+        self.calls = 0
+        self.cancelled = 0
+
+    def default_model(self) -> str:
+        return "m"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.answer
+
+
+def _router(*providers: _TimedProvider, budget: int = 10) -> AIProviderRouter:
+    router = AIProviderRouter({
+        "providers": [{"name": p.name, "model": "m"} for p in providers],
+        "hedging": {"enabled": True, "min_samples": 1, "min_delay_seconds": 0.05, "daily_budget": budget},
+    })
+    for p in providers:
+        router._providers[p.name] = p
+    return router
+
+
+def test_is_json_answer():
+    assert is_json_answer('```json\n{"a": 1}\n```')
+    assert not is_json_answer("Sorry, I can't help with that.")
+    assert not is_json_answer("{not json}")
+
+
+def test_budget_caps_hedges_per_day():
+    budget = HedgeBudget(daily_limit=2)
+    assert budget.try_consume() and budget.try_consume()
+    assert not budget.try_consume()
+    assert budget.snapshot()["denied_total"] == 1
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    slow = _TimedProvider("hg-slow", delay=2.0)
+    fast = _TimedProvider("hg-fast", delay=0.05)
+    router = _router(slow, fast)
+    router.health("hg-slow").record_success(0.1)  # observed p90 = 0.1s
+    before = router.hedge_budget.snapshot()
+
+    started = time.perf_counter()
+    provider, _, text = asyncio.run(router.achat(system="s", user="u"))
+    elapsed = time.perf_counter() - started
+
+    assert provider == "hg-fast"
+    assert text == _ANSWER
+    assert elapsed < 1.0
+    assert slow.cancelled == 1
+    after = router.hedge_budget.snapshot()
+    assert after["fired_total"] == before["fired_total"] + 1
+    assert after["won_total"] == before["won_total"] + 1
+    # The abandoned call is neither a success nor a failure.
+    assert router.health("hg-slow").snapshot()["failures"] == 0
+
+
+def test_fast_primary_is_not_hedged():
+    primary = _TimedProvider("hg-quick", delay=0.01)
+    backup = _TimedProvider("hg-unused", delay=0.01)
+    router = _router(primary, backup)
+    router.health("hg-quick").record_success(1.0)
+
+    provider, _, _ = asyncio.run(router.achat(system="s", user="u"))
+    assert provider == "hg-quick"
+    assert backup.calls == 0
+
+
+def test_invalid_json_loses_to_later_valid_answer():
+    primary = _TimedProvider("hg-chatty", delay=0.1, answer="I think the code is fine.")
+    backup = _TimedProvider("hg-json", delay=0.3)
+    router = _router(primary, backup)
+    router.health("hg-chatty").record_success(0.01)
+
+    provider, _, text = asyncio.run(router.achat(system="s", user="u"))
+    assert provider == "hg-json"
+    assert text == _ANSWER
+
+
+def test_exhausted_budget_disables_hedging():
+    slow = _TimedProvider("hg-slow2", delay=0.3)
+    other = _TimedProvider("hg-other", delay=0.01)
+    router = _router(slow, other, budget=0)
+    router.health("hg-slow2").record_success(0.01)
+
+    provider, _, _ = asyncio.run(router.achat(system="s", user="u"))
+    assert provider == "hg-slow2"
+    assert other.calls == 0
@@ -0,0 +1,168 @@
+import asyncio
+
+import httpx
+
+from adapters.bitbucket_adapter import BitbucketAdapter
+from adapters.github_adapter import GitHubAdapter
+from adapters.http_client import HttpPoolConfig, PlatformHttpClient, parse_http_pool_config
+from models import Platform, UnifiedPRData
+
+
+def _client(handler, **overrides) -> PlatformHttpClient:
+    cfg = HttpPoolConfig(backoff_base_seconds=0.0, backoff_max_seconds=0.0, **overrides)
+    return PlatformHttpClient(cfg, transport=httpx.MockTransport(handler))
+
+
+def _pr(**metadata) -> UnifiedPRData:
+    return UnifiedPRData(
+        platform=Platform.GITHUB,
+        pr_url="https://example.test/acme/api/pull/7",
+        pr_id="7",
+        repo_full_name="acme/api",
+        title="t",
+        author="a",
+        source_branch="feature",
+        target_branch="main",
+        diff="",
+        metadata=metadata,
+    )
+
+
+def test_parse_http_pool_config_defaults_and_clamps():
+    assert parse_http_pool_config({}) == HttpPoolConfig()
+    cfg = parse_http_pool_config({"http": {"retries": -2, "per_host_connections": 0, "http2": False}})
+    assert cfg.retries == 0
+    assert cfg.per_host_connections == 1
+    assert cfg.http2 is False
+
+
+def test_retries_5xx_then_succeeds():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(503 if len(calls) < 3 else 200, json={"ok": True})
+
+    async def run():
+        client = _client(handler)
+        try:
+            return await client.get("https://api.example.test/x")
+        finally:
+            await client.aclose()
+
+    response = asyncio.run(run())
+    assert response.status_code == 200
+    assert len(calls) == 3
+
+
+def test_post_not_retried_on_5xx_but_retried_on_429():
+    statuses = iter([429, 500])
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        return httpx.Response(next(statuses, 200))
+
+    async def run():
+        client = _client(handler)
+        try:
+            return await client.post("https://api.example.test/x", json={})
+        finally:
+            await client.aclose()
+
+    response = asyncio.run(run())
+    assert response.status_code == 500
+    assert calls == ["POST", "POST"]
+
+
+def test_gives_up_after_configured_retries():
+    calls = []
+
+    def handler(request):
+        calls.append(1)
+        return httpx.Response(502)
+
+    async def run():
+        client = _client(handler, retries=1)
+        try:
+            return await client.get("https://api.example.test/x")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()).status_code == 502
+    assert len(calls) == 2
+
+
+def test_per_host_limit_caps_concurrency():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200)
+
+    async def run():
+        client = _client(handler, per_host_connections=2)
+        try:
+            await asyncio.gather(*(client.get("https://api.example.test/x") for _ in range(8)))
+        finally:
+            await client.aclose()
+        return client
+
+    client = asyncio.run(run())
+    assert peak == 2
+    assert client.closed
+
+
+def test_github_adapter_paginates_files(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "t")
+    seen_auth = []
+
+    def handler(request):
+        seen_auth.append(request.headers.get("authorization"))
+        if request.url.params.get("page") == "2":
+            return httpx.Response(200, json=[{"filename": "b.py", "patch": "@@ -1 +1 @@\n-x\n+y"}])
+        return httpx.Response(
+            200,
+            json=[{"filename": "a.py", "patch": "@@ -0,0 +1 @@\n+a"}, {"filename": "bin.png"}],
+            headers={"link": '<https://api.github.com/repos/acme/api/pulls/7/files?per_page=100&page=2>; rel="next"'},
+        )
+
+    async def run():
+        client = _client(handler)
+        try:
+            return await GitHubAdapter(http=client).fetch_diff(_pr())
+        finally:
+            await client.aclose()
+
+    diff = asyncio.run(run())
+    assert diff.splitlines()[:2] == ["--- a/a.py", "+++ b/a.py"]
+    assert "+++ b/b.py" in diff
+    assert "bin.png" not in diff
+    assert seen_auth == ["Bearer t", "Bearer t"]
+
+
+def test_bitbucket_adapter_uses_basic_auth(monkeypatch):
+    monkeypatch.delenv("BITBUCKET_API_TOKEN", raising=False)
+    monkeypatch.setenv("BITBUCKET_USERNAME", "u")
+    monkeypatch.setenv("BITBUCKET_APP_PASSWORD", "p")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(201, json={})
+
+    async def run():
+        client = _client(handler)
+        try:
+            return await BitbucketAdapter(http=client).post_summary_comment(_pr(workspace="acme"), "hi")
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) is True
+    assert requests[0].url.path == "/2.0/repositories/acme/api/pullrequests/7/comments"
+    assert requests[0].headers["authorization"].startswith("Basic ")
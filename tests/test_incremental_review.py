@@ -0,0 +1,191 @@
+import asyncio
+
+import httpx
+
+from adapters.github_adapter import GitHubAdapter
+from adapters.http_client import HttpPoolConfig, PlatformHttpClient
+from models import IssueSeverity, Platform, ReviewIssue, ReviewResult, UnifiedPRData
+from services.incremental_review import build_incremental_plan, file_patch_hashes, remap_line
+from services.parsed_diff import ParsedDiff
+from services.review_store import ReviewStore
+
+
+def _file(path, hunks):
+    return f"--- a/{path}\n+++ b/{path}\n" + "".join(hunks)
+
+
+A_V1 = _file("a.py", ["@@ -1,2 +1,3 @@\n x = 1\n+y = 2\n z = 3\n"])
+B_V1 = _file("b.py", ["@@ -10,2 +10,3 @@\n p = 1\n+q = 2\n r = 3\n"])
+# Second push: b.py gains a change further down; a.py untouched
+B_V2 = _file("b.py", ["@@ -10,2 +10,3 @@\n p = 1\n+q = 2\n r = 3\n", "@@ -50,2 +51,4 @@\n s = 1\n+t = 2\n+u = 3\n v = 4\n"])
+INTERDIFF = _file("b.py", ["@@ -51,2 +51,4 @@\n s = 1\n+t = 2\n+u = 3\n v = 4\n"]) + _file("vendor/x.py", ["@@ -1 +1 @@\n-a\n+b\n"])
+
+
+def _issue(path, line, title, severity="medium"):
+    return {
+        "severity": severity, "title": title, "description": "d", "category": "bugs",
+        "file_path": path, "line_number": line, "suggestion": None,
+        "owasp_id": None, "cwe_id": None, "threat_type": None,
+    }
+
+
+def _previous():
+    v1 = ParsedDiff.parse(A_V1 + "\n" + B_V1)
+    return {
+        "head_sha": "aaaaaaa1",
+        "score": 6,
+        "file_hashes": file_patch_hashes(v1),
+        "issues": [_issue("a.py", 2, "in a"), _issue("b.py", 11, "near q"), _issue("b.py", 60, "below t")],
+    }
+
+
+def test_remap_line_shifts_past_hunks_and_drops_touched_lines():
+    diff_file = ParsedDiff.parse(_file("f.py", ["@@ -10,2 +10,4 @@\n a\n+b\n+c\n d\n", "@@ -30,0 +33,1 @@\n+e\n"])).files[0]
+    assert remap_line(diff_file, 5) == 5
+    assert remap_line(diff_file, 11) is None
+    assert remap_line(diff_file, 20) == 22
+    assert remap_line(diff_file, 30) == 32
+    assert remap_line(diff_file, 31) == 34
+
+
+def test_interdiff_plan_reviews_only_new_hunks_and_carries_issues():
+    parsed = ParsedDiff.parse(A_V1 + "\n" + B_V2)
+    plan = build_incremental_plan(_previous(), "bbbbbbb2", parsed, file_patch_hashes(parsed), INTERDIFF)
+    assert plan.mode == "interdiff"
+    assert plan.review_files == ["b.py"]  # vendor/x.py is not part of the PR
+    assert "+t = 2" in plan.review_diff and "+q = 2" not in plan.review_diff
+    carried = {(i["file_path"], i["line_number"]) for i in plan.carried_issues}
+    # a.py untouched; b.py:11 is outside the new hunk; b.py:60 moved down by 2
+    assert carried == {("a.py", 2), ("b.py", 11), ("b.py", 62)}
+
+    new = ReviewResult(summary="new", score=4, issues=[
+        ReviewIssue(severity=IssueSeverity.HIGH, title="t", description="d", file_path="b.py", line_number=52),
+    ])
+    merged = plan.merge(new)
+    assert merged.total_issues == 4 and merged.score == 5
+    assert "Incremental review since `aaaaaaa`" in merged.summary
+
+
+def test_changed_files_fallback_and_no_plan_cases():
+    parsed = ParsedDiff.parse(A_V1 + "\n" + B_V2)
+    hashes = file_patch_hashes(parsed)
+    plan = build_incremental_plan(_previous(), "bbbbbbb2", parsed, hashes, None)
+    assert plan.mode == "changed_files" and plan.review_files == ["b.py"]
+    assert "+q = 2" in plan.review_diff  # the whole file patch is re-reviewed
+    assert [i["file_path"] for i in plan.carried_issues] == ["a.py"]
+
+    assert build_incremental_plan(None, "b", parsed, hashes, None) is None
+    assert build_incremental_plan({**_previous(), "head_sha": "bbbbbbb2"}, "bbbbbbb2", parsed, hashes, None) is None
+
+    nothing_new = build_incremental_plan(_previous(), "c", ParsedDiff.parse(A_V1 + "\n" + B_V1),
+                                         _previous()["file_hashes"], None)
+    assert nothing_new.review_diff == "" and nothing_new.merge(None).score == 6
+
+
+def test_review_store_records_head_sha_and_file_hashes(tmp_path, monkeypatch):
+    monkeypatch.setattr(ReviewStore, "_instance", None)
+    store = ReviewStore(tmp_path / "reviews.db")
+    result = ReviewResult(summary="s", score=7, issues=[
+        ReviewIssue(severity=IssueSeverity.LOW, title="x", description="d", file_path="a.py", line_number=3),
+    ])
+    store.persist_review(result, repo="acme/api", pr_id="7", platform="github")
+    assert store.get_last_pr_review("acme/api", "7", platform="github") is None  # no head recorded
+
+    store.persist_review(result, repo="acme/api", pr_id="7", platform="github", head_sha="abc", file_hashes={"a.py": "h1"})
+    last = store.get_last_pr_review("acme/api", "7", platform="github")
+    assert last["head_sha"] == "abc" and last["file_hashes"] == {"a.py": "h1"}
+    assert last["issues"][0]["line_number"] == 3 and ReviewIssue(**last["issues"][0]).title == "x"
+
+
+def test_failed_review_is_not_an_incremental_base(tmp_path, monkeypatch):
+    from services.ai_reviewer import AIReviewer
+
+    reviewer = AIReviewer(ai_config={"providers": [{"name": "openai", "model": "gpt-4o"}], "rule_selection": {"enabled": False}})
+
+    async def achat(**kwargs):
+        raise RuntimeError("provider down")
+
+    reviewer.router.achat = achat
+    failed = asyncio.run(reviewer.review("--- a/a.py\n+++ b/a.py\n@@ -0,0 +1 @@\n+x = 1\n", ["a.py"], ["bugs"]))
+    assert failed.degraded and failed.summary.startswith("🚨 Review failed")
+
+    parsed = ParsedDiff.parse(A_V1 + "\n" + B_V2)
+    plan = build_incremental_plan(_previous(), "bbbbbbb2", parsed, file_patch_hashes(parsed), None)
+    assert plan.merge(failed).degraded
+
+    monkeypatch.setattr(ReviewStore, "_instance", None)
+    store = ReviewStore(tmp_path / "reviews.db")
+    ok = ReviewResult(summary="ok", score=8, issues=[])
+    store.persist_review(ok, repo="acme/api", pr_id="7", platform="github", head_sha="abc", file_hashes={"a.py": "h1"})
+    store.persist_review(failed, repo="acme/api", pr_id="7", platform="github", head_sha="def", file_hashes={"a.py": "h2"})
+    last = store.get_last_pr_review("acme/api", "7", platform="github")
+    assert last["head_sha"] == "abc" and last["file_hashes"] == {"a.py": "h1"}
+
+
+def _pr() -> UnifiedPRData:
+    return UnifiedPRData(
+        platform=Platform.GITHUB, pr_url="https://example.test/acme/api/pull/7", pr_id="7",
+        repo_full_name="acme/api", title="t", author="a", source_branch="f", target_branch="main",
+        diff="", metadata={"sha": "new"},
+    )
+
+
+def test_github_interdiff_uses_compare_and_rejects_diverged(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "t")
+    status = {"value": "ahead"}
+
+    def handler(request):
+        assert request.url.path == "/repos/acme/api/compare/old...new"
+        return httpx.Response(200, json={"status": status["value"], "files": [
+            {"filename": "b.py", "patch": "@@ -1 +1 @@\n-a\n+b"},
+        ]})
+
+    async def run():
+        client = PlatformHttpClient(HttpPoolConfig(backoff_base_seconds=0.0), transport=httpx.MockTransport(handler))
+        adapter = GitHubAdapter(http=client)
+        try:
+            first = await adapter.fetch_interdiff(_pr(), "old")
+            status["value"] = "diverged"
+            return first, await adapter.fetch_interdiff(_pr(), "old")
+        finally:
+            await client.aclose()
+
+    ahead, diverged = asyncio.run(run())
+    assert ahead == "--- a/b.py\n+++ b/b.py\n@@ -1 +1 @@\n-a\n+b"
+    assert diverged is None
+
+
+def test_gitlab_interdiff_rejects_rebased_branch(monkeypatch):
+    monkeypatch.setenv("GITLAB_TOKEN", "t")
+    from adapters.gitlab_adapter import GitLabAdapter
+
+    merge_base = {"id": "old"}
+    compares = []
+
+    def handler(request):
+        if request.url.path.endswith("/repository/merge_base"):
+            assert request.url.params.get_list("refs[]") == ["old", "new"]
+            return httpx.Response(200, json=merge_base)
+        assert request.url.path == "/api/v4/projects/42/repository/compare"
+        compares.append(dict(request.url.params))
+        # After a rebase GitLab still lists commits, diffed from the merge base
+        return httpx.Response(200, json={"commits": [{"id": "new"}], "diffs": [
+            {"old_path": "b.py", "new_path": "b.py", "diff": "@@ -1 +1 @@\n-a\n+b\n"},
+        ]})
+
+    pr = _pr().model_copy(update={"platform": Platform.GITLAB, "metadata": {"project_id": 42, "sha": "new"}})
+
+    async def run():
+        client = PlatformHttpClient(HttpPoolConfig(backoff_base_seconds=0.0), transport=httpx.MockTransport(handler))
+        adapter = GitLabAdapter(http=client)
+        try:
+            first = await adapter.fetch_interdiff(pr, "old")
+            merge_base["id"] = "somewhere-on-main"
+            return first, await adapter.fetch_interdiff(pr, "old")
+        finally:
+            await client.aclose()
+
+    ahead, rebased = asyncio.run(run())
+    assert ahead.startswith("--- a/b.py\n+++ b/b.py\n@@ -1 +1 @@\n-a\n+b")
+    assert rebased is None
+    assert compares == [{"from": "old", "to": "new"}]
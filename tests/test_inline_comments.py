@@ -0,0 +1,152 @@
+import asyncio
+import json
+
+import httpx
+
+from adapters.github_adapter import GitHubAdapter
+from adapters.gitlab_adapter import GitLabAdapter
+from adapters.http_client import HttpPoolConfig, PlatformHttpClient
+from models import Platform, UnifiedPRData
+
+COMMENTS = [{"file_path": f"src/f{i}.py", "line": i + 1, "body": f"issue {i}"} for i in range(12)]
+
+
+def _client(handler) -> PlatformHttpClient:
+    cfg = HttpPoolConfig(backoff_base_seconds=0.0, backoff_max_seconds=0.0)
+    return PlatformHttpClient(cfg, transport=httpx.MockTransport(handler))
+
+
+def _pr(platform=Platform.GITHUB, **metadata) -> UnifiedPRData:
+    return UnifiedPRData(
+        platform=platform,
+        pr_url="https://example.test/acme/api/pull/7",
+        pr_id="7",
+        repo_full_name="acme/api",
+        title="t",
+        author="a",
+        source_branch="feature",
+        target_branch="main",
+        diff="",
+        metadata=metadata,
+    )
+
+
+def _run(adapter_factory, handler, pr):
+    async def run():
+        client = _client(handler)
+        try:
+            return await adapter_factory(client).post_inline_comments(pr, COMMENTS)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_github_posts_all_comments_as_one_review(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "t")
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.method == "GET":
+            return httpx.Response(200, json={"head": {"sha": "abc"}})
+        return httpx.Response(200, json={"id": 1})
+
+    assert _run(lambda c: GitHubAdapter(http=c), handler, _pr()) is True
+    assert [(r.method, r.url.path) for r in requests] == [
+        ("GET", "/repos/acme/api/pulls/7"),
+        ("POST", "/repos/acme/api/pulls/7/reviews"),
+    ]
+    body = json.loads(requests[1].content)
+    assert body["commit_id"] == "abc"
+    assert body["event"] == "COMMENT"
+    assert len(body["comments"]) == len(COMMENTS)
+
+
+def test_github_falls_back_to_single_comments_on_422(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "t")
+    singles = []
+
+    def handler(request):
+        if request.url.path.endswith("/reviews"):
+            return httpx.Response(422, json={"message": "Line could not be resolved"})
+        body = json.loads(request.content)
+        singles.append(body["path"])
+        return httpx.Response(422 if body["path"] == "src/f3.py" else 201, json={})
+
+    assert _run(lambda c: GitHubAdapter(http=c), handler, _pr(sha="abc")) is False
+    assert sorted(singles) == sorted(c["file_path"] for c in COMMENTS)
+
+
+def test_gitlab_posts_concurrently_with_bound_and_reuses_diff_refs(monkeypatch):
+    monkeypatch.setenv("GITLAB_TOKEN", "t")
+    monkeypatch.delenv("GITLAB_URL", raising=False)
+    in_flight = 0
+    peak = 0
+    gets = []
+
+    async def handler(request):
+        nonlocal in_flight, peak
+        if request.method == "GET":
+            gets.append(request.url.path)
+            return httpx.Response(200, json={"diff_refs": {"base_sha": "b", "start_sha": "s", "head_sha": "h"}})
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(201, json={})
+
+    async def run():
+        client = _client(handler)
+        adapter = GitLabAdapter(http=client)
+        pr = _pr(Platform.GITLAB, project_id=42, sha="h")
+        ctx = adapter.context(pr)
+        try:
+            first = await adapter.post_inline_comments(pr, COMMENTS, ctx=ctx)
+            second = await adapter.post_inline_comments(pr, COMMENTS[:1], ctx=ctx)
+            return first, second
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == (True, True)
+    assert 1 < peak <= GitLabAdapter.inline_concurrency
+    assert gets == ["/api/v4/projects/42/merge_requests/7"]
+
+
+def test_pr_context_shares_head_sha_and_counts_calls_across_a_run(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "t")
+    requests = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path))
+        if request.url.path.endswith("/files"):
+            return httpx.Response(200, json=[{"filename": "a.py", "patch": "@@ -0,0 +1 @@\n+a"}])
+        if request.method == "GET":
+            return httpx.Response(200, json={"head": {"sha": "abc"}})
+        return httpx.Response(201, json={})
+
+    async def run():
+        client = _client(handler)
+        adapter = GitHubAdapter(http=client)
+        pr = _pr()
+        ctx = adapter.context(pr)
+        try:
+            await adapter.fetch_diff(pr, ctx=ctx)
+            await adapter.post_summary_comment(pr, "summary", ctx=ctx)
+            await adapter.post_inline_comments(pr, COMMENTS, ctx=ctx)
+            status_ok = await adapter.update_status(pr, "success", "ok", ctx=ctx)
+        finally:
+            await client.aclose()
+        return ctx, status_ok
+
+    ctx, status_ok = asyncio.run(run())
+    assert status_ok is True  # head sha resolved for the review is reused for the status
+    assert requests.count(("GET", "/repos/acme/api/pulls/7")) == 1
+    assert ctx.api_calls == len(requests) == 5
+    assert ctx.summary()["by_endpoint"] == {
+        "pulls.files": 1,
+        "issues.comments": 1,
+        "pulls.get": 1,
+        "pulls.reviews": 1,
+        "statuses": 1,
+    }
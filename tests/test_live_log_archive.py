@@ -0,0 +1,87 @@
+import time
+
+from services.live_log_archive import LiveLogArchive, parse_live_log_retention_config
+from services.live_log_store import LiveLogStore
+
+
+def _run(store, pr_id, events=0, finish=True):
+    run_id = store.start_run(platform="github", pr_id=pr_id, title=f"PR {pr_id}", author="u")
+    for i in range(events):
+        store.append_event(run_id, step="step_1", message=f"{pr_id}-{i}")
+    if finish:
+        store.complete_run(run_id, score=8, issues=0, critical=0)
+    return run_id
+
+
+def test_finished_runs_over_count_spill_to_archive_and_stay_queryable(tmp_path):
+    archive = LiveLogArchive(tmp_path / "live.db")
+    store = LiveLogStore(max_events_per_run=10, max_runs=2, archive=archive)
+    active = _run(store, "1", events=2, finish=False)
+    old = _run(store, "2", events=3)
+    newer = _run(store, "3", events=1)
+    newest = _run(store, "4")
+
+    # The active run is never evicted, even though it is the oldest
+    assert set(store._states) == {active, newest}
+    assert archive.count() == 2
+
+    run, events, cursor = store.get_events_since(old, cursor=1, limit=50)
+    assert run["status"] == "completed" and run["pr_id"] == "2"
+    assert [e["message"] for e in events] == ["2-1", "2-2"] and cursor == 3
+    assert store.get_run(newer)["pr_id"] == "3"
+
+    assert [r["pr_id"] for r in store.list_runs()] == ["4", "1", "3", "2"]
+    assert [r["pr_id"] for r in store.list_runs(limit=3)] == ["4", "1", "3"]
+    assert [r["run_id"] for r in store.list_active_runs()] == [active]
+
+
+def test_age_limit_evicts_idle_finished_runs(tmp_path):
+    store = LiveLogStore(max_age_seconds=60, archive=LiveLogArchive(tmp_path / "live.db"))
+    stale = _run(store, "1", events=1)
+    fresh = _run(store, "2")
+    store._recent[stale] = time.time() - 120
+
+    assert store.evict() == 1
+    assert set(store._states) == {fresh}
+    assert store.get_events_since(stale)[1][0]["message"] == "1-0"
+
+
+def test_without_archive_evicted_runs_are_gone():
+    store = LiveLogStore(max_runs=1)
+    gone = _run(store, "1")
+    _run(store, "2")
+    assert store.get_run(gone) is None
+    try:
+        store.get_events_since(gone)
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("expected KeyError")
+
+
+def test_listing_follows_last_update_not_start_order():
+    store = LiveLogStore()
+    first = _run(store, "1", finish=False)
+    second = _run(store, "2", finish=False)
+    store.append_event(first, step="step_1", message="still going")
+    assert [r["run_id"] for r in store.list_active_runs()] == [first, second]
+    store.complete_run(first, score=9, issues=0, critical=0)
+    assert [r["run_id"] for r in store.list_active_runs()] == [second]
+    assert [r["run_id"] for r in store.list_runs(limit=1)] == [first]
+
+
+def test_archive_prunes_by_count(tmp_path):
+    archive = LiveLogArchive(tmp_path / "live.db", max_runs=2)
+    for i in range(4):
+        run = {"run_id": f"r{i}", "status": "completed", "updated_at": f"2026-01-0{i + 1}T00:00:00+00:00"}
+        archive.archive_runs([(run, [{"seq": 1, "message": "m"}])])
+    assert [r["run_id"] for r in archive.list_runs(limit=10)] == ["r3", "r2"]
+    assert archive.get_events_since("r0") == []
+
+
+def test_parse_retention_config():
+    cfg = parse_live_log_retention_config({"ui": {"logs": {"retention": {
+        "max_runs": 0, "max_age_hours": 2, "archive": {"enabled": False, "max_runs": 10},
+    }}}})
+    assert cfg.max_runs == 1 and cfg.max_age_hours == 2
+    assert cfg.archive_enabled is False and cfg.archive_max_runs == 10
@@ -73,3 +73,95 @@ def test_list_runs_returns_all_statuses():
     assert statuses[active_id] == "active"
     assert statuses[completed_id] == "completed"
     assert statuses[error_id] == "error"
+
+
+def test_superseded_run_and_coalesced_counts():
+    LiveLogStore = _load_module().LiveLogStore
+
+    store = LiveLogStore(max_events_per_run=10)
+    old_id = store.start_run(platform="github", pr_id="21", title="wip", author="u")
+    new_id = store.start_run(platform="github", pr_id="21", title="wip", author="u")
+
+    store.supersede_run(old_id, superseded_by=new_id)
+    store.record_coalesced(new_id, coalesced=1, cancelled=0)
+    store.record_coalesced(new_id, cancelled=1)
+
+    old_run = store.get_run(old_id)
+    new_run = store.get_run(new_id)
+    assert old_run["status"] == "superseded"
+    assert old_run["superseded_by"] == new_id
+    assert new_run["coalesced"] == 1
+    assert new_run["cancelled"] == 1
+    assert [r["run_id"] for r in store.list_active_runs()] == [new_id]
+
+
+def test_event_ring_cursor_lookup_across_wraparound():
+    EventRing = _load_module().EventRing
+
+    ring = EventRing(5)
+    for seq in range(1, 13):  # seqs 8..12 survive; the ring has wrapped twice
+        ring.append({"seq": seq})
+    assert len(ring) == 5
+
+    def seqs(cursor, limit=50):
+        return [e["seq"] for e in ring.since(cursor, limit)]
+
+    assert seqs(0) == [8, 9, 10, 11, 12]
+    assert seqs(9) == [10, 11, 12]
+    assert seqs(10, limit=1) == [11]
+    assert seqs(7, limit=4) == [8, 9, 10, 11]
+    assert seqs(12) == []
+
+    ring.resize(3)
+    assert seqs(0) == [10, 11, 12]
+    ring.resize(6)
+    ring.append({"seq": 13})
+    assert seqs(10) == [11, 12, 13]
+
+
+def test_shrinking_max_events_keeps_latest_and_cursor_paging():
+    LiveLogStore = _load_module().LiveLogStore
+
+    store = LiveLogStore(max_events_per_run=8)
+    run_id = store.start_run(platform="github", pr_id="31", title="t", author="u")
+    for i in range(1, 11):
+        store.append_event(run_id, step="step_1", message=f"m{i}")
+    store.set_max_events_per_run(4)
+
+    _, events, next_cursor = store.get_events_since(run_id, cursor=0, limit=2)
+    assert [e["seq"] for e in events] == [7, 8] and next_cursor == 8
+    _, events, next_cursor = store.get_events_since(run_id, cursor=next_cursor, limit=2)
+    assert [e["seq"] for e in events] == [9, 10] and next_cursor == 10
+
+
+def test_concurrent_runs_keep_gapless_seqs():
+    import threading
+
+    LiveLogStore = _load_module().LiveLogStore
+
+    store = LiveLogStore(max_events_per_run=500)
+    run_ids = [store.start_run(platform="github", pr_id=str(i), title="t", author="u") for i in range(8)]
+
+    def write(run_id):
+        for i in range(200):
+            store.append_event(run_id, step="step_1", message=str(i))
+        store.complete_run(run_id, score=8, issues=0, critical=0)
+
+    def read():
+        for _ in range(200):
+            for run_id in run_ids:
+                store.get_events_since(run_id, cursor=0, limit=50)
+            store.list_runs(limit=5)
+
+    threads = [threading.Thread(target=write, args=(r,)) for r in run_ids]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for run_id in run_ids:
+        summary, events, next_cursor = store.get_events_since(run_id, cursor=0, limit=500)
+        assert summary["status"] == "completed"
+        assert [e["seq"] for e in events] == list(range(1, 201)) and next_cursor == 200
+    assert store.list_active_runs() == []
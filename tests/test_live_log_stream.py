@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from server import app, review_server
+from services.live_log_store import LiveLogStore
+from services.live_log_stream import LiveLogBroker, parse_live_stream_config
+
+
+def _parse(frames):
+    parsed = []
+    for frame in frames:
+        if frame.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def _store():
+    store = LiveLogStore(max_events_per_run=50)
+    broker = LiveLogBroker(queue_size=16)
+    broker.attach(store)
+    run_id = store.start_run(platform="github", pr_id="1", title="t", author="u")
+    return store, broker, run_id
+
+
+def test_stream_replays_from_cursor_then_pushes_live_events():
+    store, broker, run_id = _store()
+    for i in range(3):
+        store.append_event(run_id, step="step_1", message=f"old {i}")
+
+    async def run():
+        frames = broker.stream(store, run_id, cursor=1, keepalive_seconds=0.05)
+        received = [await frames.__anext__() for _ in range(3)]  # run + 2 replayed
+        assert broker.subscriber_count(run_id) == 1
+        store.append_event(run_id, step="step_2", message="live")
+        store.complete_run(run_id, score=8, issues=0, critical=0)
+        received += [frame async for frame in frames]
+        return received
+
+    events = _parse(asyncio.run(run()))
+    assert [e for e, _ in events] == ["run", "log", "log", "log", "run"]
+    assert [d["seq"] for e, d in events if e == "log"] == [2, 3, 4]
+    assert events[-1][1]["status"] == "completed"
+    assert broker.subscriber_count() == 0
+
+
+def test_slow_viewer_gets_summary_instead_of_skipped_events():
+    store, broker, run_id = _store()
+    broker.queue_size = 4
+
+    async def run():
+        frames = broker.stream(store, run_id, keepalive_seconds=0.05)
+        received = [await frames.__anext__()]
+        for i in range(10):
+            store.append_event(run_id, step="step_1", message=f"e{i}")
+        store.fail_run(run_id, error="boom")
+        received += [frame async for frame in frames]
+        return received
+
+    events = _parse(asyncio.run(run()))
+    assert [e for e, _ in events] == ["run", "log", "log", "log", "log", "summary", "run"]
+    summary = events[5][1]
+    assert summary == {"dropped": 6, "first_seq": 5, "last_seq": 10, "next_cursor": 10}
+    assert events[-1][1]["status"] == "error"
+
+
+def test_events_from_other_threads_reach_the_loop():
+    store, broker, run_id = _store()
+
+    async def run():
+        frames = broker.stream(store, run_id, keepalive_seconds=0.05)
+        await frames.__anext__()
+        await asyncio.to_thread(store.append_event, run_id, step="s", message="from thread")
+        await asyncio.to_thread(store.complete_run, run_id, score=7, issues=1, critical=0)
+        return [frame async for frame in frames]
+
+    events = _parse(asyncio.run(run()))
+    assert [d.get("message") for e, d in events if e == "log"] == ["from thread"]
+
+
+def test_stream_endpoint_resumes_after_last_event_id():
+    client = TestClient(app)
+    run_id = review_server.live_logs.start_run(platform="github", pr_id="77", title="t", author="u")
+    for i in range(4):
+        review_server.live_logs.append_event(run_id, step="step_1", message=f"m{i}")
+    review_server.live_logs.complete_run(run_id, score=9, issues=0, critical=0)
+
+    resp = client.get(f"/api/logs/runs/{run_id}/stream", headers={"Last-Event-ID": "2"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _parse(resp.text.split("\n\n")[:-1])
+    assert [d["seq"] for e, d in events if e == "log"] == [3, 4]
+    assert events[-1] == ("run", events[-1][1]) and events[-1][1]["status"] == "completed"
+
+    assert client.get("/api/logs/runs/missing/stream").status_code == 404
+
+
+def test_parse_live_stream_config_clamps_values():
+    cfg = parse_live_stream_config({"ui": {"logs": {"stream": {"queue_size": 1, "keepalive_seconds": 600}}}})
+    assert cfg.enabled is True and cfg.queue_size == 16 and cfg.keepalive_seconds == 60
@@ -0,0 +1,121 @@
+from models import IssueSeverity, ReviewIssue, ReviewResult
+from services import CommentService
+from services.diff_analyzer import DiffAnalyzer
+from services.parsed_diff import ADDED, NO_NEWLINE, ParsedDiff, TargetLineIndex
+
+
+DIFF = (
+    "diff --git a/src/app.py b/src/app.py\n"
+    "index 1..2 100644\n"
+    "--- a/src/app.py\n"
+    "+++ b/src/app.py\n"
+    "@@ -1,4 +1,5 @@\n"
+    " import os\n"
+    "--- not a header\n"
+    "+import sys\n"
+    "+\n"
+    " \n"
+    " def main():\n"
+    "@@ -20,2 +21,3 @@ def main():\n"
+    "     run()\n"
+    "+    done()\n"
+    "     return 0\n"
+    "\\ No newline at end of file\n"
+    "diff --git a/src/new.py b/src/new.py\n"
+    "new file mode 100644\n"
+    "--- /dev/null\n"
+    "+++ b/src/new.py\n"
+    "@@ -0,0 +1,2 @@\n"
+    "+a = 1\n"
+    "+b = 2\n"
+    "diff --git a/src/gone.py b/src/gone.py\n"
+    "deleted file mode 100644\n"
+    "--- a/src/gone.py\n"
+    "+++ /dev/null\n"
+    "@@ -1 +0,0 @@\n"
+    "-x = 1\n"
+)
+
+
+def test_to_dict_matches_legacy_parse_diff():
+    assert ParsedDiff.parse(DIFF).to_dict() == DiffAnalyzer.parse_diff(DIFF)
+
+
+def test_files_and_flags():
+    parsed = ParsedDiff.parse(DIFF)
+    assert parsed.paths == ["src/app.py", "src/new.py", "src/gone.py"]
+    assert parsed.file("src/new.py").is_new is True
+    assert parsed.file("src/gone.py").is_deleted is True
+    app = parsed.file("src/app.py")
+    assert (app.additions, app.deletions) == (3, 1)
+    assert parsed.line_count == 13
+    assert DiffAnalyzer.get_changed_files(DIFF) == parsed.paths
+
+
+def test_removed_line_that_looks_like_a_header_stays_in_hunk():
+    hunk = ParsedDiff.parse(DIFF).file("src/app.py").hunks[0]
+    lines = list(hunk.lines())
+    assert lines[1].type == "removed"
+    assert lines[1].content == "-- not a header\n"
+    assert lines[1].line_number == 2
+
+
+def test_added_line_numbers():
+    assert ParsedDiff.parse(DIFF).added_line_numbers() == {
+        "src/app.py": [2, 3, 22],
+        "src/new.py": [1, 2],
+        "src/gone.py": [],
+    }
+
+
+def test_hunk_containing():
+    parsed = ParsedDiff.parse(DIFF)
+    assert parsed.hunk_containing("src/app.py", 3).target_start == 1
+    assert parsed.hunk_containing("src/app.py", 23).target_start == 21
+    assert parsed.hunk_containing("src/app.py", 10) is None
+    assert parsed.hunk_containing("src/missing.py", 1) is None
+
+
+def test_no_newline_marker_is_kept_without_line_numbers():
+    hunk = ParsedDiff.parse(DIFF).file("src/app.py").hunks[1]
+    kinds = [kind for kind, _ in hunk.iter_raw()]
+    assert kinds[1] == ADDED
+    assert kinds[-1] == NO_NEWLINE
+    last = list(hunk.lines())[-1]
+    assert last.line_number is None
+    assert last.content.startswith(" No newline")
+
+
+def test_target_line_index_keeps_snaps_and_drops():
+    index = TargetLineIndex.from_diff(ParsedDiff.parse(DIFF), max_snap=3)
+    assert index.resolve("src/app.py", 4) == 4
+    assert index.resolve("./src/app.py", 22) == 22
+    assert index.resolve("src/app.py", 7) == 5  # 2 below the first hunk
+    assert index.resolve("src/app.py", 19) == 21  # 2 above the second hunk
+    assert index.resolve("src/app.py", 12) is None  # too far from both
+    assert index.resolve("src/gone.py", 1) is None  # deleted file has no new side
+    assert index.resolve("src/other.py", 1) is None
+    assert index.summary() == {"snapped": 2, "dropped": 3, "files": 2}
+
+
+def _issue(path, line):
+    return ReviewIssue(
+        severity=IssueSeverity.HIGH,
+        title="t",
+        description="d",
+        file_path=path,
+        line_number=line,
+    )
+
+
+def test_inline_comments_use_line_index():
+    result = ReviewResult(
+        score=5,
+        summary="s",
+        issues=[_issue("src/app.py", 3), _issue("src/new.py", 4), _issue("src/app.py", 90)],
+    )
+    index = TargetLineIndex.from_diff(ParsedDiff.parse(DIFF))
+    comments = CommentService().format_inline_comments(result, line_index=index)
+    assert [(c["file_path"], c["line"]) for c in comments] == [("src/app.py", 3), ("src/new.py", 2)]
+    assert (index.snapped, index.dropped) == (1, 1)
+    assert len(CommentService().format_inline_comments(result)) == 3
@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+from services.project_review_scheduler import (
+    ProjectFile,
+    ProjectReviewScheduler,
+    parse_project_review_config,
+    prioritize_files,
+)
+
+
+def test_prioritize_source_and_risky_large_files_first():
+    files = [
+        ProjectFile("appsettings.json", "config", 900),
+        ProjectFile("src/util.py", "source", 100),
+        ProjectFile("src/big.py", "source", 5000),
+        ProjectFile("src/auth/login.py", "source", 50),
+        ProjectFile("tests/test_util.py", "test", 9000),
+    ]
+    order = [f.rel for f in prioritize_files(files)]
+    assert order == ["src/auth/login.py", "src/big.py", "src/util.py", "tests/test_util.py", "appsettings.json"]
+
+
+def test_parse_config_clamps_workers():
+    assert parse_project_review_config({"project_review": {"workers": 0}}).workers == 1
+    assert parse_project_review_config({}).workers == 4
+
+
+def test_workers_bound_concurrency():
+    active = {"n": 0, "peak": 0}
+
+    async def review(item):
+        active["n"] += 1
+        active["peak"] = max(active["peak"], active["n"])
+        await asyncio.sleep(0.1)
+        active["n"] -= 1
+        return {"file": item.rel, "score": 8}
+
+    files = [ProjectFile(f"f{i}.py", size=i) for i in range(8)]
+    scheduler = ProjectReviewScheduler(review, workers=4)
+
+    started = time.perf_counter()
+    results = asyncio.run(scheduler.run(files))
+    elapsed = time.perf_counter() - started
+
+    assert [r["file"] for r in results] == [f.rel for f in files]
+    assert active["peak"] == 4
+    assert 0.2 <= elapsed < 0.4
+
+
+def test_failed_file_is_recorded_and_run_continues():
+    async def review(item):
+        if item.rel == "f1.py":
+            raise RuntimeError("429 rate_limit_exceeded")
+        return {"file": item.rel, "score": 7}
+
+    files = [ProjectFile(f"f{i}.py") for i in range(4)]
+    results = asyncio.run(ProjectReviewScheduler(review, workers=2).run(files))
+
+    assert [r["file"] for r in results] == ["f0.py", "f1.py", "f2.py", "f3.py"]
+    assert "429" in results[1]["error"]
+    assert not any(r.get("error") for i, r in enumerate(results) if i != 1)
+
+
+def test_cancellation_stops_in_flight_work():
+    state = {"cancel": False}
+
+    async def review(item):
+        state["cancel"] = True
+        await asyncio.sleep(10)
+        return {"file": item.rel}
+
+    files = [ProjectFile(f"f{i}.py") for i in range(5)]
+    scheduler = ProjectReviewScheduler(
+        review, workers=2, is_cancelled=lambda: state["cancel"], cancel_poll_seconds=0.01
+    )
+    started = time.perf_counter()
+    results = asyncio.run(scheduler.run(files))
+
+    assert time.perf_counter() - started < 1
+    assert scheduler.cancelled
+    assert results == []
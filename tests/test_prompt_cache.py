@@ -0,0 +1,90 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+from services.ai_providers.anthropic_provider import AnthropicProvider
+from services.ai_providers.base import AIProvider, ChatRequest
+from services.ai_reviewer import AIReviewer
+
+
+class _CachingProvider(AIProvider):
+    """Reports every prompt token up to the last breakpoint as a cache hit after the first call."""
+
+    name = "caching"
+
+    def __init__(self):
+        self.requests = []
+
+    def default_model(self) -> str:
+        return "cache-1"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        prefix = req.system[: req.cache_breakpoints[-1]] if req.cache_breakpoints else ""
+        seen = any(r.system.startswith(prefix) for r in self.requests) if prefix else False
+        self.requests.append(req)
+        self._report_usage(req, input_tokens=1_000, output_tokens=20, cached_tokens=800 if seen else 0)
+        return json.dumps({"summary": "ok", "score": 8, "issues": []})
+
+
+def _diff(name: str) -> str:
+    return f"diff --git a/{name} b/{name}\n--- a/{name}\n+++ b/{name}\n@@ -0,0 +1,2 @@\n+x = 1\n+y = 2\n"
+
+
+def _reviewer(**ai_config) -> tuple[AIReviewer, _CachingProvider]:
+    reviewer = AIReviewer(ai_config={
+        "providers": [{"name": "caching", "model": "cache-1"}],
+        "rule_selection": {"enabled": False},
+        **ai_config,
+    })
+    provider = _CachingProvider()
+    reviewer.router._providers["caching"] = provider
+    return reviewer, provider
+
+
+def test_static_prefix_is_shared_and_cached_tokens_recorded():
+    reviewer, provider = _reviewer()
+
+    async def run():
+        summaries = []
+        for name in ("a.py", "b.py"):
+            await reviewer.review(_diff(name), [name], ["bugs"])
+            summaries.append(reviewer.last_token_summary())
+        return summaries
+
+    first, second = asyncio.run(run())
+    a, b = provider.requests
+    assert a.system == b.system  # instructions + rules only; nothing per-diff
+    assert a.system.startswith("You are an expert code reviewer.")
+    assert "a.py" in a.user and "a.py" not in a.system
+    assert a.cache_breakpoints and a.cache_breakpoints[-1] <= len(a.system)
+    assert "{{" not in a.system and '"issues": [' in a.system
+    assert first["cached_tokens"] == 0 and second["cached_tokens"] == 800
+    assert second["completion_tokens"] == 20
+
+
+def test_prompt_cache_can_be_disabled():
+    reviewer, provider = _reviewer(prompt_cache={"enabled": False})
+    asyncio.run(reviewer.review(_diff("a.py"), ["a.py"], ["bugs"]))
+    assert provider.requests[0].cache_breakpoints == ()
+
+
+def test_anthropic_marks_prefix_blocks_cacheable():
+    system = "instructions" + "rules" + "tail"
+    req = ChatRequest(system=system, user="diff", model="m", cache_breakpoints=(12, 17))
+    blocks = AnthropicProvider._message_kwargs(req)["system"]
+    assert [b["text"] for b in blocks] == ["instructions", "rules", "tail"]
+    assert [("cache_control" in b) for b in blocks] == [True, True, False]
+    assert AnthropicProvider._message_kwargs(ChatRequest(system="s", user="u", model="m"))["system"] == "s"
+
+
+def test_anthropic_usage_counts_cache_reads_as_prompt_tokens():
+    usage: dict = {}
+    req = ChatRequest(system="s", user="u", model="m", usage=usage)
+    msg = SimpleNamespace(usage=SimpleNamespace(
+        input_tokens=50, output_tokens=10, cache_read_input_tokens=900, cache_creation_input_tokens=0,
+    ))
+    AnthropicProvider._report_message_usage(AnthropicProvider.__new__(AnthropicProvider), req, msg)
+    assert usage == {"input_tokens": 950, "output_tokens": 10, "cached_tokens": 900, "cache_write_tokens": 0}
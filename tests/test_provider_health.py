@@ -0,0 +1,133 @@
+import asyncio
+import time
+
+from services.ai_providers import AIProviderRouter
+from services.ai_providers.base import AIProvider, AIProviderError, ChatRequest
+from services.ai_providers.health import CLOSED, HALF_OPEN, OPEN, ProviderHealth
+from services.ai_providers.rate_limiter import ProviderRateLimiter
+
+
+class _ScriptedProvider(AIProvider):
+    def __init__(self, name: str, fail: bool = False, delay: float = 0.0):
+        self.name = name
+        self.fail = fail
+        self.delay = delay
+        self.calls = 0
+
+    def default_model(self) -> str:
+        return f"{self.name}-model"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise AIProviderError("503 upstream unavailable")
+        return f"answer from {self.name}"
+
+
+def _router(*providers: _ScriptedProvider, **cfg) -> AIProviderRouter:
+    router = AIProviderRouter({
+        "providers": [{"name": p.name, "model": f"{p.name}-model"} for p in providers],
+        "rate_limit_retries": 0,
+        "circuit_breaker": {"failure_threshold": 2, "reset_seconds": 0.2},
+        **cfg,
+    })
+    for p in providers:
+        router._providers[p.name] = p
+    return router
+
+
+def test_breaker_opens_then_half_open_probe_closes_it():
+    health = ProviderHealth("hb-unit", failure_threshold=2, reset_seconds=0.05)
+    health.record_failure(1.0, "boom")
+    assert health.snapshot()["state"] == CLOSED
+    health.record_failure(1.0, "boom")
+    assert health.snapshot()["state"] == OPEN
+    assert not health.try_acquire()
+
+    time.sleep(0.06)
+    assert health.snapshot()["state"] == HALF_OPEN
+    assert health.try_acquire()
+    assert not health.try_acquire()  # one probe at a time
+    health.record_success(0.2)
+    assert health.snapshot()["state"] == CLOSED
+    assert health.ewma_error_rate < 1
+
+
+def test_failed_probe_reopens_breaker():
+    health = ProviderHealth("hb-reopen", failure_threshold=1, reset_seconds=0.01)
+    health.record_failure(0.1, "x")
+    time.sleep(0.02)
+    assert health.try_acquire()
+    health.record_failure(0.1, "x")
+    assert health.snapshot()["state"] == OPEN
+
+
+def test_router_falls_back_and_skips_open_provider():
+    dead = _ScriptedProvider("hb-dead", fail=True)
+    alive = _ScriptedProvider("hb-alive")
+    router = _router(dead, alive)
+
+    async def run():
+        return [await router.achat(system="s", user="u") for _ in range(4)]
+
+    results = asyncio.run(run())
+    assert all(r == ("hb-alive", "hb-alive-model", "answer from hb-alive") for r in results)
+    # Breaker opened after 2 failures; later calls did not touch the dead provider.
+    assert dead.calls == 2
+    assert router.health("hb-dead").snapshot()["state"] == OPEN
+    assert router.available_providers() == ["hb-alive"]
+
+
+def test_fallback_order_prefers_healthier_provider():
+    primary = _ScriptedProvider("hb-primary", fail=True)
+    slow = _ScriptedProvider("hb-slow")
+    fast = _ScriptedProvider("hb-fast")
+    router = _router(primary, slow, fast)
+    router.health("hb-slow").record_success(3.0)
+    router.health("hb-fast").record_success(0.2)
+
+    assert router.candidates() == ["hb-primary", "hb-fast", "hb-slow"]
+    provider, _, _ = asyncio.run(router.achat(system="s", user="u"))
+    assert provider == "hb-fast"
+    assert slow.calls == 0
+
+
+def test_all_providers_failing_raises_with_details():
+    router = _router(_ScriptedProvider("hb-x", fail=True), _ScriptedProvider("hb-y", fail=True))
+    try:
+        asyncio.run(router.achat(system="s", user="u"))
+    except AIProviderError as e:
+        assert "hb-x" in str(e) and "hb-y" in str(e)
+    else:
+        raise AssertionError("expected AIProviderError")
+
+
+def test_unconfigured_fallback_is_skipped_without_penalty():
+    router = AIProviderRouter({"provider": "mock", "fallback": ["hb-missing-sdk"]})
+    provider, _, _ = asyncio.run(router.achat(system="s", user="u"))
+    assert provider == "mock"
+    assert router.available_providers() == ["mock"]
+
+
+def test_latency_excludes_rate_limit_wait():
+    class _SlowBudget:
+        def reserve(self, tokens):
+            return 0.2
+
+        def begin_wait(self):
+            pass
+
+        def end_wait(self):
+            pass
+
+        def slot(self):
+            return ProviderRateLimiter("hb-budget-slot").slot()
+
+    router = _router(_ScriptedProvider("hb-budget", delay=0.01))
+    router.rate_limiter = lambda name: _SlowBudget()
+    asyncio.run(router.achat(system="s", user="u"))
+    assert router.health("hb-budget").ewma_latency < 0.1
@@ -0,0 +1,189 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from services.ai_providers import AIProviderRouter
+from services.ai_providers.base import AIProvider, AIProviderError, ChatRequest
+from services.ai_providers.rate_limiter import ProviderRateLimiter, TokenBucket, parse_reset_seconds
+
+
+class _FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class _RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, retry_after: str):
+        super().__init__("Error code: 429 - rate_limit_exceeded")
+        self.response = _FakeResponse({"retry-after": retry_after})
+
+
+class _FlakyProvider(AIProvider):
+    def __init__(self, name: str, failures: int):
+        self.name = name
+        self.failures = failures
+        self.calls = 0
+
+    def default_model(self) -> str:
+        return "m"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        self.calls += 1
+        self._report_headers({"x-ratelimit-limit-tokens": "6000", "x-ratelimit-remaining-tokens": "5000"})
+        if self.calls <= self.failures:
+            try:
+                raise _RateLimited("0.05")
+            except _RateLimited as e:
+                raise AIProviderError(str(e)) from e
+        return "ok"
+
+
+def _router(provider: AIProvider, **cfg) -> AIProviderRouter:
+    router = AIProviderRouter({"providers": [{"name": provider.name, "model": "m", **cfg}]})
+    provider.headers_listener = router.rate_limiter(provider.name).observe_headers
+    router._providers[provider.name] = provider
+    return router
+
+
+def test_parse_reset_seconds_formats():
+    assert parse_reset_seconds("12") == 12
+    assert parse_reset_seconds("1m30.5s") == 90.5
+    assert parse_reset_seconds("250ms") == 0.25
+    assert parse_reset_seconds("2030-01-01T00:00:00Z", now=1893455990.0) == 10
+    assert parse_reset_seconds("soon") is None
+
+
+def test_bucket_queues_reservations_behind_each_other():
+    bucket = TokenBucket(per_minute=60, now=0.0)
+    assert bucket.reserve(60, now=0.0) == 0
+    assert bucket.reserve(1, now=0.0) == 1.0
+    assert bucket.reserve(1, now=0.0) == 2.0
+    assert bucket.reserve(1, now=10.0) == 0
+
+
+def test_headers_teach_limits_and_retry_after_blocks():
+    limiter = ProviderRateLimiter("hdr-test")
+    assert not limiter.enabled
+    limiter.observe_headers({
+        "X-RateLimit-Limit-Requests": "30",
+        "X-RateLimit-Remaining-Requests": "0",
+        "X-RateLimit-Reset-Requests": "2s",
+    })
+    snap = limiter.snapshot()
+    assert snap["source"] == "headers"
+    assert snap["requests"]["per_minute"] == 30
+    assert snap["requests"]["utilisation"] == 1.0
+    assert 1.5 < snap["blocked_for_seconds"] <= 2
+    assert limiter.reserve(10) >= 1.5
+
+
+def test_router_paces_calls_to_configured_rpm():
+    provider = _FlakyProvider("rl-pace", failures=0)
+    router = _router(provider, rpm=600)  # 10 per second, burst 600
+    limiter = router.rate_limiter("rl-pace")
+    limiter.reserve(0)
+    limiter._requests.level = 0  # exhaust the burst
+
+    async def run():
+        return await asyncio.gather(*(router.achat(system="s", user="u") for _ in range(3)))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    assert 0.25 <= elapsed < 1.0
+    assert limiter.snapshot()["throttled_total"] >= 3
+
+
+def test_router_waits_out_429_and_retries():
+    provider = _FlakyProvider("rl-retry", failures=2)
+    router = _router(provider)
+
+    _, _, text = asyncio.run(router.achat(system="s", user="u"))
+
+    assert text == "ok"
+    assert provider.calls == 3
+    snap = router.rate_limiter("rl-retry").snapshot()
+    assert snap["rate_limited_total"] == 2
+    assert snap["tokens"]["per_minute"] == 6000
+
+
+def test_router_gives_up_after_retries():
+    provider = _FlakyProvider("rl-giveup", failures=10)
+    router = AIProviderRouter({"providers": [{"name": "rl-giveup", "model": "m"}], "rate_limit_retries": 1})
+    router._providers["rl-giveup"] = provider
+
+    try:
+        asyncio.run(router.achat(system="s", user="u"))
+    except AIProviderError as e:
+        assert "429" in str(e)
+    else:
+        raise AssertionError("expected AIProviderError")
+    assert provider.calls == 2
+
+
+class _SlowProvider(AIProvider):
+    def __init__(self, name: str):
+        self.name = name
+        self.active = 0
+        self.peak = 0
+
+    def default_model(self) -> str:
+        return "m"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.05)
+        self.active -= 1
+        return "ok"
+
+
+def test_max_in_flight_caps_calls_across_routers():
+    provider = _SlowProvider("rl-inflight")
+    first = _router(provider, max_in_flight=2)
+    second = _router(provider, max_in_flight=2)  # same provider, same process-wide cap
+
+    async def run():
+        calls = [r.achat(system="s", user="u") for r in (first, second) for _ in range(3)]
+        return await asyncio.gather(*calls)
+
+    assert [text for _, _, text in asyncio.run(run())] == ["ok"] * 6
+    assert provider.peak == 2
+    assert first.rate_limiter("rl-inflight").snapshot()["in_flight"] == 0
+
+
+def test_cancelled_slot_waiter_does_not_leak_a_slot():
+    limiter = ProviderRateLimiter("rl-cancel", max_in_flight=1)
+
+    async def run():
+        await limiter.acquire_slot()
+        waiter = asyncio.create_task(limiter.acquire_slot())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        limiter.release_slot()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+        async with limiter.slot():
+            return limiter.in_flight
+
+    assert asyncio.run(run()) == 1
+    assert limiter.in_flight == 0 and not limiter._slot_waiters
+
+
+def test_rate_limits_endpoint():
+    from server import app
+
+    AIProviderRouter({"providers": [{"name": "rl-endpoint", "rpm": 30}]})
+    resp = TestClient(app).get("/api/ai/rate-limits")
+    assert resp.status_code == 200
+    names = {p["provider"]: p for p in resp.json()["providers"]}
+    assert names["rl-endpoint"]["requests"]["per_minute"] == 30
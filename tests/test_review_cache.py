@@ -0,0 +1,203 @@
+import asyncio
+import time
+
+from models import ReviewIssue, ReviewResult
+from services.ai_reviewer import AIReviewer
+from services.review_cache import ReviewCache, make_cache_key
+
+
+def _result(score: int = 6) -> ReviewResult:
+    return ReviewResult(
+        summary="cached",
+        score=score,
+        issues=[ReviewIssue(severity="high", title="t", description="d", category="security")],
+    )
+
+
+def _key(**overrides) -> str:
+    params = dict(
+        kind="diff",
+        content="+x = 1\n",
+        rules="rules",
+        focus_areas=["security"],
+        prompt="PROMPT",
+        provider="groq",
+        model="m1",
+    )
+    params.update(overrides)
+    return make_cache_key(**params)
+
+
+def test_key_ignores_whitespace_but_not_model_or_rules():
+    base = _key()
+    assert _key(content="+x = 1   \r\n\n") == base
+    assert _key(focus_areas=["SECURITY", "security"]) == base
+    assert _key(model="m2") != base
+    assert _key(rules="other rules") != base
+    assert _key(content="+x = 2\n") != base
+
+
+def test_roundtrip_restores_derived_counters(tmp_path):
+    cache = ReviewCache(tmp_path / "cache.db")
+    cache.put("k", _result())
+
+    cached = cache.get("k")
+    assert cached is not None
+    assert cached.high_count == 1
+    assert cached.security_issues_count == 1
+    assert cache.get("missing") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_ttl_and_lru_eviction(tmp_path):
+    cache = ReviewCache(tmp_path / "cache.db", ttl_seconds=0.05, max_entries=2)
+    cache.put("a", _result())
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+    cache.ttl_seconds = 3600
+    cache.put("b", _result())
+    cache.put("c", _result())
+    cache.get("b")
+    cache.put("d", _result())
+
+    assert cache.get("c") is None
+    assert cache.get("b") is not None
+    assert cache.get("d") is not None
+    assert cache.stats()["evictions"] >= 2
+
+
+def test_reviewer_serves_repeat_file_review_from_cache(tmp_path):
+    reviewer = AIReviewer(ai_config={"provider": "mock"}, cache=ReviewCache(tmp_path / "cache.db"))
+    calls = []
+    original = reviewer.router.achat
+
+    async def counting_achat(*args, **kwargs):
+        calls.append(1)
+        return await original(*args, **kwargs)
+
+    reviewer.router.achat = counting_achat
+
+    async def run():
+        kwargs = dict(code="print('hello world')\n", file_path="a.py", language="python", focus_areas=["security"])
+        first = await reviewer.review_file(**kwargs)
+        second = await reviewer.review_file(**kwargs)
+        hit = reviewer.last_cache_hit
+        third = await reviewer.review_file(**kwargs, bypass_cache=True)
+        return first, second, hit, third
+
+    first, second, hit, third = asyncio.run(run())
+    assert len(calls) == 2
+    assert hit is True
+    assert second.summary == first.summary
+    assert reviewer.last_cache_hit is False
+    assert reviewer.cache.stats()["hits"] == 1
+
+
+def test_partial_chunk_failure_is_not_cached(tmp_path):
+    import json
+
+    from services.ai_providers.base import AIProvider, ChatRequest
+
+    class _FlakyProvider(AIProvider):
+        name = "flakycache"
+
+        def __init__(self):
+            self.calls = 0
+
+        def default_model(self) -> str:
+            return "flaky-1"
+
+        def chat(self, req: ChatRequest) -> str:
+            raise NotImplementedError
+
+        async def achat(self, req: ChatRequest) -> str:
+            self.calls += 1
+            if "+++ b/broken.py" in req.user:
+                raise RuntimeError("chunk exploded")
+            if "+++ b/garbled.py" in req.user:
+                return '{"summary": "cut off", "issues": [}' 
+            return json.dumps({"summary": "ok", "score": 8, "issues": []})
+
+    def file_diff(path):
+        body = "".join(f"+v{i} = {i}\n" for i in range(60))
+        return f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n@@ -0,0 +1,60 @@\n{body}"
+
+    reviewer = AIReviewer(
+        ai_config={
+            "providers": [{"name": "flakycache", "model": "flaky-1"}],
+            "chunking": {"enabled": True, "max_chunk_tokens": 200},
+            "circuit_breaker": {"failure_threshold": 100},
+            "streaming": {"enabled": False},
+        },
+        cache=ReviewCache(tmp_path / "cache.db"),
+    )
+    provider = _FlakyProvider()
+    reviewer.router._providers["flakycache"] = provider
+    diff = file_diff("good.py") + file_diff("broken.py")
+
+    first = asyncio.run(reviewer.review(diff, ["good.py", "broken.py"], ["bugs"]))
+    calls = provider.calls
+    second = asyncio.run(reviewer.review(diff, ["good.py", "broken.py"], ["bugs"]))
+    assert first.degraded and "could not be reviewed" in first.summary
+    assert reviewer.last_cache_hit is False and provider.calls > calls
+    assert second.degraded
+
+    garbled = asyncio.run(reviewer.review(file_diff("garbled.py"), ["garbled.py"], ["bugs"]))
+    assert garbled.degraded and "Failed to parse AI response" in garbled.summary
+    assert reviewer.cache.stats()["entries"] == 0
+
+
+def test_fallback_answer_is_not_cached_under_the_primary_key(tmp_path):
+    import json
+
+    from services.ai_providers.base import AIProvider, AIProviderError, ChatRequest
+
+    class _Provider(AIProvider):
+        def __init__(self, name, down):
+            self.name = name
+            self.down = down
+            self.calls = 0
+
+        def default_model(self) -> str:
+            return f"{self.name}-1"
+
+        def chat(self, req: ChatRequest) -> str:
+            raise NotImplementedError
+
+        async def achat(self, req: ChatRequest) -> str:
+            self.calls += 1
+            if self.down:
+                raise AIProviderError("503 upstream unavailable")
+            return json.dumps({"summary": f"by {self.name}", "score": 8, "issues": []})
+
+    primary, backup = _Provider("cacheprimary", down=True), _Provider("cachebackup", down=False)
+    reviewer = AIReviewer(
+        ai_config={
+            "providers": [{"name": "cacheprimary", "model": "cacheprimary-1"}, {"name": "cachebackup", "model": "cachebackup-1"}],
+            "circuit_breaker": {"failure_threshold": 100},
+            "rate_limit_retries": 0,
+            "streaming": {"enabled": False},
+        },
+        cache=ReviewCache(tmp_path / "cache.db"),
+    )
+    reviewer.router._providers.update({"cacheprimary": primary, "cachebackup": backup})
+    kwargs = dict(code="print('hello world')\n", file_path="a.py", language="python", focus_areas=["security"])
+
+    async def run():
+        first = await reviewer.review_file(**kwargs)
+        fallback = (first.summary, reviewer.last_provider_used, reviewer.cache.stats()["entries"])
+        primary.down = False
+        await reviewer.review_file(**kwargs)
+        hit = await reviewer.review_file(**kwargs)
+        return fallback, hit, reviewer.last_cache_hit, (reviewer.last_provider_used, reviewer.last_model_used)
+
+    fallback, hit, cache_hit, reported = asyncio.run(run())
+    assert fallback == ("by cachebackup", "cachebackup", 0)
+    assert cache_hit and hit.summary == "by cacheprimary"
+    assert reported == ("cacheprimary", "cacheprimary-1")
+    assert primary.calls == 2 and reviewer.cache.stats()["entries"] == 1
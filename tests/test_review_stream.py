@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+from services.ai_providers.base import AIProvider, ChatRequest
+from services.ai_reviewer import AIReviewer
+from services.review_stream import IssueStreamParser, ReviewStream
+
+
+def _issue(title, category="bugs", severity="medium", line=1):
+    return {"severity": severity, "title": title, "description": "d", "file_path": "a.py", "line_number": line, "category": category}
+
+
+ANSWER = "Here is my review:\n```json\n" + json.dumps({
+    "summary": "Braces {in} \"strings\" [are] fine",
+    "score": 6,
+    "issues": [_issue("first }"), _issue("second", line=2)],
+    "approval_recommended": True,
+}, indent=2) + "\n```\nDone {not json}"
+
+
+def test_parser_emits_issues_as_they_close_in_any_chunking():
+    for size in (1, 3, 17, len(ANSWER)):
+        parser = IssueStreamParser()
+        emitted = []
+        for i in range(0, len(ANSWER), size):
+            emitted.extend(parser.feed(ANSWER[i : i + size]))
+        assert [x["title"] for x in emitted] == ["first }", "second"]
+        assert parser.fields == {"summary": "Braces {in} \"strings\" [are] fine", "score": 6, "approval_recommended": True}
+        assert parser.issues_closed and parser.done
+
+
+def test_issue_is_emitted_before_the_answer_ends():
+    parser = IssueStreamParser()
+    head = ANSWER[: ANSWER.index('"second"')]
+    assert [x["title"] for x in parser.feed(head)] == ["first }"]
+    assert parser.fields["score"] == 6 and not parser.issues_closed
+
+
+class _StreamingProvider(AIProvider):
+    name = "streamer"
+
+    def __init__(self, answer: str, chunk: int = 7):
+        self.answer = answer
+        self.chunk = chunk
+        self.sent = 0
+
+    def default_model(self) -> str:
+        return "stream-1"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        raise AssertionError("streaming expected")
+
+    async def astream(self, req: ChatRequest):
+        for i in range(0, len(self.answer), self.chunk):
+            self.sent = i + self.chunk
+            yield self.answer[i : i + self.chunk]
+            await asyncio.sleep(0)
+
+
+def _reviewer(answer: str, **ai_config):
+    reviewer = AIReviewer(ai_config={
+        "providers": [{"name": "streamer", "model": "stream-1"}],
+        "rule_selection": {"enabled": False},
+        **ai_config,
+    })
+    provider = _StreamingProvider(answer)
+    reviewer.router._providers["streamer"] = provider
+    return reviewer, provider
+
+
+DIFF = "diff --git a/a.py b/a.py\n--- a/a.py\n+++ b/a.py\n@@ -0,0 +1 @@\n+x = (\n"
+
+
+def test_review_streams_issues_and_stops_after_compilation_error():
+    tail = [_issue(f"style {i}", category="style", severity="low") for i in range(20)]
+    answer = json.dumps({
+        "summary": "🚨 CRITICAL ERRORS FOUND: unclosed paren",
+        "score": 2,
+        "issues": [_issue("Unclosed paren", category="compilation", severity="critical"), *tail],
+        "approval_recommended": False,
+        "block_merge": True,
+    })
+    reviewer, provider = _reviewer(answer)
+    seen = []
+    result = asyncio.run(reviewer.review(DIFF, ["a.py"], ["bugs"], on_issue=seen.append))
+
+    assert [i["title"] for i in seen] == ["Unclosed paren"]
+    assert provider.sent < len(answer) / 2  # the rest was never read
+    assert result.block_merge is True and result.score == 2
+    assert [i.title for i in result.issues] == ["CRITICAL: Unclosed paren"]
+
+
+def test_truncated_answer_keeps_streamed_issues():
+    answer = json.dumps({"summary": "s", "score": 7, "issues": [_issue("kept"), _issue("lost")]})
+    answer = answer[: answer.index('"lost"')]
+    reviewer, _ = _reviewer(answer)
+    result = asyncio.run(reviewer.review(DIFF, ["a.py"], ["bugs"]))
+    assert [i.title for i in result.issues] == ["kept"] and result.score == 7
+
+
+def test_reset_does_not_announce_issues_twice():
+    seen = []
+    stream = ReviewStream(seen.append)
+    text = json.dumps({"issues": [_issue("one")]})
+    stream.feed(text)
+    stream.reset()
+    stream.feed(text)
+    assert len(seen) == 1 and len(stream.issues) == 1
+
+
+def test_plain_call_when_nothing_consumes_the_stream():
+    reviewer, _ = _reviewer("{}")
+    assert reviewer._review_stream(None, short_circuit=False) is None
+    assert reviewer._review_stream(None, short_circuit=True) is not None
+    assert reviewer._review_stream([].append, short_circuit=False) is not None
+
+    reviewer, _ = _reviewer("{}", streaming={"abort_on_compilation_error": False})
+    assert reviewer._review_stream(None, short_circuit=True) is None
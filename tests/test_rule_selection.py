@@ -0,0 +1,86 @@
+from services.rule_selector import RuleSectionIndex, build_query, split_sections, tokenize
+from services.rules_service import RuleCache, RulesHelper
+
+
+SECURITY = """# Security Rules
+
+## Injection Attacks
+
+### SQL Injection
+CRITICAL: never build SQL queries with string formatting; use parameterized cursor execute.
+
+```python
+## not a heading
+cursor.execute(f"SELECT * FROM users WHERE name='{name}'")
+```
+
+### Command Injection
+Never pass user input to os.system or subprocess with shell=True.
+
+## Secrets
+Do not hardcode API keys or tokens in source files.
+"""
+
+PERFORMANCE = """# Performance
+
+## Caching
+Cache expensive lookups; prefer lru_cache for pure functions.
+
+## Database
+Avoid N+1 queries; batch database access and use select_related.
+"""
+
+
+def test_tokenize_splits_identifiers():
+    assert tokenize("getUserName snake_case_id HTTPServer") == [
+        "getusername", "get", "user", "name", "snake_case_id", "snake", "case", "httpserver", "http", "server",
+    ]
+
+
+def test_split_sections_tracks_parents_and_ignores_fenced_headings():
+    sections = split_sections("security.md", "Rules for: SECURITY", SECURITY)
+    assert [(s.parent, s.heading) for s in sections] == [
+        ("", ""),
+        ("## Injection Attacks", "### SQL Injection"),
+        ("## Injection Attacks", "### Command Injection"),
+        ("", "## Secrets"),
+    ]
+    assert "## not a heading" in sections[1].body
+    assert sections[1].critical is True
+
+
+def _index():
+    return RuleSectionIndex.from_documents([
+        ("security.md", "Rules for: SECURITY", SECURITY),
+        ("performance.md", "Rules for: PERFORMANCE", PERFORMANCE),
+    ])
+
+
+def test_select_ranks_by_relevance_within_budget():
+    index = _index()
+    diff = "+++ b/app/db.py\n+import sqlite3\n+cursor.execute(f\"SELECT * FROM users WHERE id={user_id}\")\n-old = 1\n"
+    query = build_query(diff, ["app/db.py"], language="python")
+    assert query["sqlite3"] >= 3  # imports are weighted
+    assert "old" not in query  # removed lines are ignored
+
+    sizes = {s.heading: s.tokens for s in index.sections}
+    budget = sizes["### SQL Injection"] + sizes["## Database"]
+    selected = index.select(query, max_tokens=budget)
+    # Every rule file keeps its best section even when another file scores higher
+    assert [s.heading for s in selected] == ["### SQL Injection", "## Database"]
+
+    text, _ = index.render(query, max_tokens=budget)
+    assert text.startswith("## Rules for: SECURITY\n\n## Injection Attacks\n\n### SQL Injection")
+
+
+def test_rule_index_is_cached_and_rebuilt_on_change(tmp_path):
+    (tmp_path / "security.md").write_text(SECURITY, encoding="utf-8")
+    helper = RulesHelper(rules_dir=tmp_path, cache=RuleCache(stat_interval=0.0))
+    index = helper.resolve_rule_index(["security"])
+    assert helper.resolve_rule_index(["security"]) is index
+    assert index.sources == ["security.md"]
+
+    (tmp_path / "security.md").write_text(SECURITY + "\n## Logging\nNever log passwords.\n", encoding="utf-8")
+    rebuilt = helper.resolve_rule_index(["security"])
+    assert rebuilt is not index
+    assert rebuilt.sections[-1].heading == "## Logging"
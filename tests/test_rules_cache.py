@@ -0,0 +1,88 @@
+import asyncio
+from pathlib import Path
+
+from services.rules_service import RuleCache, RulesHelper
+
+
+def _helper(tmp_path, stat_interval=60.0):
+    (tmp_path / "security.md").write_text("general security", encoding="utf-8")
+    (tmp_path / "performance.md").write_text("general perf", encoding="utf-8")
+    cache = RuleCache(stat_interval=stat_interval)
+    return RulesHelper(rules_dir=tmp_path, cache=cache), cache
+
+
+def _count_reads(monkeypatch):
+    reads = []
+    original = Path.read_text
+
+    def read_text(self, *args, **kwargs):
+        reads.append(self.name)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "read_text", read_text)
+    return reads
+
+
+def test_resolve_rules_is_memoised_without_file_io(tmp_path, monkeypatch):
+    helper, cache = _helper(tmp_path)
+    reads = _count_reads(monkeypatch)
+
+    first = helper.resolve_rules(["security", "performance"], language="python")
+    assert first["files"] == ["security.md", "performance.md"]
+    assert len(reads) == 2
+
+    monkeypatch.setattr(Path, "stat", lambda self: (_ for _ in ()).throw(AssertionError("stat")))
+    second = helper.resolve_rules(["security", "performance"], language="python")
+    assert second == first
+    assert len(reads) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    second["files"].append("mutated.md")
+    assert helper.resolve_rules(["security", "performance"], language="python")["files"] == first["files"]
+
+
+def test_changed_and_new_files_are_picked_up_after_stat(tmp_path):
+    helper, _ = _helper(tmp_path, stat_interval=0.0)
+    assert "general security" in helper.resolve_rules(["security"], language="python")["content"]
+
+    (tmp_path / "security.md").write_text("general security, revised", encoding="utf-8")
+    assert "revised" in helper.resolve_rules(["security"])["content"]
+
+    # A language file that did not exist before takes over on the next resolve
+    (tmp_path / "python-security.md").write_text("python security", encoding="utf-8")
+    bundle = helper.resolve_rules(["security"], language="python")
+    assert bundle["files"] == ["python-security.md"]
+
+
+def test_invalidate_applies_edits_immediately(tmp_path):
+    helper, cache = _helper(tmp_path)
+    assert helper.get_rule("security.md") == "general security"
+    helper.resolve_rules(["security"])
+
+    path = tmp_path / "security.md"
+    path.write_text("updated", encoding="utf-8")
+    assert helper.get_rule("security.md") == "general security"  # within the stat interval
+
+    cache.invalidate(path)
+    assert helper.get_rule("security.md") == "updated"
+    assert helper.resolve_rules(["security"])["content"].endswith("updated")
+    assert helper.get_rule("missing.md") is None
+
+
+def test_generated_rule_replaces_cached_copy(tmp_path, monkeypatch):
+    from services import rule_generator
+    from services.rule_generator import RuleGenerator
+
+    monkeypatch.setattr(rule_generator, "RULES_DIR", tmp_path)
+    (tmp_path / "python-security.md").write_text("old rule", encoding="utf-8")
+    helper = RulesHelper(rules_dir=tmp_path)
+    assert helper.get_rule("python-security.md") == "old rule"
+
+    generator = RuleGenerator(ai_config={"provider": "openai", "model": "gpt-4o"}, rules_helper=helper)
+
+    async def achat(**kwargs):
+        return "openai", "gpt-4o", "new rule"
+
+    generator.router.achat = achat
+    assert asyncio.run(generator.generate_rule_for_language("python", "security", force_regenerate=True))
+    assert helper.get_rule("python-security.md") == "new rule"
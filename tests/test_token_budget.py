@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+from services.ai_providers.base import AIProvider, ChatRequest
+from services.ai_reviewer import AIReviewer
+from services.token_budget import (
+    TokenBudgetConfig,
+    TokenCounter,
+    fit_prompt,
+    parse_token_budget_config,
+    plan_budget,
+)
+
+
+class _EchoProvider(AIProvider):
+    name = "echo"
+
+    def __init__(self):
+        self.prompts = []
+
+    def default_model(self) -> str:
+        return "echo-1"
+
+    def chat(self, req: ChatRequest) -> str:
+        raise NotImplementedError
+
+    async def achat(self, req: ChatRequest) -> str:
+        self.prompts.append(req.user)
+        return json.dumps({"summary": "ok", "score": 8, "issues": []})
+
+
+def test_estimator_handles_dense_and_cjk_text():
+    counter = TokenCounter()
+    prose = "The quick brown fox jumps over the lazy dog. " * 20
+    assert abs(counter.count(prose) - len(prose) / 4.5) < len(prose) / 12
+    minified = "a=[1,2];b={x:a[0]};f(a,b);" * 40
+    assert counter.count(minified) > len(minified) / 2
+    cjk = "这是一个代码审查的测试句子" * 10
+    assert counter.count(cjk) == len(cjk)
+
+
+def test_truncate_stays_within_budget_on_a_line_boundary():
+    counter = TokenCounter()
+    text = "".join(f"line_{i} = compute(value_{i})\n" for i in range(200))
+    cut = counter.truncate(text, 100)
+    assert counter.count(cut) <= 100
+    assert cut.endswith("\n") and text.startswith(cut)
+    assert counter.truncate(text, 10_000) == text
+    assert counter.truncate(text, 0) == ""
+
+
+def test_plan_budget_prefers_content_but_reserves_rules_share():
+    cfg = TokenBudgetConfig(context_window=10_000, max_input_tokens=2_000, rules_share=0.25, safety_margin=0)
+    big = plan_budget(cfg, fixed_tokens=400, content_tokens=5_000, rules_tokens=5_000, response_tokens=1_000)
+    assert (big.content, big.rules) == (1_200, 400)
+    small = plan_budget(cfg, fixed_tokens=400, content_tokens=300, rules_tokens=5_000, response_tokens=1_000)
+    assert (small.content, small.rules) == (300, 1_300)
+    # The context window (minus the response) wins over max_input_tokens
+    tight = plan_budget(cfg, fixed_tokens=400, content_tokens=9_000, rules_tokens=0, response_tokens=9_000)
+    assert tight.content == 600
+
+
+def test_fit_prompt_reports_usage_and_truncation():
+    cfg = TokenBudgetConfig(max_input_tokens=600, rules_share=0.5, safety_margin=0)
+    content = "x = 1\n" * 500
+    fitted, rules, usage = fit_prompt(
+        TokenCounter(), cfg, kind="diff", model="m", fixed_text="system", content=content,
+        rules="rule\n" * 10, response_tokens=100,
+    )
+    assert usage.content_truncated and not usage.rules_truncated
+    assert usage.prompt_tokens <= 600
+    assert content.startswith(fitted) and rules == "rule\n" * 10
+
+
+def test_parse_token_budget_config_clamps():
+    cfg = parse_token_budget_config({"token_budget": {"rules_share": 5, "max_input_tokens": 1}})
+    assert cfg.rules_share == 0.9
+    assert cfg.max_input_tokens == 512
+    assert parse_token_budget_config({}) == TokenBudgetConfig()
+
+
+def test_reviewer_budgets_diff_and_records_usage():
+    reviewer = AIReviewer(ai_config={
+        "providers": [{"name": "echo", "model": "echo-1"}],
+        "max_tokens": 1_000,
+        "rule_selection": {"enabled": False},
+        "token_budget": {"max_input_tokens": 5_000},
+    })
+    provider = _EchoProvider()
+    reviewer.router._providers["echo"] = provider
+    diff = "diff --git a/a.txt b/a.txt\n--- a/a.txt\n+++ b/a.txt\n@@ -0,0 +1,3000 @@\n" + "+some text\n" * 3000
+
+    async def run():
+        await reviewer.review(diff, ["a.txt"], ["bugs"])
+        return reviewer.last_token_usage, reviewer.last_token_summary()
+
+    [usage], summary = asyncio.run(run())
+    assert usage.kind == "diff" and usage.model == "echo-1"
+    assert usage.content_truncated is True
+    assert 0 < usage.content_tokens and usage.prompt_tokens <= 5_000
+    assert usage.completion_tokens > 0
+    assert len(provider.prompts[0]) < len(diff)
+    assert summary["requests"] == 1 and summary["truncated"] == 1
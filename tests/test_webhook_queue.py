@@ -0,0 +1,202 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from services.webhook_queue import WebhookJobQueue, WebhookWorkerPool, parse_webhook_queue_config, pr_key
+
+
+def _enqueue(queue: WebhookJobQueue, repo: str, pr_id: str) -> str:
+    return queue.enqueue({"pr_id": pr_id}, run_id=f"run-{pr_id}", platform="github", repo=repo, pr_id=pr_id)
+
+
+def test_claim_is_fifo_and_skips_saturated_repos(tmp_path):
+    queue = WebhookJobQueue(tmp_path / "jobs.db")
+    _enqueue(queue, "acme/api", "1")
+    _enqueue(queue, "acme/api", "2")
+    _enqueue(queue, "acme/web", "3")
+
+    first = queue.claim_next()
+    assert first is not None and first.pr_id == "1"
+    assert first.payload == {"pr_id": "1"}
+
+    skipped = queue.claim_next(exclude_repos={"acme/api"})
+    assert skipped is not None and skipped.pr_id == "3"
+
+    assert queue.claim_next(exclude_repos={"acme/api"}) is None
+    assert queue.depth() == 1
+
+
+def test_running_jobs_are_requeued_after_restart(tmp_path):
+    db = tmp_path / "jobs.db"
+    queue = WebhookJobQueue(db)
+    job_id = _enqueue(queue, "acme/api", "7")
+    assert queue.claim_next() is not None
+    assert queue.depth() == 0
+
+    reopened = WebhookJobQueue(db)
+    assert reopened.depth() == 1
+    job = reopened.claim_next()
+    assert job is not None
+    assert job.job_id == job_id
+    assert job.attempts == 2
+
+
+def test_worker_pool_respects_per_repo_cap(tmp_path):
+    queue = WebhookJobQueue(tmp_path / "jobs.db")
+    for i in range(4):
+        _enqueue(queue, "acme/api", str(i))
+    for i in range(4, 6):
+        _enqueue(queue, "acme/web", str(i))
+
+    active: dict[str, int] = {}
+    peak: dict[str, int] = {}
+
+    async def handler(job):
+        active[job.repo] = active.get(job.repo, 0) + 1
+        peak[job.repo] = max(peak.get(job.repo, 0), active[job.repo])
+        await asyncio.sleep(0.01)
+        active[job.repo] -= 1
+        return {"status": "error", "message": "boom"} if job.pr_id == "5" else {"status": "success"}
+
+    async def drain():
+        pool = WebhookWorkerPool(queue, handler, workers=4, per_repo_concurrency=1, poll_interval_seconds=0.01)
+        await pool.start()
+        for _ in range(200):
+            if queue.depth() == 0 and (await pool.metrics())["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        metrics = await pool.metrics()
+        await pool.stop()
+        return metrics
+
+    metrics = asyncio.run(drain())
+
+    assert peak == {"acme/api": 1, "acme/web": 1}
+    assert metrics["processed"] == 5
+    assert metrics["failed"] == 1
+    assert metrics["status_counts"] == {"done": 5, "failed": 1}
+    assert metrics["wait_seconds"]["count"] == 6
+
+
+def test_parse_webhook_queue_config_clamps_values():
+    cfg = parse_webhook_queue_config({"webhook": {"queue": {"workers": 0, "per_repo_concurrency": -2}}})
+    assert cfg.enabled is True
+    assert cfg.workers == 1
+    assert cfg.per_repo_concurrency == 1
+
+
+def test_queue_metrics_endpoint():
+    from server import app
+
+    client = TestClient(app)
+    resp = client.get("/api/queue/metrics")
+    assert resp.status_code == 200
+    data = resp.json()
+    assert "depth" in data
+    assert "wait_seconds" in data
+    assert "in_flight_by_repo" in data
+
+
+def test_debounced_job_is_not_claimed_early(tmp_path):
+    queue = WebhookJobQueue(tmp_path / "jobs.db")
+    queue.enqueue({}, run_id="r1", platform="github", repo="acme/api", pr_id="1", delay_seconds=60)
+    assert queue.depth() == 1
+    assert queue.claim_next() is None
+
+
+def test_newer_push_supersedes_queued_jobs(tmp_path):
+    queue = WebhookJobQueue(tmp_path / "jobs.db")
+    pool = WebhookWorkerPool(queue, lambda job: None)
+    first = queue.enqueue({}, run_id="r1", platform="github", repo="acme/api", pr_id="9", sha="aaa")
+    second = queue.enqueue({}, run_id="r2", platform="github", repo="acme/api", pr_id="9", sha="bbb")
+    other = queue.enqueue({}, run_id="r3", platform="github", repo="acme/api", pr_id="10", sha="ccc")
+    latest = queue.enqueue({}, run_id="r4", platform="github", repo="acme/api", pr_id="9", sha="ddd")
+
+    result = asyncio.run(pool.supersede(pr_key("github", "acme/api", "9"), sha="ddd", keep_job_id=latest))
+
+    assert {j["job_id"] for j in result["coalesced"]} == {first, second}
+    assert result["cancelled"] == []
+    assert queue.get_job(first)["status"] == "superseded"
+    assert queue.get_job(other)["status"] == "queued"
+    assert queue.get_job(latest)["status"] == "queued"
+    assert asyncio.run(pool.metrics())["coalesced"] == 2
+
+
+def test_newer_sha_cancels_in_flight_review(tmp_path):
+    queue = WebhookJobQueue(tmp_path / "jobs.db")
+    started = asyncio.Event()
+    finished: list[str] = []
+
+    async def handler(job):
+        if job.sha == "old":
+            started.set()
+            await asyncio.sleep(10)
+        finished.append(job.sha)
+        return {"status": "success"}
+
+    async def scenario():
+        pool = WebhookWorkerPool(queue, handler, workers=1, poll_interval_seconds=0.01)
+        queue.enqueue({}, run_id="r1", platform="github", repo="acme/api", pr_id="5", sha="old")
+        await pool.start()
+        await asyncio.wait_for(started.wait(), timeout=2)
+
+        same = await pool.supersede(pr_key("github", "acme/api", "5"), sha="old", keep_job_id="x")
+        assert same["cancelled"] == []
+
+        new_id = queue.enqueue({}, run_id="r2", platform="github", repo="acme/api", pr_id="5", sha="new")
+        result = await pool.supersede(pr_key("github", "acme/api", "5"), sha="new", keep_job_id=new_id)
+        assert [j["run_id"] for j in result["cancelled"]] == ["r1"]
+
+        for _ in range(200):
+            if (await pool.metrics())["processed"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        metrics = await pool.metrics()
+        await pool.stop()
+        return metrics
+
+    metrics = asyncio.run(scenario())
+    assert finished == ["new"]
+    assert metrics["cancelled"] == 1
+    assert metrics["status_counts"] == {"superseded": 1, "done": 1}
+
+
+def test_unwinding_job_does_not_hide_its_successor(tmp_path):
+    queue = WebhookJobQueue(tmp_path / "jobs.db")
+    started = {sha: asyncio.Event() for sha in ("a", "b")}
+    release_a = asyncio.Event()
+
+    async def handler(job):
+        started[job.sha].set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            if job.sha == "a":
+                await release_a.wait()  # slow cleanup after cancellation
+            raise
+        return {"status": "success"}
+
+    async def scenario():
+        pool = WebhookWorkerPool(queue, handler, workers=2, per_repo_concurrency=2, poll_interval_seconds=0.01)
+        key = pr_key("github", "acme/api", "5")
+        queue.enqueue({}, run_id="ra", platform="github", repo="acme/api", pr_id="5", sha="a")
+        await pool.start()
+        await asyncio.wait_for(started["a"].wait(), timeout=2)
+
+        b_id = queue.enqueue({}, run_id="rb", platform="github", repo="acme/api", pr_id="5", sha="b")
+        assert [j["run_id"] for j in (await pool.supersede(key, sha="b", keep_job_id=b_id))["cancelled"]] == ["ra"]
+        await asyncio.wait_for(started["b"].wait(), timeout=2)
+
+        release_a.set()  # "a" finishes unwinding while "b" is running
+        for _ in range(100):
+            if len(pool._running_by_pr.get(key, {})) == 1:
+                break
+            await asyncio.sleep(0.01)
+
+        c_id = queue.enqueue({}, run_id="rc", platform="github", repo="acme/api", pr_id="5", sha="c")
+        result = await pool.supersede(key, sha="c", keep_job_id=c_id)
+        await pool.stop()
+        return result
+
+    result = asyncio.run(scenario())
+    assert [j["run_id"] for j in result["cancelled"]] == ["rb"]
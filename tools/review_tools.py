@@ -62,6 +62,11 @@ class ReviewTools:
                             "items": {"type": "string"},
                             "description": "Focus areas: compilation, security, performance, bugs, best_practices, code_quality",
                             "default": ["compilation", "security", "bugs", "performance", "best_practices"]
+                        },
+                        "bypass_cache": {
+                            "type": "boolean",
+                            "description": "Force a fresh AI review instead of returning a cached result for identical input.",
+                            "default": False
                         }
                     },
                     "required": ["code"]
@@ -99,6 +104,11 @@ class ReviewTools:
                             "items": {"type": "string"},
                             "description": "Focus areas: compilation, security, performance, bugs, best_practices, code_quality",
                             "default": ["compilation", "security", "bugs", "performance", "best_practices"]
+                        },
+                        "bypass_cache": {
+                            "type": "boolean",
+                            "description": "Force a fresh AI review instead of returning a cached result for identical input.",
+                            "default": False
                         }
                     },
                     "required": ["code"]
@@ -143,6 +153,11 @@ class ReviewTools:
                         "language": {
                             "type": "string",
                             "description": "Programming language"
+                        },
+                        "bypass_cache": {
+                            "type": "boolean",
+                            "description": "Force a fresh AI review instead of returning a cached result for identical input.",
+                            "default": False
                         }
                     },
                     "required": ["code"]
@@ -187,6 +202,7 @@ class ReviewTools:
         focus = args.get('focus', ['compilation', 'security', 'bugs', 'performance', 'best_practices'])
         provider = args.get("provider")
         model = args.get("model")
+        bypass_cache = bool(args.get("bypass_cache", False))
 
         is_diff = code.lstrip().startswith(('diff --git', '--- a/', '+++ b/', '@@'))
 
@@ -197,6 +213,7 @@ class ReviewTools:
                 focus_areas=focus,
                 provider=provider,
                 model=model,
+                bypass_cache=bypass_cache,
             )
         else:
             review_result = await self.ai_reviewer.review_file(
@@ -206,11 +223,13 @@ class ReviewTools:
                 focus_areas=focus,
                 provider=provider,
                 model=model,
+                bypass_cache=bypass_cache,
             )
         
         result = {
             "ai_provider": getattr(self.ai_reviewer, "last_provider_used", None),
             "ai_model": getattr(self.ai_reviewer, "last_model_used", None),
+            "cache_hit": getattr(self.ai_reviewer, "last_cache_hit", False),
             "summary": review_result.summary,
             "score": review_result.score,
             "total_issues": review_result.total_issues,
@@ -244,6 +263,7 @@ class ReviewTools:
         focus = args.get('focus', ['compilation', 'security', 'bugs', 'performance', 'best_practices'])
         provider = args.get("provider")
         model = args.get("model")
+        bypass_cache = bool(args.get("bypass_cache", False))
 
         review_result = await self.ai_reviewer.review_file(
             code=code,
@@ -252,11 +272,13 @@ class ReviewTools:
             focus_areas=focus,
             provider=provider,
             model=model,
+            bypass_cache=bypass_cache,
         )
 
         result = {
             "ai_provider": getattr(self.ai_reviewer, "last_provider_used", None),
             "ai_model": getattr(self.ai_reviewer, "last_model_used", None),
+            "cache_hit": getattr(self.ai_reviewer, "last_cache_hit", False),
             "file_path": file_path,
             "language": language,
             "summary": review_result.summary,
@@ -331,6 +353,7 @@ class ReviewTools:
         language = self._detect_language(file_path, args.get('language'))
         provider = args.get("provider")
         model = args.get("model")
+        bypass_cache = bool(args.get("bypass_cache", False))
         
         review_result = await self.ai_reviewer.review_file(
             code=code,
@@ -339,6 +362,7 @@ class ReviewTools:
             focus_areas=['security'],
             provider=provider,
             model=model,
+            bypass_cache=bypass_cache,
         )
         
         security_issues = [
@@ -349,6 +373,7 @@ class ReviewTools:
         result = {
             "ai_provider": getattr(self.ai_reviewer, "last_provider_used", None),
             "ai_model": getattr(self.ai_reviewer, "last_model_used", None),
+            "cache_hit": getattr(self.ai_reviewer, "last_cache_hit", False),
             "security_score": review_result.security_score,
             "vulnerabilities_found": len(security_issues),
             "critical_count": sum(1 for i in security_issues if i.severity.value == 'critical'),
@@ -2,10 +2,11 @@ import { useCallback, useEffect, useMemo, useRef, useState } from 'react'
 import { useParams } from 'react-router-dom'
 import { getLogsConfig, getRunEvents } from '../lib/api'
 import { usePolling } from '../lib/usePolling'
-import type { LiveEvent, LiveRunSummary } from '../types/logs'
+import type { LiveEvent, LiveRunSummary, StreamSummary } from '../types/logs'
 
 const DEFAULT_POLL_MS = 3000
 const DEFAULT_LIMIT = 200
+const TERMINAL_STATUSES = new Set(['completed', 'error', 'superseded'])
 
 type GroupStatus = 'neutral' | 'running' | 'success' | 'error'
 type GroupKind = 'header' | 'step' | 'result' | 'misc'
@@ -147,6 +148,7 @@ export default function LogDetailPage() {
   const [error, setError] = useState<string | null>(null)
   const [pollMs, setPollMs] = useState(DEFAULT_POLL_MS)
   const [limit, setLimit] = useState(DEFAULT_LIMIT)
+  const [streaming, setStreaming] = useState(false)
   const cursorRef = useRef(0)
   const groupedEvents = useMemo(() => groupEvents(events), [events])
 
@@ -160,6 +162,7 @@ export default function LogDetailPage() {
         }
         setPollMs(Math.max(1000, cfg.poll_interval_seconds * 1000))
         setLimit(Math.max(20, cfg.max_events_per_poll))
+        setStreaming(Boolean(cfg.stream_enabled) && typeof EventSource !== 'undefined')
       } catch {
         if (mounted) {
           setPollMs(DEFAULT_POLL_MS)
@@ -173,6 +176,21 @@ export default function LogDetailPage() {
     }
   }, [])
 
+  const appendEvents = useCallback((incoming: LiveEvent[]) => {
+    if (incoming.length === 0) {
+      return
+    }
+    setEvents((prev) => {
+      const seen = new Set(prev.map((item) => item.seq))
+      const fresh = incoming.filter((item) => !seen.has(item.seq))
+      if (fresh.length === 0) {
+        return prev
+      }
+      // Events fetched to fill a stream gap may arrive after newer ones
+      return [...prev, ...fresh].sort((a, b) => a.seq - b.seq)
+    })
+  }, [])
+
   const loadEvents = useCallback(async () => {
     if (!runId) {
       return
@@ -181,21 +199,50 @@ export default function LogDetailPage() {
     try {
       const data = await getRunEvents(runId, cursorRef.current, limit)
       setRun(data.run)
-      if (data.events.length > 0) {
-        setEvents((prev) => {
-          const seen = new Set(prev.map((item) => item.seq))
-          const fresh = data.events.filter((item) => !seen.has(item.seq))
-          return fresh.length > 0 ? [...prev, ...fresh] : prev
-        })
-      }
-      cursorRef.current = data.next_cursor
+      appendEvents(data.events)
+      cursorRef.current = Math.max(cursorRef.current, data.next_cursor)
       setError(null)
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to load events')
     }
-  }, [limit, runId])
+  }, [appendEvents, limit, runId])
+
+  useEffect(() => {
+    if (!streaming || !runId) {
+      return
+    }
+    const source = new EventSource(
+      `/api/logs/runs/${encodeURIComponent(runId)}/stream?cursor=${cursorRef.current}`
+    )
+    source.addEventListener('run', (msg) => {
+      const data = JSON.parse((msg as MessageEvent).data) as LiveRunSummary
+      setRun(data)
+      if (TERMINAL_STATUSES.has(data.status)) {
+        source.close()
+      }
+    })
+    source.addEventListener('log', (msg) => {
+      const event = JSON.parse((msg as MessageEvent).data) as LiveEvent
+      appendEvents([event])
+      cursorRef.current = Math.max(cursorRef.current, event.seq)
+      setError(null)
+    })
+    source.addEventListener('summary', () => {
+      // The server skipped events because this tab fell behind: fetch the gap
+      void loadEvents()
+    })
+    source.onerror = () => {
+      // EventSource reconnects by itself (resuming via Last-Event-ID) unless closed
+      if (source.readyState === EventSource.CLOSED) {
+        setStreaming(false)
+      }
+    }
+    return () => {
+      source.close()
+    }
+  }, [appendEvents, loadEvents, runId, streaming])
 
-  usePolling(loadEvents, pollMs, Boolean(runId))
+  usePolling(loadEvents, pollMs, Boolean(runId) && !streaming)
 
   return (
     <>
@@ -45,6 +45,7 @@ interface ReviewData {
   reviewed_count: number
   current_file: string | null
   current_file_started_at: number | null
+  in_progress?: string[]
   started_at: number | null
   results: FileResult[]
   summary: Summary | null
@@ -1,4 +1,4 @@
-export type RunStatus = 'active' | 'completed' | 'error'
+export type RunStatus = 'active' | 'completed' | 'error' | 'superseded'
 
 export interface LiveRunSummary {
   run_id: string
@@ -16,6 +16,9 @@ export interface LiveRunSummary {
   issues?: number | null
   critical?: number | null
   error?: string | null
+  coalesced?: number
+  cancelled?: number
+  superseded_by?: string | null
 }
 
 export interface LiveEvent {
@@ -30,6 +33,14 @@ export interface LiveEvent {
 export interface LogsConfig {
   poll_interval_seconds: number
   max_events_per_poll: number
+  stream_enabled?: boolean
+}
+
+export interface StreamSummary {
+  dropped: number
+  first_seq: number
+  last_seq: number
+  next_cursor: number
 }
 
 export interface ActiveRunsResponse {
@@ -39,6 +39,7 @@ class AzureParser:
                 'repository_id': repo['id'],
                 'project_id': repo['project']['id'],
                 'event_type': body.get('eventType'),
+                'sha': (resource.get('lastMergeSourceCommit') or {}).get('commitId'),
             }
         )
 
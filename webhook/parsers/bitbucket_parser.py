@@ -52,6 +52,7 @@ class BitbucketParser:
                 'repo_uuid': repo['uuid'],
                 'workspace': repo['workspace']['slug'],
                 'event_key': headers.get('x-event-key'),
+                'sha': ((pr.get('source') or {}).get('commit') or {}).get('hash'),
             }
         )
 